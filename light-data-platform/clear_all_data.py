@@ -65,13 +65,17 @@ def clear_clickhouse_data():
         return False
 
 def clear_processing_status():
-    """清空处理状态文件"""
+    """清空处理状态文件（原JSON状态文件及SQLite状态库）"""
     try:
-        status_file = "processing-status.json"
-        if os.path.exists(status_file):
-            os.remove(status_file)
-            log_info(f"已删除状态文件: {status_file}")
-        else:
+        status_files = ["processing-status.json", "processing-status.db",
+                        "processing-status.db-wal", "processing-status.db-shm"]
+        removed = False
+        for status_file in status_files:
+            if os.path.exists(status_file):
+                os.remove(status_file)
+                log_info(f"已删除状态文件: {status_file}")
+                removed = True
+        if not removed:
             log_info("状态文件不存在，跳过")
         return True
     except Exception as e:
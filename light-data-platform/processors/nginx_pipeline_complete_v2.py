@@ -23,6 +23,8 @@ from urllib.parse import urlparse, parse_qs
 import clickhouse_connect
 from pathlib import Path
 
+from utils.uri_template import get_uri_template_engine
+
 
 class NginxLogCompleteProcessorV2:
     """完整的Nginx日志处理器V2 - 支持Self全功能"""
@@ -573,21 +575,10 @@ class NginxLogCompleteProcessorV2:
         return enriched
     
     def _normalize_uri(self, uri_path: str) -> str:
-        """URI规范化，用于聚合分析"""
+        """URI规范化，用于聚合分析：数字ID、UUID、哈希、令牌类路径片段归一为 {id}"""
         if not uri_path:
             return ''
-        
-        # 移除查询参数
-        path = uri_path.split('?')[0]
-        
-        # ID参数规范化
-        path = re.sub(r'/\d+', '/{id}', path)
-        path = re.sub(r'/[a-f0-9]{8,}', '/{uuid}', path)
-        
-        # 版本号规范化
-        path = re.sub(r'/v\d+/', '/v{n}/', path)
-        
-        return path
+        return get_uri_template_engine().normalize(uri_path)
     
     def _classify_platform(self, user_agent: str) -> str:
         """平台分类（Self核心功能）"""
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 """
 增量处理管理器 - 处理状态追踪和断点续传
+
+状态保存在 SQLite (WAL) 中：每个文件一行、按日期索引，标记处理中/完成/失败都是单行更新，
+不再每次重写整个状态文件。文件是否变化用 大小 + 首尾各64KB的MD5 判断，不再读取整个文件。
+原有的 processing-status.json 在首次打开时导入（原文件保留）。
 """
 
 import os
 import sys
 import json
+import sqlite3
 import hashlib
 from datetime import datetime, date
 from pathlib import Path
@@ -17,59 +22,123 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from self.self_00_02_utils import log_info
 
+# 文件指纹覆盖的首尾字节数
+FINGERPRINT_CHUNK_BYTES = 64 * 1024
+
+# 对外返回的文件记录字段（与原JSON状态文件一致）
+FILE_RECORD_FIELDS = ('process_id', 'file', 'full_path', 'hash', 'file_size', 'status',
+                      'start_time', 'end_time', 'records_count', 'error_message')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processing_dates (
+    log_date TEXT PRIMARY KEY,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS processing_files (
+    log_date TEXT NOT NULL,
+    file TEXT NOT NULL,
+    full_path TEXT,
+    fingerprint TEXT,
+    legacy_hash TEXT,
+    file_size INTEGER,
+    mtime REAL,
+    process_id TEXT,
+    status TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    records_count INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    PRIMARY KEY (log_date, file)
+);
+CREATE INDEX IF NOT EXISTS idx_processing_files_status ON processing_files (status);
+CREATE TABLE IF NOT EXISTS processing_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
 class IncrementalManager:
     """增量处理管理器"""
     
     def __init__(self, status_file: str = "processing-status.json"):
+        """
+        Args:
+            status_file: 原JSON状态文件路径，状态库为同名 .db 文件
+        """
         self.status_file = status_file
-        self.status_data = {}
+        self.db_file = str(Path(status_file).with_suffix('.db'))
+        self.conn = None
         self.load_status()
     
     def load_status(self):
-        """加载处理状态"""
+        """打开状态库（首次打开时导入原JSON状态文件）"""
         try:
-            if os.path.exists(self.status_file):
-                with open(self.status_file, 'r', encoding='utf-8') as f:
-                    self.status_data = json.load(f)
-                log_info(f"加载状态文件成功，包含 {len(self.status_data)} 个日期记录")
-            else:
-                log_info("状态文件不存在，创建新的状态记录")
-                self.status_data = {}
+            self.conn = sqlite3.connect(self.db_file)
+            self.conn.row_factory = sqlite3.Row
+            with self.conn:
+                self.conn.execute('PRAGMA journal_mode=WAL')
+                self.conn.execute('PRAGMA synchronous=NORMAL')
+                self.conn.executescript(_SCHEMA)
+            
+            migrated = self.conn.execute(
+                "SELECT value FROM processing_meta WHERE key = 'migrated_from'").fetchone()
+            if not migrated and os.path.exists(self.status_file):
+                self._migrate_json_status()
+            
+            date_count = self.conn.execute('SELECT COUNT(*) FROM processing_dates').fetchone()[0]
+            log_info(f"加载状态库成功，包含 {date_count} 个日期记录")
         except Exception as e:
-            log_info(f"加载状态文件失败: {e}", level="ERROR")
-            self.status_data = {}
+            log_info(f"加载状态库失败: {e}", level="ERROR")
+            raise
     
-    def save_status(self):
-        """保存处理状态"""
+    def _migrate_json_status(self):
+        """导入原JSON状态文件（原整文件MD5保存为 legacy_hash，首次检查时升级为新指纹）"""
         try:
-            # 备份原文件
-            if os.path.exists(self.status_file):
-                backup_file = f"{self.status_file}.backup"
-                os.rename(self.status_file, backup_file)
-            
-            with open(self.status_file, 'w', encoding='utf-8') as f:
-                json.dump(self.status_data, f, ensure_ascii=False, indent=2, default=str)
-            log_info("状态文件保存成功")
-            
-            # 删除备份文件
-            backup_file = f"{self.status_file}.backup"
-            if os.path.exists(backup_file):
-                os.remove(backup_file)
-                
+            with open(self.status_file, 'r', encoding='utf-8') as f:
+                status_data = json.load(f)
         except Exception as e:
-            log_info(f"保存状态文件失败: {e}", level="ERROR")
-            
-            # 恢复备份
-            backup_file = f"{self.status_file}.backup"
-            if os.path.exists(backup_file):
-                os.rename(backup_file, self.status_file)
-                log_info("已恢复状态文件备份")
+            log_info(f"读取原状态文件失败，跳过导入: {e}", level="ERROR")
+            return
+        
+        file_rows = []
+        for date_str, date_info in status_data.items():
+            for record in date_info.get('files_processed', []):
+                file_rows.append((
+                    date_str, record.get('file'), record.get('full_path'), record.get('hash'),
+                    record.get('file_size'), record.get('process_id'), record.get('status', 'pending'),
+                    record.get('start_time'), record.get('end_time'), record.get('records_count', 0),
+                    record.get('error_message')
+                ))
+        
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO processing_dates (log_date, status) VALUES (?, ?)',
+                [(date_str, info.get('status', 'processing')) for date_str, info in status_data.items()])
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO processing_files (log_date, file, full_path, legacy_hash, file_size, '
+                'process_id, status, start_time, end_time, records_count, error_message) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', file_rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO processing_meta (key, value) VALUES ('migrated_from', ?)",
+                (f"{self.status_file} @ {datetime.now().isoformat()}",))
+        log_info(f"已从 {self.status_file} 导入 {len(status_data)} 个日期、{len(file_rows)} 个文件记录")
+    
+    def save_status(self):
+        """保存处理状态 - 状态变更时已逐条提交，保留此方法兼容原调用"""
+        if self.conn is not None:
+            self.conn.commit()
+    
+    def close(self):
+        """关闭状态库"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
     
     def get_file_info(self, file_path: str) -> Dict:
-        """获取文件信息（大小、哈希等）"""
+        """获取文件信息（大小、指纹等）"""
         try:
             stat = os.stat(file_path)
-            file_hash = self._calculate_file_hash(file_path)
+            file_hash = self._calculate_file_fingerprint(file_path, stat.st_size)
             
             return {
                 'file_path': file_path,
@@ -83,8 +152,24 @@ class IncrementalManager:
             log_info(f"获取文件信息失败 {file_path}: {e}", level="ERROR")
             return None
     
+    def _calculate_file_fingerprint(self, file_path: str, file_size: int = None) -> str:
+        """计算文件指纹：大小 + 首尾各 FINGERPRINT_CHUNK_BYTES 字节的MD5（不读取整个文件）"""
+        try:
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
+            hash_md5 = hashlib.md5()
+            with open(file_path, "rb") as f:
+                hash_md5.update(f.read(FINGERPRINT_CHUNK_BYTES))
+                if file_size > FINGERPRINT_CHUNK_BYTES:
+                    f.seek(max(FINGERPRINT_CHUNK_BYTES, file_size - FINGERPRINT_CHUNK_BYTES))
+                    hash_md5.update(f.read(FINGERPRINT_CHUNK_BYTES))
+        except Exception as e:
+            log_info(f"计算文件指纹失败 {file_path}: {e}", level="ERROR")
+            return None
+        return f"{file_size}:{hash_md5.hexdigest()}"
+    
     def _calculate_file_hash(self, file_path: str, chunk_size: int = 8192) -> str:
-        """计算文件MD5哈希值"""
+        """计算整个文件的MD5哈希值（仅用于核对导入的旧记录）"""
         hash_md5 = hashlib.md5()
         try:
             with open(file_path, "rb") as f:
@@ -96,100 +181,94 @@ class IncrementalManager:
         return hash_md5.hexdigest()
     
     def is_file_processed(self, file_path: str, log_date: date) -> bool:
-        """检查文件是否已处理"""
+        """检查文件是否已处理（大小和修改时间未变时不读取文件）"""
         date_str = log_date.strftime('%Y-%m-%d')
+        file_name = os.path.basename(file_path)
         
-        if date_str not in self.status_data:
-            return False
-        
-        date_info = self.status_data[date_str]
-        if 'files_processed' not in date_info:
+        record = self.conn.execute(
+            "SELECT fingerprint, legacy_hash, file_size, mtime FROM processing_files "
+            "WHERE log_date = ? AND file = ? AND status = 'completed'", (date_str, file_name)).fetchone()
+        if record is None:
             return False
         
-        file_name = os.path.basename(file_path)
-        current_hash = self._calculate_file_hash(file_path)
-        
-        if not current_hash:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
             return False
         
-        # 检查是否存在相同文件名和哈希的已完成记录
-        for file_record in date_info['files_processed']:
-            if (file_record.get('file') == file_name and 
-                file_record.get('hash') == current_hash and
-                file_record.get('status') == 'completed'):
+        if record['fingerprint']:
+            if record['file_size'] == stat.st_size and record['mtime'] == stat.st_mtime:
                 return True
+            return self._calculate_file_fingerprint(file_path, stat.st_size) == record['fingerprint']
         
-        return False
+        # 导入的旧记录只有整文件MD5：核对一次，一致时升级为新指纹，之后不再读取整个文件
+        if not record['legacy_hash'] or self._calculate_file_hash(file_path) != record['legacy_hash']:
+            return False
+        with self.conn:
+            self.conn.execute(
+                "UPDATE processing_files SET fingerprint = ?, file_size = ?, mtime = ?, legacy_hash = NULL "
+                "WHERE log_date = ? AND file = ?",
+                (self._calculate_file_fingerprint(file_path, stat.st_size), stat.st_size, stat.st_mtime,
+                 date_str, file_name))
+        return True
     
     def mark_file_processing(self, file_path: str, log_date: date) -> str:
         """标记文件开始处理，返回进程ID"""
         date_str = log_date.strftime('%Y-%m-%d')
         
-        if date_str not in self.status_data:
-            self.status_data[date_str] = {
-                'status': 'processing',
-                'files_processed': []
-            }
-        
         file_info = self.get_file_info(file_path)
         if not file_info:
             return None
         
         process_id = f"{date_str}_{file_info['file_name']}_{datetime.now().strftime('%H%M%S')}"
         
-        file_record = {
-            'process_id': process_id,
-            'file': file_info['file_name'],
-            'full_path': file_info['file_path'],
-            'hash': file_info['file_hash'],
-            'file_size': file_info['file_size'],
-            'status': 'processing',
-            'start_time': datetime.now().isoformat(),
-            'end_time': None,
-            'records_count': 0,
-            'error_message': None
-        }
-        
-        # 查找现有记录或添加新记录
-        existing_found = False
-        for i, record in enumerate(self.status_data[date_str]['files_processed']):
-            if record['file'] == file_info['file_name']:
-                self.status_data[date_str]['files_processed'][i] = file_record
-                existing_found = True
-                break
+        # 同一日期下的同名文件覆盖原记录
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO processing_dates (log_date, status) VALUES (?, 'processing')",
+                (date_str,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO processing_files (log_date, file, full_path, fingerprint, file_size, "
+                "mtime, process_id, status, start_time, records_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 'processing', ?, 0)",
+                (date_str, file_info['file_name'], file_info['file_path'], file_info['file_hash'],
+                 file_info['file_size'], file_info['modified_time'].timestamp(), process_id,
+                 datetime.now().isoformat()))
         
-        if not existing_found:
-            self.status_data[date_str]['files_processed'].append(file_record)
-        
-        self.save_status()
         log_info(f"标记文件开始处理: {file_path}, 进程ID: {process_id}")
         return process_id
     
+    def _update_file_record(self, date_str: str, file_name: str, process_id: Optional[str],
+                            assignments: str, params: Tuple) -> bool:
+        """更新文件记录（指定 process_id 时只更新该次处理的记录），返回日期是否存在"""
+        if self.conn.execute('SELECT 1 FROM processing_dates WHERE log_date = ?', (date_str,)).fetchone() is None:
+            return False
+        
+        sql = f"UPDATE processing_files SET {assignments} WHERE log_date = ? AND file = ?"
+        where_params = (date_str, file_name)
+        if process_id is not None:
+            sql += " AND process_id = ?"
+            where_params += (process_id,)
+        self.conn.execute(sql, params + where_params)
+        return True
+    
     def mark_file_completed(self, file_path: str, log_date: date, records_count: int, process_id: str = None):
         """标记文件处理完成"""
         date_str = log_date.strftime('%Y-%m-%d')
         file_name = os.path.basename(file_path)
         
-        if date_str not in self.status_data:
-            return
-        
-        # 找到对应的文件记录
-        for record in self.status_data[date_str]['files_processed']:
-            if (record['file'] == file_name and 
-                (process_id is None or record.get('process_id') == process_id)):
-                record['status'] = 'completed'
-                record['end_time'] = datetime.now().isoformat()
-                record['records_count'] = records_count
-                break
-        
-        # 检查该日期下所有文件是否都已完成
-        all_completed = all(f.get('status') == 'completed' 
-                           for f in self.status_data[date_str]['files_processed'])
-        
-        if all_completed:
-            self.status_data[date_str]['status'] = 'completed'
+        with self.conn:
+            if not self._update_file_record(date_str, file_name, process_id,
+                                            "status = 'completed', end_time = ?, records_count = ?",
+                                            (datetime.now().isoformat(), records_count)):
+                return
+            
+            # 检查该日期下所有文件是否都已完成
+            self.conn.execute(
+                "UPDATE processing_dates SET status = 'completed' WHERE log_date = ? AND NOT EXISTS "
+                "(SELECT 1 FROM processing_files WHERE log_date = ? AND status != 'completed')",
+                (date_str, date_str))
         
-        self.save_status()
         log_info(f"标记文件处理完成: {file_path}, 记录数: {records_count}")
     
     def mark_file_failed(self, file_path: str, log_date: date, error_message: str, process_id: str = None):
@@ -197,19 +276,12 @@ class IncrementalManager:
         date_str = log_date.strftime('%Y-%m-%d')
         file_name = os.path.basename(file_path)
         
-        if date_str not in self.status_data:
-            return
-        
-        # 找到对应的文件记录
-        for record in self.status_data[date_str]['files_processed']:
-            if (record['file'] == file_name and 
-                (process_id is None or record.get('process_id') == process_id)):
-                record['status'] = 'failed'
-                record['end_time'] = datetime.now().isoformat()
-                record['error_message'] = error_message
-                break
+        with self.conn:
+            if not self._update_file_record(date_str, file_name, process_id,
+                                            "status = 'failed', end_time = ?, error_message = ?",
+                                            (datetime.now().isoformat(), error_message)):
+                return
         
-        self.save_status()
         log_info(f"标记文件处理失败: {file_path}, 错误: {error_message}", level="ERROR")
     
     def get_unprocessed_files(self, log_files: List[Tuple[str, date]]) -> List[Tuple[str, date]]:
@@ -223,11 +295,19 @@ class IncrementalManager:
         log_info(f"发现 {len(unprocessed)} 个未处理文件，总文件数: {len(log_files)}")
         return unprocessed
     
+    def _file_record(self, row: sqlite3.Row) -> Dict:
+        """数据库行 -> 原JSON格式的文件记录"""
+        record = {field: row[field] for field in FILE_RECORD_FIELDS if field != 'hash'}
+        record['hash'] = row['fingerprint'] or row['legacy_hash']
+        return record
+    
     def get_date_status(self, log_date: date) -> Dict:
         """获取指定日期的处理状态"""
         date_str = log_date.strftime('%Y-%m-%d')
         
-        if date_str not in self.status_data:
+        date_row = self.conn.execute('SELECT status FROM processing_dates WHERE log_date = ?',
+                                     (date_str,)).fetchone()
+        if date_row is None:
             return {
                 'date': date_str,
                 'status': 'not_started',
@@ -238,8 +318,8 @@ class IncrementalManager:
                 'total_records': 0
             }
         
-        date_info = self.status_data[date_str]
-        files = date_info.get('files_processed', [])
+        files = [self._file_record(row) for row in self.conn.execute(
+            'SELECT * FROM processing_files WHERE log_date = ? ORDER BY rowid', (date_str,))]
         
         completed_count = len([f for f in files if f.get('status') == 'completed'])
         failed_count = len([f for f in files if f.get('status') == 'failed'])
@@ -248,7 +328,7 @@ class IncrementalManager:
         
         return {
             'date': date_str,
-            'status': date_info.get('status', 'unknown'),
+            'status': date_row['status'] or 'unknown',
             'files_count': len(files),
             'completed_count': completed_count,
             'failed_count': failed_count,
@@ -259,17 +339,13 @@ class IncrementalManager:
     
     def get_processing_summary(self) -> Dict:
         """获取处理汇总信息"""
-        total_dates = len(self.status_data)
-        completed_dates = len([d for d in self.status_data.values() if d.get('status') == 'completed'])
+        total_dates, completed_dates = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(status = 'completed'), 0) FROM processing_dates").fetchone()
         
-        all_files = []
-        for date_info in self.status_data.values():
-            all_files.extend(date_info.get('files_processed', []))
-        
-        total_files = len(all_files)
-        completed_files = len([f for f in all_files if f.get('status') == 'completed'])
-        failed_files = len([f for f in all_files if f.get('status') == 'failed'])
-        total_records = sum(f.get('records_count', 0) for f in all_files if f.get('status') == 'completed')
+        total_files, completed_files, failed_files, total_records, last_end_time = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(status = 'completed'), 0), COALESCE(SUM(status = 'failed'), 0), "
+            "COALESCE(SUM(CASE WHEN status = 'completed' THEN records_count ELSE 0 END), 0), MAX(end_time) "
+            "FROM processing_files").fetchone()
         
         return {
             'total_dates': total_dates,
@@ -280,50 +356,31 @@ class IncrementalManager:
             'failed_files': failed_files,
             'file_success_rate': (completed_files / total_files * 100) if total_files > 0 else 0,
             'total_records': total_records,
-            'last_updated': max([
-                datetime.fromisoformat(f.get('end_time', '1900-01-01T00:00:00'))
-                for date_info in self.status_data.values()
-                for f in date_info.get('files_processed', [])
-                if f.get('end_time')
-            ] + [datetime(1900, 1, 1)]).isoformat()
+            'last_updated': datetime.fromisoformat(last_end_time or '1900-01-01T00:00:00').isoformat()
         }
     
     def reset_failed_files(self, log_date: date = None):
         """重置失败文件状态，允许重新处理"""
+        date_filter = ""
+        params = ()
         if log_date:
-            date_str = log_date.strftime('%Y-%m-%d')
-            if date_str in self.status_data:
-                files = self.status_data[date_str].get('files_processed', [])
-                reset_count = 0
-                for file_record in files:
-                    if file_record.get('status') == 'failed':
-                        file_record['status'] = 'pending'
-                        file_record['error_message'] = None
-                        reset_count += 1
-                
-                if reset_count > 0:
-                    self.status_data[date_str]['status'] = 'processing'
-                    self.save_status()
-                    log_info(f"重置 {date_str} 日期下 {reset_count} 个失败文件")
-        else:
-            # 重置所有失败文件
-            total_reset = 0
-            for date_str, date_info in self.status_data.items():
-                files = date_info.get('files_processed', [])
-                date_reset = 0
-                for file_record in files:
-                    if file_record.get('status') == 'failed':
-                        file_record['status'] = 'pending'
-                        file_record['error_message'] = None
-                        date_reset += 1
-                
-                if date_reset > 0:
-                    date_info['status'] = 'processing'
-                    total_reset += date_reset
-            
-            if total_reset > 0:
-                self.save_status()
-                log_info(f"重置所有失败文件，总计 {total_reset} 个")
+            date_filter = " AND log_date = ?"
+            params = (log_date.strftime('%Y-%m-%d'),)
+        
+        with self.conn:
+            failed_dates = [row[0] for row in self.conn.execute(
+                f"SELECT DISTINCT log_date FROM processing_files WHERE status = 'failed'{date_filter}", params)]
+            reset_count = self.conn.execute(
+                f"UPDATE processing_files SET status = 'pending', error_message = NULL "
+                f"WHERE status = 'failed'{date_filter}", params).rowcount
+            self.conn.executemany("UPDATE processing_dates SET status = 'processing' WHERE log_date = ?",
+                                  [(date_str,) for date_str in failed_dates])
+        
+        if reset_count > 0:
+            if log_date:
+                log_info(f"重置 {params[0]} 日期下 {reset_count} 个失败文件")
+            else:
+                log_info(f"重置所有失败文件，总计 {reset_count} 个")
 
 
 def main():
@@ -334,7 +391,7 @@ def main():
     parser.add_argument('--status', action='store_true', help='显示处理状态')
     parser.add_argument('--date', type=str, help='查看指定日期状态 (YYYY-MM-DD)')
     parser.add_argument('--reset-failed', action='store_true', help='重置失败文件')
-    parser.add_argument('--status-file', type=str, default='processing-status.json', help='状态文件路径')
+    parser.add_argument('--status-file', type=str, default='processing-status.json', help='原状态文件路径（状态库为同名 .db 文件）')
     
     args = parser.parse_args()
     
@@ -365,4 +422,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+URI模板化引擎
+将路径中的ID类片段归一为占位符，降低request_uri_normalized等聚合键的基数
+
+规则实现在 self/self_00_08_uri_templates.py（与Self分析器共用同一份），这里只提供本平台的默认引擎
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+# Self模块之间按模块名直接导入，需要把 self 目录加入路径
+SELF_DIR = Path(__file__).resolve().parent.parent.parent / 'self'
+if str(SELF_DIR) not in sys.path:
+    sys.path.append(str(SELF_DIR))
+
+from self_00_08_uri_templates import UriTemplateEngine
+
+_default_engine: Optional[UriTemplateEngine] = None
+
+
+def get_uri_template_engine() -> UriTemplateEngine:
+    """进程内共享的默认引擎（不加载Self分析器的配置模板，移除末尾斜杠）"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = UriTemplateEngine(strip_trailing_slash=True)
+    return _default_engine
@@ -28,7 +28,7 @@ AS SELECT
     client_type,
     
     -- API业务维度
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     api_category,
     api_subcategory,
     api_module,
@@ -153,7 +153,7 @@ AS SELECT
     'hour' as time_granularity,
     platform,
     access_type,
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     
     -- 慢请求分类
     multiIf(
@@ -233,7 +233,7 @@ AS SELECT
     'hour' as time_granularity,
     platform,
     access_type,
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     api_module,
     api_category,
     business_domain,
@@ -315,7 +315,7 @@ AS SELECT
     'hour' as time_granularity,
     platform,
     access_type,
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     response_status_code,
     multiIf(
         toUInt16OrZero(response_status_code) >= 400 AND toUInt16OrZero(response_status_code) < 500, '4xx_client',
@@ -441,7 +441,7 @@ AS SELECT
     toStartOfHour(log_time) as stat_time,
     'hour' as time_granularity,
     platform,
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     api_module,
     response_status_code as error_code,
     count() as error_count,
@@ -461,7 +461,7 @@ AS SELECT
     max(log_time) as last_error_time
 FROM nginx_analytics.dwd_nginx_enriched_v3
 WHERE is_error = true
-GROUP BY toStartOfHour(log_time), platform, request_uri, api_module, response_status_code;
+GROUP BY toStartOfHour(log_time), platform, request_uri_normalized, api_module, response_status_code;
 
 -- 9. IP来源分析物化视图 - 对应ads_ip_source_analysis
 CREATE MATERIALIZED VIEW IF NOT EXISTS nginx_analytics.mv_ip_source_analysis_hourly
@@ -488,7 +488,7 @@ AS SELECT
         'external'
     ) as ip_classification,
     count() as total_requests,
-    uniq(request_uri) as unique_apis,
+    uniq(request_uri_normalized) as unique_apis,
     uniq(user_agent_string) as unique_user_agents,
     avg(total_request_duration) as avg_response_time,
     quantile(0.95)(total_request_duration) as p95_response_time,
@@ -604,7 +604,7 @@ AS SELECT
     'hour' as time_granularity,
     count() as total_requests,
     uniq(client_ip) as unique_visitors,
-    uniq(request_uri) as unique_apis,
+    uniq(request_uri_normalized) as unique_apis,
     count() / 3600.0 as avg_qps,
     avg(total_request_duration) as avg_response_time,
     quantile(0.5)(total_request_duration) as median_response_time,
@@ -9,7 +9,7 @@ AS SELECT
     'hour' as time_granularity,
     platform,
     access_type,
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     api_module,
     api_category,
     business_domain,
@@ -44,7 +44,7 @@ AS SELECT
     'hour' as time_granularity,
     platform,
     access_type,
-    request_uri as api_path,
+    request_uri_normalized as api_path,
     response_status_code,
     multiIf(
         response_status_code >= '400' AND response_status_code < '500', '4xx_client',
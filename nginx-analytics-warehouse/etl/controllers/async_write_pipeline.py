@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步写入流水线 - 线程模式下解析与写入解耦
+Async Write Pipeline
+
+线程模式原先在解析线程里同步调用 write_batch_optimized，每次ClickHouse往返期间解析停顿。
+本模块改为生产者/消费者结构：
+
+1. 解析线程: 每满 batch_size 条记录映射为列式批次，submit 到有界队列后继续解析；
+   队列满或在途字节超出预算时 submit 阻塞（背压）
+2. 写入线程: 每个线程独占一个 DWDWriter，从队列取批次并合并小批次，
+   达到目标行数或字节数（或队列暂时取空）时按列插入一次
+3. 文件级提交: 解析线程处理完文件后调用 finish_file 等待该文件所有行的写入回执，
+   回执齐全后才由控制器标记为已处理（与多进程模式的状态语义一致）；
+   文件有批次写入失败后，该文件后续提交和仍在队列中的批次直接记为失败、不再写入，
+   解析线程据 file_failed 停止解析该文件，断点之后的数据不会被写入后在下次运行中重复
+4. 分阶段耗时: 映射、入队等待（背压）、排队、写入、提交等待，见 stats()
+"""
+
+import queue
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Callable
+
+# 单次插入的目标行数/字节数（合并后达到任一阈值即写入）
+DEFAULT_TARGET_ROWS = 10000
+DEFAULT_TARGET_BYTES = 16 * 1024 * 1024
+
+# 队列未取到新批次时最多等待多久再写入（秒）
+DEFAULT_COALESCE_WAIT = 0.2
+
+# 估算批次字节数时抽样的行数
+BYTES_SAMPLE_ROWS = 8
+
+STAGES = ('map', 'enqueue_wait', 'queue', 'write', 'commit_wait')
+
+_STOP = object()
+
+
+def estimate_columns_bytes(columns: Dict[str, List[Any]], rows: int) -> int:
+    """按抽样行估算列式批次的数据量（字符串按长度，其他值按8字节）"""
+    if rows <= 0:
+        return 0
+
+    step = max(1, rows // BYTES_SAMPLE_ROWS)
+    sample = range(0, rows, step)
+    sampled_bytes = 0
+    for values in columns.values():
+        for i in sample:
+            value = values[i]
+            if isinstance(value, str):
+                sampled_bytes += len(value)
+            elif isinstance(value, list):
+                sampled_bytes += 8 * len(value)
+            else:
+                sampled_bytes += 8
+    return sampled_bytes * rows // len(sample)
+
+
+def merge_columns(parts: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """合并多个列式批次（字段不一致时缺失部分补None，由写入器按默认值处理）"""
+    if len(parts) == 1:
+        return parts[0]['columns']
+
+    fields = list(dict.fromkeys(field for part in parts for field in part['columns']))
+    merged = {}
+    for field in fields:
+        values = []
+        for part in parts:
+            column = part['columns'].get(field)
+            values.extend(column if column is not None else [None] * part['rows'])
+        merged[field] = values
+    return merged
+
+
+def write_columns_to(writer, columns: Dict[str, List[Any]], rows: int) -> Dict[str, Any]:
+    """按列写入；写入器没有 write_columns 时转为逐行字典走 write_batch（线程/多进程写入共用）"""
+    if hasattr(writer, 'write_columns'):
+        return writer.write_columns(columns, rows)
+    fields = list(columns)
+    records = [dict(zip(fields, values)) for values in zip(*(columns[field] for field in fields))]
+    return writer.write_batch(records)
+
+
+class AsyncWritePipeline:
+    """有界队列 + 专用写入线程 + 小批次合并"""
+
+    def __init__(self,
+                 writers: List[Any],
+                 queue_batches: int = None,
+                 target_rows: int = DEFAULT_TARGET_ROWS,
+                 target_bytes: int = DEFAULT_TARGET_BYTES,
+                 coalesce_wait: float = DEFAULT_COALESCE_WAIT,
+                 on_batch_written: Callable = None,
+                 byte_budget=None,
+                 logger: logging.Logger = None):
+        """
+        Args:
+            writers: 写入器列表，每个写入线程独占一个（write_columns，没有时回退到 write_batch）
+            queue_batches: 批次队列长度（背压阈值），默认每个写入线程4个批次
+            target_rows / target_bytes: 合并后单次插入的目标行数/字节数
+            coalesce_wait: 未达到目标时等待后续批次的最长时间（秒）
+            on_batch_written: (rows, success, write_time) 一次插入完成（在写入线程中回调）
+            byte_budget: 在途字节预算（utils.memory_governor.ByteBudget），批次入队前占用、回执后归还
+        """
+        self.writers = list(writers)
+        self.queue_batches = queue_batches or max(1, len(self.writers)) * 4
+        self.target_rows = target_rows
+        self.target_bytes = target_bytes
+        self.coalesce_wait = coalesce_wait
+        self.on_batch_written = on_batch_written
+        self.byte_budget = byte_budget
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._queue = queue.Queue(maxsize=self.queue_batches)
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+
+        # 文件级回执：文件 -> {'rows': 已提交行数, 'acked': 已回执行数, 'failed': 写入失败行数}
+        self._files: Dict[str, Dict[str, int]] = {}
+        self._finishing = 0  # 正在等待提交的文件数（>0 时写入线程不再等待合并）
+        self._cond = threading.Condition()
+
+        self._stages = {stage: {'count': 0, 'total': 0.0, 'max': 0.0} for stage in STAGES}
+        self._counters = {'batches': 0, 'inserts': 0, 'rows_written': 0, 'rows_failed': 0,
+                          'max_queue_depth': 0}
+        self._stats_lock = threading.Lock()
+
+    # ========== 生命周期 ==========
+
+    def start(self):
+        """启动写入线程（重复调用无副作用）"""
+        with self._start_lock:
+            if self._threads:
+                return
+            for i, writer in enumerate(self.writers):
+                thread = threading.Thread(target=self._writer_loop, args=(writer,),
+                                          name=f"etl-async-writer-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self.logger.info(f"💾 异步写入流水线: {len(self._threads)} 个写入线程, "
+                             f"队列上限 {self.queue_batches} 批, 合并目标 {self.target_rows:,} 行")
+
+    def stop(self, timeout: float = 60):
+        """写完队列中的批次后停止写入线程"""
+        with self._start_lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout=timeout)
+            if thread.is_alive():
+                self.logger.warning(f"写入线程 {thread.name} 未在 {timeout} 秒内退出")
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    # ========== 生产者接口 ==========
+
+    def submit(self, file_key: str, columns: Dict[str, List[Any]], rows: int,
+               on_ack: Callable[[bool], None] = None):
+        """
+        提交一个列式批次，队列满时阻塞（背压）
+
+        Args:
+            on_ack: (success) 该批次写入完成（或被丢弃）时在写入线程中回调，用于推进文件断点
+        """
+        if rows <= 0:
+            return
+        self.start()
+
+        with self._cond:
+            state = self._files.setdefault(file_key, {'rows': 0, 'acked': 0, 'failed': 0})
+            state['rows'] += rows
+            file_failed = state['failed'] > 0
+
+        item = {'file_key': file_key, 'columns': columns, 'rows': rows, 'on_ack': on_ack,
+                'bytes': 0, 'reserved': 0, 'queued_at': time.time()}
+        if file_failed:
+            # 该文件已有批次写入失败，后续批次不再写入（断点停在失败批次之前）
+            self._ack(item, success=False)
+            return
+        item['bytes'] = estimate_columns_bytes(columns, rows)
+        wait_start = time.time()
+        if self.byte_budget is not None:
+            while not self.byte_budget.acquire(item['bytes'], timeout=1.0):
+                if not self.running:
+                    self._ack(item, success=False)
+                    return
+            item['reserved'] = item['bytes']
+        while True:
+            try:
+                self._queue.put(item, timeout=1.0)
+                break
+            except queue.Full:
+                # 写入线程全部退出时不再等待，避免解析线程永久阻塞
+                if not self.running:
+                    self._ack(item, success=False)
+                    return
+        self.record_stage('enqueue_wait', time.time() - wait_start)
+
+        with self._stats_lock:
+            self._counters['batches'] += 1
+            self._counters['max_queue_depth'] = max(self._counters['max_queue_depth'], self._queue.qsize())
+
+    def finish_file(self, file_key: str) -> Dict[str, int]:
+        """
+        等待文件所有已提交行的写入回执
+
+        Returns:
+            {'rows': 提交行数, 'acked': 回执行数, 'failed': 写入失败行数}
+        """
+        wait_start = time.time()
+        with self._cond:
+            state = self._files.get(file_key)
+            if state is None:
+                return {'rows': 0, 'acked': 0, 'failed': 0}
+
+            self._finishing += 1
+            try:
+                while state['acked'] < state['rows']:
+                    self._cond.wait(timeout=1.0)
+                    if state['acked'] < state['rows'] and not self.running:
+                        self._cond.release()
+                        try:
+                            self._discard_queued_batches()
+                        finally:
+                            self._cond.acquire()
+                        if state['acked'] < state['rows']:
+                            # 写入线程已退出且队列已清空，剩余行不会再有回执
+                            state['failed'] += state['rows'] - state['acked']
+                            state['acked'] = state['rows']
+            finally:
+                self._finishing -= 1
+            del self._files[file_key]
+
+        self.record_stage('commit_wait', time.time() - wait_start)
+        return dict(state)
+
+    def file_failed(self, file_key: str) -> bool:
+        """文件是否已有批次写入失败（解析线程据此停止解析该文件）"""
+        with self._cond:
+            state = self._files.get(file_key)
+            return bool(state and state['failed'])
+
+    def record_stage(self, stage: str, seconds: float):
+        """记录一个阶段的耗时"""
+        with self._stats_lock:
+            timing = self._stages[stage]
+            timing['count'] += 1
+            timing['total'] += seconds
+            if seconds > timing['max']:
+                timing['max'] = seconds
+
+    # ========== 写入线程 ==========
+
+    def _writer_loop(self, writer):
+        """写入线程主循环 - 取批次、合并、按列插入，收到停止标记后退出"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            parts = [item]
+            rows = item['rows']
+            nbytes = item['bytes']
+            deadline = time.time() + self.coalesce_wait
+            while rows < self.target_rows and nbytes < self.target_bytes:
+                try:
+                    # 有文件在等待提交时只合并已在队列中的批次
+                    remaining = deadline - time.time()
+                    if self._finishing or remaining <= 0:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = self._queue.get(timeout=min(remaining, 0.05))
+                except queue.Empty:
+                    if self._finishing or time.time() >= deadline:
+                        break
+                    continue
+                if item is _STOP:
+                    stopping = True
+                    break
+                parts.append(item)
+                rows += item['rows']
+                nbytes += item['bytes']
+
+            self._write_parts(writer, parts, rows)
+
+    def _write_parts(self, writer, parts: List[Dict[str, Any]], rows: int):
+        """合并写入一组批次并按文件回执（所属文件已有批次失败的批次不写入，直接记为失败）"""
+        dequeued_at = time.time()
+        for part in parts:
+            self.record_stage('queue', dequeued_at - part['queued_at'])
+
+        kept = []
+        for part in parts:
+            if self.file_failed(part['file_key']):
+                self._ack(part, success=False)
+                with self._stats_lock:
+                    self._counters['rows_failed'] += part['rows']
+            else:
+                kept.append(part)
+        if len(kept) < len(parts):
+            parts = kept
+            rows = sum(part['rows'] for part in parts)
+            if not parts:
+                return
+
+        success = False
+        try:
+            result = write_columns_to(writer, merge_columns(parts), rows)
+            success = bool(result and result.get('success', False))
+            if not success:
+                self.logger.error(f"写入返回失败结果: {result}")
+        except Exception as e:
+            self.logger.error(f"异步批量写入失败: {e}")
+        write_time = time.time() - dequeued_at
+        self.record_stage('write', write_time)
+
+        with self._stats_lock:
+            self._counters['inserts'] += 1
+            self._counters['rows_written' if success else 'rows_failed'] += rows
+
+        for part in parts:
+            self._ack(part, success)
+
+        if self.on_batch_written:
+            try:
+                self.on_batch_written(rows, success, write_time)
+            except Exception as e:
+                self.logger.warning(f"写入回调异常: {e}")
+
+    def _ack(self, item: Dict[str, Any], success: bool):
+        """记录批次的写入回执（先归还在途预算、回调断点推进，再唤醒等待提交的文件）"""
+        if item['reserved']:
+            self.byte_budget.release(item['reserved'])
+            item['reserved'] = 0
+        if item['on_ack']:
+            try:
+                item['on_ack'](success)
+            except Exception as e:
+                self.logger.warning(f"批次回执回调异常: {e}")
+
+        with self._cond:
+            state = self._files.get(item['file_key'])
+            if state is not None:
+                state['acked'] += item['rows']
+                if not success:
+                    state['failed'] += item['rows']
+            self._cond.notify_all()
+
+    def _discard_queued_batches(self):
+        """写入线程不可用时丢弃已排队的批次并记为失败"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                self._ack(item, success=False)
+
+    # ========== 统计 ==========
+
+    def stats(self) -> Dict[str, Any]:
+        """流水线统计：计数、当前队列深度、各阶段耗时（次数/平均/最大，秒）"""
+        with self._stats_lock:
+            stats = dict(self._counters)
+            stats['stages'] = {
+                stage: {
+                    'count': timing['count'],
+                    'avg': timing['total'] / timing['count'] if timing['count'] else 0.0,
+                    'max': timing['max'],
+                    'total': timing['total'],
+                }
+                for stage, timing in self._stages.items()
+            }
+        stats['queue_depth'] = self._queue.qsize()
+        if self.byte_budget is not None:
+            stats['budget'] = self.byte_budget.stats()
+        stats['avg_rows_per_insert'] = (stats['rows_written'] + stats['rows_failed']) / stats['inserts'] \
+            if stats['inserts'] else 0.0
+        return stats
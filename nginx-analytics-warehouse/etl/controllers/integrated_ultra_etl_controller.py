@@ -15,17 +15,15 @@ Integrated Ultra Performance ETL Controller with Auto Discovery
 
 import sys
 import os
-import json
 import time
 import argparse
 import threading
-import queue
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from collections import defaultdict, deque
-import gc
 import traceback
 import logging
 
@@ -47,6 +45,15 @@ from processors.enhanced_field_mapper_v2 import EnhancedFieldMapperV2 as FieldMa
 #from processors.field_mapper import FieldMapper
 # =====================================
 from writers.dwd_writer import DWDWriter
+from controllers.process_etl_pipeline import ProcessETLPipeline, UA_CACHE_NAME, URI_CACHE_NAME
+from controllers.async_write_pipeline import AsyncWritePipeline
+from utils.file_checkpoint import (FileCheckpointTracker, TAIL_SETTLE_SECONDS, build_checkpoint,
+                                   is_fully_processed, resume_position)
+from utils.state_store import ProcessingStateStore
+from utils.memory_governor import MemoryGovernor, configure_gc
+from utils.file_watcher import LogDirectoryWatcher, POLL_INTERVAL
+from utils.enrichment_cache import (get_enrichment_cache, load_hot_keys, save_hot_keys,
+                                    merge_hot_keys, snapshot_hot_keys)
 
 # 尝试导入可选依赖
 try:
@@ -90,80 +97,54 @@ if platform.system() == 'Windows':
     builtins.print = safe_print
 
 class AutoFileDiscovery:
-    """自动文件发现器"""
+    """自动文件发现器 - inotify 事件驱动（不可用时轮询活跃日期目录），只跟踪活跃日期目录"""
 
-    def __init__(self, log_dir: Path, scan_interval: int = 180):
+    def __init__(self, log_dir: Path, scan_interval: int = POLL_INTERVAL):
         self.log_dir = log_dir
-        self.scan_interval = scan_interval  # 默认3分钟
-        self.last_scan_time = 0
-        self.known_files = set()
+        self.scan_interval = scan_interval  # 轮询间隔（inotify 可用时为兜底复查间隔）
         self.logger = logging.getLogger(__name__)
+        self.watcher = LogDirectoryWatcher(log_dir, poll_interval=scan_interval, logger=self.logger)
 
-    def discover_new_files(self) -> List[Path]:
-        """发现新增的日志文件"""
-        current_time = time.time()
-        if current_time - self.last_scan_time < self.scan_interval:
-            return []
+    @property
+    def mode(self) -> str:
+        return self.watcher.mode
 
-        new_files = []
+    def discover_new_files(self, timeout: float = 0) -> List[Path]:
+        """发现新增或追加了内容的日志文件（最多等待 timeout 秒）"""
+        self.watcher.poll_interval = self.scan_interval
         try:
-            if not self.log_dir.exists():
-                return []
-
-            # 扫描所有日期目录下的.log文件
-            for date_dir in self.log_dir.iterdir():
-                if date_dir.is_dir() and date_dir.name.isdigit() and len(date_dir.name) == 8:
-                    try:
-                        datetime.strptime(date_dir.name, '%Y%m%d')
-                        for log_file in date_dir.glob("*.log"):
-                            if log_file not in self.known_files:
-                                # 检查文件是否稳定（最后修改时间超过30秒）
-                                if time.time() - log_file.stat().st_mtime > 30:
-                                    new_files.append(log_file)
-                                    self.known_files.add(log_file)
-                    except (ValueError, OSError):
-                        continue
-
-            self.last_scan_time = current_time
-            if new_files:
-                self.logger.info(f"发现 {len(new_files)} 个新日志文件")
-
+            new_files = self.watcher.poll(timeout)
         except Exception as e:
             self.logger.error(f"文件发现过程出错: {e}")
+            return []
 
+        if new_files:
+            self.logger.info(f"发现 {len(new_files)} 个新增/追加的日志文件")
         return new_files
 
+    def requeue(self, files: List[Path]):
+        """未能处理的文件放回就绪队列"""
+        self.watcher.requeue(files)
+
     def initialize_known_files(self, existing_files: set = None):
-        """初始化已知文件列表"""
+        """记录活跃日期目录中现有文件的签名（这些文件不作为新文件交出）"""
         try:
-            if existing_files:
-                self.known_files.update(existing_files)
-
-            if not self.log_dir.exists():
-                return
-
-            for date_dir in self.log_dir.iterdir():
-                if date_dir.is_dir() and date_dir.name.isdigit() and len(date_dir.name) == 8:
-                    try:
-                        datetime.strptime(date_dir.name, '%Y%m%d')
-                        for log_file in date_dir.glob("*.log"):
-                            self.known_files.add(log_file)
-                    except (ValueError, OSError):
-                        continue
-
-            self.logger.info(f"初始化已知文件列表，共 {len(self.known_files)} 个文件")
+            self.watcher.baseline(existing_files)
+            stats = self.watcher.stats()
+            self.logger.info(f"活跃日期目录 {stats['active_dirs']}，已知文件 {stats['tracked_files']} 个")
         except Exception as e:
             self.logger.error(f"初始化已知文件列表失败: {e}")
 
+    def close(self):
+        self.watcher.close()
+
 class PerformanceOptimizer:
     """性能优化器 - 解决性能衰减问题"""
 
     def __init__(self):
         self.performance_history = deque(maxlen=50)
         self.cache_optimization_interval = 300  # 5分钟
-        self.gc_optimization_interval = 180     # 3分钟
         self.last_cache_cleanup = time.time()
-        self.last_gc_cleanup = time.time()
 
     def monitor_performance(self, current_speed: float):
         """监控性能并记录历史"""
@@ -176,10 +157,6 @@ class PerformanceOptimizer:
         """判断是否需要缓存优化"""
         return time.time() - self.last_cache_cleanup > self.cache_optimization_interval
 
-    def should_optimize_gc(self) -> bool:
-        """判断是否需要GC优化"""
-        return time.time() - self.last_gc_cleanup > self.gc_optimization_interval
-
     def optimize_cache(self, cache_dict: dict, max_size: int = 5000):
         """优化缓存大小"""
         if len(cache_dict) > max_size:
@@ -192,12 +169,6 @@ class PerformanceOptimizer:
         self.last_cache_cleanup = time.time()
         return len(cache_dict)
 
-    def optimize_gc(self) -> int:
-        """执行垃圾回收优化"""
-        collected = gc.collect()
-        self.last_gc_cleanup = time.time()
-        return collected
-
     def get_performance_trend(self) -> str:
         """获取性能趋势"""
         if len(self.performance_history) < 10:
@@ -418,12 +389,16 @@ class IntegratedUltraETLController:
                  connection_pool_size: int = None,
                  memory_limit_mb: int = 512,
                  enable_detailed_logging: bool = True,
-                 progress_refresh_minutes: int = 3):
+                 progress_refresh_minutes: int = 3,
+                 execution_mode: str = 'thread',
+                 writer_processes: int = 1):
         """
         初始化集成超高性能ETL控制器
 
         Args:
             progress_refresh_minutes: 进度刷新间隔(分钟) 1-5分钟
+            execution_mode: 执行模式 thread(线程池) / process(解析映射进程池 + 独立写入进程)
+            writer_processes: 多进程模式下的写入进程数（每个进程一个数据库连接）
         """
         # 基础配置 (完全兼容原有) - 使用相对路径
         if base_log_dir:
@@ -442,6 +417,10 @@ class IntegratedUltraETLController:
         self.connection_pool_size = connection_pool_size if connection_pool_size is not None else max_workers
         self.memory_limit_mb = memory_limit_mb
         self.enable_detailed_logging = enable_detailed_logging
+        if execution_mode not in ('thread', 'process'):
+            raise ValueError(f"不支持的执行模式: {execution_mode}")
+        self.execution_mode = execution_mode
+        self.writer_processes = writer_processes
 
         # 日志配置
         self.logger = self._setup_logger()
@@ -450,24 +429,26 @@ class IntegratedUltraETLController:
         self.progress_tracker = IntegratedProgressTracker(self.logger, progress_refresh_minutes)
         self.performance_optimizer = PerformanceOptimizer()
 
-        # 线程安全的组件池 (原有设计)
-        self.parser_pool = [BaseLogParser() for _ in range(max_workers)]
-        self.mapper_pool = [FieldMapper(geoip_db_path=str(etl_root / "data" / "GeoLite2-City.mmdb")) for _ in range(max_workers)]
+        # 线程安全的组件池 (原有设计) - 只有线程模式使用；多进程模式由各解析/写入进程自建解析器、映射器和连接
+        self.parser_pool = []
+        self.mapper_pool = []
         self.writer_pool = []
+        if self.execution_mode == 'thread':
+            self.parser_pool = [BaseLogParser() for _ in range(max_workers)]
+            self.mapper_pool = [FieldMapper(geoip_db_path=str(etl_root / "data" / "GeoLite2-City.mmdb")) for _ in range(max_workers)]
 
-        # 优化的缓存机制 (解决性能衰减)
-        self.ua_cache = {}
-        self.uri_cache = {}
-        self.cache_stats = {'ua_hits': 0, 'ua_misses': 0, 'uri_hits': 0, 'uri_misses': 0}
+        # 优化的缓存机制 (解决性能衰减) - 进程内共享的LRU缓存，命中统计在缓存内部加锁更新
+        self.ua_cache = get_enrichment_cache(UA_CACHE_NAME, 3000)
+        self.uri_cache = get_enrichment_cache(URI_CACHE_NAME, 3000)
 
-        # 处理状态 (兼容原有格式)
-        self.processed_state = self.load_state()
+        # 热点键文件：运行结束时保存，下次启动时预热缓存
+        self.hot_keys_file = self.state_file.with_name('enrichment_hot_keys.json')
+        self.process_hot_keys = {}  # 多进程模式下各解析进程上报的热点键
+        self._warm_enrichment_caches()
 
-        # 异步写入优化 - 增加缓冲区大小
-        self.write_buffer = []
-        self.write_buffer_lock = threading.Lock()
-        self.async_write_queue = queue.Queue(maxsize=500)  # 增加队列大小
-        self.buffer_flush_threshold = batch_size * 2  # 动态刷新阈值
+        # 处理状态 - SQLite(WAL) 按文件逐行存储，写入线程推进断点时直接 upsert 单行
+        self.state_store = self.load_state()
+        self.checkpoints = FileCheckpointTracker()
 
         # 性能统计 (兼容原有)
         self.write_stats = {
@@ -477,8 +458,23 @@ class IntegratedUltraETLController:
             'buffer_flushes': 0
         }
 
-        # 初始化系统
-        self._init_connection_pool()
+        # 内存调控 - 在途批次字节预算、解析缓冲区上限、按插入延迟调整合并目标（多进程模式由流水线自建）
+        self.memory_governor = MemoryGovernor(memory_limit_mb, max_workers, batch_size, batch_size * 5,
+                                              logger=self.logger)
+
+        # 异步写入流水线 - 线程模式下解析线程只提交批次，写入线程独占连接池中的写入器并合并小批次
+        # 多进程模式的写入进程各自建立连接，主进程不建连接池也不启动写入线程
+        self.write_pipeline = None
+        if self.execution_mode == 'thread':
+            self._init_connection_pool()
+            self.write_pipeline = AsyncWritePipeline(
+                writers=self.writer_pool,
+                queue_batches=max_workers * 2,
+                target_rows=self.memory_governor.insert_rows,
+                on_batch_written=self._on_async_batch_written,
+                byte_budget=self.memory_governor.budget,
+                logger=self.logger
+            )
 
         # 自动文件发现功能 (新增)
         self.auto_discovery = AutoFileDiscovery(self.base_log_dir)
@@ -488,17 +484,20 @@ class IntegratedUltraETLController:
         self.is_processing = False
         self.processing_lock = threading.Lock()
 
-        # 初始化已知文件列表
-        existing_files = set(Path(f) for f in self.processed_state.get('processed_files', {}))
-        self.auto_discovery.initialize_known_files(existing_files)
+        # 初始化已知文件列表（只记录活跃日期目录中的文件；已处理文件的追加部分由断点续传判断）
+        self.auto_discovery.initialize_known_files()
+
+        # 组件池、缓存和IP索引常驻整个运行期间：冻结后GC不再扫描，第0代阈值调高，不再定期强制全量回收
+        configure_gc()
 
         self.logger.info("🚀 集成超高性能ETL控制器初始化完成")
         self.logger.info(f"📁 日志目录: {self.base_log_dir}")
         self.logger.info(f"⚙️ 批处理大小: {self.batch_size:,}")
         self.logger.info(f"🧵 工作线程数: {self.max_workers}")
+        self.logger.info(f"🧩 执行模式: {self.execution_mode}")
         self.logger.info(f"🔗 连接池大小: {self.connection_pool_size}")
         self.logger.info(f"📊 进度刷新间隔: {progress_refresh_minutes} 分钟")
-        self.logger.info(f"🔍 自动扫描间隔: {self.auto_discovery.scan_interval} 秒")
+        self.logger.info(f"🔍 自动文件发现: {self._discovery_description()}")
 
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
@@ -537,24 +536,31 @@ class IntegratedUltraETLController:
 
         self.logger.info(f"✅ 数据库连接池初始化完成: {success_count}/{self.connection_pool_size}")
 
-    def get_writer(self) -> Optional[DWDWriter]:
-        """获取可用的写入器"""
-        if self.writer_pool:
-            return self.writer_pool.pop(0)
-        return None
+    def _record_batch_written(self, rows: int, success: bool, write_time: float):
+        """一次插入完成（写入线程/多进程模式写入回执中回调）"""
+        if not success:
+            self.logger.error(f"批量写入完全失败: {rows} 条记录")
+            return
+        self.write_stats['total_writes'] += 1
+        self.write_stats['total_records'] += rows
+        self.write_stats['total_write_time'] += write_time
+        self.progress_tracker.update_batch_written(rows)
+        self.performance_optimizer.monitor_performance(rows / write_time if write_time > 0 else 0)
 
-    def return_writer(self, writer: DWDWriter):
-        """归还写入器"""
-        if writer:
-            self.writer_pool.append(writer)
+        if self.enable_detailed_logging:
+            self.logger.info(f"✅ 批次写入成功: {rows} 条记录, {write_time:.2f}秒")
 
-    def cached_ua_parse(self, user_agent: str, mapper: FieldMapper) -> Dict:
-        """优化的缓存用户代理解析"""
-        if user_agent in self.ua_cache:
-            self.cache_stats['ua_hits'] += 1
-            return self.ua_cache[user_agent]
+    def _on_async_batch_written(self, rows: int, success: bool, write_time: float):
+        """线程模式一次合并插入完成：按插入延迟调整合并目标行数"""
+        if success:
+            self.write_pipeline.target_rows = self.memory_governor.record_insert(rows, write_time)
+        self._record_batch_written(rows, success, write_time)
 
-        self.cache_stats['ua_misses'] += 1
+    def cached_ua_parse(self, user_agent: str, mapper: FieldMapper) -> Dict:
+        """优化的缓存用户代理解析（LRU淘汰，防止内存膨胀）"""
+        parsed = self.ua_cache.get(user_agent)
+        if parsed is not None:
+            return parsed
 
         # 执行解析
         try:
@@ -562,22 +568,14 @@ class IntegratedUltraETLController:
         except:
             parsed = {'browser': 'Unknown', 'os': 'Unknown'}
 
-        # 缓存管理 (防止内存膨胀) - 更积极的清理
-        if len(self.ua_cache) > 3000:  # 降低阈值，更频繁清理
-            cache_size = self.performance_optimizer.optimize_cache(self.ua_cache, 3000)
-            if self.enable_detailed_logging:
-                self.logger.info(f"🧹 UA缓存优化完成，当前大小: {cache_size}")
-
-        self.ua_cache[user_agent] = parsed
+        self.ua_cache.put(user_agent, parsed)
         return parsed
 
     def cached_uri_parse(self, uri: str, mapper: FieldMapper) -> Dict:
-        """优化的缓存URI解析"""
-        if uri in self.uri_cache:
-            self.cache_stats['uri_hits'] += 1
-            return self.uri_cache[uri]
-
-        self.cache_stats['uri_misses'] += 1
+        """优化的缓存URI解析（LRU淘汰，防止内存膨胀）"""
+        parsed = self.uri_cache.get(uri)
+        if parsed is not None:
+            return parsed
 
         # 执行解析
         try:
@@ -585,16 +583,36 @@ class IntegratedUltraETLController:
         except:
             parsed = {'path': uri, 'query_count': 0}
 
-        # 缓存管理 - 优化清理策略
-        if len(self.uri_cache) > 3000:  # 降低阈值
-            # 保留最常用的缓存
-            items = list(self.uri_cache.items())
-            self.uri_cache.clear()
-            self.uri_cache.update(items[-1500:])  # 保留更少项目
-
-        self.uri_cache[uri] = parsed
+        self.uri_cache.put(uri, parsed)
         return parsed
 
+    def _warm_enrichment_caches(self):
+        """用上次运行保存的热点键预热共享缓存（同一进程内的映射器共用缓存，预热一次即可）"""
+        if not self.mapper_pool:
+            return  # 多进程模式由解析进程启动时各自预热
+        hot_keys = load_hot_keys(self.hot_keys_file)
+        if not hot_keys:
+            return
+
+        mapper = self.mapper_pool[0]
+        warmed = mapper.warm_caches(hot_keys)
+        for user_agent in reversed(hot_keys.get(UA_CACHE_NAME, [])):
+            self.cached_ua_parse(user_agent, mapper)
+            warmed += 1
+        for uri in reversed(hot_keys.get(URI_CACHE_NAME, [])):
+            self.cached_uri_parse(uri, mapper)
+            warmed += 1
+        self.logger.info(f"🔥 缓存预热完成: {warmed} 项")
+
+    def _save_hot_keys(self):
+        """保存本次运行的热点键（多进程模式下以解析进程上报的为准）"""
+        hot_keys = snapshot_hot_keys()
+        merge_hot_keys(hot_keys, self.process_hot_keys)
+        try:
+            save_hot_keys(self.hot_keys_file, hot_keys)
+        except OSError as e:
+            self.logger.warning(f"保存缓存热点键失败: {e}")
+
     def process_file_batch(self, file_paths: List[Path], thread_id: int,
                           test_mode: bool = False, limit: int = None) -> Dict[str, Any]:
         """处理文件批次 - 集成性能优化"""
@@ -609,12 +627,6 @@ class IntegratedUltraETLController:
                 if result.get('success') and 'speed_rps' in result:
                     self.performance_optimizer.monitor_performance(result['speed_rps'])
 
-                # 定期GC优化
-                if self.performance_optimizer.should_optimize_gc():
-                    collected = self.performance_optimizer.optimize_gc()
-                    if collected > 0:
-                        self.logger.info(f"🧹 GC优化完成，清理对象: {collected}")
-
             except Exception as e:
                 self.logger.error(f"处理文件 {file_path} 失败: {e}")
                 results.append({
@@ -644,134 +656,103 @@ class IntegratedUltraETLController:
             # 获取组件
             parser = self.parser_pool[thread_id % len(self.parser_pool)]
             mapper = self.mapper_pool[thread_id % len(self.mapper_pool)]
-            writer = self.get_writer() if not test_mode else None
+            file_key = str(file_path)
 
-            if not test_mode and not writer:
-                error_msg = f"线程 {thread_id} 无法获取数据库连接"
-                self.logger.error(error_msg)
-                return {'success': False, 'error': error_msg}
+            # 从断点续传：已处理过的文件只读取新增部分
+            start_offset, start_line = self.get_resume_position(file_path)
+            if start_offset and self.enable_detailed_logging:
+                self.logger.info(f"⏩ {file_path.name}: 从第 {start_line} 行 (偏移 {start_offset:,}) 继续处理")
+            if not test_mode:
+                self.checkpoints.begin(file_key, start_offset, start_line)
 
             batch = []
             file_records = 0
             file_lines = 0
             file_errors = 0
-
-            try:
-                # 流式处理文件
-                for parsed_data in parser.parse_file(file_path):
-                    file_lines += 1
-
-                    # 更新进度 (减少频率以提高性能)
-                    if file_lines % 5000 == 0:  # 从1000改为5000，减少进度更新开销
-                        self.progress_tracker.update_file_progress(thread_id, file_lines, file_records, file_errors)
-
-                        # 显示进度 (根据配置的刷新间隔)
-                        self.progress_tracker.display_progress()
-
-                        # 执行GC优化
-                        if self.performance_optimizer.should_optimize_gc():
-                            collected = self.performance_optimizer.optimize_gc()
-                            if self.enable_detailed_logging:
-                                self.logger.info(f"🗞️ GC优化完成，回收对象: {collected}")
-
-                    if parsed_data:
-                        try:
-                            # 缓存解析
-                            user_agent = parsed_data.get('user_agent', '')
-                            if user_agent:
-                                parsed_data['_cached_ua'] = self.cached_ua_parse(user_agent, mapper)
-
-                            # 安全的URI解析
-                            request = parsed_data.get('request', '')
-                            uri = ''
-                            if request:
-                                request_parts = request.split(' ')
-                                if len(request_parts) >= 2:
-                                    uri = request_parts[1]
-                                else:
-                                    uri = request  # 如果分割失败，使用原始请求
-                            if uri:
-                                parsed_data['_cached_uri'] = self.cached_uri_parse(uri, mapper)
-
-                            # 字段映射
-                            mapped_data = mapper.map_to_dwd(parsed_data, file_path.name)
-                            batch.append(mapped_data)
-                            file_records += 1
-
-                            # 批量写入 - 增加异步处理
-                            if len(batch) >= self.batch_size:
-                                if not test_mode and writer:
-                                    try:
-                                        write_start = time.time()
-
-                                        # 使用更高效的写入方式
-                                        result = writer.write_batch_optimized(batch)  # 使用优化版本
-                                        write_time = time.time() - write_start
-
-                                        # 检查写入结果
-                                        if result and result.get('success', False):
-                                            # 更新写入统计
-                                            self.write_stats['total_writes'] += 1
-                                            self.write_stats['total_records'] += len(batch)
-                                            self.write_stats['total_write_time'] += write_time
-
-                                            # 更新实时统计 (新增)
-                                            self.progress_tracker.update_batch_written(len(batch))
-
-                                            # 记录性能指标
-                                            current_speed = len(batch) / write_time if write_time > 0 else 0
-                                            self.performance_optimizer.monitor_performance(current_speed)
-
-                                            if self.enable_detailed_logging:
-                                                self.logger.info(f"✅ [线程{thread_id}] 批次写入成功: {len(batch)} 条记录, {write_time:.2f}秒")
-                                        else:
-                                            self.logger.error(f"写入返回失败结果: {result}")
-                                            raise Exception("写入失败")
-
-                                    except Exception as e:
-                                        # 如果优化方法失败，回退到普通方法
-                                        try:
-                                            self.logger.warning(f"优化写入失败，回退到标准方法: {e}")
-                                            result = writer.write_batch(batch)
-                                            if result and result.get('success', False):
-                                                self.write_stats['total_writes'] += 1
-                                                self.write_stats['total_records'] += len(batch)
-                                                # 更新实时统计
-                                                self.progress_tracker.update_batch_written(len(batch))
-                                            else:
-                                                raise Exception("标准写入也失败")
-                                        except Exception as e2:
-                                            self.logger.error(f"批量写入完全失败: {e2}")
-                                            file_errors += len(batch)  # 记录失败的记录数
-
-                                batch.clear()
-
-                            # 检查限制
-                            if limit and file_records >= limit:
-                                break
-
-                        except Exception as e:
-                            file_errors += 1
-                            if file_errors <= 5:
-                                self.logger.error(f"记录处理错误: {e}")
-
-                # 处理剩余批次
-                if batch and not test_mode and writer:
+            parsed_count = 0
+            batch_seq = 0
+            end_offset, end_line = start_offset, start_line
+            # 解析缓冲区条数上限（按实测单条记录字节数，不超过 batch_size）
+            batch_limit = self.memory_governor.parse_batch_limit()
+
+            def flush():
+                nonlocal file_records, file_errors, batch_seq, batch_limit
+                batch_limit = self.memory_governor.parse_batch_limit(batch)
+                # 映射为列式批次后提交给写入线程，解析不等待数据库往返（在途字节超出预算时阻塞）
+                map_start = time.time()
+                columns, rows, errors = mapper.map_batch_to_columns(batch, file_path.name)
+                self.write_pipeline.record_stage('map', time.time() - map_start)
+                file_records += rows
+                file_errors += errors
+                if rows and not test_mode:
+                    # 批次写入确认后按顺序推进断点（批次结束位置随回执带回）
+                    on_ack = partial(self._on_batch_ack, file_key, batch_seq, end_offset, end_line, rows)
+                    batch_seq += 1
+                    self.write_pipeline.submit(file_key, columns, rows, on_ack=on_ack)
+
+            # 流式处理文件（按字节偏移读取，每行都带回结束位置）
+            for parsed_data, end_offset, end_line in parser.parse_file_from(
+                    file_path, start_offset, start_line, complete_lines_only=self._is_file_growing(file_path)):
+                file_lines += 1
+
+                # 更新进度 (减少频率以提高性能)
+                if file_lines % 5000 == 0:  # 从1000改为5000，减少进度更新开销
+                    self.progress_tracker.update_file_progress(thread_id, file_lines, file_records, file_errors)
+
+                    # 显示进度 (根据配置的刷新间隔)
+                    self.progress_tracker.display_progress()
+
+                if parsed_data:
                     try:
-                        result = writer.write_batch(batch)
-                        if result and result.get('success', False):
-                            self.write_stats['total_writes'] += 1
-                            self.write_stats['total_records'] += len(batch)
-                            # 更新实时统计
-                            self.progress_tracker.update_batch_written(len(batch))
+                        # 缓存解析
+                        user_agent = parsed_data.get('user_agent', '')
+                        if user_agent:
+                            parsed_data.cached_ua = self.cached_ua_parse(user_agent, mapper)
+
+                        # 安全的URI解析
+                        request = parsed_data.request
+                        uri = ''
+                        if request:
+                            request_parts = request.split(' ')
+                            if len(request_parts) >= 2:
+                                uri = request_parts[1]
+                            else:
+                                uri = request  # 如果分割失败，使用原始请求
+                        if uri:
+                            parsed_data.cached_uri = self.cached_uri_parse(uri, mapper)
+
                     except Exception as e:
-                        self.logger.error(f"最终批量写入失败: {e}")
                         file_errors += 1
+                        if file_errors <= 5:
+                            self.logger.error(f"记录处理错误: {e}")
+                        continue
 
-            finally:
-                # 归还写入器
-                if writer:
-                    self.return_writer(writer)
+                    batch.append(parsed_data)
+                    parsed_count += 1
+
+                    # 批量映射并提交（队列满时阻塞，形成背压）
+                    if len(batch) >= batch_limit:
+                        flush()
+                        batch = []
+                        # 已有批次写入失败时停止解析，断点之后的数据留到下次运行
+                        if not test_mode and self.write_pipeline.file_failed(file_key):
+                            self.logger.warning(f"⚠️ {file_path.name}: 批次写入失败，停止处理该文件")
+                            break
+
+                    # 检查限制
+                    if limit and parsed_count >= limit:
+                        break
+
+            # 处理剩余批次
+            if batch and (test_mode or not self.write_pipeline.file_failed(file_key)):
+                flush()
+
+            # 文件级提交：所有批次收到写入回执后才标记为已处理
+            checkpoint = None
+            if not test_mode:
+                commit = self.write_pipeline.finish_file(file_key)
+                file_errors += commit['failed']
+                checkpoint = self.checkpoints.finish(file_key, batch_seq, end_offset, end_line)
 
             # 完成文件处理
             processing_time = time.time() - start_time
@@ -779,7 +760,7 @@ class IntegratedUltraETLController:
 
             # 标记文件已处理
             if not test_mode:
-                self.mark_file_processed(file_path, file_records, processing_time)
+                self.mark_file_processed(file_path, file_records, processing_time, checkpoint)
 
             result = {
                 'success': True,
@@ -801,6 +782,10 @@ class IntegratedUltraETLController:
         except Exception as e:
             error_msg = f"处理文件 {file_path.name} 失败: {e}"
             self.logger.error(error_msg)
+            # 等待已提交批次写完，断点停在最后一个连续确认的批次，文件不标记为已处理
+            if not test_mode:
+                self.write_pipeline.finish_file(str(file_path))
+                self.checkpoints.finish(str(file_path), 0, 0, 0)
             self.progress_tracker.complete_file_processing(thread_id, 0, 1)
             return {
                 'success': False,
@@ -830,30 +815,26 @@ class IntegratedUltraETLController:
 
     # === 完全兼容原有的状态管理 ===
 
-    def load_state(self) -> Dict[str, Any]:
-        """加载处理状态 - 完全兼容原有格式"""
-        if self.state_file.exists():
-            try:
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                self.logger.warning(f"加载状态文件失败: {e}")
+    def load_state(self) -> ProcessingStateStore:
+        """
+        打开处理状态库（state_file 同名 .db）
 
-        return {
-            'processed_files': {},
-            'last_update': None,
-            'total_processed_records': 0,
-            'processing_history': []
-        }
+        原有的 JSON 状态文件在首次打开时导入一次，之后不再读写
+        """
+        db_file = self.state_file.with_suffix('.db')
+        json_file = self.state_file if self.state_file.suffix == '.json' else None
+        first_open = not db_file.exists()
+        store = ProcessingStateStore(db_file, json_path=json_file)
+        if first_open and store.get_meta('migrated_from'):
+            self.logger.info(f"📦 已从 {json_file} 导入 {store.count_files()} 条文件处理记录到 {db_file}")
+        return store
 
     def save_state(self):
-        """保存处理状态 - 完全兼容原有格式"""
+        """保存处理状态 - 文件记录在变更时已逐行提交，这里只更新最后更新时间"""
         try:
-            self.processed_state['last_update'] = datetime.now().isoformat()
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(self.processed_state, f, indent=2, ensure_ascii=False, default=str)
+            self.state_store.set_meta('last_update', datetime.now().isoformat())
         except Exception as e:
-            self.logger.error(f"保存状态文件失败: {e}")
+            self.logger.error(f"保存状态失败: {e}")
 
     def scan_log_directories(self) -> Dict[str, List[Path]]:
         """扫描日志目录 - 完全兼容原有逻辑"""
@@ -874,24 +855,75 @@ class IntegratedUltraETLController:
         return log_files_by_date
 
     def is_file_processed(self, file_path: Path) -> bool:
-        """检查文件是否已处理"""
+        """检查文件是否已处理（已处理到文件末尾；追加了内容的文件视为未处理）"""
+        return is_fully_processed(file_path, self.state_store.get_file(str(file_path)))
+
+    def get_resume_position(self, file_path: Path) -> Tuple[int, int]:
+        """
+        文件的续传位置 (字节偏移, 行数)
+
+        需要从头处理时（新文件、文件被截断或替换）清零原记录的累计记录数
+        """
         file_key = str(file_path)
-        return file_key in self.processed_state.get('processed_files', {})
+        entry = self.state_store.get_file(file_key)
+        offset, line_count = resume_position(file_path, entry)
+        if entry and offset == 0 and entry.get('record_count'):
+            self.state_store.upsert_file(file_key, {'record_count': 0})
+        return offset, line_count
+
+    def reset_file_checkpoints(self, file_paths: List[Path]):
+        """清除文件断点（强制重新处理时从头开始）"""
+        self.state_store.delete_files(file_paths)
+
+    @staticmethod
+    def _is_file_growing(file_path: Path) -> bool:
+        """文件是否仍在写入（最近修改过），此时末尾不完整的行留到下次处理"""
+        try:
+            return time.time() - file_path.stat().st_mtime < TAIL_SETTLE_SECONDS
+        except OSError:
+            return False
 
-    def mark_file_processed(self, file_path: Path, record_count: int, processing_time: float):
-        """标记文件为已处理"""
+    def commit_file_checkpoint(self, file_path: Path, offset: int, line_count: int, rows: int):
+        """批次写入确认后推进文件断点（单行 upsert，立即提交）"""
+        try:
+            fields = build_checkpoint(file_path, offset, line_count)
+            fields.update({'status': 'processing', 'checkpoint_at': datetime.now().isoformat()})
+            self.state_store.upsert_file(file_path, fields, add_records=rows)
+        except Exception as e:
+            self.logger.error(f"保存文件断点失败 {file_path}: {e}")
+
+    def _on_batch_ack(self, file_key: str, seq: int, end_offset: int, end_line: int, rows: int,
+                      success: bool):
+        """线程模式批次写入回执（写入线程中回调）"""
+        advanced = self.checkpoints.ack(file_key, seq, end_offset, end_line, rows, success)
+        if advanced:
+            self.commit_file_checkpoint(Path(file_key), *advanced)
+
+    def mark_file_processed(self, file_path: Path, record_count: int, processing_time: float,
+                            checkpoint: Dict[str, Any] = None):
+        """
+        标记文件为已处理
+
+        Args:
+            checkpoint: 本次处理结束时的断点 {'offset', 'line_count'}；有批次写入失败时停在失败批次之前，
+                        文件不会被视为处理完成，下次从该位置继续
+        """
         file_key = str(file_path)
         try:
-            self.processed_state['processed_files'][file_key] = {
+            stat = file_path.stat()
+            fields = {
+                'status': 'partial' if checkpoint and checkpoint.get('failed') else 'completed',
                 'processed_at': datetime.now().isoformat(),
-                'record_count': record_count,
                 'processing_time': processing_time,
-                'mtime': file_path.stat().st_mtime,
-                'file_size': file_path.stat().st_size
+                'mtime': stat.st_mtime,
+                'file_size': stat.st_size
             }
-            # 定期保存状态
-            if len(self.processed_state['processed_files']) % 10 == 0:
-                self.save_state()
+            if checkpoint:
+                fields.update(build_checkpoint(file_path, checkpoint['offset'], checkpoint['line_count']))
+            if self.state_store.get_file(file_key) is None:
+                # 没有断点提交过的文件记录本次已提交的行数（无断点时为本次记录数）
+                fields['record_count'] = checkpoint['rows'] if checkpoint else record_count
+            self.state_store.upsert_file(file_key, fields)
         except Exception as e:
             self.logger.error(f"标记文件状态失败 {file_path}: {e}")
 
@@ -933,46 +965,57 @@ class IntegratedUltraETLController:
                     'total_records': 0
                 }
             log_files = unprocessed_files
+        elif not test_mode:
+            # 强制重新处理：清除断点，从文件开头读取
+            self.reset_file_checkpoints(log_files)
 
         self.logger.info(f"📅 处理日期 {date_str}: {len(log_files)} 个文件")
 
         # 启动进度追踪
         self.progress_tracker.start_session(len(log_files))
 
-        # 文件分组处理
-        files_per_thread = max(1, len(log_files) // self.max_workers)
-        file_groups = [log_files[i:i + files_per_thread]
-                      for i in range(0, len(log_files), files_per_thread)]
-
-        # 确保不超过最大线程数
-        while len(file_groups) > self.max_workers:
-            last_group = file_groups.pop()
-            file_groups[-1].extend(last_group)
-
         # 并行处理
         total_records = 0
         total_errors = 0
         processed_files = 0
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_group = {
-                executor.submit(self.process_file_batch, group, thread_id, test_mode, limit): thread_id
-                for thread_id, group in enumerate(file_groups)
-            }
+        if self.execution_mode == 'process':
+            # 多进程模式：按文件调度到解析进程池
+            for file_result in self.process_files_multiprocess(log_files, test_mode, limit):
+                if file_result.get('success'):
+                    total_records += file_result.get('records_processed', 0)
+                    processed_files += 1
+                total_errors += file_result.get('errors', 0)
+        else:
+            # 文件分组处理
+            files_per_thread = max(1, len(log_files) // self.max_workers)
+            file_groups = [log_files[i:i + files_per_thread]
+                          for i in range(0, len(log_files), files_per_thread)]
+
+            # 确保不超过最大线程数
+            while len(file_groups) > self.max_workers:
+                last_group = file_groups.pop()
+                file_groups[-1].extend(last_group)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                future_to_group = {
+                    executor.submit(self.process_file_batch, group, thread_id, test_mode, limit): thread_id
+                    for thread_id, group in enumerate(file_groups)
+                }
 
-            for future in as_completed(future_to_group):
-                thread_id = future_to_group[future]
-                try:
-                    result = future.result()
-                    if result['success']:
-                        for file_result in result['file_results']:
-                            if file_result.get('success'):
-                                total_records += file_result.get('records_processed', 0)
-                                processed_files += 1
-                            total_errors += file_result.get('errors', 0)
-                except Exception as e:
-                    self.logger.error(f"线程 {thread_id} 处理异常: {e}")
-                    total_errors += 1
+                for future in as_completed(future_to_group):
+                    thread_id = future_to_group[future]
+                    try:
+                        result = future.result()
+                        if result['success']:
+                            for file_result in result['file_results']:
+                                if file_result.get('success'):
+                                    total_records += file_result.get('records_processed', 0)
+                                    processed_files += 1
+                                total_errors += file_result.get('errors', 0)
+                    except Exception as e:
+                        self.logger.error(f"线程 {thread_id} 处理异常: {e}")
+                        total_errors += 1
 
         # 最终进度显示
         self.progress_tracker.display_progress(force=True)
@@ -993,6 +1036,70 @@ class IntegratedUltraETLController:
             'processing_speed': processing_speed
         }
 
+    def process_files_multiprocess(self, log_files: List[Path], test_mode: bool = False,
+                                   limit: int = None) -> List[Dict[str, Any]]:
+        """
+        多进程处理文件 - 解析映射在进程池中执行，写入由独立写入进程完成
+
+        状态文件只在主进程中维护：文件的全部批次收到写入回执后才标记为已处理
+        """
+        pipeline = ProcessETLPipeline(
+            parser_class=BaseLogParser,
+            mapper_class=FieldMapper,
+            writer_class=DWDWriter,
+            mapper_kwargs={'geoip_db_path': str(etl_root / "data" / "GeoLite2-City.mmdb")},
+            parse_workers=self.max_workers,
+            writer_processes=self.writer_processes,
+            batch_size=self.batch_size,
+            hot_keys_file=self.hot_keys_file,
+            memory_limit_mb=self.memory_limit_mb,
+            logger=self.logger
+        )
+
+        def on_file_start(file_seq: int, file_path: Path):
+            self.progress_tracker.start_file_processing(file_seq, file_path,
+                                                        self._estimate_file_lines(file_path))
+
+        def on_file_complete(file_seq: int, result: Dict[str, Any]):
+            file_path = Path(result['file_path'])
+            if file_seq not in self.progress_tracker.current_files:
+                on_file_start(file_seq, file_path)
+            self.progress_tracker.update_file_progress(file_seq, result['lines_processed'],
+                                                       result['records_processed'], result['errors'])
+            self.progress_tracker.complete_file_processing(file_seq, result['records_processed'],
+                                                           result['errors'])
+
+            if not result['success']:
+                self.logger.error(result.get('error', f"处理文件 {file_path.name} 失败"))
+                return
+
+            if not test_mode:
+                self.mark_file_processed(file_path, result['records_processed'], result['processing_time'],
+                                         result.get('checkpoint'))
+            self.performance_optimizer.monitor_performance(result['speed_rps'])
+
+            self.logger.info(
+                f"✅ {file_path.name}: {result['records_processed']:,} 条记录, "
+                f"{result['processing_time']:.1f}秒, {result['speed_rps']:.0f} RPS"
+            )
+
+        # 各文件从断点续传
+        resume_from = {str(file_path): (*self.get_resume_position(file_path), self._is_file_growing(file_path))
+                       for file_path in log_files}
+
+        results = pipeline.run(log_files, test_mode=test_mode, limit=limit,
+                               on_file_start=on_file_start,
+                               on_batch_written=self._record_batch_written,
+                               on_file_complete=on_file_complete,
+                               on_idle=self.progress_tracker.display_progress,
+                               resume_from=resume_from,
+                               on_checkpoint=None if test_mode else self.commit_file_checkpoint)
+        merge_hot_keys(self.process_hot_keys, pipeline.hot_keys)
+        if pipeline.memory_governor is not None:
+            # 多进程模式的内存调控统计以最近一次运行为准
+            self.memory_governor = pipeline.memory_governor
+        return results
+
     def process_all_parallel(self, test_mode: bool = False, limit: int = None) -> Dict[str, Any]:
         """处理所有日志 - 完全兼容原有逻辑"""
         start_time = time.time()
@@ -1047,14 +1154,17 @@ class IntegratedUltraETLController:
         print(f"   详细日志: {'启用' if self.enable_detailed_logging else '禁用'}")
 
         # 缓存统计
-        total_ua = self.cache_stats['ua_hits'] + self.cache_stats['ua_misses']
-        total_uri = self.cache_stats['uri_hits'] + self.cache_stats['uri_misses']
-        ua_hit_rate = self.cache_stats['ua_hits'] / total_ua * 100 if total_ua > 0 else 0
-        uri_hit_rate = self.cache_stats['uri_hits'] / total_uri * 100 if total_uri > 0 else 0
+        ua_stats = self.ua_cache.stats()
+        uri_stats = self.uri_cache.stats()
+        field_cache_stats = self.mapper_pool[0].get_cache_stats() if self.mapper_pool else {}
 
         print(f"\\n📈 缓存统计:")
-        print(f"   User-Agent缓存: {len(self.ua_cache)} 项 (命中率: {ua_hit_rate:.1f}%)")
-        print(f"   URI缓存: {len(self.uri_cache)} 项 (命中率: {uri_hit_rate:.1f}%)")
+        print(f"   User-Agent缓存: {ua_stats['size']} 项 (命中率: {ua_stats['hit_rate'] * 100:.1f}%, 淘汰: {ua_stats['evictions']})")
+        print(f"   URI缓存: {uri_stats['size']} 项 (命中率: {uri_stats['hit_rate'] * 100:.1f}%, 淘汰: {uri_stats['evictions']})")
+        for name, stats in field_cache_stats.get('caches', {}).items():
+            if name in (UA_CACHE_NAME, URI_CACHE_NAME) or not (stats['hits'] + stats['misses']):
+                continue
+            print(f"   {name}: {stats['size']} 项 (命中率: {stats['hit_rate'] * 100:.1f}%, 淘汰: {stats['evictions']})")
 
         # 性能趋势
         trend = self.performance_optimizer.get_performance_trend()
@@ -1077,6 +1187,37 @@ class IntegratedUltraETLController:
             print(f"   总写入记录: {self.write_stats['total_records']:,}")
             print(f"   平均写入时间: {avg_write_time:.3f}秒")
 
+        # 异步写入流水线统计（线程模式）
+        pipeline_stats = self.write_pipeline.stats() if self.write_pipeline is not None else {'inserts': 0}
+        if pipeline_stats['inserts'] > 0:
+            stage_names = {'map': '映射', 'enqueue_wait': '入队等待(背压)', 'queue': '排队',
+                           'write': '写入', 'commit_wait': '文件提交等待'}
+            print(f"\\n🔀 异步写入流水线:")
+            print(f"   提交批次: {pipeline_stats['batches']}, 合并插入: {pipeline_stats['inserts']} 次, "
+                  f"平均每次 {pipeline_stats['avg_rows_per_insert']:.0f} 行")
+            print(f"   失败记录: {pipeline_stats['rows_failed']:,}, 最大队列深度: {pipeline_stats['max_queue_depth']}")
+            for stage, timing in pipeline_stats['stages'].items():
+                if timing['count']:
+                    print(f"   {stage_names[stage]}: 平均 {timing['avg'] * 1000:.1f}ms, "
+                          f"最大 {timing['max'] * 1000:.1f}ms ({timing['count']} 次)")
+
+        memory_stats = self.memory_governor.stats()
+        budget = memory_stats['budget']
+        print(f"\n🧠 内存调控:")
+        print(f"   在途预算: {budget['limit_bytes'] / 1024 / 1024:.0f}MB, 峰值 {budget['peak_bytes'] / 1024 / 1024:.1f}MB, "
+              f"预算等待 {budget['waits']} 次")
+        print(f"   单条记录: {memory_stats['bytes_per_record']:.0f} 字节, 解析批次上限 {memory_stats['parse_batch_limit']:,} 条, "
+              f"合并目标 {memory_stats['insert_rows']:,} 行")
+        model = memory_stats['latency_model']
+        if model['per_row'] is not None:
+            print(f"   插入耗时模型: 固定开销 {model['overhead'] * 1000:.1f}ms + 每千行 {model['per_row'] * 1000000:.1f}ms "
+                  f"({model['samples']} 次插入)")
+        gc_info = memory_stats['gc']
+        print(f"   GC: 阈值 {gc_info['threshold']}, 冻结对象 {gc_info['frozen_objects']:,}")
+        for generation, pause in gc_info['pauses'].items():
+            print(f"   第{generation}代回收: {pause['count']} 次, 平均停顿 {pause['avg'] * 1000:.2f}ms, "
+                  f"最大 {pause['max'] * 1000:.2f}ms")
+
         print("=" * 80)
 
     def print_detailed_error_log(self):
@@ -1108,16 +1249,30 @@ class IntegratedUltraETLController:
 
     # === 自动文件发现和监控功能 (新增) ===
 
-    def auto_process_new_files(self) -> Dict[str, Any]:
-        """自动处理新发现的文件"""
+    def _discovery_description(self) -> str:
+        if self.auto_discovery.mode == 'inotify':
+            return f"inotify 事件驱动 (兜底复查间隔 {self.auto_discovery.scan_interval} 秒)"
+        return f"轮询活跃日期目录，间隔 {self.auto_discovery.scan_interval} 秒"
+
+    def auto_process_new_files(self, new_files: List[Path] = None) -> Dict[str, Any]:
+        """
+        自动处理新发现的文件
+
+        Args:
+            new_files: 监视器交出的文件；为空时立即检查一次
+        """
         with self.processing_lock:
             if self.is_processing:
+                if new_files:
+                    # 手动处理进行中：放回就绪队列，下次再处理
+                    self.auto_discovery.requeue(new_files)
                 return {'success': False, 'error': 'Already processing', 'skipped': True}
             self.is_processing = True
 
         try:
             start_time = time.time()
-            new_files = self.auto_discovery.discover_new_files()
+            if new_files is None:
+                new_files = self.auto_discovery.discover_new_files()
 
             if not new_files:
                 return {'success': True, 'new_files': 0, 'message': 'No new files found'}
@@ -1129,17 +1284,25 @@ class IntegratedUltraETLController:
             processed_files = 0
             errors = []
 
-            for file_path in new_files:
-                try:
-                    # 使用原有的处理逻辑
-                    result = self.process_single_file(file_path, 0, test_mode=False)
-                    if result['success'] and not result.get('skipped', False):
-                        total_records += result.get('records_processed', 0)
-                        processed_files += 1
-                    elif not result['success']:
-                        errors.append(f"{file_path}: {result.get('error', 'Unknown error')}")
-                except Exception as e:
-                    errors.append(f"{file_path}: {str(e)}")
+            file_results = []
+            if self.execution_mode == 'process':
+                # 多进程模式：主进程没有线程模式的组件池和写入流水线，新文件交给解析进程池处理
+                file_results = [(result['file_path'], result)
+                                for result in self.process_files_multiprocess(new_files)]
+            else:
+                for file_path in new_files:
+                    try:
+                        # 使用原有的处理逻辑
+                        file_results.append((file_path, self.process_single_file(file_path, 0, test_mode=False)))
+                    except Exception as e:
+                        errors.append(f"{file_path}: {str(e)}")
+
+            for file_path, result in file_results:
+                if result['success'] and not result.get('skipped', False):
+                    total_records += result.get('records_processed', 0)
+                    processed_files += 1
+                elif not result['success']:
+                    errors.append(f"{file_path}: {result.get('error', 'Unknown error')}")
 
             processing_time = time.time() - start_time
 
@@ -1169,17 +1332,24 @@ class IntegratedUltraETLController:
                 self.is_processing = False
 
     def monitoring_loop(self):
-        """监控循环线程"""
-        self.logger.info(f"自动监控已启动，扫描间隔 {self.auto_discovery.scan_interval} 秒")
+        """监控循环线程 - 等待监视器交出就绪文件后立即处理"""
+        self.logger.info(f"自动监控已启动，{self._discovery_description()}")
 
         while not self.stop_monitoring.is_set():
             try:
-                # 等待扫描间隔
-                if self.stop_monitoring.wait(self.auto_discovery.scan_interval):
-                    break  # 收到停止信号
+                # 最多等待1秒，以便及时响应停止信号
+                new_files = self.auto_discovery.discover_new_files(timeout=1.0)
+                if not new_files:
+                    continue
+                if self.stop_monitoring.is_set():
+                    self.auto_discovery.requeue(new_files)
+                    break
 
                 # 执行自动处理
-                result = self.auto_process_new_files()
+                result = self.auto_process_new_files(new_files)
+                if result.get('skipped'):
+                    self.stop_monitoring.wait(5)
+                    continue
 
                 if result.get('new_files', 0) > 0:
                     print(f"\n🔍 自动发现并处理了 {result['processed_files']} 个新文件，"
@@ -1200,7 +1370,7 @@ class IntegratedUltraETLController:
         self.stop_monitoring.clear()
         self.monitoring_thread = threading.Thread(target=self.monitoring_loop, daemon=True)
         self.monitoring_thread.start()
-        print(f"✅ 自动监控已启动，扫描间隔 {self.auto_discovery.scan_interval} 秒")
+        print(f"✅ 自动监控已启动，{self._discovery_description()}")
         print("💡 提示: 按 Ctrl+C 或输入任意键停止监控")
         return True
 
@@ -1214,6 +1384,7 @@ class IntegratedUltraETLController:
 
         if self.monitoring_thread and self.monitoring_thread.is_alive():
             self.monitoring_thread.join(timeout=5)
+        self.auto_discovery.close()
 
         print("✅ 自动监控已停止")
         return True
@@ -1255,7 +1426,7 @@ class IntegratedUltraETLController:
 
                         # 处理完成后询问是否进入自动监控模式
                         print("\\n🤖 处理完成！现在可以进入自动监控模式")
-                        print(f"📊 将每 {self.auto_discovery.scan_interval} 秒自动检查新文件并处理")
+                        print(f"📊 新文件写完后自动处理 ({self._discovery_description()})")
                         auto_monitor = input("是否启动自动监控？(Y/n): ").strip().lower()
 
                         if auto_monitor != 'n':
@@ -1327,7 +1498,7 @@ class IntegratedUltraETLController:
         print(f"  线程数: {self.max_workers}")
         print(f"  连接池: {self.connection_pool_size}")
         print(f"  进度刷新间隔: {self.progress_tracker.refresh_interval // 60} 分钟")
-        print(f"  自动扫描间隔: {self.auto_discovery.scan_interval} 秒")
+        print(f"  自动扫描间隔: {self.auto_discovery.scan_interval} 秒 ({self.auto_discovery.mode})")
 
         # 获取系统信息推荐
         if PSUTIL_AVAILABLE:
@@ -1348,7 +1519,7 @@ class IntegratedUltraETLController:
         new_workers = input(f"新的线程数 (当前{self.max_workers}, 推荐2-8): ").strip()
         new_pool = input(f"新的连接池大小 (当前{self.connection_pool_size}, 推荐=线程数): ").strip()
         new_refresh = input(f"新的进度刷新间隔(分钟) (当前{self.progress_tracker.refresh_interval // 60}, 推荐1-5): ").strip()
-        new_scan_interval = input(f"新的自动扫描间隔(秒) (当前{self.auto_discovery.scan_interval}, 推荐180-600): ").strip()
+        new_scan_interval = input(f"新的自动扫描间隔(秒) (当前{self.auto_discovery.scan_interval}, 推荐10-60): ").strip()
 
         # 应用配置
         if new_batch.isdigit():
@@ -1360,7 +1531,7 @@ class IntegratedUltraETLController:
             self.max_workers = max(1, min(16, int(new_workers)))
             print(f"✅ 线程数调整为: {self.max_workers}")
 
-            if self.max_workers != old_workers:
+            if self.max_workers != old_workers and self.execution_mode == 'thread':
                 print("🔄 重新初始化组件池...")
                 self.parser_pool = [BaseLogParser() for _ in range(self.max_workers)]
                 self.mapper_pool = [FieldMapper(geoip_db_path=str(etl_root / "data" / "GeoLite2-City.mmdb")) for _ in range(self.max_workers)]
@@ -1376,29 +1547,28 @@ class IntegratedUltraETLController:
             print(f"✅ 进度刷新间隔调整为: {refresh_minutes} 分钟")
 
         if new_scan_interval.isdigit():
-            scan_interval = max(60, min(3600, int(new_scan_interval)))  # 1分钟到1小时
+            scan_interval = max(5, min(3600, int(new_scan_interval)))  # 5秒到1小时
             self.auto_discovery.scan_interval = scan_interval
             print(f"✅ 自动扫描间隔调整为: {scan_interval} 秒")
             if self.monitoring_enabled:
-                print("⚠️  自动监控正在运行，新设置将在下次扫描时生效")
+                print("⚠️  自动监控正在运行，新设置将在下次检查时生效")
 
     def _show_processing_status(self):
         """显示处理状态"""
         print("\\n📋 文件处理状态")
         print("-" * 50)
 
-        processed_files = self.processed_state.get('processed_files', {})
-        if not processed_files:
+        total_files = self.state_store.count_files()
+        if not total_files:
             print("暂无已处理文件记录")
             return
 
-        print(f"已处理文件总数: {len(processed_files)}")
-        print(f"最后更新时间: {self.processed_state.get('last_update', 'Unknown')}")
+        partial_files = self.state_store.count_files('partial')
+        print(f"已处理文件总数: {total_files}" + (f" (其中 {partial_files} 个有批次写入失败)" if partial_files else ""))
+        print(f"最后更新时间: {self.state_store.get_meta('last_update', 'Unknown')}")
 
         # 显示最近处理的10个文件
-        recent_files = sorted(processed_files.items(),
-                            key=lambda x: x[1].get('processed_at', ''),
-                            reverse=True)[:10]
+        recent_files = self.state_store.recent_files(10)
 
         print("\\n📄 最近处理的文件:")
         for file_path, info in recent_files:
@@ -1417,6 +1587,10 @@ class IntegratedUltraETLController:
         # 保存最终状态
         self.save_state()
 
+        # 写完队列中的批次后停止写入线程
+        if self.write_pipeline is not None:
+            self.write_pipeline.stop()
+
         # 关闭数据库连接
         for writer in self.writer_pool:
             try:
@@ -1424,7 +1598,12 @@ class IntegratedUltraETLController:
             except Exception as e:
                 self.logger.warning(f"关闭数据库连接失败: {e}")
 
-        # 清理缓存
+        # 写入线程已停止，不会再有断点提交
+        self.state_store.close()
+        self.auto_discovery.close()
+
+        # 保存热点键后清理缓存
+        self._save_hot_keys()
         self.ua_cache.clear()
         self.uri_cache.clear()
 
@@ -1465,6 +1644,9 @@ def main():
     parser.add_argument('--refresh-minutes', type=int, default=3, help='进度刷新间隔(分钟)')
     parser.add_argument('--auto-monitor', action='store_true', help='启动自动监控模式（非交互式）')
     parser.add_argument('--monitor-duration', type=int, default=7200, help='自动监控持续时间（秒），默认2小时')
+    parser.add_argument('--process-mode', action='store_true',
+                        help='多进程模式：--workers 个解析映射进程 + 独立写入进程（绕开GIL）')
+    parser.add_argument('--writer-processes', type=int, default=1, help='多进程模式下的写入进程数')
 
     args = parser.parse_args()
 
@@ -1474,7 +1656,9 @@ def main():
             max_workers=args.workers,
             connection_pool_size=args.pool_size,
             enable_detailed_logging=args.detailed_logging,
-            progress_refresh_minutes=args.refresh_minutes
+            progress_refresh_minutes=args.refresh_minutes,
+            execution_mode='process' if args.process_mode else 'thread',
+            writer_processes=args.writer_processes
         ) as controller:
 
             # 自动监控模式（非交互式）
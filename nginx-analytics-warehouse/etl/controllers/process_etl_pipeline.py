@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程ETL流水线 - 解析/映射进程池 + 独立写入进程
+Process-based ETL Pipeline
+
+解析(parse_line)、字段映射(map_to_dwd)都是纯Python的CPU密集型工作，线程池受GIL限制
+只能用满一个核心。本模块把它们放到进程池中执行：
+
+1. 解析进程: 每个进程持有自己的 Parser + FieldMapper，按文件流式解析映射，
+   每满 batch_size 条记录编码为一个列式缓冲区（字段名 + 每列一个值列表）；
+   进程启动时用上次运行的热点键预热富化缓存，每个文件处理完后上报本进程的热点键
+2. 写入进程: 1~N 个进程各自持有一个 DWDWriter（ClickHouse连接只存在于写入进程中）
+3. 批次队列: 有界 multiprocessing.Queue，写入跟不上时解析进程在 put 上阻塞（背压）；
+   配置内存上限时，已编码未写完的批次另受进程间共享的在途字节预算约束，
+   批次条数受解析缓冲区上限约束，并随实测插入延迟调整（utils.memory_governor）
+4. 主进程: 只负责调度、汇总写入回执和维护状态文件；一个文件的所有批次都收到回执后
+   才回调 on_file_complete，由控制器标记为已处理（与线程模式的状态语义一致）
+5. 断点: 解析进程从续传偏移开始读取，每个批次带上序号和结束位置；主进程按序号顺序
+   推进断点并回调 on_checkpoint，由控制器立即保存。文件有批次写入失败后置位进程间共享的
+   失败标志，解析进程停止解析该文件，写入进程跳过该文件仍在队列中的批次（记为失败），
+   断点之后的数据不会被写入后在下次运行中重复
+
+使用 spawn 启动方式，Windows/Linux 行为一致。
+"""
+
+import os
+import sys
+import time
+import queue
+import pickle
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+# 添加路径以导入其他模块（spawn子进程同样需要）
+current_dir = Path(__file__).parent
+etl_root = current_dir.parent
+if str(etl_root) not in sys.path:
+    sys.path.append(str(etl_root))
+
+from parsers.base_log_parser import ParsedRecord
+from controllers.async_write_pipeline import write_columns_to
+from utils.enrichment_cache import get_enrichment_cache, load_hot_keys, merge_hot_keys, snapshot_hot_keys
+from utils.file_checkpoint import FileCheckpointTracker
+from utils.memory_governor import MemoryGovernor, RecordSizeMeter, configure_gc
+
+# 列式缓冲区序列化协议（protocol 5 支持大块缓冲区）
+COLUMNAR_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+# 解析进程内的UA/URI缓存上限（与线程模式一致）及缓存名（与控制器共用，便于热点键互通）
+WORKER_CACHE_LIMIT = 3000
+UA_CACHE_NAME = 'controller_ua'
+URI_CACHE_NAME = 'controller_uri'
+
+# UA解析失败时的默认结果
+UA_FALLBACK = {'browser': 'Unknown', 'os': 'Unknown'}
+
+# 每个文件结果中上报的每个缓存的热点键数
+HOT_KEYS_PER_FILE = 200
+
+
+# ========== 列式批次缓冲区 ==========
+
+def encode_columnar_batch(columns: Dict[str, list], rows: int) -> bytes:
+    """
+    把列数据编码为列式缓冲区
+
+    列数据由 FieldMapper.map_batch_to_columns 直接写入预分配的列缓冲区得到；
+    同一列中重复出现的对象（默认值、枚举值）在序列化时只保存一次，
+    比逐行字典更紧凑，写入端直接按列插入（DWDWriter.write_columns）。
+
+    Returns:
+        序列化后的 (字段名列表, {字段名: 值列表}, 行数)
+    """
+    return pickle.dumps((list(columns), columns, rows), protocol=COLUMNAR_PICKLE_PROTOCOL)
+
+
+def decode_columnar_batch(payload: bytes) -> Tuple[List[str], Dict[str, list], int]:
+    """解码列式缓冲区，返回 (字段名列表, {字段名: 值列表}, 行数)"""
+    return pickle.loads(payload)
+
+
+# ========== 解析进程 ==========
+
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_parse_worker(batch_queue, event_queue, parser_class, mapper_class, mapper_kwargs,
+                       hot_keys_file=None, byte_budget=None, batch_rows=None, parse_buffer_bytes=None,
+                       failed_files=None):
+    """
+    解析进程初始化 - 每个进程独立创建解析器和映射器，并用热点键预热缓存
+
+    Args:
+        byte_budget: 进程间共享的在途字节预算
+        batch_rows: 进程间共享的目标批次条数（主进程按插入延迟调整）
+        parse_buffer_bytes: 本进程解析缓冲区字节上限
+        failed_files: 进程间共享的文件写入失败标志（按文件序号）
+    """
+    _WORKER_STATE['batch_queue'] = batch_queue
+    _WORKER_STATE['failed_files'] = failed_files
+    _WORKER_STATE['event_queue'] = event_queue
+    _WORKER_STATE['byte_budget'] = byte_budget
+    _WORKER_STATE['batch_rows'] = batch_rows
+    _WORKER_STATE['parse_buffer_bytes'] = parse_buffer_bytes
+    _WORKER_STATE['record_meter'] = RecordSizeMeter()
+    _WORKER_STATE['parser'] = parser_class()
+    _WORKER_STATE['mapper'] = mapper = mapper_class(**mapper_kwargs)
+    _WORKER_STATE['ua_cache'] = get_enrichment_cache(UA_CACHE_NAME, WORKER_CACHE_LIMIT)
+    _WORKER_STATE['uri_cache'] = get_enrichment_cache(URI_CACHE_NAME, WORKER_CACHE_LIMIT)
+
+    hot_keys = load_hot_keys(hot_keys_file) if hot_keys_file else {}
+    if hot_keys:
+        if hasattr(mapper, 'warm_caches'):
+            mapper.warm_caches(hot_keys)
+        for user_agent in reversed(hot_keys.get(UA_CACHE_NAME, [])):
+            _cached_parse(_WORKER_STATE['ua_cache'], user_agent, mapper,
+                          '_parse_user_agent_enhanced', UA_FALLBACK)
+        for uri in reversed(hot_keys.get(URI_CACHE_NAME, [])):
+            _cached_parse(_WORKER_STATE['uri_cache'], uri, mapper,
+                          '_parse_uri_components', {'path': uri, 'query_count': 0})
+
+    # 解析器、映射器和预热的缓存常驻整个进程生命周期，冻结后GC不再扫描
+    configure_gc()
+
+
+def _cached_parse(cache, key: str, mapper, method_name: str, fallback: Dict) -> Dict:
+    """进程内缓存解析（LRU淘汰）"""
+    parsed = cache.get(key)
+    if parsed is not None:
+        return parsed
+
+    try:
+        parsed = getattr(mapper, method_name)(key)
+    except Exception:
+        parsed = fallback
+
+    cache.put(key, parsed)
+    return parsed
+
+
+def _attach_cached_parses(parsed_data: ParsedRecord, mapper) -> None:
+    """附加UA/URI缓存解析结果 - 与线程模式 process_single_file 的处理一致"""
+    user_agent = parsed_data.get('user_agent', '')
+    if user_agent:
+        parsed_data.cached_ua = _cached_parse(
+            _WORKER_STATE['ua_cache'], user_agent, mapper, '_parse_user_agent_enhanced', UA_FALLBACK)
+
+    request = parsed_data.request
+    uri = ''
+    if request:
+        request_parts = request.split(' ')
+        uri = request_parts[1] if len(request_parts) >= 2 else request
+    if uri:
+        parsed_data.cached_uri = _cached_parse(
+            _WORKER_STATE['uri_cache'], uri, mapper, '_parse_uri_components',
+            {'path': uri, 'query_count': 0})
+
+
+def _parse_file_worker(file_key: str, file_seq: int, batch_size: int,
+                       limit: Optional[int], test_mode: bool, start_offset: int = 0,
+                       start_line: int = 0, complete_lines_only: bool = False) -> Dict[str, Any]:
+    """
+    从续传位置开始解析并映射单个文件，按批次投递到写入队列
+
+    Returns:
+        解析结果，batches 为已投递的批次数（主进程据此判断文件是否写完），
+        end_offset/end_line 为解析结束位置；文件有批次写入失败时提前停止
+    """
+    parser = _WORKER_STATE['parser']
+    mapper = _WORKER_STATE['mapper']
+    batch_queue = _WORKER_STATE['batch_queue']
+    file_path = Path(file_key)
+
+    started_at = time.time()
+    _WORKER_STATE['event_queue'].put(('started', file_key, file_seq, started_at))
+
+    file_lines = 0
+    file_records = 0
+    file_errors = 0
+    batches = 0
+    parsed_count = 0
+    batch = []
+    end_offset, end_line = start_offset, start_line
+    byte_budget = _WORKER_STATE.get('byte_budget')
+    batch_rows = _WORKER_STATE.get('batch_rows')
+    parse_buffer_bytes = _WORKER_STATE.get('parse_buffer_bytes')
+    record_meter = _WORKER_STATE.get('record_meter')
+    failed_files = _WORKER_STATE.get('failed_files')
+
+    def file_failed() -> bool:
+        return failed_files is not None and bool(failed_files[file_seq])
+
+    def batch_limit() -> int:
+        """当前批次条数：主进程调整的目标条数，且不超过解析缓冲区上限"""
+        target = batch_rows.value if batch_rows is not None else batch_size
+        if parse_buffer_bytes and record_meter is not None:
+            return record_meter.batch_limit(parse_buffer_bytes, target)
+        return target
+
+    def flush():
+        nonlocal batches, file_records, file_errors
+        if parse_buffer_bytes and record_meter is not None:
+            record_meter.measure(batch)
+        # 映射结果直接写入按列预分配的缓冲区
+        columns, rows, errors = mapper.map_batch_to_columns(batch, file_path.name)
+        file_records += rows
+        file_errors += errors
+        if rows and not test_mode:
+            payload = encode_columnar_batch(columns, rows)
+            # 在途字节超出预算或队列满时阻塞，形成背压；批次序号和结束位置随写入回执带回主进程
+            if byte_budget is not None:
+                byte_budget.acquire(len(payload))
+            batch_queue.put((file_key, file_seq, batches, end_offset, end_line, payload))
+            batches += 1
+
+    rows_limit = batch_limit()
+
+    try:
+        for parsed_data, end_offset, end_line in parser.parse_file_from(
+                file_path, start_offset, start_line, complete_lines_only):
+            file_lines += 1
+            if not parsed_data:
+                continue
+
+            try:
+                _attach_cached_parses(parsed_data, mapper)
+            except Exception as e:
+                file_errors += 1
+                if file_errors <= 5:
+                    logging.getLogger(__name__).error(f"记录处理错误: {e}")
+                continue
+            batch.append(parsed_data)
+            parsed_count += 1
+
+            if len(batch) >= rows_limit:
+                flush()
+                batch = []
+                rows_limit = batch_limit()
+                # 已有批次写入失败时停止解析，断点之后的数据留到下次运行
+                if file_failed():
+                    logging.getLogger(__name__).warning(f"{file_path.name}: 批次写入失败，停止处理该文件")
+                    break
+
+            if limit and parsed_count >= limit:
+                break
+
+        if batch and not file_failed():
+            flush()
+
+        return {
+            'success': True,
+            'file_path': file_key,
+            'lines_processed': file_lines,
+            'records_processed': file_records,
+            'errors': file_errors,
+            'batches': batches,
+            'end_offset': end_offset,
+            'end_line': end_line,
+            'started_at': started_at,
+            'hot_keys': snapshot_hot_keys(HOT_KEYS_PER_FILE)
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'file_path': file_key,
+            'lines_processed': file_lines,
+            'records_processed': file_records,
+            'errors': file_errors + 1,
+            'batches': batches,
+            'end_offset': end_offset,
+            'end_line': end_line,
+            'started_at': started_at,
+            'error': f"处理文件 {file_path.name} 失败: {e}"
+        }
+
+
+# ========== 写入进程 ==========
+
+def _writer_process_main(batch_queue, event_queue, writer_class, byte_budget=None, failed_files=None):
+    """
+    写入进程主循环 - 独占一个ClickHouse连接，列式批次按列插入（写入器没有 write_columns 时
+    回退到 write_batch，写完归还在途预算），收到 None 时退出
+
+    写入失败时置位该文件的失败标志；已置位文件的批次不再写入，直接回执失败
+    """
+    logger = logging.getLogger(__name__)
+    writer = writer_class()
+    if not writer.connect():
+        logger.error(f"写入进程 {os.getpid()} 连接数据库失败，将在写入时重试")
+
+    try:
+        while True:
+            item = batch_queue.get()
+            if item is None:
+                break
+
+            file_key, file_seq, seq, end_offset, end_line, payload = item
+            write_start = time.time()
+            rows = 0
+            success = False
+            try:
+                _, columns, rows = decode_columnar_batch(payload)
+                if failed_files is None or not failed_files[file_seq]:
+                    result = write_columns_to(writer, columns, rows)
+                    success = bool(result and result.get('success', False))
+            except Exception as e:
+                logger.error(f"写入进程 {os.getpid()} 批量写入失败: {e}")
+            if not success and failed_files is not None:
+                failed_files[file_seq] = 1
+            if byte_budget is not None:
+                byte_budget.release(len(payload))
+
+            event_queue.put(('written', file_key, seq, end_offset, end_line, rows, success,
+                             time.time() - write_start))
+    finally:
+        writer.close()
+
+
+# ========== 主进程调度 ==========
+
+class ProcessETLPipeline:
+    """多进程ETL流水线调度器"""
+
+    def __init__(self,
+                 parser_class,
+                 mapper_class,
+                 writer_class,
+                 mapper_kwargs: Dict[str, Any] = None,
+                 parse_workers: int = None,
+                 writer_processes: int = 1,
+                 batch_size: int = 2000,
+                 queue_batches: int = None,
+                 hot_keys_file: Path = None,
+                 memory_limit_mb: int = None,
+                 logger: logging.Logger = None):
+        """
+        Args:
+            parse_workers: 解析进程数，默认 CPU核心数 - 写入进程数
+            writer_processes: 写入进程数（每个进程一个ClickHouse连接）
+            queue_batches: 批次队列长度（背压阈值），默认每个写入进程4个批次
+            hot_keys_file: 热点键文件，解析进程启动时据此预热缓存
+            memory_limit_mb: 内存上限，设置时启用在途字节预算、解析缓冲区上限和按插入延迟调整批次
+        """
+        self.parser_class = parser_class
+        self.mapper_class = mapper_class
+        self.writer_class = writer_class
+        self.mapper_kwargs = mapper_kwargs or {}
+        self.writer_processes = max(1, writer_processes)
+        self.parse_workers = parse_workers or max(1, (os.cpu_count() or 2) - self.writer_processes)
+        self.batch_size = batch_size
+        self.queue_batches = queue_batches or self.writer_processes * 4
+        self.hot_keys_file = str(hot_keys_file) if hot_keys_file else None
+        self.memory_limit_mb = memory_limit_mb
+        # 最近一次 run 的内存调控器（统计用）
+        self.memory_governor: Optional[MemoryGovernor] = None
+        # 各解析进程上报的热点键（合并后由控制器保存）
+        self.hot_keys: Dict[str, List[str]] = {}
+        self.logger = logger or logging.getLogger(__name__)
+
+    def run(self, file_paths: List[Path], test_mode: bool = False, limit: int = None,
+            on_file_start: Callable = None, on_batch_written: Callable = None,
+            on_file_complete: Callable = None, on_idle: Callable = None,
+            resume_from: Dict[str, Tuple[int, int, bool]] = None,
+            on_checkpoint: Callable = None) -> List[Dict[str, Any]]:
+        """
+        处理一组文件
+
+        Args:
+            on_file_start: (file_seq, file_path) 解析进程开始处理文件
+            on_batch_written: (rows, success, write_time) 一个批次写入完成
+            on_file_complete: (file_seq, result) 文件的全部批次已写入（或测试模式下解析完成），
+                              result['checkpoint'] 为文件结束时的断点
+            on_idle: () 主循环空闲时调用（用于刷新进度）
+            resume_from: {文件路径: (起始偏移, 起始行数, 是否只处理完整行)}，缺省从头处理
+            on_checkpoint: (file_path, offset, line_count, rows) 文件断点推进
+
+        Returns:
+            每个文件的处理结果，格式与线程模式 process_single_file 一致
+        """
+        ctx = multiprocessing.get_context('spawn')
+        batch_queue = ctx.Queue(maxsize=self.queue_batches)
+        event_queue = ctx.Queue()
+
+        governor = byte_budget = batch_rows = None
+        if self.memory_limit_mb:
+            governor = MemoryGovernor(self.memory_limit_mb, self.parse_workers, self.batch_size,
+                                      self.batch_size, mp_context=ctx, logger=self.logger)
+            byte_budget = governor.budget
+            batch_rows = ctx.Value('q', governor.insert_rows, lock=False)
+        self.memory_governor = governor
+        # 文件写入失败标志（按文件序号），解析进程和写入进程据此跳过失败文件的后续批次
+        failed_files = ctx.Array('b', len(file_paths), lock=False)
+
+        writers = []
+        if not test_mode:
+            for i in range(self.writer_processes):
+                process = ctx.Process(target=_writer_process_main,
+                                      args=(batch_queue, event_queue, self.writer_class, byte_budget,
+                                            failed_files),
+                                      name=f"etl-writer-{i}", daemon=True)
+                process.start()
+                writers.append(process)
+
+        file_seqs = {str(path): seq for seq, path in enumerate(file_paths)}
+        pending = {key: {'parse': None, 'acked': 0, 'failed_rows': 0} for key in file_seqs}
+        results = []
+
+        resume_from = resume_from or {}
+        checkpoints = FileCheckpointTracker()
+        for key in file_seqs:
+            offset, line_count, _ = resume_from.get(key, (0, 0, False))
+            checkpoints.begin(key, offset, line_count)
+
+        self.logger.info(f"🧩 多进程模式: {self.parse_workers} 个解析进程, "
+                         f"{len(writers)} 个写入进程, 队列上限 {self.queue_batches} 批")
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=ctx,
+                                     initializer=_init_parse_worker,
+                                     initargs=(batch_queue, event_queue, self.parser_class,
+                                               self.mapper_class, self.mapper_kwargs,
+                                               self.hot_keys_file, byte_budget, batch_rows,
+                                               governor.parse_buffer_bytes if governor else None,
+                                               failed_files)) as executor:
+                futures = {
+                    executor.submit(_parse_file_worker, key, seq, self.batch_size, limit, test_mode,
+                                    *resume_from.get(key, (0, 0, False))): key
+                    for key, seq in file_seqs.items()
+                }
+
+                def batch_written(rows: int, success: bool, write_time: float):
+                    if governor is not None and success:
+                        # 解析进程在下一个批次读取调整后的条数
+                        batch_rows.value = governor.record_insert(rows, write_time)
+                    if on_batch_written:
+                        on_batch_written(rows, success, write_time)
+
+                while pending:
+                    self._drain_events(event_queue, pending, file_seqs, on_file_start, batch_written,
+                                       checkpoints, on_checkpoint)
+
+                    for future in [f for f in futures if f.done()]:
+                        key = futures.pop(future)
+                        try:
+                            pending[key]['parse'] = future.result()
+                            merge_hot_keys(self.hot_keys, pending[key]['parse'].pop('hot_keys', {}))
+                        except Exception as e:
+                            pending[key]['parse'] = {
+                                'success': False, 'file_path': key, 'lines_processed': 0,
+                                'records_processed': 0, 'errors': 1, 'batches': 0,
+                                'started_at': time.time(), 'error': f"解析进程异常: {e}"
+                            }
+
+                    # 写入进程全部退出时，由主进程消费队列并记为写入失败，避免解析进程永久阻塞
+                    if writers and not any(p.is_alive() for p in writers):
+                        self._discard_queued_batches(batch_queue, pending, checkpoints)
+                        if byte_budget is not None:
+                            # 写入中的批次不会再归还预算
+                            byte_budget.reset()
+
+                    for key in [k for k, s in pending.items()
+                                if s['parse'] is not None and s['acked'] >= s['parse']['batches']]:
+                        state = pending.pop(key)
+                        result = self._build_file_result(state)
+                        parse = state['parse']
+                        result['checkpoint'] = checkpoints.finish(
+                            key, parse['batches'], parse.get('end_offset', 0), parse.get('end_line', 0))
+                        results.append(result)
+                        if on_file_complete:
+                            on_file_complete(file_seqs[key], result)
+
+                    if on_idle:
+                        on_idle()
+        finally:
+            for _ in writers:
+                try:
+                    batch_queue.put(None, timeout=5)
+                except queue.Full:
+                    break
+            for process in writers:
+                process.join(timeout=60)
+                if process.is_alive():
+                    self.logger.warning(f"写入进程 {process.name} 未正常退出，强制终止")
+                    process.terminate()
+
+        return results
+
+    def _drain_events(self, event_queue, pending: Dict[str, Dict], file_seqs: Dict[str, int],
+                      on_file_start: Callable, on_batch_written: Callable,
+                      checkpoints: FileCheckpointTracker, on_checkpoint: Callable, timeout: float = 0.2):
+        """读取子进程事件（文件开始、批次写入回执），按回执推进文件断点"""
+        try:
+            event = event_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+
+        while True:
+            if event[0] == 'started':
+                _, file_key, file_seq, _ = event
+                if on_file_start:
+                    on_file_start(file_seq, Path(file_key))
+            elif event[0] == 'written':
+                _, file_key, seq, end_offset, end_line, rows, success, write_time = event
+                state = pending.get(file_key)
+                if state is not None:
+                    state['acked'] += 1
+                    if not success:
+                        state['failed_rows'] += rows
+                if on_batch_written:
+                    on_batch_written(rows, success, write_time)
+                advanced = checkpoints.ack(file_key, seq, end_offset, end_line, rows, success)
+                if advanced and on_checkpoint:
+                    on_checkpoint(Path(file_key), *advanced)
+
+            try:
+                event = event_queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _discard_queued_batches(self, batch_queue, pending: Dict[str, Dict],
+                                checkpoints: FileCheckpointTracker):
+        """写入进程不可用时丢弃已排队的批次并记为失败（断点停在失败批次之前）"""
+        while True:
+            try:
+                item = batch_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                continue
+            file_key, _, seq, end_offset, end_line, payload = item
+            rows = decode_columnar_batch(payload)[2]
+            state = pending.get(file_key)
+            if state is not None:
+                state['acked'] += 1
+                state['failed_rows'] += rows
+            checkpoints.ack(file_key, seq, end_offset, end_line, rows, False)
+
+    @staticmethod
+    def _build_file_result(state: Dict[str, Any]) -> Dict[str, Any]:
+        """汇总解析结果与写入回执"""
+        parse = state['parse']
+        processing_time = time.time() - parse['started_at']
+        records = parse['records_processed']
+        result = {
+            'success': parse['success'],
+            'file_path': parse['file_path'],
+            'lines_processed': parse['lines_processed'],
+            'records_processed': records,
+            'errors': parse['errors'] + state['failed_rows'],
+            'processing_time': processing_time,
+            'speed_rps': records / processing_time if processing_time > 0 else 0
+        }
+        if not parse['success']:
+            result['error'] = parse.get('error', '')
+        return result
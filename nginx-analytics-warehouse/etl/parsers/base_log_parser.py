@@ -11,14 +11,112 @@ http_host:domain remote_addr:"ip" remote_port:"port" time:"timestamp" request:"m
 import re
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, Iterator
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from pathlib import Path
 
+# 日志字段（与 field_patterns 顺序一致）
+LOG_FIELDS = ('http_host', 'remote_addr', 'remote_port', 'remote_user', 'time', 'request',
+              'code', 'body', 'http_referer', 'ar_time', 'RealIp', 'agent')
+
+# 解析错误位（ParsedRecord.error_flags）
+PARSE_ERROR_MISSING_REMOTE_ADDR = 1 << 0
+PARSE_ERROR_MISSING_TIME = 1 << 1
+PARSE_ERROR_MISSING_CODE = 1 << 2
+PARSE_ERROR_INVALID_TIME = 1 << 3
+PARSE_ERROR_INVALID_STATUS = 1 << 4
+
+# 关键字段 -> (字段下标, 缺失时的错误位)
+_REQUIRED_FIELDS = (
+    ('remote_addr', LOG_FIELDS.index('remote_addr'), PARSE_ERROR_MISSING_REMOTE_ADDR),
+    ('time', LOG_FIELDS.index('time'), PARSE_ERROR_MISSING_TIME),
+    ('code', LOG_FIELDS.index('code'), PARSE_ERROR_MISSING_CODE),
+)
+_TIME_INDEX = LOG_FIELDS.index('time')
+_CODE_INDEX = LOG_FIELDS.index('code')
+
+
+class ParsedRecord:
+    """
+    单行解析结果的紧凑表示（解析器 -> 映射器）
+
+    用 __slots__ 代替每行一个字典和错误列表：错误记为位掩码，原始行可不保留，
+    UA/URI缓存解析结果放在固定槽位。get()/[] 的读取方式与原字典一致，to_dict() 还原为原字典格式。
+    """
+
+    __slots__ = LOG_FIELDS + ('raw_line', 'line_number', 'source_file', 'error_flags',
+                              'cached_ua', 'cached_uri')
+
+    def __init__(self, values, raw_line: Optional[str], line_number: int, source_file: str,
+                 error_flags: int = 0):
+        (self.http_host, self.remote_addr, self.remote_port, self.remote_user, self.time, self.request,
+         self.code, self.body, self.http_referer, self.ar_time, self.RealIp, self.agent) = values
+        self.raw_line = raw_line
+        self.line_number = line_number
+        self.source_file = source_file
+        self.error_flags = error_flags
+        self.cached_ua = None
+        self.cached_uri = None
+
+    @property
+    def parsing_errors(self) -> List[str]:
+        """按错误位还原的错误信息列表"""
+        flags = self.error_flags
+        if not flags:
+            return []
+
+        errors = [f'缺失关键字段: {field}' for field, _, flag in _REQUIRED_FIELDS if flags & flag]
+        if flags & PARSE_ERROR_INVALID_TIME:
+            errors.append(f'时间格式无效: {self.time}')
+        if flags & PARSE_ERROR_INVALID_STATUS:
+            errors.append(f'状态码格式无效: {self.code}')
+        return errors
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为 parse_line 原有的字典格式"""
+        data = {}
+        if self.raw_line is not None:
+            data['raw_line'] = self.raw_line
+        data['line_number'] = self.line_number
+        data['source_file'] = self.source_file
+        data['parsing_errors'] = self.parsing_errors
+        for field in LOG_FIELDS:
+            data[field] = getattr(self, field)
+        if self.cached_ua is not None:
+            data['_cached_ua'] = self.cached_ua
+        if self.cached_uri is not None:
+            data['_cached_uri'] = self.cached_uri
+        return data
+
+    def __str__(self) -> str:
+        # 与原字典的字符串形式一致
+        return str(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"ParsedRecord({self.to_dict()!r})"
+
+
 class BaseLogParser:
     """底座格式日志解析器"""
     
-    def __init__(self):
+    def __init__(self, keep_raw_line: bool = True):
+        """
+        Args:
+            keep_raw_line: 解析结果是否保留原始行（映射器的 raw_log_entry 依赖它）
+        """
         self.logger = logging.getLogger(__name__)
+        self.keep_raw_line = keep_raw_line
         
         # 字段提取模式
         self.field_patterns = {
@@ -67,6 +165,16 @@ class BaseLogParser:
         Returns:
             解析后的字典，如果解析失败返回None
         """
+        record = self.parse_record(line, line_number, source_file)
+        return record.to_dict() if record is not None else None
+    
+    def parse_record(self, line: str, line_number: int = 0, source_file: str = '') -> Optional[ParsedRecord]:
+        """
+        解析单行日志为紧凑记录（流式处理使用，不为每行分配字典）
+        
+        Returns:
+            ParsedRecord，如果解析失败返回None
+        """
         self.stats['total_lines'] += 1
         
         if not line or line.strip() == '':
@@ -76,30 +184,20 @@ class BaseLogParser:
         line = line.strip()
         
         try:
-            # 基础解析结果
-            parsed_data = {
-                'raw_line': line,
-                'line_number': line_number,
-                'source_file': source_file,
-                'parsing_errors': []
-            }
-            
             # 提取所有字段
-            for field_name, patterns in self.field_patterns.items():
-                value = self._extract_field_value(line, patterns)
-                parsed_data[field_name] = value
-                
-                # 记录缺失的关键字段
-                if value is None and field_name in ['time', 'remote_addr', 'code']:
-                    parsed_data['parsing_errors'].append(f'缺失关键字段: {field_name}')
+            field_patterns = self.field_patterns
+            values = [self._extract_field_value(line, field_patterns[field]) for field in LOG_FIELDS]
             
-            # 基本验证
-            if not self._validate_parsed_data(parsed_data):
-                self.stats['error_lines'] += 1
-                return None
+            # 基本验证：关键字段缺失时丢弃
+            for _, index, _ in _REQUIRED_FIELDS:
+                if values[index] is None:
+                    self.stats['error_lines'] += 1
+                    return None
             
+            error_flags = self._format_error_flags(values)
             self.stats['parsed_lines'] += 1
-            return parsed_data
+            return ParsedRecord(values, line if self.keep_raw_line else None,
+                                line_number, source_file, error_flags)
             
         except Exception as e:
             self.logger.error(f"解析第{line_number}行失败: {e}")
@@ -145,6 +243,42 @@ class BaseLogParser:
                         f"解析失败={self.stats['error_lines']}, "
                         f"空行={self.stats['empty_lines']}")
     
+    def parse_file_from(self, file_path: str, start_offset: int = 0, start_line: int = 0,
+                        complete_lines_only: bool = False) -> Iterator[Tuple[Optional[Dict[str, Any]], int, int]]:
+        """
+        从指定字节偏移开始逐行解析（断点续传/追加文件增量摄取）
+
+        Args:
+            file_path: 日志文件路径
+            start_offset: 起始字节偏移（必须位于行首）
+            start_line: 起始偏移之前的行数
+            complete_lines_only: 为True时不处理末尾没有换行符的行（文件仍在写入）
+
+        Yields:
+            (ParsedRecord或None, 该行结束后的字节偏移, 行号)，解析失败的行也会产出以便推进偏移
+        """
+        file_path = Path(file_path)
+
+        if not file_path.exists():
+            self.logger.error(f"文件不存在: {file_path}")
+            return
+
+        offset = start_offset
+        line_number = start_line
+        try:
+            with open(file_path, 'rb') as f:
+                f.seek(start_offset)
+                for raw_line in f:
+                    if complete_lines_only and not raw_line.endswith(b'\n'):
+                        break
+                    offset += len(raw_line)
+                    line_number += 1
+                    line = raw_line.decode('utf-8', errors='replace')
+                    yield self.parse_record(line, line_number, file_path.name), offset, line_number
+
+        except Exception as e:
+            self.logger.error(f"读取文件失败 {file_path}: {e}")
+
     def batch_parse_files(self, file_paths: list, batch_size: int = 500) -> Iterator[list]:
         """
         批量解析多个文件
@@ -205,26 +339,21 @@ class BaseLogParser:
         
         return None
     
-    def _validate_parsed_data(self, parsed_data: Dict[str, Any]) -> bool:
-        """验证解析后的数据"""
-        # 检查关键字段是否存在
-        required_fields = ['time', 'remote_addr', 'code']
-        
-        for field in required_fields:
-            if parsed_data.get(field) is None:
-                return False
+    def _format_error_flags(self, values: list) -> int:
+        """检查时间和状态码格式，返回错误位"""
+        error_flags = 0
         
         # 检查时间格式
-        time_str = parsed_data.get('time')
+        time_str = values[_TIME_INDEX]
         if time_str and not self._is_valid_time_format(time_str):
-            parsed_data['parsing_errors'].append(f'时间格式无效: {time_str}')
+            error_flags |= PARSE_ERROR_INVALID_TIME
         
         # 检查状态码格式
-        code_str = parsed_data.get('code')
+        code_str = values[_CODE_INDEX]
         if code_str and not self._is_valid_status_code(code_str):
-            parsed_data['parsing_errors'].append(f'状态码格式无效: {code_str}')
+            error_flags |= PARSE_ERROR_INVALID_STATUS
         
-        return True
+        return error_flags
     
     def _is_valid_time_format(self, time_str: str) -> bool:
         """验证时间格式"""
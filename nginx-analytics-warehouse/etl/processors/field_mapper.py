@@ -20,9 +20,21 @@ from datetime import datetime, date
 from pathlib import Path
 from typing import Dict, Any, Optional, Union, List, Tuple
 from urllib.parse import urlparse, parse_qs
-from functools import lru_cache
 from ipaddress import ip_address, ip_network
 
+try:
+    from utils.uri_template import get_uri_template_engine
+    from utils.enrichment_cache import enrichment_cached, get_enrichment_cache, get_enrichment_cache_stats
+    from utils.ip_range_index import (get_ip_range_index, ISP_PREFIXES, SUSPICIOUS_PREFIXES, TOR_EXIT_PREFIXES,
+                                      PROXY_PREFIXES, VPN_PREFIXES, DATACENTER_PREFIXES)
+except ImportError:
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent))
+    from utils.uri_template import get_uri_template_engine
+    from utils.enrichment_cache import enrichment_cached, get_enrichment_cache, get_enrichment_cache_stats
+    from utils.ip_range_index import (get_ip_range_index, ISP_PREFIXES, SUSPICIOUS_PREFIXES, TOR_EXIT_PREFIXES,
+                                      PROXY_PREFIXES, VPN_PREFIXES, DATACENTER_PREFIXES)
+
 # 第三方库
 try:
     from user_agents import parse as ua_parse
@@ -40,6 +52,113 @@ except ImportError:
     logging.warning("geoip2库未安装，将使用简化IP解析")
 
 
+# 分组缓存（请求行/UA/IP等）每组的容量
+GROUP_MEMO_SIZE = 20000
+
+# 字段分组（每组按输入值缓存）
+DWD_FIELD_GROUPS = ('request', 'ua', 'ip', 'status', 'referer', 'duration', 'time', 'server')
+
+# 视为"未填充"的值（数据质量评估）
+EMPTY_VALUES = [None, '', 0, False, [], {}]
+
+# 与输入无关的固定字段（日志中无法获取，使用默认值）
+STATIC_DWD_FIELDS = {
+    'server_protocol': 'HTTP/1.1',
+    'request_body_size': 0,  # POST请求可能有body，但日志中没有
+    'bytes_received': 0,
+    'log_format_version': '1.0',
+    'request_processing_time': 0,
+
+    'application_version': '',
+    'service_version': '',
+    'service_mesh_name': '',
+    'upstream_server': '',
+    'downstream_service': '',
+    'api_submodule': '',
+    'api_subcategory': '',
+    'business_subdomain': '',
+    'business_operation_subtype': '',
+    'workflow_step': '',
+    'process_stage': '',
+    'user_session_stage': '',
+    'access_method': 'sync',  # 默认同步
+
+    # 用户信息
+    'user_id': '',
+    'session_id': '',
+    'user_type': 'guest',
+    'user_tier': 'free',
+    'user_segment': 'consumer',
+    'authentication_method': 'none',
+    'authorization_level': 'public',
+
+    # 链路追踪
+    'span_id': '',
+    'parent_span_id': '',
+    'transaction_id': '',
+    'business_transaction_id': '',
+    'batch_id': '',
+
+    # 缓存信息
+    'cache_key': '',
+    'cache_age': 0,
+    'cache_hit_ratio': 0.0,
+
+    # 连接信息
+    'connection_requests': 1,
+    'connection_id': '',
+    'connection_type': 'keep_alive',
+    'ssl_session_reused': False,
+
+    # 标签和元数据
+    'feature_flag': '',
+    'ab_test_group': '',
+    'experiment_id': '',
+    'cookie_count': 0,
+    'header_size': 0,
+    'campaign_id': '',
+    'network_type': 'unknown',
+
+    # 基础设施信息
+    'load_balancer_node': '',
+    'edge_location': '',
+    'datacenter': '',
+    'availability_zone': '',
+    'cluster_node': '',
+    'instance_id': '',
+    'pod_name': '',
+    'container_id': '',
+
+    # 错误与安全分析
+    'error_subcategory': '',
+    'error_propagation_path': '',
+    'upstream_status_code': '',
+    'root_cause_analysis': '',
+    'attack_signature': '',
+    'geo_anomaly': False,
+    'access_pattern_anomaly': False,
+    'rate_limit_hit': False,
+    'blocked_by_waf': False,
+
+    # 衍生字段
+    'is_retry': False,  # 需要会话级别的分析才能准确判断
+    'is_holiday': False,  # 需要节假日数据库
+    'enrichment_status': 'complete',
+}
+
+# 每条记录需要独立实例的空列表/空字典字段
+LIST_DWD_FIELDS = ('custom_tags', 'business_tags', 'error_chain', 'validation_errors', 'processing_flags')
+DICT_DWD_FIELDS = ('custom_headers', 'security_headers', 'custom_dimensions', 'custom_metrics', 'metadata')
+
+
+def _count_filled(fields: Dict[str, Any]) -> int:
+    """统计非空字段数"""
+    return sum(1 for value in fields.values() if value not in EMPTY_VALUES)
+
+
+STATIC_FILLED_COUNT = _count_filled(STATIC_DWD_FIELDS)
+
+
 class FieldMapper:
     """字段映射器 - 重构版"""
     
@@ -77,16 +196,19 @@ class FieldMapper:
             else:
                 self.logger.info(f"📍 GeoIP数据库文件不存在: {geoip_db_path}")
                 self.logger.info("💡 提示: 下载GeoLite2-City.mmdb到data目录可启用精确地理定位")
+
+        # IPv4区间索引（内置IP段 + 已加载的GeoIP库），为None时逐条解析
+        self.ip_index = get_ip_range_index(str(geoip_db_path) if self.geoip_reader else None)
         
         # 预编译正则表达式
         self._compile_patterns()
-        
-        # 初始化缓存统计
-        self.cache_stats = {
-            'ua_hits': 0,
-            'ua_misses': 0,
-            'ip_hits': 0,
-            'ip_misses': 0,
+
+
+        # 分组字段缓存：分组名 -> 共享LRU缓存 {输入值: (字段, 非空字段数, 附加值)}
+        # 按类名区分，子类重写分组计算时不会读到父类的结果
+        self._group_memo = {
+            group: get_enrichment_cache(f'dwd_group.{type(self).__name__}.{group}', GROUP_MEMO_SIZE)
+            for group in DWD_FIELD_GROUPS
         }
     
     def _compile_patterns(self):
@@ -115,97 +237,244 @@ class FieldMapper:
     def map_to_dwd(self, parsed_data: Dict[str, Any], source_file: str = '') -> Dict[str, Any]:
         """
         将解析后的数据映射到DWD表结构
-        
+
+        字段按输入分组（请求行、UA、IP、状态码、Referer、时间、耗时、域名），
+        每组对每个不同的输入值只计算一次，之后直接复用；只有与单条日志相关的字段逐条计算。
+
         Args:
             parsed_data: 解析后的原始数据
             source_file: 源文件名
-            
+
         Returns:
             映射后的DWD结构数据
         """
         try:
-            dwd_record = {}
-            
-            # === 基础字段映射 ===
-            self._map_basic_fields(dwd_record, parsed_data, source_file)
-            
-            # === 时间字段映射 ===
-            self._map_time_fields(dwd_record, parsed_data)
-            
-            # === 网络和地理信息 ===
-            self._map_network_geo_fields(dwd_record, parsed_data)
-            
-            # === 请求响应字段 ===
-            self._map_request_response_fields(dwd_record, parsed_data)
-            
-            # === 性能字段映射 ===
-            self._map_performance_fields(dwd_record, parsed_data)
-            
-            # === User-Agent解析 ===
-            self._map_user_agent_fields(dwd_record, parsed_data)
-            
-            # === 业务字段映射 ===
-            self._map_business_fields(dwd_record, parsed_data)
-            
-            # === 权限控制维度 ===
-            self._map_permission_fields(dwd_record, parsed_data)
-            
-            # === 错误分析维度 ===
-            self._map_error_fields(dwd_record, parsed_data)
-            
-            # === 安全分析维度 ===
-            self._map_security_fields(dwd_record, parsed_data)
-            
-            # === 计算衍生字段 ===
-            self._generate_derived_fields(dwd_record)
-            
-            # === 数据质量评估 ===
-            self._assess_data_quality(dwd_record, parsed_data)
-            
-            return dwd_record
-            
+            return self._build_dwd_record(parsed_data, source_file)
         except Exception as e:
             self.logger.error(f"字段映射失败: {e}")
             return self._create_fallback_record(parsed_data, source_file, str(e))
-    
-    def _map_basic_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any], source_file: str):
-        """映射基础字段"""
-        # 网络基础字段
-        dwd_record['client_ip'] = parsed_data.get('RealIp', parsed_data.get('remote_addr', ''))
-        dwd_record['client_port'] = self._safe_int(parsed_data.get('remote_port'), 0)
-        dwd_record['xff_ip'] = parsed_data.get('RealIp', '')
-        dwd_record['client_real_ip'] = parsed_data.get('RealIp', parsed_data.get('remote_addr', ''))
-        
-        # 服务器信息
-        dwd_record['server_name'] = parsed_data.get('http_host', '')
-        dwd_record['server_port'] = 443 if 'https' in parsed_data.get('http_host', '') else 80
-        dwd_record['server_protocol'] = 'HTTP/1.1'  # 从request字段提取
-        
-        # 请求信息解析
-        request_str = parsed_data.get('request', '')
-        request_info = self._parse_request_line(request_str)
-        
-        dwd_record['request_method'] = request_info['method']
-        dwd_record['request_uri'] = request_info['uri']
-        dwd_record['request_uri_normalized'] = self._normalize_uri(request_info['uri'])
-        dwd_record['request_full_uri'] = request_str
-        dwd_record['request_path'] = request_info['path']
-        dwd_record['query_parameters'] = request_info['query_string']
-        dwd_record['query_params_count'] = len(request_info['query_params'])
-        dwd_record['http_protocol_version'] = request_info['protocol']
-        
-        # 请求体大小（从日志推断）
-        dwd_record['request_body_size'] = 0  # POST请求可能有body，但日志中没有
-        
-        # User-Agent和Referer
-        dwd_record['user_agent_string'] = parsed_data.get('agent', '')
-        dwd_record['referer_url'] = parsed_data.get('http_referer', '')
-        dwd_record['referer_domain'] = self._extract_domain(parsed_data.get('http_referer', ''))
-        
-        # 日志元信息
-        dwd_record['log_source_file'] = source_file
-        dwd_record['log_format_version'] = '1.0'
-        dwd_record['raw_log_entry'] = str(parsed_data)[:1000]  # 截断避免过长
+
+    def map_batch_to_columns(self, parsed_records: List[Dict[str, Any]],
+                             source_file: str = '') -> Tuple[Dict[str, List[Any]], int, int]:
+        """
+        批量映射并直接写入按列预分配的缓冲区（供列式写入使用）
+
+        Args:
+            parsed_records: 解析后的原始数据列表
+            source_file: 源文件名
+
+        Returns:
+            (字段名 -> 列数据, 成功行数, 失败条数)
+        """
+        capacity = len(parsed_records)
+        columns: Dict[str, List[Any]] = {}
+        rows = 0
+        errors = 0
+        self._prefetch_ip_groups(parsed_records)
+
+        for parsed_data in parsed_records:
+            try:
+                dwd_record = self.map_to_dwd(parsed_data, source_file)
+            except Exception as e:
+                errors += 1
+                if errors <= 5:
+                    self.logger.error(f"字段映射失败: {e}")
+                continue
+
+            for field, value in dwd_record.items():
+                column = columns.get(field)
+                if column is None:
+                    column = columns[field] = [None] * capacity
+                column[rows] = value
+            rows += 1
+
+        if rows < capacity:
+            for field in columns:
+                del columns[field][rows:]
+
+        return columns, rows, errors
+
+    def _prefetch_ip_groups(self, parsed_records: List[Dict[str, Any]]):
+        """整批未缓存的客户端IP一次查询区间索引，结果写入IP分组缓存"""
+        if self.ip_index is None:
+            return
+
+        cache = self._group_memo['ip']
+        pending = []
+        seen = set()
+        for parsed_data in parsed_records:
+            client_ip = parsed_data.get('RealIp', parsed_data.get('remote_addr', ''))
+            if client_ip in seen:
+                continue
+            seen.add(client_ip)
+            if cache.get(client_ip) is None:
+                pending.append(client_ip)
+
+        for client_ip, indexed in zip(pending, self.ip_index.lookup_many(pending)):
+            if indexed is not None:
+                fields, extra = indexed
+                cache.put(client_ip, (fields, _count_filled(fields), extra))
+
+    def _memo_group(self, group: str, key: Any, builder) -> Tuple[Dict[str, Any], int, Any]:
+        """
+        按输入值查找分组字段，未命中时调用builder计算并记录非空字段数
+
+        Returns:
+            (分组字段, 非空字段数, 附加值)
+        """
+        cache = self._group_memo[group]
+        entry = cache.get(key)
+        if entry is None:
+            fields, extra = builder(key)
+            entry = (fields, _count_filled(fields), extra)
+            cache.put(key, entry)
+        return entry
+
+    def _build_dwd_record(self, parsed_data: Dict[str, Any], source_file: str) -> Dict[str, Any]:
+        """组装单条DWD记录：常量字段 + 各分组字段 + 逐条字段"""
+        client_ip = parsed_data.get('RealIp', parsed_data.get('remote_addr', ''))
+        server_name = parsed_data.get('http_host', '')
+        user_agent = parsed_data.get('agent', '')
+        status_code = str(parsed_data.get('code', '0'))
+        body_size = self._safe_int(parsed_data.get('body'), 0)
+        # ar_time是秒，转换为毫秒
+        ar_time_ms = int(self._safe_float(parsed_data.get('ar_time'), 0.0) * 1000)
+
+        request_fields, request_filled, uri_risk = self._memo_group(
+            'request', parsed_data.get('request', ''), self._build_request_group)
+        ua_fields, ua_filled, _ = self._memo_group('ua', user_agent, self._build_ua_group)
+        ip_fields, ip_filled, ip_extra = self._memo_group('ip', client_ip, self._build_ip_group)
+        status_fields, status_filled, _ = self._memo_group('status', status_code, self._build_status_group)
+        referer_fields, referer_filled, _ = self._memo_group(
+            'referer', parsed_data.get('http_referer', ''), self._build_referer_group)
+        duration_fields, duration_filled, _ = self._memo_group('duration', ar_time_ms, self._build_duration_group)
+        time_fields, time_filled = self._get_time_group(parsed_data.get('time', ''))
+
+        is_government = '.gov.cn' in server_name or 'government' in request_fields['business_domain']
+        server_fields, server_filled, _ = self._memo_group(
+            'server', (server_name, is_government), self._build_server_group)
+
+        dwd_record = dict(STATIC_DWD_FIELDS)
+        for field in LIST_DWD_FIELDS:
+            dwd_record[field] = []
+        for field in DICT_DWD_FIELDS:
+            dwd_record[field] = {}
+        dwd_record.update(request_fields)
+        dwd_record.update(ua_fields)
+        dwd_record.update(ip_fields)
+        dwd_record.update(status_fields)
+        dwd_record.update(referer_fields)
+        dwd_record.update(duration_fields)
+        dwd_record.update(time_fields)
+        dwd_record.update(server_fields)
+
+        # === 逐条计算的字段 ===
+        body_size_kb = round(body_size / 1024.0, 2)
+        if ar_time_ms > 0 and body_size_kb > 0:
+            transfer_speed = body_size_kb / (ar_time_ms / 1000.0)
+        else:
+            transfer_speed = 0.0
+
+        trace_id = self._generate_trace_id(parsed_data)
+        risk_score = ip_extra['risk_score'] + uri_risk
+        risk_level = self._get_risk_level(risk_score)
+
+        is_success = status_fields['is_success']
+        is_server_error = status_fields['is_server_error']
+        perf_slow = duration_fields['perf_slow']
+        perf_very_slow = duration_fields['perf_very_slow']
+
+        # 异常检测
+        has_anomaly = is_server_error or perf_very_slow or body_size > 10 * 1024 * 1024  # 10MB
+        if not has_anomaly:
+            anomaly_type = ''
+        elif is_server_error:
+            anomaly_type = 'error'
+        elif perf_very_slow:
+            anomaly_type = 'performance'
+        else:
+            anomaly_type = 'data'
+
+        # SLA合规性
+        sla_compliance = not perf_slow and is_success
+        if sla_compliance:
+            sla_violation_type = ''
+        elif perf_slow:
+            sla_violation_type = 'performance'
+        else:
+            sla_violation_type = 'availability'
+
+        # 原始日志直接取解析器保留的原始行，不再把整条解析结果转成字典再转字符串
+        raw_line = parsed_data.get('raw_line')
+
+        row_fields = {
+            'client_ip': client_ip,
+            'client_port': self._safe_int(parsed_data.get('remote_port'), 0),
+            'xff_ip': parsed_data.get('RealIp', ''),
+            'client_real_ip': client_ip,
+            'server_name': server_name,
+            'request_uri_normalized': self._normalize_uri(request_fields['request_uri']),
+            'user_agent_string': user_agent,
+            'log_source_file': source_file,
+            'raw_log_entry': raw_line[:1000] if raw_line else '',  # 截断避免过长
+
+            'response_body_size': body_size,
+            'response_body_size_kb': body_size_kb,
+            'total_bytes_sent': body_size,
+            'total_bytes_sent_kb': body_size_kb,
+            'response_transfer_speed': transfer_speed,
+            'total_transfer_speed': transfer_speed,
+
+            'is_proxy': bool(client_ip) and (
+                parsed_data.get('RealIp') != parsed_data.get('remote_addr') or ip_extra['proxy_range']),
+            'client_classification': self._classify_client_classification({
+                'is_internal_ip': ip_fields['is_internal_ip'],
+                'is_bot': ua_fields['is_bot'],
+                'sdk_type': ua_fields['sdk_type'],
+            }),
+            'business_value_score': self._calculate_business_value_score(request_fields, {
+                'business_domain': request_fields['business_domain'],
+                'api_category': request_fields['api_category'],
+                'response_status_code': status_code,
+                'total_request_duration': ar_time_ms,
+            }),
+
+            # 链路追踪（生成简单的ID）
+            'trace_id': trace_id,
+            'correlation_id': trace_id,
+            'request_id': trace_id,
+            'error_correlation_id': trace_id,
+
+            # 安全风险评分 = IP风险 + URI风险
+            'security_risk_score': min(100, risk_score),
+            'security_risk_level': risk_level,
+            'ip_risk_level': risk_level,
+            'fraud_score': risk_score / 100.0,
+
+            'is_business_success': is_success and body_size > 0,
+            'has_anomaly': has_anomaly,
+            'anomaly_type': anomaly_type,
+            'anomaly_severity': 'high' if has_anomaly else '',
+            'sla_compliance': sla_compliance,
+            'sla_violation_type': sla_violation_type,
+        }
+        dwd_record.update(row_fields)
+
+        # === 数据质量评估 ===
+        # 各分组的非空字段数已在缓存时统计，这里只统计逐条字段
+        filled_fields = (STATIC_FILLED_COUNT + request_filled + ua_filled + ip_filled + status_filled +
+                         referer_filled + duration_filled + time_filled + server_filled +
+                         _count_filled(row_fields))
+        total_fields = len(dwd_record)
+        completeness = filled_fields / total_fields if total_fields > 0 else 0
+
+        dwd_record['data_completeness'] = completeness
+        dwd_record['data_quality_score'] = completeness * 100
+
+        # 解析错误记录
+        dwd_record['parsing_errors'] = parsed_data.get('parsing_errors', [])
+
+        return dwd_record
     
     def _parse_request_line(self, request_str: str) -> Dict[str, Any]:
         """解析HTTP请求行"""
@@ -242,23 +511,36 @@ class FieldMapper:
             
         return result
     
-    def _map_time_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射时间字段"""
-        time_str = parsed_data.get('time', '')
+    def _get_time_group(self, time_str: str) -> Tuple[Dict[str, Any], int]:
+        """时间字段（无法解析时使用当前时间，且不缓存）"""
+        cache = self._group_memo['time']
+        entry = cache.get(time_str)
+        if entry is not None:
+            return entry
+
         log_time = self._parse_log_time(time_str)
-        
         if not log_time:
-            log_time = datetime.now()
-            
-        dwd_record['log_time'] = log_time
-        dwd_record['date_partition'] = log_time.date()
-        dwd_record['hour_partition'] = log_time.hour
-        dwd_record['minute_partition'] = log_time.minute
-        dwd_record['second_partition'] = log_time.second
-        dwd_record['quarter_partition'] = (log_time.month - 1) // 3 + 1
-        dwd_record['week_partition'] = log_time.isocalendar()[1]
-    
-    @lru_cache(maxsize=10000)
+            fields = self._build_time_fields(datetime.now())
+            return fields, _count_filled(fields)
+
+        fields = self._build_time_fields(log_time)
+        entry = (fields, _count_filled(fields))
+        cache.put(time_str, entry)
+        return entry
+
+    def _build_time_fields(self, log_time: datetime) -> Dict[str, Any]:
+        """映射时间字段"""
+        return {
+            'log_time': log_time,
+            'date_partition': log_time.date(),
+            'hour_partition': log_time.hour,
+            'minute_partition': log_time.minute,
+            'second_partition': log_time.second,
+            'quarter_partition': (log_time.month - 1) // 3 + 1,
+            'week_partition': log_time.isocalendar()[1],
+        }
+    
+    @enrichment_cached('log_time', maxsize=10000)
     def _parse_log_time(self, time_str: str) -> Optional[datetime]:
         """解析日志时间（带缓存）"""
         if not time_str:
@@ -280,29 +562,42 @@ class FieldMapper:
                 
         return None
     
-    def _map_network_geo_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射网络和地理位置字段"""
-        client_ip = dwd_record['client_ip']
-        
-        # IP类型分类
-        dwd_record['client_ip_type'] = self._classify_ip_type(client_ip)
-        dwd_record['is_internal_ip'] = self._is_internal_ip(client_ip)
-        
+    def _build_ip_group(self, client_ip: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """映射网络和地理位置字段（按客户端IP分组）"""
+        # 合法IPv4直接查区间索引，一次得到地理与信誉字段
+        if self.ip_index is not None:
+            indexed = self.ip_index.lookup(client_ip)
+            if indexed is not None:
+                return indexed
+
+        fields = {
+            # IP类型分类
+            'client_ip_type': self._classify_ip_type(client_ip),
+            'is_internal_ip': self._is_internal_ip(client_ip),
+        }
+
         # 地理位置解析
-        geo_info = self._resolve_geo_location(client_ip)
-        dwd_record.update(geo_info)
-        
+        fields.update(self._resolve_geo_location(client_ip))
+
         # IP风险评估
-        dwd_record['client_ip_classification'] = self._classify_ip_reputation(client_ip)
-        dwd_record['ip_reputation'] = dwd_record['client_ip_classification']
-        
+        fields['client_ip_classification'] = self._classify_ip_reputation(client_ip)
+        fields['ip_reputation'] = fields['client_ip_classification']
+
         # 特殊IP检测
-        dwd_record['is_tor_exit'] = self._detect_tor_exit(client_ip)
-        dwd_record['is_proxy'] = self._detect_proxy(client_ip, parsed_data)
-        dwd_record['is_vpn'] = self._detect_vpn(client_ip)
-        dwd_record['is_datacenter'] = self._detect_datacenter(client_ip)
+        fields['is_tor_exit'] = self._detect_tor_exit(client_ip)
+        fields['is_vpn'] = self._detect_vpn(client_ip)
+        fields['is_datacenter'] = self._detect_datacenter(client_ip)
+
+        # 是否代理还取决于RealIp与remote_addr是否一致，逐条判断；这里只缓存IP段检测结果
+        extra = {
+            'proxy_range': self._detect_proxy(client_ip, {}),
+            'risk_score': ((30 if fields['is_tor_exit'] else 0) +
+                           (20 if fields['is_vpn'] else 0) +
+                           (10 if fields['is_datacenter'] else 0)),
+        }
+        return fields, extra
     
-    @lru_cache(maxsize=50000)
+    @enrichment_cached('geo_location', maxsize=50000)
     def _resolve_geo_location(self, ip: str) -> Dict[str, Any]:
         """解析IP地理位置（带缓存）"""
         default_geo = {
@@ -343,82 +638,54 @@ class FieldMapper:
         geo = default_geo.copy()
         
         # 中国主要运营商IP段示例
-        if ip.startswith(('111.', '112.', '113.', '114.', '115.', '116.', '117.', '118.', '119.', '120.')):
-            geo['client_isp'] = 'China Mobile'
-            geo['client_region'] = 'China'
-        elif ip.startswith(('221.', '222.', '223.')):
-            geo['client_isp'] = 'China Telecom'
-            geo['client_region'] = 'China'
-        elif ip.startswith(('58.', '59.', '60.', '61.')):
-            geo['client_isp'] = 'China Unicom'
-            geo['client_region'] = 'China'
+        for isp, prefixes in ISP_PREFIXES.items():
+            if ip.startswith(prefixes):
+                geo['client_isp'] = isp
+                geo['client_region'] = 'China'
+                break
             
         return geo
     
-    def _map_request_response_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射请求响应字段"""
-        # 响应状态码
-        status_code = str(parsed_data.get('code', '0'))
-        dwd_record['response_status_code'] = status_code
-        dwd_record['response_status_class'] = self._get_status_class(status_code)
-        
-        # 响应体大小
-        body_size = self._safe_int(parsed_data.get('body'), 0)
-        dwd_record['response_body_size'] = body_size
-        dwd_record['response_body_size_kb'] = round(body_size / 1024.0, 2)
-        dwd_record['total_bytes_sent'] = body_size
-        dwd_record['total_bytes_sent_kb'] = round(body_size / 1024.0, 2)
-        dwd_record['bytes_received'] = dwd_record.get('request_body_size', 0)
-        
-        # 推断内容类型
-        uri = dwd_record['request_path']
-        dwd_record['response_content_type'] = self._infer_content_type(uri, status_code)
-        dwd_record['content_type'] = dwd_record['response_content_type']
-    
-    def _map_performance_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射性能字段 - 基于Web Vitals标准"""
-        # ar_time是秒，转换为毫秒
-        ar_time_seconds = self._safe_float(parsed_data.get('ar_time'), 0.0)
-        ar_time_ms = int(ar_time_seconds * 1000)
-        
-        dwd_record['total_request_duration'] = ar_time_ms
-        
+    def _build_duration_group(self, ar_time_ms: int) -> Tuple[Dict[str, Any], None]:
+        """映射性能字段 - 基于Web Vitals标准（按请求耗时分组）"""
+        fields = {'total_request_duration': ar_time_ms}
+
         # 由于日志中没有upstream时间，使用智能估算
         # 基于经验：后端处理约占70%，网络传输占20%，Nginx处理占10%
         if ar_time_ms > 0:
             backend_ratio = 0.7
             network_ratio = 0.2
-            nginx_ratio = 0.1
-            
-            dwd_record['upstream_response_time'] = int(ar_time_ms * backend_ratio)
-            dwd_record['upstream_connect_time'] = int(ar_time_ms * 0.05)  # 连接时间约5%
-            dwd_record['upstream_header_time'] = int(ar_time_ms * 0.15)   # 头部处理约15%
-            
-            dwd_record['backend_connect_phase'] = dwd_record['upstream_connect_time']
-            dwd_record['backend_process_phase'] = dwd_record['upstream_header_time'] - dwd_record['upstream_connect_time']
-            dwd_record['backend_transfer_phase'] = dwd_record['upstream_response_time'] - dwd_record['upstream_header_time']
-            dwd_record['nginx_transfer_phase'] = ar_time_ms - dwd_record['upstream_response_time']
-            
-            dwd_record['backend_total_phase'] = dwd_record['upstream_response_time']
-            dwd_record['network_phase'] = int(ar_time_ms * network_ratio)
-            dwd_record['processing_phase'] = dwd_record['backend_process_phase']
-            dwd_record['transfer_phase'] = dwd_record['backend_transfer_phase'] + dwd_record['nginx_transfer_phase']
+
+            fields['upstream_response_time'] = int(ar_time_ms * backend_ratio)
+            fields['upstream_connect_time'] = int(ar_time_ms * 0.05)  # 连接时间约5%
+            fields['upstream_header_time'] = int(ar_time_ms * 0.15)   # 头部处理约15%
+
+            fields['backend_connect_phase'] = fields['upstream_connect_time']
+            fields['backend_process_phase'] = fields['upstream_header_time'] - fields['upstream_connect_time']
+            fields['backend_transfer_phase'] = fields['upstream_response_time'] - fields['upstream_header_time']
+            fields['nginx_transfer_phase'] = ar_time_ms - fields['upstream_response_time']
+
+            fields['backend_total_phase'] = fields['upstream_response_time']
+            fields['network_phase'] = int(ar_time_ms * network_ratio)
+            fields['processing_phase'] = fields['backend_process_phase']
+            fields['transfer_phase'] = fields['backend_transfer_phase'] + fields['nginx_transfer_phase']
         else:
             # 时间为0的情况（静态缓存）
             for field in ['upstream_response_time', 'upstream_connect_time', 'upstream_header_time',
                          'backend_connect_phase', 'backend_process_phase', 'backend_transfer_phase',
                          'nginx_transfer_phase', 'backend_total_phase', 'network_phase',
                          'processing_phase', 'transfer_phase']:
-                dwd_record[field] = 0
-        
-        # 其他未使用的性能字段设为0
-        dwd_record['request_processing_time'] = 0
-        dwd_record['response_send_time'] = ar_time_ms
-        
-        # 性能评分和分级
-        self._calculate_performance_metrics(dwd_record, ar_time_ms)
+                fields[field] = 0
+
+        fields['response_send_time'] = ar_time_ms
 
+        # 性能评分和分级
+        self._calculate_performance_metrics(fields, ar_time_ms)
 
+        # 缓存信息
+        fields['cache_status'] = self._infer_cache_status(ar_time_ms)
+        fields['cache_layer'] = 'L1' if fields['cache_status'] == 'HIT' else ''
+        return fields, None
     
     def _calculate_performance_metrics(self, dwd_record: Dict[str, Any], response_time_ms: int):
         """计算性能指标和评分"""
@@ -488,14 +755,6 @@ class FieldMapper:
             
         dwd_record['performance_score'] = performance_score
         
-        # 传输速度计算
-        if response_time_ms > 0 and dwd_record['response_body_size_kb'] > 0:
-            dwd_record['response_transfer_speed'] = dwd_record['response_body_size_kb'] / (response_time_ms / 1000.0)
-            dwd_record['total_transfer_speed'] = dwd_record['response_transfer_speed']
-        else:
-            dwd_record['response_transfer_speed'] = 0.0
-            dwd_record['total_transfer_speed'] = 0.0
-        
         dwd_record['nginx_transfer_speed'] = 0.0
         
         # 效率指标
@@ -513,15 +772,13 @@ class FieldMapper:
         dwd_record['processing_efficiency_index'] = performance_score
         dwd_record['latency_percentile'] = 0.0  # 需要批量计算才能得出
 
-    def _map_user_agent_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射User-Agent相关字段 - 增强政务应用识别"""
-        user_agent = parsed_data.get('agent', '')
-
+    def _build_ua_group(self, user_agent: str) -> Tuple[Dict[str, Any], None]:
+        """映射User-Agent相关字段 - 增强政务应用识别（按UA分组）"""
         # 优先检测政务SDK和应用
         gov_app_info = self._detect_government_app(user_agent)
         if gov_app_info['is_government_app']:
             # 政务应用优先处理
-            dwd_record.update({
+            fields = {
                 'platform': gov_app_info['platform'],
                 'platform_version': gov_app_info['platform_version'],
                 'platform_category': 'government',
@@ -539,47 +796,55 @@ class FieldMapper:
                 'bot_name': '',
                 'bot_probability': 0.0,
                 'crawler_category': '',
-            })
-            return
-
-        # 如果不是政务应用，使用通用解析
-        if HAS_UA_PARSER:
-            ua_info = self._parse_ua_with_library(user_agent)
+            }
         else:
-            ua_info = self._parse_ua_fallback(user_agent)
-
-        # 映射解析结果
-        dwd_record['platform'] = ua_info['platform']
-        dwd_record['platform_version'] = ua_info['platform_version']
-        dwd_record['platform_category'] = ua_info['platform_category']
-        dwd_record['app_version'] = ua_info['app_version']
-        dwd_record['app_build_number'] = ''
-        dwd_record['device_type'] = ua_info['device_type']
-        dwd_record['device_model'] = ua_info.get('device_model', '')
-        dwd_record['device_manufacturer'] = ua_info.get('device_manufacturer', '')
-        dwd_record['screen_resolution'] = ''
-        dwd_record['browser_type'] = ua_info['browser_type']
-        dwd_record['browser_version'] = ua_info['browser_version']
-        dwd_record['browser_engine'] = ua_info.get('browser_engine', '')
-        dwd_record['os_type'] = ua_info['os_type']
-        dwd_record['os_version'] = ua_info['os_version']
-        dwd_record['os_architecture'] = ua_info.get('os_architecture', '')
-
-        # SDK和框架
-        dwd_record['sdk_type'] = ua_info.get('sdk_type', '')
-        dwd_record['sdk_version'] = ua_info.get('sdk_version', '')
-        dwd_record['integration_type'] = ua_info.get('integration_type', 'native')
-        dwd_record['framework_type'] = ua_info.get('framework_type', '')
-        dwd_record['framework_version'] = ''
-
-        # Bot检测
-        dwd_record['is_bot'] = ua_info.get('is_bot', False)
-        dwd_record['bot_type'] = ua_info.get('bot_type', '')
-        dwd_record['bot_name'] = ua_info.get('bot_name', '')
-        dwd_record['bot_probability'] = ua_info.get('bot_probability', 0.0)
-        dwd_record['crawler_category'] = ua_info.get('crawler_category', '')
+            # 如果不是政务应用，使用通用解析
+            if HAS_UA_PARSER:
+                ua_info = self._parse_ua_with_library(user_agent)
+            else:
+                ua_info = self._parse_ua_fallback(user_agent)
+
+            # 映射解析结果
+            fields = {
+                'platform': ua_info['platform'],
+                'platform_version': ua_info['platform_version'],
+                'platform_category': ua_info['platform_category'],
+                'app_version': ua_info['app_version'],
+                'app_build_number': '',
+                'device_type': ua_info['device_type'],
+                'device_model': ua_info.get('device_model', ''),
+                'device_manufacturer': ua_info.get('device_manufacturer', ''),
+                'screen_resolution': '',
+                'browser_type': ua_info['browser_type'],
+                'browser_version': ua_info['browser_version'],
+                'browser_engine': ua_info.get('browser_engine', ''),
+                'os_type': ua_info['os_type'],
+                'os_version': ua_info['os_version'],
+                'os_architecture': ua_info.get('os_architecture', ''),
+
+                # SDK和框架
+                'sdk_type': ua_info.get('sdk_type', ''),
+                'sdk_version': ua_info.get('sdk_version', ''),
+                'integration_type': ua_info.get('integration_type', 'native'),
+                'framework_type': ua_info.get('framework_type', ''),
+                'framework_version': '',
+
+                # Bot检测
+                'is_bot': ua_info.get('is_bot', False),
+                'bot_type': ua_info.get('bot_type', ''),
+                'bot_name': ua_info.get('bot_name', ''),
+                'bot_probability': ua_info.get('bot_probability', 0.0),
+                'crawler_category': ua_info.get('crawler_category', ''),
+            }
 
-    @lru_cache(maxsize=5000)
+        # 客户端分类（client_classification还依赖是否内网IP，逐条计算）
+        fields['client_channel'] = self._identify_client_channel(fields['platform'])
+        fields['access_type'] = self._classify_access_type(fields)
+        fields['client_category'] = self._classify_client_category(fields)
+        fields['client_type'] = self._classify_client_type(fields)
+        return fields, None
+    
+    @enrichment_cached('government_app', maxsize=5000)
     def _detect_government_app(self, user_agent: str) -> Dict[str, Any]:
         """检测政务应用 - 专门优化"""
         result = {
@@ -656,7 +921,7 @@ class FieldMapper:
         return result
 
 
-    @lru_cache(maxsize=10000)
+    @enrichment_cached('ua_library', maxsize=10000)
     def _parse_ua_with_library(self, user_agent: str) -> Dict[str, Any]:
         """使用user-agents库解析UA"""
         if not user_agent:
@@ -708,6 +973,7 @@ class FieldMapper:
             self.logger.debug(f"UA解析失败，使用备用方案: {e}")
             return self._parse_ua_fallback(user_agent)
     
+    @enrichment_cached('ua_fallback', maxsize=10000)
     def _parse_ua_fallback(self, user_agent: str) -> Dict[str, Any]:
         """备用UA解析方案"""
         if not user_agent:
@@ -845,153 +1111,104 @@ class FieldMapper:
             return 'Desktop'
         return 'Unknown'
     
-    def _map_business_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射业务字段"""
-        uri = dwd_record['request_uri']
-        
+    def _build_request_group(self, request_str: str) -> Tuple[Dict[str, Any], int]:
+        """映射请求行及业务字段（按请求行分组），附加值为URI风险分"""
+        request_info = self._parse_request_line(request_str)
+        uri = request_info['uri']
+
+        fields = {
+            'request_method': request_info['method'],
+            'request_uri': uri,
+            'request_full_uri': request_str,
+            'request_path': request_info['path'],
+            'query_parameters': request_info['query_string'],
+            'query_params_count': len(request_info['query_params']),
+            'http_protocol_version': request_info['protocol'],
+        }
+
+        # 推断内容类型
+        fields['response_content_type'] = self._infer_content_type(request_info['path'], '')
+        fields['content_type'] = fields['response_content_type']
+
         # URI结构化解析
         uri_structure = self._parse_uri_structure(uri)
-        
+
         # API和服务信息
-        dwd_record['application_name'] = uri_structure['application_name']
-        dwd_record['application_version'] = ''
-        dwd_record['service_name'] = uri_structure['service_name']
-        dwd_record['service_version'] = ''
-        dwd_record['microservice_name'] = uri_structure['service_name']
-        dwd_record['service_mesh_name'] = ''
-        dwd_record['upstream_server'] = ''
-        dwd_record['upstream_service'] = uri_structure['service_name']
-        dwd_record['downstream_service'] = ''
-        
+        fields['application_name'] = uri_structure['application_name']
+        fields['service_name'] = uri_structure['service_name']
+        fields['microservice_name'] = uri_structure['service_name']
+        fields['upstream_service'] = uri_structure['service_name']
+
         # API分类
-        dwd_record['api_module'] = uri_structure['api_module']
-        dwd_record['api_submodule'] = ''
-        dwd_record['api_category'] = self._classify_api_category(uri_structure)
-        dwd_record['api_subcategory'] = ''
-        dwd_record['api_version'] = self._extract_api_version(uri)
-        dwd_record['api_endpoint_type'] = self._get_endpoint_type(dwd_record['request_method'])
-        
+        fields['api_module'] = uri_structure['api_module']
+        fields['api_category'] = self._classify_api_category(uri_structure)
+        fields['api_version'] = self._extract_api_version(uri)
+        fields['api_endpoint_type'] = self._get_endpoint_type(fields['request_method'])
+
         # 业务域分类
-        dwd_record['business_domain'] = self._classify_business_domain(uri_structure)
-        dwd_record['business_subdomain'] = ''
-        dwd_record['functional_area'] = self._get_functional_area(uri_structure)
-        dwd_record['service_tier'] = self._get_service_tier(uri_structure)
-        
+        fields['business_domain'] = self._classify_business_domain(uri_structure)
+        fields['functional_area'] = self._get_functional_area(uri_structure)
+        fields['service_tier'] = self._get_service_tier(uri_structure)
+
         # 业务操作分类
-        dwd_record['business_operation_type'] = self._classify_business_operation(uri)
-        dwd_record['business_operation_subtype'] = ''
-        dwd_record['transaction_type'] = self._get_transaction_type(dwd_record['request_method'])
-        dwd_record['workflow_step'] = ''
-        dwd_record['process_stage'] = ''
-        
+        fields['business_operation_type'] = self._classify_business_operation(uri)
+        fields['transaction_type'] = self._get_transaction_type(fields['request_method'])
+
         # 用户旅程
-        dwd_record['user_journey_stage'] = self._identify_user_journey_stage(uri)
-        dwd_record['user_session_stage'] = ''
-        
-        # 访问入口和来源
-        referer = dwd_record['referer_url']
-        dwd_record['access_entry_point'] = self._identify_access_entry_point(dwd_record['server_name'])
-        dwd_record['entry_source'] = self._classify_entry_source(referer)
-        dwd_record['entry_source_detail'] = referer[:200] if referer and referer != '-' else ''
-        dwd_record['client_channel'] = self._identify_client_channel(dwd_record['platform'])
-        dwd_record['traffic_source'] = self._analyze_traffic_source(referer)
-        
-        # 搜索引擎和社交媒体
-        dwd_record['search_engine'] = self._detect_search_engine(referer)
-        dwd_record['search_keywords'] = self._extract_search_keywords(referer)
-        dwd_record['social_media'] = self._detect_social_media(referer)
-        dwd_record['social_media_type'] = self._get_social_media_type(dwd_record['social_media'])
-        
-        # Referer域名分类
-        dwd_record['referer_domain_type'] = self._classify_domain_type(dwd_record['referer_domain'])
-        
-        # 访问分类
-        dwd_record['access_type'] = self._classify_access_type(dwd_record)
-        dwd_record['access_method'] = 'sync'  # 默认同步
-        dwd_record['client_category'] = self._classify_client_category(dwd_record)
-        dwd_record['client_type'] = self._classify_client_type(dwd_record)
-        dwd_record['client_classification'] = self._classify_client_classification(dwd_record)
-        dwd_record['integration_pattern'] = self._identify_integration_pattern(uri_structure)
-        
-        # 业务价值评估
-        dwd_record['api_importance_level'] = self._assess_api_importance(uri_structure)
-        dwd_record['business_criticality'] = self._assess_business_criticality(uri_structure)
-        dwd_record['business_value_score'] = self._calculate_business_value_score(uri_structure, dwd_record)
-        dwd_record['revenue_impact_level'] = self._assess_revenue_impact(uri_structure)
-        dwd_record['customer_impact_level'] = self._assess_customer_impact(uri_structure)
-        
+        fields['user_journey_stage'] = self._identify_user_journey_stage(uri)
+        fields['integration_pattern'] = self._identify_integration_pattern(uri_structure)
+
+        # 业务价值评估（business_value_score还依赖状态码和耗时，逐条计算）
+        fields['api_importance_level'] = self._assess_api_importance(uri_structure)
+        fields['business_criticality'] = self._assess_business_criticality(uri_structure)
+        fields['revenue_impact_level'] = self._assess_revenue_impact(uri_structure)
+        fields['customer_impact_level'] = self._assess_customer_impact(uri_structure)
+
         # 业务标识
-        dwd_record['business_sign'] = self._generate_business_sign(uri_structure)
-        
-        # 用户信息（从日志中无法获取，设置默认值）
-        dwd_record['user_id'] = ''
-        dwd_record['session_id'] = ''
-        dwd_record['user_type'] = 'guest'
-        dwd_record['user_tier'] = 'free'
-        dwd_record['user_segment'] = 'consumer'
-        dwd_record['authentication_method'] = 'none'
-        dwd_record['authorization_level'] = 'public'
-        
-        # 链路追踪（生成简单的ID）
-        dwd_record['trace_id'] = self._generate_trace_id(parsed_data)
-        dwd_record['span_id'] = ''
-        dwd_record['parent_span_id'] = ''
-        dwd_record['correlation_id'] = dwd_record['trace_id']
-        dwd_record['request_id'] = dwd_record['trace_id']
-        dwd_record['transaction_id'] = ''
-        dwd_record['business_transaction_id'] = ''
-        dwd_record['batch_id'] = ''
-        
-        # 缓存信息
-        dwd_record['cache_status'] = self._infer_cache_status(dwd_record['total_request_duration'])
-        dwd_record['cache_layer'] = 'L1' if dwd_record['cache_status'] == 'HIT' else ''
-        dwd_record['cache_key'] = ''
-        dwd_record['cache_age'] = 0
-        dwd_record['cache_hit_ratio'] = 0.0
-        
-        # 连接信息
-        dwd_record['connection_requests'] = 1
-        dwd_record['connection_id'] = ''
-        dwd_record['connection_type'] = 'keep_alive'
-        dwd_record['ssl_session_reused'] = False
-        
-        # 标签和元数据
-        dwd_record['feature_flag'] = ''
-        dwd_record['ab_test_group'] = ''
-        dwd_record['experiment_id'] = ''
-        dwd_record['custom_tags'] = []
-        dwd_record['business_tags'] = []
-        dwd_record['custom_headers'] = {}
-        dwd_record['security_headers'] = {}
-        dwd_record['cookie_count'] = 0
-        dwd_record['header_size'] = 0
-        dwd_record['custom_dimensions'] = {}
-        dwd_record['custom_metrics'] = {}
-        dwd_record['metadata'] = {}
-        
+        fields['business_sign'] = self._generate_business_sign(uri_structure)
+
         # UTM参数提取
-        query_params = parse_qs(dwd_record['query_parameters'])
-        dwd_record['campaign_id'] = ''
-        dwd_record['utm_source'] = query_params.get('utm_source', [''])[0]
-        dwd_record['utm_medium'] = query_params.get('utm_medium', [''])[0]
-        dwd_record['utm_campaign'] = query_params.get('utm_campaign', [''])[0]
-        dwd_record['utm_content'] = query_params.get('utm_content', [''])[0]
-        dwd_record['utm_term'] = query_params.get('utm_term', [''])[0]
-        
-        # 网络类型（无法从日志判断）
-        dwd_record['network_type'] = 'unknown'
-        
-        # 基础设施信息
-        dwd_record['load_balancer_node'] = ''
-        dwd_record['edge_location'] = ''
-        dwd_record['datacenter'] = ''
-        dwd_record['availability_zone'] = ''
-        dwd_record['cluster_node'] = ''
-        dwd_record['instance_id'] = ''
-        dwd_record['pod_name'] = ''
-        dwd_record['container_id'] = ''
-    
-    @lru_cache(maxsize=10000)
+        query_params = request_info['query_params']
+        fields['utm_source'] = query_params.get('utm_source', [''])[0]
+        fields['utm_medium'] = query_params.get('utm_medium', [''])[0]
+        fields['utm_campaign'] = query_params.get('utm_campaign', [''])[0]
+        fields['utm_content'] = query_params.get('utm_content', [''])[0]
+        fields['utm_term'] = query_params.get('utm_term', [''])[0]
+
+        # URI风险检测
+        if self._detect_sql_injection(uri):
+            uri_risk = 50
+            fields['threat_category'] = 'sql_injection'
+        elif self._detect_xss(uri):
+            uri_risk = 40
+            fields['threat_category'] = 'xss'
+        else:
+            uri_risk = 0
+            fields['threat_category'] = ''
+
+        return fields, uri_risk
+
+    def _build_referer_group(self, referer: str) -> Tuple[Dict[str, Any], None]:
+        """映射访问来源字段（按Referer分组）"""
+        fields = {
+            'referer_url': referer,
+            'referer_domain': self._extract_domain(referer),
+            'entry_source': self._classify_entry_source(referer),
+            'entry_source_detail': referer[:200] if referer and referer != '-' else '',
+            'traffic_source': self._analyze_traffic_source(referer),
+
+            # 搜索引擎和社交媒体
+            'search_engine': self._detect_search_engine(referer),
+            'search_keywords': self._extract_search_keywords(referer),
+            'social_media': self._detect_social_media(referer),
+        }
+        fields['social_media_type'] = self._get_social_media_type(fields['social_media'])
+
+        # Referer域名分类
+        fields['referer_domain_type'] = self._classify_domain_type(fields['referer_domain'])
+        return fields, None
+    
+    @enrichment_cached('uri_structure', maxsize=10000)
     def _parse_uri_structure(self, uri: str) -> Dict[str, Any]:
         """解析URI结构（带缓存）"""
         if not uri or not uri.startswith('/'):
@@ -1147,43 +1364,47 @@ class FieldMapper:
 
         return min(100, max(1, base_score))
 
-    def _map_permission_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射权限控制字段 - 政务场景增强"""
-        server_name = dwd_record.get('server_name', '')
-        business_domain = dwd_record.get('business_domain', '')
+    def _build_server_group(self, key: Tuple[str, bool]) -> Tuple[Dict[str, Any], None]:
+        """映射权限控制字段 - 政务场景增强（按域名及是否政务分组）"""
+        server_name, is_government = key
+        fields = {
+            'server_port': 443 if 'https' in server_name else 80,
+            'access_entry_point': self._identify_access_entry_point(server_name),
+        }
 
         # 政务租户识别
-        if '.gov.cn' in server_name or 'government' in business_domain:
-            dwd_record['tenant_code'] = self._identify_government_tenant(server_name)
-            dwd_record['environment'] = 'prod'  # 政务系统默认生产环境
-            dwd_record['data_sensitivity'] = 3  # confidential - 政务数据敏感级别高
-            dwd_record['compliance_zone'] = 'government'  # 政务合规区
+        if is_government:
+            fields['tenant_code'] = self._identify_government_tenant(server_name)
+            fields['environment'] = 'prod'  # 政务系统默认生产环境
+            fields['data_sensitivity'] = 3  # confidential - 政务数据敏感级别高
+            fields['compliance_zone'] = 'government'  # 政务合规区
 
             # 基于域名识别具体政府部门
             if 'gx' in server_name or 'guangxi' in server_name:
-                dwd_record['team_code'] = 'guangxi_gov'
-                dwd_record['business_unit'] = 'guangxi_government'
-                dwd_record['region_code'] = 'cn-south'
+                fields['team_code'] = 'guangxi_gov'
+                fields['business_unit'] = 'guangxi_government'
+                fields['region_code'] = 'cn-south'
             elif 'zj' in server_name or 'zhejiang' in server_name:
-                dwd_record['team_code'] = 'zhejiang_gov'
-                dwd_record['business_unit'] = 'zhejiang_government'
-                dwd_record['region_code'] = 'cn-east'
+                fields['team_code'] = 'zhejiang_gov'
+                fields['business_unit'] = 'zhejiang_government'
+                fields['region_code'] = 'cn-east'
             else:
-                dwd_record['team_code'] = 'central_gov'
-                dwd_record['business_unit'] = 'central_government'
-                dwd_record['region_code'] = 'cn-north'
+                fields['team_code'] = 'central_gov'
+                fields['business_unit'] = 'central_government'
+                fields['region_code'] = 'cn-north'
         else:
             # 非政务系统
-            dwd_record['tenant_code'] = 'default'
-            dwd_record['environment'] = self._infer_environment(server_name)
-            dwd_record['team_code'] = 'default'
-            dwd_record['data_sensitivity'] = 2  # internal
-            dwd_record['business_unit'] = 'default'
-            dwd_record['region_code'] = 'cn-north'
-            dwd_record['compliance_zone'] = 'default'
-
-        dwd_record['cost_center'] = dwd_record['business_unit']
+            fields['tenant_code'] = 'default'
+            fields['environment'] = self._infer_environment(server_name)
+            fields['team_code'] = 'default'
+            fields['data_sensitivity'] = 2  # internal
+            fields['business_unit'] = 'default'
+            fields['region_code'] = 'cn-north'
+            fields['compliance_zone'] = 'default'
 
+        fields['cost_center'] = fields['business_unit']
+        return fields, None
+    
     def _identify_government_tenant(self, server_name: str) -> str:
         """识别政府租户"""
         if not server_name:
@@ -1216,134 +1437,27 @@ class FieldMapper:
         return 'government'
 
 
-    def _map_error_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射错误分析字段"""
-        status_code = dwd_record['response_status_code']
-        
-        # 错误分类
-        dwd_record['error_code_group'] = self._classify_error_group(status_code)
-        dwd_record['http_error_class'] = self._classify_http_error_class(status_code)
-        dwd_record['error_severity_level'] = self._assess_error_severity(status_code)
-        dwd_record['error_category'] = self._classify_error_category(status_code)
-        dwd_record['error_subcategory'] = ''
-        dwd_record['error_source'] = self._identify_error_source(status_code)
-        dwd_record['error_propagation_path'] = ''
-        dwd_record['upstream_status_code'] = ''
-        dwd_record['error_correlation_id'] = dwd_record.get('trace_id', '')
-        dwd_record['error_chain'] = []
-        dwd_record['root_cause_analysis'] = ''
-    
-    def _map_security_fields(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """映射安全分析字段"""
-        client_ip = dwd_record['client_ip']
-        uri = dwd_record['request_uri']
-        
-        # 安全风险评分
-        risk_score = 0
-        
-        # IP风险评估
-        if dwd_record.get('is_tor_exit'):
-            risk_score += 30
-        if dwd_record.get('is_vpn'):
-            risk_score += 20
-        if dwd_record.get('is_datacenter'):
-            risk_score += 10
-        
-        # URI风险检测
-        if self._detect_sql_injection(uri):
-            risk_score += 50
-            dwd_record['threat_category'] = 'sql_injection'
-        elif self._detect_xss(uri):
-            risk_score += 40
-            dwd_record['threat_category'] = 'xss'
-        else:
-            dwd_record['threat_category'] = ''
-        
-        dwd_record['security_risk_score'] = min(100, risk_score)
-        dwd_record['security_risk_level'] = self._get_risk_level(risk_score)
-        
-        dwd_record['attack_signature'] = ''
-        dwd_record['ip_risk_level'] = dwd_record.get('security_risk_level', 'low')
-        dwd_record['geo_anomaly'] = False
-        dwd_record['access_pattern_anomaly'] = False
-        dwd_record['rate_limit_hit'] = False
-        dwd_record['blocked_by_waf'] = False
-        dwd_record['fraud_score'] = risk_score / 100.0
-    
-    def _generate_derived_fields(self, dwd_record: Dict[str, Any]):
-        """生成衍生字段"""
-        status_code = dwd_record['response_status_code']
-        
-        # 成功状态判断
-        dwd_record['is_success'] = status_code.startswith('2')
-        dwd_record['is_business_success'] = dwd_record['is_success'] and dwd_record['response_body_size'] > 0
-        dwd_record['is_error'] = not dwd_record['is_success']
-        dwd_record['is_client_error'] = status_code.startswith('4')
-        dwd_record['is_server_error'] = status_code.startswith('5')
-        
-        # 重试检测
-        dwd_record['is_retry'] = False  # 需要会话级别的分析才能准确判断
-        
-        # 异常检测
-        dwd_record['has_anomaly'] = (
-            dwd_record['is_server_error'] or
-            dwd_record['perf_very_slow'] or
-            dwd_record['response_body_size'] > 10 * 1024 * 1024  # 10MB
-        )
-        
-        if dwd_record['has_anomaly']:
-            if dwd_record['is_server_error']:
-                dwd_record['anomaly_type'] = 'error'
-            elif dwd_record['perf_very_slow']:
-                dwd_record['anomaly_type'] = 'performance'
-            else:
-                dwd_record['anomaly_type'] = 'data'
-        else:
-            dwd_record['anomaly_type'] = ''
-        
-        dwd_record['anomaly_severity'] = 'high' if dwd_record['has_anomaly'] else ''
-        
-        # SLA合规性
-        dwd_record['sla_compliance'] = not dwd_record['perf_slow'] and dwd_record['is_success']
-        dwd_record['sla_violation_type'] = ''
-        if not dwd_record['sla_compliance']:
-            if dwd_record['perf_slow']:
-                dwd_record['sla_violation_type'] = 'performance'
-            elif not dwd_record['is_success']:
-                dwd_record['sla_violation_type'] = 'availability'
-        
-        # 时间字段（这些是MATERIALIZED字段，不需要设置）
-        # date, hour, minute等会自动从log_time计算
-        
-        # 节假日标记（需要节假日数据库）
-        dwd_record['is_holiday'] = False
-        
-        # 系统字段（有默认值的不设置）
-        # created_at, updated_at, data_version等会使用默认值
-        
-        # 扩展字段
-        dwd_record['enrichment_status'] = 'complete'
-        dwd_record['validation_errors'] = []
-        dwd_record['processing_flags'] = []
-    
-    def _assess_data_quality(self, dwd_record: Dict[str, Any], parsed_data: Dict[str, Any]):
-        """评估数据质量"""
-        # 计算完整性
-        total_fields = 0
-        filled_fields = 0
-        
-        for key, value in dwd_record.items():
-            total_fields += 1
-            if value not in [None, '', 0, False, [], {}]:
-                filled_fields += 1
-        
-        completeness = filled_fields / total_fields if total_fields > 0 else 0
-        
-        dwd_record['data_completeness'] = completeness
-        dwd_record['data_quality_score'] = completeness * 100
-        
-        # 解析错误记录
-        dwd_record['parsing_errors'] = parsed_data.get('parsing_errors', [])
+    def _build_status_group(self, status_code: str) -> Tuple[Dict[str, Any], None]:
+        """映射状态码及错误分析字段（按状态码分组）"""
+        is_success = status_code.startswith('2')
+        fields = {
+            'response_status_code': status_code,
+            'response_status_class': self._get_status_class(status_code),
+
+            # 错误分类
+            'error_code_group': self._classify_error_group(status_code),
+            'http_error_class': self._classify_http_error_class(status_code),
+            'error_severity_level': self._assess_error_severity(status_code),
+            'error_category': self._classify_error_category(status_code),
+            'error_source': self._identify_error_source(status_code),
+
+            # 成功状态判断
+            'is_success': is_success,
+            'is_error': not is_success,
+            'is_client_error': status_code.startswith('4'),
+            'is_server_error': status_code.startswith('5'),
+        }
+        return fields, None
     
     # ========== 辅助方法 ==========
     
@@ -1366,18 +1480,8 @@ class FieldMapper:
             return default
     
     def _normalize_uri(self, uri: str) -> str:
-        """标准化URI"""
-        if not uri:
-            return uri
-        
-        # 移除查询参数
-        uri = uri.split('?')[0]
-        
-        # 移除末尾斜杠
-        if uri.endswith('/') and len(uri) > 1:
-            uri = uri[:-1]
-            
-        return uri
+        """标准化URI：移除查询参数与末尾斜杠，ID类路径片段归一为 {id}"""
+        return get_uri_template_engine().normalize(uri)
     
     def _extract_domain(self, url: str) -> str:
         """提取域名"""
@@ -1413,8 +1517,7 @@ class FieldMapper:
             return 'trusted'
         
         # 检测已知恶意IP段（示例）
-        suspicious_ranges = ['185.220.', '199.87.', '204.11.']  # Tor节点示例
-        if any(ip.startswith(prefix) for prefix in suspicious_ranges):
+        if ip.startswith(SUSPICIOUS_PREFIXES):
             return 'suspicious'
             
         return 'neutral'
@@ -1425,8 +1528,7 @@ class FieldMapper:
             return False
         
         # 已知Tor出口节点IP段（示例）
-        tor_ranges = ['185.220.', '199.87.', '204.11.', '109.70.', '176.10.']
-        return any(ip.startswith(prefix) for prefix in tor_ranges)
+        return ip.startswith(TOR_EXIT_PREFIXES)
     
     def _detect_proxy(self, ip: str, parsed_data: Dict[str, Any]) -> bool:
         """检测代理访问"""
@@ -1438,8 +1540,7 @@ class FieldMapper:
             return True
         
         # 已知代理IP段
-        proxy_ranges = ['104.16.', '172.64.', '173.245.', '103.21.', '103.22.']  # Cloudflare
-        return any(ip.startswith(prefix) for prefix in proxy_ranges)
+        return ip.startswith(PROXY_PREFIXES)
     
     def _detect_vpn(self, ip: str) -> bool:
         """检测VPN"""
@@ -1447,8 +1548,7 @@ class FieldMapper:
             return False
         
         # 已知VPN提供商IP段（示例）
-        vpn_ranges = ['45.', '91.', '194.', '195.']
-        return any(ip.startswith(prefix) for prefix in vpn_ranges)
+        return ip.startswith(VPN_PREFIXES)
     
     def _detect_datacenter(self, ip: str) -> bool:
         """检测数据中心IP"""
@@ -1456,14 +1556,7 @@ class FieldMapper:
             return False
         
         # 已知数据中心IP段
-        datacenter_ranges = [
-            '13.',      # AWS
-            '52.',      # AWS
-            '104.',     # Cloudflare
-            '142.250.', # Google
-            '157.240.', # Facebook
-        ]
-        return any(ip.startswith(prefix) for prefix in datacenter_ranges)
+        return ip.startswith(DATACENTER_PREFIXES)
     
     def _get_status_class(self, status_code: str) -> str:
         """获取状态码类别"""
@@ -1807,7 +1900,7 @@ class FieldMapper:
         
         return 'referral'
     
-    @lru_cache(maxsize=1000)
+    @enrichment_cached('search_engine', maxsize=1000)
     def _detect_search_engine(self, referer: str) -> str:
         """检测搜索引擎"""
         if not referer or referer == '-':
@@ -1848,7 +1941,7 @@ class FieldMapper:
         
         return ''
     
-    @lru_cache(maxsize=1000)
+    @enrichment_cached('social_media', maxsize=1000)
     def _detect_social_media(self, referer: str) -> str:
         """检测社交媒体"""
         if not referer or referer == '-':
@@ -2209,33 +2302,61 @@ class FieldMapper:
         }
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """获取缓存统计信息"""
+        """获取缓存统计信息（UA/IP按分组缓存统计，caches为进程内所有富化缓存的明细）"""
+        ua_stats = self._group_memo['ua'].stats()
+        ip_stats = self._group_memo['ip'].stats()
         return {
-            'ua_cache_hit_rate': self.cache_stats['ua_hits'] / (self.cache_stats['ua_hits'] + self.cache_stats['ua_misses'])
-            if (self.cache_stats['ua_hits'] + self.cache_stats['ua_misses']) > 0 else 0,
-            'ip_cache_hit_rate': self.cache_stats['ip_hits'] / (self.cache_stats['ip_hits'] + self.cache_stats['ip_misses'])
-            if (self.cache_stats['ip_hits'] + self.cache_stats['ip_misses']) > 0 else 0,
-            'total_cache_hits': self.cache_stats['ua_hits'] + self.cache_stats['ip_hits'],
-            'total_cache_misses': self.cache_stats['ua_misses'] + self.cache_stats['ip_misses'],
+            'ua_cache_hit_rate': ua_stats['hit_rate'],
+            'ip_cache_hit_rate': ip_stats['hit_rate'],
+            'total_cache_hits': ua_stats['hits'] + ip_stats['hits'],
+            'total_cache_misses': ua_stats['misses'] + ip_stats['misses'],
+            'caches': get_enrichment_cache_stats(),
         }
     
     def clear_caches(self):
         """清空所有缓存"""
-        self._parse_ua_with_library.cache_clear()
-        self._parse_ua_fallback.cache_clear()
-        self._resolve_geo_location.cache_clear()
-        self._parse_uri_structure.cache_clear()
-        self._parse_log_time.cache_clear()
-        self._detect_search_engine.cache_clear()
-        self._detect_social_media.cache_clear()
-        
-        # 重置缓存统计
-        self.cache_stats = {
-            'ua_hits': 0,
-            'ua_misses': 0,
-            'ip_hits': 0,
-            'ip_misses': 0,
+        for method in (self._parse_ua_with_library, self._parse_ua_fallback, self._resolve_geo_location,
+                       self._parse_uri_structure, self._parse_log_time, self._detect_government_app,
+                       self._detect_search_engine, self._detect_social_media):
+            method.cache.clear()
+        for cache in self._group_memo.values():
+            cache.clear()
+
+    def warm_caches(self, hot_keys: Dict[str, List[str]]) -> int:
+        """
+        用上次运行保存的热点键预热缓存
+
+        Args:
+            hot_keys: 缓存名 -> 键列表（utils.enrichment_cache.load_hot_keys 的结果）
+
+        Returns:
+            预热的条目数
+        """
+        warmers = {
+            self._group_memo['request'].name: lambda key: self._memo_group('request', key, self._build_request_group),
+            self._group_memo['ua'].name: lambda key: self._memo_group('ua', key, self._build_ua_group),
+            self._group_memo['ip'].name: lambda key: self._memo_group('ip', key, self._build_ip_group),
+            self._group_memo['referer'].name: lambda key: self._memo_group('referer', key, self._build_referer_group),
+            self._group_memo['status'].name: lambda key: self._memo_group('status', key, self._build_status_group),
         }
+        # 时间类缓存的键随日志时间推进，不做预热
+        for method in (self._parse_ua_with_library, self._parse_ua_fallback, self._resolve_geo_location,
+                       self._parse_uri_structure, self._detect_government_app):
+            warmers[method.cache.name] = method
+
+        warmed = 0
+        for name, keys in hot_keys.items():
+            warmer = warmers.get(name)
+            if warmer is None:
+                continue
+            # 由旧到新写入，最热的键最后写入、最晚被淘汰
+            for key in reversed(keys):
+                try:
+                    warmer(key)
+                    warmed += 1
+                except Exception:
+                    continue
+        return warmed
 
 
 # ========== 批处理优化类 ==========
@@ -2337,29 +2458,20 @@ class BatchFieldMapper(FieldMapper):
         self.logger.info(f"缓存预热完成: 预解析了 {len(top_uas)} 个UA和 {len(top_ips)} 个IP")
     
     def _cleanup_old_cache_entries(self):
-        """清理旧缓存条目，保留最近使用的"""
-        # LRU缓存会自动管理，但可以根据需要手动清理
-        cache_info = self._parse_ua_with_library.cache_info() if HAS_UA_PARSER else self._parse_ua_fallback.cache_info()
-        
-        if cache_info.currsize > cache_info.maxsize * 0.9:
-            # 缓存接近满，可以考虑增大缓存大小或清理
-            self.logger.warning(f"UA缓存接近满: {cache_info.currsize}/{cache_info.maxsize}")
+        """检查缓存容量（缓存按LRU自动淘汰，这里只在接近满时提示）"""
+        stats = self._group_memo['ua'].stats()
+
+        if stats['size'] > stats['maxsize'] * 0.9:
+            # 缓存接近满，可以考虑增大缓存大小
+            self.logger.warning(f"UA缓存接近满: {stats['size']}/{stats['maxsize']}，已淘汰 {stats['evictions']} 项")
     
     def _get_ua_cache_hit_rate(self) -> float:
         """获取UA缓存命中率"""
-        if HAS_UA_PARSER:
-            cache_info = self._parse_ua_with_library.cache_info()
-        else:
-            cache_info = self._parse_ua_fallback.cache_info()
-        
-        total = cache_info.hits + cache_info.misses
-        return cache_info.hits / total if total > 0 else 0
+        return self._group_memo['ua'].stats()['hit_rate']
     
     def _get_ip_cache_hit_rate(self) -> float:
         """获取IP缓存命中率"""
-        cache_info = self._resolve_geo_location.cache_info()
-        total = cache_info.hits + cache_info.misses
-        return cache_info.hits / total if total > 0 else 0
+        return self._group_memo['ip'].stats()['hit_rate']
     
     def get_processing_stats(self) -> Dict[str, Any]:
         """获取处理统计信息"""
@@ -3,6 +3,10 @@
 """
 动态批大小优化器
 根据系统性能和数据量动态调整批处理大小以获得最佳性能
+
+按插入延迟调整（record_insert_latency / optimize_by_latency）不依赖psutil：
+用最近的插入拟合 耗时 = 固定开销 + 每行耗时 × 行数，使固定开销只占单次插入的一小部分，
+同时单次插入耗时不超过上限
 """
 
 import time
@@ -29,7 +33,10 @@ class DynamicBatchOptimizer:
                  max_batch_size: int = 100000,
                  memory_threshold: float = 0.8,
                  cpu_threshold: float = 0.9,
-                 optimization_window: int = 10):
+                 optimization_window: int = 10,
+                 target_overhead_ratio: float = 0.1,
+                 max_insert_seconds: float = 2.0,
+                 latency_check_interval: float = 5.0):
         """
         初始化动态批大小优化器
 
@@ -40,6 +47,9 @@ class DynamicBatchOptimizer:
             memory_threshold: 内存使用阈值 (0-1)
             cpu_threshold: CPU使用阈值 (0-1)
             optimization_window: 性能统计窗口大小
+            target_overhead_ratio: 插入固定开销占单次插入耗时的目标比例
+            max_insert_seconds: 单次插入耗时上限(秒)
+            latency_check_interval: 按插入延迟调整的最小间隔(秒)
         """
         self.current_batch_size = initial_batch_size
         self.min_batch_size = min_batch_size
@@ -52,6 +62,13 @@ class DynamicBatchOptimizer:
         self.performance_history = deque(maxlen=optimization_window)
         self.batch_history = deque(maxlen=optimization_window)
 
+        # 插入延迟 (行数, 耗时)
+        self.target_overhead_ratio = target_overhead_ratio
+        self.max_insert_seconds = max_insert_seconds
+        self.latency_check_interval = latency_check_interval
+        self.latency_history = deque(maxlen=max(optimization_window, 20))
+        self.last_latency_check = time.time()
+
         # 系统监控
         self.memory_history = deque(maxlen=20)
         self.cpu_history = deque(maxlen=20)
@@ -235,6 +252,79 @@ class DynamicBatchOptimizer:
 
         return self.current_batch_size
 
+    def record_insert_latency(self, rows: int, duration: float) -> None:
+        """记录一次插入的行数和耗时(秒)"""
+        if rows > 0 and duration > 0:
+            self.latency_history.append((rows, duration))
+
+    def get_latency_model(self) -> Dict:
+        """
+        拟合插入耗时模型
+
+        Returns:
+            {'overhead': 固定开销(秒), 'per_row': 每行耗时(秒), 'samples': 样本数}，
+            行数没有变化或样本不足时 overhead/per_row 为 None
+        """
+        samples = list(self.latency_history)
+        model = {'overhead': None, 'per_row': None, 'samples': len(samples)}
+        if len(samples) < 3:
+            return model
+
+        mean_rows = mean(rows for rows, _ in samples)
+        mean_duration = mean(duration for _, duration in samples)
+        variance = sum((rows - mean_rows) ** 2 for rows, _ in samples)
+        if variance <= 0:
+            return model
+
+        per_row = sum((rows - mean_rows) * (duration - mean_duration) for rows, duration in samples) / variance
+        if per_row <= 0:
+            return model
+        model['per_row'] = per_row
+        model['overhead'] = max(0.0, mean_duration - per_row * mean_rows)
+        return model
+
+    def optimize_by_latency(self) -> Tuple[int, str]:
+        """
+        按插入延迟调整批大小
+
+        Returns:
+            Tuple[新的批大小, 调整原因]
+        """
+        if len(self.latency_history) < 5 or time.time() - self.last_latency_check < self.latency_check_interval:
+            return self.current_batch_size, "无需优化"
+        self.last_latency_check = time.time()
+
+        model = self.get_latency_model()
+        recent = list(self.latency_history)[-5:]
+        recent_duration = mean(duration for _, duration in recent)
+
+        if model['per_row'] is None:
+            # 行数没有变化，无法区分固定开销：只按单次耗时约束，否则小步增大以获得不同批大小的样本
+            if recent_duration > self.max_insert_seconds:
+                new_batch_size, reason = int(self.current_batch_size * 0.7), "单次插入耗时过长"
+            else:
+                new_batch_size, reason = int(self.current_batch_size * 1.2), "探索更大批次"
+        else:
+            overhead, per_row = model['overhead'], model['per_row']
+            # 固定开销占比降到目标比例所需的行数
+            target = overhead * (1 - self.target_overhead_ratio) / (self.target_overhead_ratio * per_row)
+            reason = "摊薄固定开销"
+            # 单次插入耗时上限
+            if overhead < self.max_insert_seconds:
+                limit = (self.max_insert_seconds - overhead) / per_row
+                if limit < target:
+                    target, reason = limit, "单次插入耗时上限"
+            else:
+                target, reason = self.min_batch_size, "固定开销超过耗时上限"
+            # 渐进式调整
+            new_batch_size = int(max(self.current_batch_size * 0.5, min(self.current_batch_size * 1.5, target)))
+
+        new_batch_size = max(self.min_batch_size, min(self.max_batch_size, new_batch_size))
+        if new_batch_size != self.current_batch_size:
+            self.logger.info(f"批大小优化: {self.current_batch_size} -> {new_batch_size}, 原因: {reason}")
+            self.current_batch_size = new_batch_size
+        return self.current_batch_size, reason
+
     def get_current_batch_size(self) -> int:
         """获取当前批大小"""
         return self.current_batch_size
@@ -275,6 +365,7 @@ class DynamicBatchOptimizer:
         self.batch_history.clear()
         self.memory_history.clear()
         self.cpu_history.clear()
+        self.latency_history.clear()
         self.consecutive_bad_performance = 0
         self.consecutive_good_performance = 0
         self.last_optimization_time = time.time()
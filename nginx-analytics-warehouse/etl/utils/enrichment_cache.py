@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+富化缓存服务
+UA解析、IP地理定位、URI结构等富化结果的进程内共享缓存
+
+1. 按名称注册，同一进程内所有映射器/工作线程共用一份缓存（不绑定实例）
+2. 严格LRU淘汰，读写加锁，命中/未命中/淘汰计数在锁内更新
+3. 热点键持久化 - 运行结束时保存各缓存最近使用的键，下次运行（含各解析进程）启动时预热
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_HOT_KEYS = 1000
+
+_MISSING = object()
+
+
+class EnrichmentCache:
+    """有界LRU缓存（线程安全）"""
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """查找缓存，命中时移到最近使用端"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[Hashable], Any]) -> Any:
+        """查找缓存，未命中时计算并写入（计算在锁外进行，并发未命中时可能重复计算）"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute(key)
+            self.put(key, value)
+        return value
+
+    def hot_keys(self, limit: int = DEFAULT_HOT_KEYS) -> List[Hashable]:
+        """最近使用的键（由新到旧）"""
+        with self._lock:
+            keys = list(self._data.keys())
+        return keys[:-limit - 1:-1] if limit else keys[::-1]
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total > 0 else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_registry: Dict[str, EnrichmentCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_enrichment_cache(name: str, maxsize: int = DEFAULT_CACHE_SIZE) -> EnrichmentCache:
+    """获取进程内共享的命名缓存（首次获取时创建）"""
+    cache = _registry.get(name)
+    if cache is None:
+        with _registry_lock:
+            cache = _registry.get(name)
+            if cache is None:
+                cache = _registry[name] = EnrichmentCache(name, maxsize)
+    return cache
+
+
+def enrichment_cached(name: str, maxsize: int = DEFAULT_CACHE_SIZE):
+    """
+    单参数方法的共享缓存装饰器（替代实例方法上的 lru_cache）
+
+    缓存以参数为键、不包含 self，同一进程内所有实例共用；
+    被装饰的方法通过 .cache 访问对应的 EnrichmentCache
+    """
+    def decorator(func):
+        cache = get_enrichment_cache(name, maxsize)
+
+        @wraps(func)
+        def wrapper(self, key):
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(self, key)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def get_enrichment_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """所有命名缓存的统计"""
+    return {name: cache.stats() for name, cache in list(_registry.items())}
+
+
+def clear_enrichment_caches():
+    """清空所有命名缓存"""
+    for cache in list(_registry.values()):
+        cache.clear()
+
+
+# ========== 热点键持久化 ==========
+
+def snapshot_hot_keys(limit: int = DEFAULT_HOT_KEYS) -> Dict[str, List[str]]:
+    """各缓存最近使用的字符串键（其他类型的键不持久化）"""
+    snapshot = {}
+    for name, cache in list(_registry.items()):
+        keys = [key for key in cache.hot_keys(limit) if isinstance(key, str)]
+        if keys:
+            snapshot[name] = keys
+    return snapshot
+
+
+def merge_hot_keys(target: Dict[str, List[str]], snapshot: Dict[str, List[str]],
+                   limit: int = DEFAULT_HOT_KEYS):
+    """合并多个来源（如各解析进程）的热点键，后合并的优先"""
+    for name, keys in snapshot.items():
+        merged = list(dict.fromkeys(list(keys) + target.get(name, [])))
+        target[name] = merged[:limit]
+
+
+def save_hot_keys(path: Union[str, Path], hot_keys: Optional[Dict[str, List[str]]] = None):
+    """保存热点键（默认取当前进程各缓存的快照）"""
+    if hot_keys is None:
+        hot_keys = snapshot_hot_keys()
+    path = Path(path)
+    temp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(hot_keys, f, ensure_ascii=False)
+    temp_path.replace(path)
+
+
+def load_hot_keys(path: Union[str, Path]) -> Dict[str, List[str]]:
+    """读取热点键，文件不存在或损坏时返回空字典"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {name: [key for key in keys if isinstance(key, str)]
+            for name, keys in data.items() if isinstance(keys, list)}
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件断点 - 按字节偏移续传与追加文件的增量摄取
+
+1. 断点内容 - 每个文件记录最后一个已提交批次之后的字节偏移和行数，
+   以及文件开头一段内容的摘要（用于识别轮转/重建的同名文件）
+2. 有序提交 - 同一文件的批次可能被不同写入线程/进程乱序确认，
+   只有从断点开始连续确认的批次才推进断点；某批次写入失败后该文件的断点不再推进，
+   生产者停止解析该文件，写入端丢弃该文件尚未写入的批次，下次运行从失败批次处重读
+   （只有失败时已在其他写入线程/进程中并发写入的批次会重复）
+3. 续传 - 文件变小或开头内容变化时从头处理，文件变大时只处理新增部分
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+# 文件摘要覆盖的开头字节数
+HEAD_DIGEST_BYTES = 1024
+
+# 最后修改时间在此秒数内的文件视为仍在写入，不处理末尾不完整的行
+TAIL_SETTLE_SECONDS = 30
+
+
+def head_digest(file_path: Union[str, Path], length: int) -> str:
+    """文件开头 length 字节的摘要"""
+    with open(file_path, 'rb') as f:
+        return hashlib.md5(f.read(length)).hexdigest()
+
+
+def build_checkpoint(file_path: Union[str, Path], offset: int, line_count: int) -> Dict[str, Any]:
+    """生成断点字段（偏移、行数、开头摘要）"""
+    head_length = min(offset, HEAD_DIGEST_BYTES)
+    return {
+        'offset': offset,
+        'line_count': line_count,
+        'head_length': head_length,
+        'head_digest': head_digest(file_path, head_length),
+    }
+
+
+def resume_position(file_path: Union[str, Path], entry: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    根据状态记录确定续传位置
+
+    Args:
+        entry: 状态文件中该文件的记录；旧格式只有 file_size（整文件已处理）
+
+    Returns:
+        (起始字节偏移, 已处理行数)，需要从头处理时为 (0, 0)
+    """
+    if not entry:
+        return 0, 0
+
+    try:
+        size = Path(file_path).stat().st_size
+        if 'offset' not in entry:
+            # 旧格式：按整文件已处理，文件变大时只处理新增部分
+            offset = int(entry.get('file_size', 0))
+            return (offset, 0) if offset <= size else (0, 0)
+
+        offset = int(entry['offset'])
+        if offset > size:
+            return 0, 0
+        head_length = int(entry.get('head_length', 0))
+        if head_length and head_digest(file_path, head_length) != entry.get('head_digest'):
+            return 0, 0
+        return offset, int(entry.get('line_count', 0))
+    except (OSError, ValueError, TypeError):
+        return 0, 0
+
+
+def is_fully_processed(file_path: Union[str, Path], entry: Optional[Dict[str, Any]]) -> bool:
+    """文件是否已处理到末尾（续传位置不小于当前大小）"""
+    if not entry:
+        return False
+    try:
+        size = Path(file_path).stat().st_size
+    except OSError:
+        # 文件已不存在时保持原有判断（有记录即已处理）
+        return True
+    offset, _ = resume_position(file_path, entry)
+    return offset >= size
+
+
+class FileCheckpointTracker:
+    """
+    按文件跟踪批次确认，只按批次序号顺序推进断点（线程安全）
+
+    生产者为每个文件的批次从0开始编号，确认时带上该批次结束位置；
+    文件解析结束后 finish 传入批次总数和解析结束位置（含末尾未成批的行）
+    """
+
+    def __init__(self):
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, file_key: str, offset: int, line_count: int):
+        """开始跟踪一个文件（从续传位置开始）"""
+        with self._lock:
+            self._files[file_key] = {
+                'committed': (offset, line_count),
+                'next_seq': 0,
+                'acked': {},        # 已确认但前面还有未确认批次的序号 -> (结束偏移, 结束行数, 行数, 是否成功)
+                'failed': False,
+                'committed_rows': 0,
+            }
+
+    def ack(self, file_key: str, seq: int, end_offset: int, end_line: int, rows: int,
+            success: bool) -> Optional[Tuple[int, int, int]]:
+        """
+        记录批次确认
+
+        Returns:
+            断点推进时返回 (偏移, 行数, 本次推进包含的行数)，否则 None
+        """
+        with self._lock:
+            state = self._files.get(file_key)
+            if state is None or state['failed']:
+                return None
+            state['acked'][seq] = (end_offset, end_line, rows, success)
+
+            advanced = None
+            advanced_rows = 0
+            while state['next_seq'] in state['acked']:
+                end_offset, end_line, batch_rows, batch_success = state['acked'].pop(state['next_seq'])
+                if not batch_success:
+                    state['failed'] = True
+                    state['acked'].clear()
+                    break
+                state['next_seq'] += 1
+                state['committed'] = (end_offset, end_line)
+                state['committed_rows'] += batch_rows
+                advanced_rows += batch_rows
+                advanced = (end_offset, end_line, advanced_rows)
+            return advanced
+
+    def finish(self, file_key: str, batches: int, end_offset: int, end_line: int) -> Dict[str, Any]:
+        """
+        结束跟踪；全部批次成功时断点推进到解析结束位置
+
+        Returns:
+            {'offset', 'line_count', 'rows': 已提交行数, 'failed': 是否有批次失败或未确认}
+        """
+        with self._lock:
+            state = self._files.pop(file_key, None)
+        if state is None:
+            return {'offset': 0, 'line_count': 0, 'rows': 0, 'failed': True}
+
+        failed = state['failed'] or state['next_seq'] < batches
+        offset, line_count = state['committed'] if failed else (end_offset, end_line)
+        return {
+            'offset': offset,
+            'line_count': line_count,
+            'rows': state['committed_rows'],
+            'failed': failed,
+        }
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志目录监视 - 事件驱动的新文件/追加文件发现
+
+1. inotify（Linux，ctypes 调用 libc，无额外依赖）：写入关闭（IN_CLOSE_WRITE）、移入（IN_MOVED_TO）
+   的文件立即就绪；只有修改事件（nginx 等长期打开追加写的文件）的文件在静默 stable_seconds 后就绪
+2. 不可用时（非 Linux、inotify 实例/监视数耗尽）退化为轮询，同样只扫描活跃日期目录
+3. 只跟踪活跃日期目录：启动时最新的 active_days 个 YYYYMMDD 目录，加上运行中新建的日期目录；
+   超出数量的旧目录移除监视并丢弃其文件签名，内存和每次检查的开销不随历史目录数增长
+4. 文件以 (大小, 修改时间) 签名交出，签名未变的文件不重复交出；变大的文件再次交出，
+   由断点续传（utils.file_checkpoint）只处理新增部分
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# 活跃日期目录数
+ACTIVE_DAYS = 2
+
+# 只有修改事件的文件静默多少秒后视为写完
+STABLE_SECONDS = 5
+
+# 轮询间隔（inotify 可用时作为兜底复查间隔）
+POLL_INTERVAL = 30
+
+LOG_SUFFIX = '.log'
+
+# inotify 常量（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, 'O_NONBLOCK') else 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+FileSignature = Tuple[int, float]
+
+
+def is_date_dir_name(name: str) -> bool:
+    """是否为 YYYYMMDD 日期目录名"""
+    if len(name) != 8 or not name.isdigit():
+        return False
+    try:
+        datetime.strptime(name, '%Y%m%d')
+        return True
+    except ValueError:
+        return False
+
+
+class Inotify:
+    """inotify 的最小封装（非阻塞描述符 + select）"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._get_errno = ctypes.get_errno
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self.fd = fd
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith('linux')
+
+    def add_watch(self, path: Union[str, Path], mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            err = self._get_errno()
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """等待并读取事件，返回 [(wd, mask, name)]，超时返回空列表"""
+        try:
+            readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        except InterruptedError:
+            return []
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = data[pos:pos + name_len].rstrip(b'\0')
+            pos += name_len
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class LogDirectoryWatcher:
+    """
+    日志目录监视器（线程安全）
+
+    baseline() 记录活跃目录中现有文件的签名（这些文件不交出）；poll() 首次调用时启动 inotify
+    并复查一次活跃目录，之后等待事件直到有文件就绪或超时。
+    """
+
+    def __init__(self,
+                 log_dir: Union[str, Path],
+                 active_days: int = ACTIVE_DAYS,
+                 stable_seconds: float = STABLE_SECONDS,
+                 poll_interval: float = POLL_INTERVAL,
+                 use_inotify: bool = True,
+                 logger: logging.Logger = None):
+        self.log_dir = Path(log_dir)
+        self.active_days = max(1, active_days)
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and Inotify.available()
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.RLock()
+        self._inotify: Optional[Inotify] = None
+        self._base_wd: Optional[int] = None
+        self._dir_wds: Dict[int, str] = {}
+        # 活跃日期目录名 -> 目录（按名称排序，最旧的先淘汰）
+        self._active_dirs: Dict[str, Path] = {}
+        # 已交出的文件签名（只含活跃目录中的文件）
+        self._signatures: Dict[Path, FileSignature] = {}
+        # 有修改事件、尚未静默的文件
+        self._pending: Dict[Path, float] = {}
+        # 就绪待交出的文件（保持发现顺序，去重）
+        self._ready: 'OrderedDict[Path, None]' = OrderedDict()
+        self._started = False
+        self._last_rescan = 0.0
+        self._stats = {'events': 0, 'rescans': 0, 'overflows': 0, 'handed_out': 0}
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._inotify is not None or (self.use_inotify and not self._started) else 'polling'
+
+    # ========== 活跃目录 ==========
+
+    def _list_date_dirs(self) -> List[str]:
+        try:
+            with os.scandir(self.log_dir) as entries:
+                return sorted(entry.name for entry in entries
+                              if entry.is_dir() and is_date_dir_name(entry.name))
+        except OSError:
+            return []
+
+    def _activate_dir(self, name: str) -> bool:
+        """把日期目录加入活跃集合，超出数量时淘汰最旧的；返回目录是否为活跃目录"""
+        if name in self._active_dirs:
+            return True
+        if len(self._active_dirs) >= self.active_days and name < min(self._active_dirs):
+            return False
+
+        self._active_dirs[name] = self.log_dir / name
+        if self._inotify is not None:
+            self._watch_dir(name)
+
+        while len(self._active_dirs) > self.active_days:
+            self._retire_dir(min(self._active_dirs))
+        return True
+
+    def _retire_dir(self, name: str):
+        date_dir = self._active_dirs.pop(name)
+        for wd, watched in list(self._dir_wds.items()):
+            if watched == name:
+                del self._dir_wds[wd]
+                if self._inotify is not None:
+                    self._inotify.rm_watch(wd)
+        for tracked in (self._signatures, self._pending, self._ready):
+            for path in [path for path in tracked if path.parent == date_dir]:
+                del tracked[path]
+
+    def _watch_dir(self, name: str):
+        try:
+            wd = self._inotify.add_watch(self.log_dir / name,
+                                         IN_CLOSE_WRITE | IN_MOVED_TO | IN_MODIFY | IN_CREATE
+                                         | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+            self._dir_wds[wd] = name
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self.logger.warning(f"inotify 监视数已达上限，改为轮询: {e}")
+                self._fallback_to_polling()
+            elif e.errno != errno.ENOENT:
+                self.logger.warning(f"监视目录失败 {name}: {e}")
+
+    def _select_active_dirs(self):
+        for name in self._list_date_dirs()[-self.active_days:]:
+            self._activate_dir(name)
+
+    # ========== 签名 ==========
+
+    def _scan_dir(self, date_dir: Path) -> Dict[Path, os.stat_result]:
+        files = {}
+        try:
+            with os.scandir(date_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(LOG_SUFFIX) and entry.is_file():
+                        files[Path(entry.path)] = entry.stat()
+        except OSError:
+            pass
+        return files
+
+    def _rescan(self, baseline: bool = False):
+        """复查活跃目录（含新出现的日期目录）：签名变化的文件按修改时间判断就绪或待静默"""
+        if self.log_dir.exists():
+            for name in self._list_date_dirs()[-self.active_days:]:
+                self._activate_dir(name)
+
+        now = time.time()
+        for date_dir in list(self._active_dirs.values()):
+            for path, stat in self._scan_dir(date_dir).items():
+                signature = (stat.st_size, stat.st_mtime)
+                if baseline:
+                    self._signatures[path] = signature
+                elif self._signatures.get(path) != signature and path not in self._ready:
+                    self._pending[path] = stat.st_mtime
+        self._last_rescan = now
+        self._stats['rescans'] += 1
+
+    def baseline(self, known_files: Iterable[Union[str, Path]] = None):
+        """
+        选择活跃目录并记录现有文件签名（启动前已存在的文件不交出）
+
+        Args:
+            known_files: 兼容参数，历史上已处理的文件由断点状态判断，这里不再单独记录
+        """
+        with self._lock:
+            self._select_active_dirs()
+            self._rescan(baseline=True)
+
+    # ========== inotify ==========
+
+    def _start(self):
+        self._started = True
+        if self.use_inotify:
+            try:
+                self._inotify = Inotify()
+                self._base_wd = self._inotify.add_watch(self.log_dir, IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+                for name in self._active_dirs:
+                    self._watch_dir(name)
+            except (OSError, AttributeError) as e:
+                self.logger.warning(f"inotify 不可用，改为轮询活跃目录: {e}")
+                self._fallback_to_polling()
+        # 监视建立之前发生的变化
+        self._rescan()
+
+    def _fallback_to_polling(self):
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._base_wd = None
+        self._dir_wds.clear()
+
+    def _handle_events(self, events: List[Tuple[int, int, str]]):
+        now = time.time()
+        for wd, mask, name in events:
+            self._stats['events'] += 1
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出：丢失的事件靠复查补上
+                self._stats['overflows'] += 1
+                self._rescan()
+                continue
+
+            if wd == self._base_wd:
+                if mask & IN_ISDIR and is_date_dir_name(name) and self._activate_dir(name):
+                    # 目录创建到加上监视之间写入的文件
+                    for path, stat in self._scan_dir(self.log_dir / name).items():
+                        self._pending[path] = stat.st_mtime
+                continue
+
+            dir_name = self._dir_wds.get(wd)
+            if dir_name is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                self._dir_wds.pop(wd, None)
+                if dir_name in self._active_dirs and not (self.log_dir / dir_name).is_dir():
+                    self._retire_dir(dir_name)
+                continue
+            if mask & IN_ISDIR or not name.endswith(LOG_SUFFIX):
+                continue
+
+            path = self._active_dirs[dir_name] / name
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._pending.pop(path, None)
+                self._mark_ready(path)
+            elif path not in self._ready:
+                self._pending[path] = now
+
+    # ========== 就绪判断 ==========
+
+    def _mark_ready(self, path: Path):
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+        if self._signatures.get(path) != (stat.st_size, stat.st_mtime):
+            self._ready[path] = None
+
+    def _promote_stable(self) -> Optional[float]:
+        """静默够久的待定文件转为就绪，返回最近一个待定文件还需等待的秒数"""
+        now = time.time()
+        next_wait = None
+        for path, last_change in list(self._pending.items()):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                del self._pending[path]
+                continue
+            quiet = now - max(last_change, mtime)
+            if quiet >= self.stable_seconds:
+                del self._pending[path]
+                self._mark_ready(path)
+            else:
+                wait = self.stable_seconds - quiet
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+        return next_wait
+
+    def _take_ready(self) -> List[Path]:
+        files = []
+        for path in self._ready:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            self._signatures[path] = (stat.st_size, stat.st_mtime)
+            files.append(path)
+        self._ready.clear()
+        self._stats['handed_out'] += len(files)
+        return files
+
+    def poll(self, timeout: float = 0) -> List[Path]:
+        """
+        等待就绪文件
+
+        Args:
+            timeout: 最长等待秒数，0 时只检查一次
+
+        Returns:
+            就绪的文件（新文件或自上次交出后变化过的文件）
+        """
+        deadline = time.time() + timeout
+        with self._lock:
+            if not self._started:
+                self._start()
+
+            while True:
+                now = time.time()
+                if now - self._last_rescan >= self.poll_interval:
+                    self._rescan()
+                next_wait = self._promote_stable()
+                if self._ready:
+                    return self._take_ready()
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    return []
+                wait = min(remaining, self.poll_interval - (now - self._last_rescan))
+                if next_wait is not None:
+                    wait = min(wait, next_wait)
+
+                if self._inotify is not None:
+                    self._handle_events(self._inotify.read_events(wait))
+                else:
+                    time.sleep(max(0.0, wait))
+
+    def requeue(self, files: Iterable[Path]):
+        """交出后未能处理的文件放回就绪队列"""
+        with self._lock:
+            for path in files:
+                self._signatures.pop(path, None)
+                if path.parent in self._active_dirs.values():
+                    self._ready[path] = None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return dict(self._stats, mode=self.mode, active_dirs=sorted(self._active_dirs),
+                        tracked_files=len(self._signatures), pending=len(self._pending),
+                        ready=len(self._ready))
+
+    def close(self):
+        """关闭 inotify；再次 poll 时重新建立监视并复查活跃目录"""
+        with self._lock:
+            if self._inotify is not None:
+                self._inotify.close()
+            self._inotify = None
+            self._base_wd = None
+            self._dir_wds.clear()
+            self._started = False
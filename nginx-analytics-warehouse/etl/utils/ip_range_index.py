@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IP富化区间索引
+把GeoLite2-City库与内置的IP段列表（内网、Tor、VPN、数据中心、代理、运营商）预编译为
+一张有序的IPv4区间表，一次 np.searchsorted 即可得到整批IP的地理与信誉字段
+
+1. 区间表 - 所有来源的区间边界切分为互不重叠的基本区间，每个区间记录标记位和地理信息编号
+2. 批量查询 - IP转为uint32后对区间起点做二分查找，结果按（标记位, 地理编号）组合复用
+3. 磁盘缓存 - 含GeoIP库时构建较慢，结果保存为 .npz，GeoIP库或内置IP段变化时才重建
+
+只处理合法的点分IPv4地址；IPv6及无法解析的字符串由调用方按原有逐条逻辑处理
+"""
+
+import hashlib
+import ipaddress
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import maxminddb
+    HAS_MAXMINDDB = True
+except ImportError:
+    HAS_MAXMINDDB = False
+
+# ========== 内置IP段（按点分前缀） ==========
+
+# 内网IP段（与 FieldMapper.patterns['internal_ip'] 一致）
+INTERNAL_PREFIXES = ('10.', '192.168.', '127.') + tuple(f'172.{i}.' for i in range(16, 32))
+
+# 已知恶意IP段（示例）- Tor节点
+SUSPICIOUS_PREFIXES = ('185.220.', '199.87.', '204.11.')
+
+# 已知Tor出口节点IP段（示例）
+TOR_EXIT_PREFIXES = ('185.220.', '199.87.', '204.11.', '109.70.', '176.10.')
+
+# 已知代理IP段 - Cloudflare
+PROXY_PREFIXES = ('104.16.', '172.64.', '173.245.', '103.21.', '103.22.')
+
+# 已知VPN提供商IP段（示例）
+VPN_PREFIXES = ('45.', '91.', '194.', '195.')
+
+# 已知数据中心IP段
+DATACENTER_PREFIXES = (
+    '13.',      # AWS
+    '52.',      # AWS
+    '104.',     # Cloudflare
+    '142.250.', # Google
+    '157.240.', # Facebook
+)
+
+# 中国主要运营商IP段示例（无GeoIP数据时推断ISP）
+ISP_PREFIXES = {
+    'China Mobile': ('111.', '112.', '113.', '114.', '115.', '116.', '117.', '118.', '119.', '120.'),
+    'China Telecom': ('221.', '222.', '223.'),
+    'China Unicom': ('58.', '59.', '60.', '61.'),
+}
+
+# 区间标记位
+FLAG_INTERNAL = 1
+FLAG_SUSPICIOUS = 2
+FLAG_TOR_EXIT = 4
+FLAG_PROXY = 8
+FLAG_VPN = 16
+FLAG_DATACENTER = 32
+# 运营商编号占用高位（0 表示未知）
+ISP_SHIFT = 8
+ISP_NAMES = ('',) + tuple(ISP_PREFIXES)
+
+# 内置IP段的版本签名，IP段调整后磁盘缓存自动失效
+RANGES_VERSION = hashlib.md5(repr((
+    INTERNAL_PREFIXES, SUSPICIOUS_PREFIXES, TOR_EXIT_PREFIXES, PROXY_PREFIXES,
+    VPN_PREFIXES, DATACENTER_PREFIXES, ISP_PREFIXES,
+)).encode()).hexdigest()[:12]
+
+INDEX_FILE_NAME = 'ip_range_index.npz'
+
+# 无GeoIP数据时的默认地理信息
+DEFAULT_GEO = {
+    'client_country': 'CN',
+    'client_region': 'unknown',
+    'client_city': 'unknown',
+    'client_isp': 'unknown',
+    'client_org': 'unknown',
+    'client_asn': 0,
+}
+
+
+def prefix_to_range(prefix: str) -> Tuple[int, int]:
+    """点分前缀转为 [起点, 终点) 区间，如 '185.220.' -> 185.220.0.0/16"""
+    octets = [int(part) for part in prefix.rstrip('.').split('.')]
+    start = 0
+    for octet in octets:
+        start = (start << 8) | octet
+    shift = 8 * (4 - len(octets))
+    return start << shift, (start + 1) << shift
+
+
+def ipv4_to_int(ip: Any) -> Optional[int]:
+    """合法的点分IPv4地址转为整数，其他输入返回None"""
+    if not ip or type(ip) is not str:
+        return None
+    try:
+        return int(ipaddress.IPv4Address(ip))
+    except ValueError:
+        return None
+
+
+class IpRangeIndex:
+    """IPv4区间索引（构建后只读，线程安全）"""
+
+    def __init__(self, starts: np.ndarray, flags: np.ndarray, geo_ids: np.ndarray,
+                 geo_table: List[Tuple[str, str, str]]):
+        """
+        Args:
+            starts: 各基本区间的起点（升序，首个为0）
+            flags: 各区间的标记位
+            geo_ids: 各区间在 geo_table 中的编号，-1 表示GeoIP库中无记录
+            geo_table: (国家, 地区, 城市) 列表
+        """
+        self.starts = starts
+        self.flags = flags
+        self.geo_ids = geo_ids
+        self.geo_table = geo_table
+        self._results: Dict[Tuple[int, int], Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def build(cls, mmdb_path: Optional[str] = None) -> 'IpRangeIndex':
+        """由内置IP段（及可选的GeoLite2-City库）构建索引"""
+        flagged_ranges = []
+        for prefixes, flag in ((INTERNAL_PREFIXES, FLAG_INTERNAL), (SUSPICIOUS_PREFIXES, FLAG_SUSPICIOUS),
+                               (TOR_EXIT_PREFIXES, FLAG_TOR_EXIT), (PROXY_PREFIXES, FLAG_PROXY),
+                               (VPN_PREFIXES, FLAG_VPN), (DATACENTER_PREFIXES, FLAG_DATACENTER)):
+            flagged_ranges.extend(prefix_to_range(prefix) + (flag,) for prefix in prefixes)
+        for isp_id, prefixes in enumerate(ISP_PREFIXES.values(), start=1):
+            flagged_ranges.extend(prefix_to_range(prefix) + (isp_id << ISP_SHIFT,) for prefix in prefixes)
+
+        geo_ranges, geo_table = cls._read_mmdb_ranges(mmdb_path) if mmdb_path else ([], [])
+        geo_ranges = np.array(sorted(geo_ranges), dtype=np.int64).reshape(-1, 3)
+
+        # 所有区间边界切分为基本区间
+        bounds = np.concatenate([
+            np.array([0], dtype=np.int64),
+            np.array([r[:2] for r in flagged_ranges], dtype=np.int64).ravel(),
+            geo_ranges[:, :2].ravel(),
+        ])
+        bounds = np.unique(bounds[bounds < (1 << 32)])
+        starts = bounds.astype(np.uint32)
+
+        flags = np.zeros(len(starts), dtype=np.uint16)
+        for start, end, flag in flagged_ranges:
+            lo, hi = cls._segment_span(starts, start, end)
+            flags[lo:hi] |= flag
+
+        # GeoIP网段互不重叠：每个基本区间找起点不大于它的最后一个网段，落在网段内即取其地理编号
+        geo_ids = np.full(len(starts), -1, dtype=np.int32)
+        if len(geo_ranges):
+            owner = np.searchsorted(geo_ranges[:, 0], bounds, side='right') - 1
+            inside = (owner >= 0) & (bounds < geo_ranges[np.maximum(owner, 0), 1])
+            geo_ids[inside] = geo_ranges[owner[inside], 2]
+
+        return cls(starts, flags, geo_ids, geo_table)
+
+    @staticmethod
+    def _segment_span(starts: np.ndarray, start: int, end: int) -> Tuple[int, int]:
+        """区间 [start, end) 覆盖的基本区间下标范围"""
+        lo = int(np.searchsorted(starts, start, side='left'))
+        hi = len(starts) if end >= (1 << 32) else int(np.searchsorted(starts, end, side='left'))
+        return lo, hi
+
+    @staticmethod
+    def _read_mmdb_ranges(mmdb_path: str) -> Tuple[List[Tuple[int, int, int]], List[Tuple[str, str, str]]]:
+        """遍历GeoLite2-City库中的IPv4网段"""
+        geo_ranges = []
+        geo_table = []
+        geo_ids = {}
+        with maxminddb.open_database(str(mmdb_path)) as reader:
+            for network, record in reader:
+                if network.version != 4 or not record:
+                    continue
+                subdivisions = record.get('subdivisions') or [{}]
+                geo = (
+                    (record.get('country') or {}).get('iso_code') or 'unknown',
+                    (subdivisions[-1].get('names') or {}).get('en') or 'unknown',
+                    ((record.get('city') or {}).get('names') or {}).get('en') or 'unknown',
+                )
+                geo_id = geo_ids.get(geo)
+                if geo_id is None:
+                    geo_id = geo_ids[geo] = len(geo_table)
+                    geo_table.append(geo)
+                start = int(network.network_address)
+                geo_ranges.append((start, start + network.num_addresses, geo_id))
+        return geo_ranges, geo_table
+
+    # ========== 查询 ==========
+
+    def lookup(self, ip: Any) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """查询单个IP，返回 (字段, 附加值)；非IPv4地址返回None"""
+        value = ipv4_to_int(ip)
+        if value is None:
+            return None
+        segment = int(np.searchsorted(self.starts, value, side='right')) - 1
+        return self._result(int(self.flags[segment]), int(self.geo_ids[segment]))
+
+    def lookup_many(self, ips: Sequence[Any]) -> List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        """批量查询（一次searchsorted），非IPv4地址对应位置为None"""
+        values = [ipv4_to_int(ip) for ip in ips]
+        valid = [i for i, value in enumerate(values) if value is not None]
+        results: List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]] = [None] * len(values)
+        if not valid:
+            return results
+
+        segments = np.searchsorted(self.starts, np.array([values[i] for i in valid], dtype=np.uint32),
+                                   side='right') - 1
+        flags = self.flags[segments].tolist()
+        geo_ids = self.geo_ids[segments].tolist()
+        for i, flag, geo_id in zip(valid, flags, geo_ids):
+            results[i] = self._result(flag, geo_id)
+        return results
+
+    def _result(self, flag: int, geo_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """（标记位, 地理编号）组合对应的字段，同一组合只构建一次"""
+        key = (flag, geo_id)
+        result = self._results.get(key)
+        if result is None:
+            result = self._build_result(flag, geo_id)
+            with self._lock:
+                self._results[key] = result
+        return result
+
+    def _build_result(self, flag: int, geo_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """按 FieldMapper 的IP字段规则生成结果"""
+        is_internal = bool(flag & FLAG_INTERNAL)
+
+        geo = dict(DEFAULT_GEO)
+        if is_internal:
+            geo['client_region'] = 'internal'
+        elif geo_id >= 0:
+            country, region, city = self.geo_table[geo_id]
+            geo.update({'client_country': country, 'client_region': region, 'client_city': city})
+        else:
+            isp = ISP_NAMES[flag >> ISP_SHIFT]
+            if isp:
+                geo['client_isp'] = isp
+                geo['client_region'] = 'China'
+
+        if is_internal:
+            reputation = 'trusted'
+        elif flag & FLAG_SUSPICIOUS:
+            reputation = 'suspicious'
+        else:
+            reputation = 'neutral'
+
+        is_tor_exit = not is_internal and bool(flag & FLAG_TOR_EXIT)
+        is_vpn = not is_internal and bool(flag & FLAG_VPN)
+        is_datacenter = not is_internal and bool(flag & FLAG_DATACENTER)
+
+        fields = {
+            'client_ip_type': 'internal' if is_internal else 'external',
+            'is_internal_ip': is_internal,
+        }
+        fields.update(geo)
+        fields.update({
+            'client_ip_classification': reputation,
+            'ip_reputation': reputation,
+            'is_tor_exit': is_tor_exit,
+            'is_vpn': is_vpn,
+            'is_datacenter': is_datacenter,
+        })
+        extra = {
+            'proxy_range': bool(flag & FLAG_PROXY),
+            'risk_score': (30 if is_tor_exit else 0) + (20 if is_vpn else 0) + (10 if is_datacenter else 0),
+        }
+        return fields, extra
+
+    # ========== 磁盘缓存 ==========
+
+    def save(self, path: Path, signature: str):
+        """保存索引（np.savez，不依赖pickle）"""
+        geo_table = np.array(self.geo_table, dtype=str).reshape(-1, 3)
+        temp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(temp_path, starts=self.starts, flags=self.flags, geo_ids=self.geo_ids,
+                 geo_table=geo_table, signature=np.array(signature))
+        temp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, signature: str) -> Optional['IpRangeIndex']:
+        """读取索引，签名不一致（来源已变化）或文件损坏时返回None"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['signature']) != signature:
+                    return None
+                geo_table = [tuple(row) for row in data['geo_table'].tolist()]
+                return cls(data['starts'], data['flags'], data['geo_ids'], geo_table)
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def _source_signature(mmdb_path: Optional[Path]) -> str:
+    """索引来源签名：内置IP段版本 + GeoIP库路径/大小/修改时间"""
+    if not mmdb_path:
+        return RANGES_VERSION
+    stat = mmdb_path.stat()
+    return f"{RANGES_VERSION}:{mmdb_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+_indexes: Dict[str, Optional[IpRangeIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_ip_range_index(mmdb_path: Optional[str] = None) -> Optional[IpRangeIndex]:
+    """
+    获取进程内共享的IP区间索引
+
+    Args:
+        mmdb_path: GeoLite2-City库路径；为None时只使用内置IP段
+
+    Returns:
+        索引；指定了GeoIP库但无法读取（未安装maxminddb等）时返回None，由调用方走逐条查询
+    """
+    key = str(mmdb_path) if mmdb_path else ''
+    if key in _indexes:
+        return _indexes[key]
+
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = _load_or_build(Path(mmdb_path) if mmdb_path else None)
+        return _indexes[key]
+
+
+def _load_or_build(mmdb_path: Optional[Path]) -> Optional[IpRangeIndex]:
+    """读取磁盘缓存，来源变化时重建"""
+    logger = logging.getLogger(__name__)
+    if mmdb_path is None:
+        return IpRangeIndex.build()
+
+    if not HAS_MAXMINDDB or not mmdb_path.exists():
+        return None
+
+    signature = _source_signature(mmdb_path)
+    index_path = mmdb_path.with_name(INDEX_FILE_NAME)
+    if index_path.exists():
+        index = IpRangeIndex.load(index_path, signature)
+        if index is not None:
+            logger.info(f"IP区间索引已加载: {len(index):,} 个区间")
+            return index
+
+    try:
+        index = IpRangeIndex.build(str(mmdb_path))
+    except Exception as e:
+        logger.warning(f"IP区间索引构建失败，使用逐条GeoIP查询: {e}")
+        return None
+
+    try:
+        index.save(index_path, signature)
+    except OSError as e:
+        logger.warning(f"IP区间索引保存失败: {e}")
+    logger.info(f"IP区间索引已构建: {len(index):,} 个区间")
+    return index
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存调控 - 代替定期强制 gc.collect()
+
+1. 在途字节预算: 已映射、尚未写入完成的批次（队列中 + 写入中）合计不超过预算，
+   超出时生产者阻塞（线程模式与多进程模式通用，多进程时预算在进程间共享）
+2. 单条记录字节数: 按抽样测量解析缓冲区中每条记录占用的内存，据此限制解析批次的条数
+3. 插入批大小: 按实测插入耗时与行数的关系调整（utils.dynamic_batch_optimizer）
+4. GC: 提高第0代阈值、冻结初始化阶段创建的长期对象（映射器缓存、IP索引等），
+   不再在大堆上执行全量回收；通过 gc.callbacks 统计每次回收的停顿
+"""
+
+import gc
+import sys
+import time
+import threading
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+try:
+    from utils.dynamic_batch_optimizer import DynamicBatchOptimizer
+except ImportError:
+    from dynamic_batch_optimizer import DynamicBatchOptimizer
+
+# 内存上限的分配：在途批次 / 各解析线程的解析缓冲区，其余留给缓存和解释器
+IN_FLIGHT_SHARE = 0.5
+PARSE_BUFFER_SHARE = 0.25
+
+# 第0代回收阈值（默认约700~2000个对象，解析大量短命对象时回收过于频繁）
+GC_GEN0_THRESHOLD = 50000
+
+# 测量单条记录字节数时的抽样条数，以及平滑系数
+RECORD_SAMPLE_SIZE = 16
+RECORD_BYTES_SMOOTHING = 0.2
+
+# 解析批次的最小条数（预算很小时也保证批量映射有效）
+MIN_PARSE_BATCH = 100
+
+
+class ByteBudget:
+    """
+    在途字节预算
+
+    acquire 在已占用 + 本次 超出上限时阻塞；没有任何占用时总是放行（单个超大批次不会死锁）。
+    传入 multiprocessing 上下文时计数和条件变量在进程间共享，可作为进程初始化参数传给子进程。
+    """
+
+    def __init__(self, limit_bytes: int, mp_context=None):
+        self.limit_bytes = int(limit_bytes)
+        if mp_context is None:
+            self._cond = threading.Condition()
+            self._used = SimpleNamespace(value=0)
+            self._peak = SimpleNamespace(value=0)
+            self._waits = SimpleNamespace(value=0)
+        else:
+            self._cond = mp_context.Condition()
+            self._used = mp_context.Value('q', 0, lock=False)
+            self._peak = mp_context.Value('q', 0, lock=False)
+            self._waits = mp_context.Value('q', 0, lock=False)
+
+    def acquire(self, nbytes: int, timeout: float = None) -> bool:
+        """占用预算，超时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            if self._used.value > 0 and self._used.value + nbytes > self.limit_bytes:
+                self._waits.value += 1
+                while self._used.value > 0 and self._used.value + nbytes > self.limit_bytes:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(timeout=1.0 if remaining is None else min(remaining, 1.0))
+            self._used.value += nbytes
+            if self._used.value > self._peak.value:
+                self._peak.value = self._used.value
+        return True
+
+    def release(self, nbytes: int):
+        """归还预算"""
+        with self._cond:
+            self._used.value = max(0, self._used.value - nbytes)
+            self._cond.notify_all()
+
+    def reset(self):
+        """清空占用（消费者全部退出、已占用的批次不会再归还时）"""
+        with self._cond:
+            self._used.value = 0
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'limit_bytes': self.limit_bytes, 'used_bytes': self._used.value,
+                    'peak_bytes': self._peak.value, 'waits': self._waits.value}
+
+
+def estimate_record_bytes(record: Any) -> int:
+    """单条解析记录占用的字节数（对象本身 + 字符串字段）"""
+    size = sys.getsizeof(record)
+    if isinstance(record, dict):
+        values = record.values()
+    else:
+        values = (getattr(record, slot, None) for slot in getattr(type(record), '__slots__', ()))
+    for value in values:
+        if isinstance(value, str):
+            size += sys.getsizeof(value)
+    return size
+
+
+class RecordSizeMeter:
+    """按抽样测量解析缓冲区中单条记录的字节数（指数平滑，线程安全）"""
+
+    def __init__(self, initial_bytes: int = 2048):
+        self.bytes_per_record = float(initial_bytes)
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def measure(self, records: List[Any]) -> float:
+        if not records:
+            return self.bytes_per_record
+
+        step = max(1, len(records) // RECORD_SAMPLE_SIZE)
+        sample = records[::step][:RECORD_SAMPLE_SIZE]
+        measured = sum(estimate_record_bytes(record) for record in sample) / len(sample)
+        with self._lock:
+            if self.samples == 0:
+                self.bytes_per_record = measured
+            else:
+                self.bytes_per_record += (measured - self.bytes_per_record) * RECORD_BYTES_SMOOTHING
+            self.samples += 1
+            return self.bytes_per_record
+
+    def batch_limit(self, buffer_bytes: int, max_records: int) -> int:
+        """解析缓冲区字节数允许的最大条数（不超过 max_records）"""
+        return max(min(MIN_PARSE_BATCH, max_records), min(max_records, int(buffer_bytes / self.bytes_per_record)))
+
+
+# ========== GC ==========
+
+_gc_state = {'configured': False, 'pauses': {}, 'started_at': None}
+_gc_lock = threading.Lock()
+
+
+def _gc_callback(phase: str, info: Dict[str, Any]):
+    if phase == 'start':
+        _gc_state['started_at'] = time.perf_counter()
+        return
+    started_at = _gc_state['started_at']
+    if started_at is None:
+        return
+    pause = time.perf_counter() - started_at
+    _gc_state['started_at'] = None
+    timing = _gc_state['pauses'].setdefault(info.get('generation', -1), {'count': 0, 'total': 0.0, 'max': 0.0})
+    timing['count'] += 1
+    timing['total'] += pause
+    if pause > timing['max']:
+        timing['max'] = pause
+
+
+def configure_gc(gen0_threshold: int = GC_GEN0_THRESHOLD, freeze: bool = True) -> bool:
+    """
+    调整本进程的GC（初始化完成后调用，重复调用只冻结新增的长期对象）
+
+    Args:
+        gen0_threshold: 第0代回收阈值，第1/2代阈值保持不变
+        freeze: 把当前所有对象移入永久代，之后的回收不再扫描它们
+
+    Returns:
+        是否首次配置
+    """
+    with _gc_lock:
+        first = not _gc_state['configured']
+        if first:
+            _, gen1, gen2 = gc.get_threshold()
+            gc.set_threshold(max(gen0_threshold, gc.get_threshold()[0]), gen1, gen2)
+            gc.callbacks.append(_gc_callback)
+            _gc_state['configured'] = True
+    if freeze and hasattr(gc, 'freeze'):
+        gc.freeze()
+    return first
+
+
+def gc_stats() -> Dict[str, Any]:
+    """GC 阈值、冻结对象数、各代回收次数与停顿（秒）"""
+    pauses = {
+        generation: {'count': timing['count'], 'max': timing['max'],
+                     'avg': timing['total'] / timing['count'] if timing['count'] else 0.0}
+        for generation, timing in sorted(_gc_state['pauses'].items())
+    }
+    return {
+        'threshold': gc.get_threshold(),
+        'frozen_objects': gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0,
+        'pauses': pauses,
+    }
+
+
+class MemoryGovernor:
+    """按内存上限分配在途预算与解析缓冲区，按插入延迟调整插入批大小"""
+
+    def __init__(self,
+                 memory_limit_mb: int,
+                 parse_workers: int,
+                 batch_size: int,
+                 insert_rows: int,
+                 mp_context=None,
+                 logger: logging.Logger = None):
+        """
+        Args:
+            memory_limit_mb: ETL可用内存上限
+            parse_workers: 同时持有解析缓冲区的线程/进程数
+            batch_size: 配置的解析批次条数（上限）
+            insert_rows: 初始的单次插入行数
+            mp_context: 多进程模式的 multiprocessing 上下文（预算在进程间共享）
+        """
+        limit_bytes = memory_limit_mb * 1024 * 1024
+        self.budget = ByteBudget(limit_bytes * IN_FLIGHT_SHARE, mp_context)
+        self.parse_buffer_bytes = int(limit_bytes * PARSE_BUFFER_SHARE / max(1, parse_workers))
+        self.batch_size = batch_size
+        self.record_meter = RecordSizeMeter()
+        self.batch_optimizer = DynamicBatchOptimizer(
+            initial_batch_size=insert_rows,
+            min_batch_size=max(MIN_PARSE_BATCH, batch_size),
+            max_batch_size=max(insert_rows, batch_size * 50))
+        self.logger = logger or logging.getLogger(__name__)
+
+    def parse_batch_limit(self, records: List[Any] = None) -> int:
+        """解析缓冲区允许的条数；传入已缓冲的记录时先更新单条记录字节数"""
+        if records:
+            self.record_meter.measure(records)
+        return self.record_meter.batch_limit(self.parse_buffer_bytes, self.batch_size)
+
+    def record_insert(self, rows: int, seconds: float) -> int:
+        """记录一次插入，返回（可能调整后的）目标插入行数"""
+        self.batch_optimizer.record_insert_latency(rows, seconds)
+        return self.batch_optimizer.optimize_by_latency()[0]
+
+    @property
+    def insert_rows(self) -> int:
+        return self.batch_optimizer.get_current_batch_size()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'budget': self.budget.stats(),
+            'bytes_per_record': self.record_meter.bytes_per_record,
+            'parse_batch_limit': self.parse_batch_limit(),
+            'insert_rows': self.insert_rows,
+            'latency_model': self.batch_optimizer.get_latency_model(),
+            'gc': gc_stats(),
+        }
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+处理状态存储 - SQLite (WAL) 替代整文件重写的 processed_logs_state.json
+
+1. 每个文件一行（路径主键），按日期、状态建索引；断点推进、完成标记都是单行 upsert，
+   不再随文件数增长重写整个状态文件
+2. WAL 模式下写入只追加日志，读写互不阻塞，进程崩溃不会损坏已提交的状态
+3. 首次打开时若存在旧的 JSON 状态文件则导入一次（原文件保留，其他旧控制器仍在读取）
+
+读出的文件记录与旧 JSON 中 processed_files 的条目字段一致（offset/line_count/record_count/...），
+断点相关逻辑（utils.file_checkpoint）无需区分存储方式。
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+SCHEMA_VERSION = 1
+
+# 文件记录字段 -> 列名（offset 是SQL关键字，列名用 byte_offset）
+FILE_FIELDS = {
+    'status': 'status',
+    'offset': 'byte_offset',
+    'line_count': 'line_count',
+    'record_count': 'record_count',
+    'file_size': 'file_size',
+    'mtime': 'mtime',
+    'head_length': 'head_length',
+    'head_digest': 'head_digest',
+    'processing_time': 'processing_time',
+    'processed_at': 'processed_at',
+    'checkpoint_at': 'checkpoint_at',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed_files (
+    file_path TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    log_date TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'processing',
+    byte_offset INTEGER,
+    line_count INTEGER NOT NULL DEFAULT 0,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    file_size INTEGER,
+    mtime REAL,
+    head_length INTEGER,
+    head_digest TEXT,
+    processing_time REAL,
+    processed_at TEXT,
+    checkpoint_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_processed_files_date ON processed_files (log_date);
+CREATE INDEX IF NOT EXISTS idx_processed_files_status ON processed_files (status);
+CREATE TABLE IF NOT EXISTS state_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def log_date_of(file_path: Union[str, Path]) -> str:
+    """从日志路径的日期目录（YYYYMMDD）取日期，不符合时为空串"""
+    name = Path(file_path).parent.name
+    return name if len(name) == 8 and name.isdigit() else ''
+
+
+class ProcessingStateStore:
+    """文件处理状态存储（线程安全，单连接 + 锁）"""
+
+    def __init__(self, db_path: Union[str, Path], json_path: Union[str, Path] = None):
+        """
+        Args:
+            db_path: SQLite 数据库文件
+            json_path: 旧的 JSON 状态文件，存在且尚未导入过时导入
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute("INSERT OR IGNORE INTO state_meta (key, value) VALUES ('schema_version', ?)",
+                               (str(SCHEMA_VERSION),))
+
+        if json_path and Path(json_path).exists() and self.get_meta('migrated_from') is None:
+            self.migrate_json_state(json_path)
+
+    # ========== 文件记录 ==========
+
+    def get_file(self, file_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """按路径读取文件记录，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM processed_files WHERE file_path = ?',
+                                     (str(file_path),)).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def upsert_file(self, file_path: Union[str, Path], fields: Dict[str, Any], add_records: int = 0):
+        """
+        插入或更新文件记录（单条语句，原子提交）
+
+        Args:
+            fields: 要写入的字段（FILE_FIELDS 中的键），未给出的字段保持原值
+            add_records: 在 record_count 上累加的记录数
+        """
+        unknown = set(fields) - set(FILE_FIELDS)
+        if unknown:
+            raise ValueError(f"未知的状态字段: {sorted(unknown)}")
+
+        columns = [FILE_FIELDS[field] for field in fields]
+        values = list(fields.values())
+        if 'record_count' in fields:
+            values[columns.index('record_count')] += add_records
+            record_update = 'record_count = excluded.record_count'
+        else:
+            columns.append('record_count')
+            values.append(add_records)
+            record_update = 'record_count = processed_files.record_count + excluded.record_count'
+
+        updates = [f'{column} = excluded.{column}' for column in columns if column != 'record_count']
+        updates.append(record_update)
+        sql = (f"INSERT INTO processed_files (file_path, file_name, log_date, {', '.join(columns)}) "
+               f"VALUES (?, ?, ?, {', '.join('?' * len(columns))}) "
+               f"ON CONFLICT(file_path) DO UPDATE SET {', '.join(updates)}")
+
+        file_path = Path(file_path)
+        with self._lock, self._conn:
+            self._conn.execute(sql, [str(file_path), file_path.name, log_date_of(file_path)] + values)
+
+    def delete_files(self, file_paths: Iterable[Union[str, Path]]) -> int:
+        """删除文件记录，返回删除条数"""
+        with self._lock, self._conn:
+            cursor = self._conn.executemany('DELETE FROM processed_files WHERE file_path = ?',
+                                            [(str(path),) for path in file_paths])
+            return cursor.rowcount
+
+    def file_paths(self) -> List[str]:
+        """所有有记录的文件路径"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT file_path FROM processed_files')]
+
+    def files_by_date(self, log_date: str) -> Dict[str, Dict[str, Any]]:
+        """指定日期（YYYYMMDD）目录下的文件记录"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM processed_files WHERE log_date = ?',
+                                      (log_date,)).fetchall()
+        return {row['file_path']: self._row_to_entry(row) for row in rows}
+
+    def recent_files(self, limit: int = 10) -> List[Tuple[str, Dict[str, Any]]]:
+        """最近处理完成的文件"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM processed_files WHERE processed_at IS NOT NULL '
+                'ORDER BY processed_at DESC LIMIT ?', (limit,)).fetchall()
+        return [(row['file_path'], self._row_to_entry(row)) for row in rows]
+
+    def count_files(self, status: str = None) -> int:
+        """文件记录数（可按状态过滤）"""
+        with self._lock:
+            if status is None:
+                return self._conn.execute('SELECT COUNT(*) FROM processed_files').fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM processed_files WHERE status = ?',
+                                      (status,)).fetchone()[0]
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        """数据库行 -> 与旧 JSON 条目一致的字典（空值字段省略）"""
+        entry = {}
+        for field, column in FILE_FIELDS.items():
+            value = row[column]
+            if value is not None:
+                entry[field] = value
+        return entry
+
+    # ========== 元信息 ==========
+
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM state_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: Any):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT INTO state_meta (key, value) VALUES (?, ?) '
+                               'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (key, str(value)))
+
+    # ========== 迁移 ==========
+
+    def migrate_json_state(self, json_path: Union[str, Path]) -> int:
+        """
+        导入旧的 JSON 状态文件（processed_files），已有的文件记录不覆盖
+
+        Returns:
+            导入的文件记录数，文件无法解析时为 0
+        """
+        json_path = Path(json_path)
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            processed_files = state.get('processed_files', {})
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+        rows = []
+        for file_path, info in processed_files.items():
+            if not isinstance(info, dict):
+                continue
+            offset = info.get('offset')
+            rows.append((
+                file_path, Path(file_path).name, log_date_of(file_path),
+                # 旧格式没有断点：整文件已处理
+                'completed' if offset is None or offset >= info.get('file_size', 0) else 'processing',
+                offset, info.get('line_count', 0), info.get('record_count', 0),
+                info.get('file_size'), info.get('mtime'), info.get('head_length'), info.get('head_digest'),
+                info.get('processing_time'), info.get('processed_at'), info.get('checkpoint_at'),
+            ))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO processed_files (file_path, file_name, log_date, status, byte_offset, '
+                'line_count, record_count, file_size, mtime, head_length, head_digest, processing_time, '
+                'processed_at, checkpoint_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            for key in ('last_update', 'total_processed_records'):
+                if state.get(key) is not None:
+                    self._conn.execute('INSERT OR IGNORE INTO state_meta (key, value) VALUES (?, ?)',
+                                       (key, str(state[key])))
+            self._conn.execute('INSERT INTO state_meta (key, value) VALUES (?, ?) '
+                               'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                               ('migrated_from', f"{json_path} @ {datetime.now().isoformat()}"))
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URI模板化引擎
+将路径中的ID类片段归一为占位符，降低request_uri_normalized等聚合键的基数
+
+规则（按路径片段匹配）：
+1. 配置模板 - 如 /api/user/{uid}/orders，按片段前缀树匹配，命中即输出模板本身
+2. 内置规则 - 纯数字ID、UUID、十六进制哈希、base64/令牌类片段替换为 {id}
+3. 学习规则（可选）- 同一父路径下不同取值超过阈值的位置视为变量
+
+规则与 self/self_00_08_uri_templates.py 相同（light-data-platform 直接复用那一份）；
+ETL按独立目录部署、只依赖 etl 下的模块，因此保留这一份，修改规则时两处同步。
+"""
+
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Iterable
+
+DEFAULT_PLACEHOLDER = '{id}'
+DEFAULT_CACHE_SIZE = 100000
+
+# 单个路径片段的ID规则，合并为一个正则一次匹配
+ID_SEGMENT_PATTERN = re.compile(r'''^(?:
+    \d+                                                                         # 纯数字ID
+  | [0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}  # UUID
+  | (?=[a-fA-F]*\d)[0-9a-fA-F]{16,}                                             # 十六进制哈希(MD5/SHA)
+  | (?=[\w\-]*\d)(?=[\w\-]*[A-Za-z])[\w\-+]{20,}={0,2}                          # base64/令牌
+)$''', re.VERBOSE | re.ASCII)
+
+# 不含数字的路径不会命中内置规则，可直接跳过
+_DIGIT_PATTERN = re.compile(r'\d')
+
+
+class _TemplateNode:
+    """配置模板前缀树节点"""
+
+    __slots__ = ('children', 'wildcard', 'template')
+
+    def __init__(self):
+        self.children: Dict[str, '_TemplateNode'] = {}
+        self.wildcard: Optional['_TemplateNode'] = None
+        self.template: Optional[str] = None
+
+
+class UriTemplateEngine:
+    """URI模板化引擎（线程安全，结果带LRU缓存）"""
+
+    def __init__(self,
+                 templates: Optional[Iterable[str]] = None,
+                 placeholder: str = DEFAULT_PLACEHOLDER,
+                 learn_threshold: Optional[int] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 strip_trailing_slash: bool = False):
+        """
+        初始化URI模板化引擎
+
+        Args:
+            templates: 配置模板列表，{xxx} 片段匹配任意取值
+            placeholder: 内置/学习规则使用的占位符
+            learn_threshold: 同一父路径下不同取值超过该数量时视为变量，None表示不学习
+            cache_size: 结果缓存条数
+            strip_trailing_slash: 是否移除末尾斜杠
+        """
+        self.placeholder = placeholder
+        self.learn_threshold = learn_threshold
+        self.strip_trailing_slash = strip_trailing_slash
+
+        self._root = _TemplateNode()
+        self._has_templates = False
+        self._lock = threading.Lock()
+
+        # 学习状态：父路径(已归一) -> 见过的取值；已判定为变量的父路径
+        self._seen_values: Dict[tuple, set] = {}
+        self._learned_prefixes: set = set()
+
+        self._cached_normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+        for template in templates or []:
+            self.add_template(template)
+
+    def add_template(self, template: str):
+        """添加配置模板"""
+        node = self._root
+        for segment in template.strip('/').split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                if node.wildcard is None:
+                    node.wildcard = _TemplateNode()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _TemplateNode())
+        node.template = template
+        self._has_templates = True
+        self._cached_normalize.cache_clear()
+
+    def normalize(self, uri: str) -> str:
+        """将URI归一为模板（移除查询参数与片段标识）"""
+        if not uri:
+            return uri
+        return self._cached_normalize(uri)
+
+    def cache_info(self):
+        """结果缓存命中情况"""
+        return self._cached_normalize.cache_info()
+
+    def _normalize(self, uri: str) -> str:
+        path = uri.split('?', 1)[0].split('#', 1)[0]
+        if self.strip_trailing_slash and len(path) > 1 and path.endswith('/'):
+            path = path[:-1]
+
+        if self._has_templates:
+            template = self._match_template(path.strip('/').split('/'))
+            if template is not None:
+                return template
+
+        if self.learn_threshold is None and not _DIGIT_PATTERN.search(path):
+            return path
+
+        segments = path.split('/')
+        normalized = []
+        for segment in segments:
+            if segment and (ID_SEGMENT_PATTERN.match(segment) or self._is_learned(normalized, segment)):
+                normalized.append(self.placeholder)
+            else:
+                normalized.append(segment)
+        return '/'.join(normalized)
+
+    def _match_template(self, segments: List[str]) -> Optional[str]:
+        """前缀树匹配，字面片段优先于通配片段"""
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth == len(segments):
+                if node.template is not None:
+                    return node.template
+                continue
+            if node.wildcard is not None:
+                stack.append((node.wildcard, depth + 1))
+            child = node.children.get(segments[depth])
+            if child is not None:
+                stack.append((child, depth + 1))
+        return None
+
+    def _is_learned(self, normalized_prefix: List[str], segment: str) -> bool:
+        """记录父路径下的取值，超过阈值后该位置视为变量"""
+        if self.learn_threshold is None:
+            return False
+
+        prefix = tuple(normalized_prefix)
+        with self._lock:
+            if prefix in self._learned_prefixes:
+                return True
+            values = self._seen_values.setdefault(prefix, set())
+            values.add(segment)
+            if len(values) <= self.learn_threshold:
+                return False
+            self._learned_prefixes.add(prefix)
+            del self._seen_values[prefix]
+
+        # 已缓存的结果中该位置仍为原值，清空后按新规则重新计算
+        self._cached_normalize.cache_clear()
+        return True
+
+
+_default_engine: Optional[UriTemplateEngine] = None
+
+
+def get_uri_template_engine() -> UriTemplateEngine:
+    """进程内共享的默认引擎"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = UriTemplateEngine(strip_trailing_slash=True)
+    return _default_engine
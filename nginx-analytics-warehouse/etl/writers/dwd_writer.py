@@ -14,6 +14,16 @@ from typing import Dict, Any, List, Optional, Tuple
 import clickhouse_connect
 from clickhouse_connect.driver.exceptions import ClickHouseError
 
+try:
+    from .column_converters import fill_none, to_naive_datetime_column, to_int_column, to_bool_column
+except ImportError:
+    from column_converters import fill_none, to_naive_datetime_column, to_int_column, to_bool_column
+
+# 优化写入路径中需要特殊转换的字段
+OPTIMIZED_INT_FIELDS = ('client_port', 'server_port', 'response_body_size')
+OPTIMIZED_BOOL_FIELDS = ('is_success', 'is_slow', 'is_error')
+OPTIMIZED_FALSE_VALUES = (None, '', '0', 'false', 'False')
+
 class DWDWriter:
     """DWD层数据写入器"""
 
@@ -362,10 +372,24 @@ class DWDWriter:
                 self.client = None
 
     def write_batch_optimized(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """优化的批量写入方法 - 更高性能"""
+        """优化的批量写入方法 - 转置为列后走列式写入"""
         if not records:
             return self._create_success_result(0, "没有记录需要写入")
 
+        columns = {field_name: [record.get(field_name) for record in records] for field_name in self.dwd_fields}
+        return self.write_columns(columns, len(records))
+
+    def write_columns(self, columns: Dict[str, List[Any]], row_count: int) -> Dict[str, Any]:
+        """
+        列式批量写入 - 按列向量化转换后以 column_oriented 方式插入
+
+        Args:
+            columns: {字段名: 该字段的值列表}，缺失的字段整列使用默认值
+            row_count: 行数
+        """
+        if row_count == 0:
+            return self._create_success_result(0, "没有记录需要写入")
+
         # 使用写入锁
         with self._write_lock:
             if not self.client:
@@ -373,45 +397,48 @@ class DWDWriter:
                     return self._create_error_result("数据库连接失败")
 
             try:
-                # 快速数据预处理 - 减少字段处理开销
-                list_data = []
-                for record in records:
-                    row_list = []
-                    for field_name in self.dwd_fields:
-                        value = record.get(field_name)
-                        # 快速处理关键字段
-                        if field_name == 'log_time' and isinstance(value, datetime):
-                            processed_value = value.replace(tzinfo=None) if value.tzinfo else value
-                        elif field_name in ['client_port', 'server_port', 'response_body_size'] and value is not None:
-                            try:
-                                processed_value = int(value) if isinstance(value, (int, float)) else int(float(value))
-                            except (ValueError, TypeError):
-                                processed_value = 0
-                        elif field_name in ['is_success', 'is_slow', 'is_error']:
-                            processed_value = bool(value) if value not in [None, '', '0', 'false', 'False'] else False
-                        else:
-                            processed_value = value if value is not None else self._get_default_value(field_name)
-
-                        row_list.append(processed_value)
-                    list_data.append(row_list)
+                column_data = self._prepare_columns(columns, row_count)
 
                 # 异步批量插入
                 table_name = f"{self.config['database']}.dwd_nginx_enriched_v3"
-                result = self.client.insert(
+                self.client.insert(
                     table=table_name,
-                    data=list_data,
+                    data=column_data,
+                    column_names=self.dwd_fields,
+                    column_oriented=True,
                     settings={'async_insert': 1, 'wait_for_async_insert': 0}  # 异步插入设置
                 )
 
-                success_count = len(records)
-                self.stats['total_records'] += success_count
-                self.stats['success_records'] += success_count
+                self.stats['total_records'] += row_count
+                self.stats['success_records'] += row_count
 
-                return self._create_success_result(success_count, f"优化写入成功: {success_count} 条记录")
+                return self._create_success_result(row_count, f"优化写入成功: {row_count} 条记录")
 
             except Exception as e:
                 self.logger.error(f"优化写入失败，回退到标准方法: {e}")
-                return self.write_batch(records)  # 回退到标准方法
+
+        # 回退到标准方法（在写入锁之外调用，write_batch 自己会加锁）
+        fields = list(columns.keys())
+        records = [dict(zip(fields, values)) for values in zip(*(columns[field] for field in fields))]
+        return self.write_batch(records)
+
+    def _prepare_columns(self, columns: Dict[str, List[Any]], row_count: int) -> List[List[Any]]:
+        """按列转换字段值，返回与 dwd_fields 顺序一致的列列表"""
+        column_data = []
+        for field_name in self.dwd_fields:
+            default = self._get_default_value(field_name)
+            values = columns.get(field_name)
+            if values is None:
+                column_data.append([default] * row_count)
+            elif field_name == 'log_time':
+                column_data.append(to_naive_datetime_column(values, default))
+            elif field_name in OPTIMIZED_INT_FIELDS:
+                column_data.append(to_int_column(values, 0))
+            elif field_name in OPTIMIZED_BOOL_FIELDS:
+                column_data.append(to_bool_column(values, OPTIMIZED_FALSE_VALUES))
+            else:
+                column_data.append(fill_none(values, default))
+        return column_data
 
     def write_batch(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
         """批量写入数据到DWD表"""
@@ -22,6 +22,13 @@ from concurrent.futures import ThreadPoolExecutor
 import clickhouse_connect
 from clickhouse_connect.driver.exceptions import ClickHouseError
 
+try:
+    from .column_converters import (to_datetime_column, to_date_column, to_int_column, to_float_column,
+                                    to_bool_column, to_str_column, to_list_column, slice_columns)
+except ImportError:
+    from column_converters import (to_datetime_column, to_date_column, to_int_column, to_float_column,
+                                   to_bool_column, to_str_column, to_list_column, slice_columns)
+
 class HighPerformanceDWDWriter:
     """高性能DWD层数据写入器"""
     
@@ -118,27 +125,27 @@ class HighPerformanceDWDWriter:
             'client_region', 'client_isp', 'ip_risk_level', 'is_internal_ip'
         ]
         
-        # 预编译类型转换器（避免运行时类型检查）
-        self.field_converters = {}
-        self._build_field_converters()
+        # 预编译列转换器（按列向量化转换，避免逐行逐字段调用）
+        self.column_converters = {}
+        self._build_column_converters()
     
-    def _build_field_converters(self):
-        """构建预编译的字段类型转换器"""
+    def _build_column_converters(self):
+        """构建预编译的列类型转换器（输入一整列值，返回转换后的列）"""
         # DateTime字段
         datetime_fields = {'log_time'}
         for field in datetime_fields:
-            self.field_converters[field] = lambda x: x if isinstance(x, datetime) else datetime.now()
+            self.column_converters[field] = lambda values: to_datetime_column(values, datetime.now())
         
         # Date字段
         date_fields = {'date_partition'}
         for field in date_fields:
-            self.field_converters[field] = lambda x: x.date() if hasattr(x, 'date') else datetime.now().date()
+            self.column_converters[field] = lambda values: to_date_column(values, datetime.now().date())
         
         # 整数字段
         int_fields = {'hour_partition', 'minute_partition', 'second_partition', 'client_port', 
                      'response_body_size', 'total_bytes_sent', 'connection_requests', 'business_value_score'}
         for field in int_fields:
-            self.field_converters[field] = lambda x: int(x) if x is not None and x != '' else 0
+            self.column_converters[field] = to_int_column
         
         # 浮点数字段
         float_fields = {'response_body_size_kb', 'total_bytes_sent_kb', 'total_request_duration',
@@ -150,22 +157,22 @@ class HighPerformanceDWDWriter:
                        'network_overhead', 'transfer_ratio', 'connection_cost_ratio',
                        'processing_efficiency_index', 'data_quality_score'}
         for field in float_fields:
-            self.field_converters[field] = lambda x: float(x) if x is not None and x != '' else 0.0
+            self.column_converters[field] = to_float_column
         
         # 布尔字段
         bool_fields = {'is_success', 'is_business_success', 'is_slow', 'is_very_slow',
                       'is_error', 'is_client_error', 'is_server_error', 'has_anomaly', 'is_internal_ip'}
         for field in bool_fields:
-            self.field_converters[field] = lambda x: bool(x) if x is not None else False
+            self.column_converters[field] = to_bool_column
         
         # 数组字段
-        self.field_converters['parsing_errors'] = lambda x: x if isinstance(x, list) else []
+        self.column_converters['parsing_errors'] = to_list_column
         
         # 字符串字段（默认）
         string_fields = set(self.dwd_fields) - set(datetime_fields) - set(date_fields) - \
                        set(int_fields) - set(float_fields) - set(bool_fields) - {'parsing_errors'}
         for field in string_fields:
-            self.field_converters[field] = lambda x: str(x) if x is not None else ''
+            self.column_converters[field] = to_str_column
     
     def connect(self) -> bool:
         """连接ClickHouse"""
@@ -247,40 +254,25 @@ class HighPerformanceDWDWriter:
             return self._create_error_result(f"批量写入异常: {str(e)}")
     
     def _prepare_batch_data_optimized(self, records: List[Dict[str, Any]]) -> List[List[Any]]:
-        """优化的批量数据预处理"""
-        prepared_data = []
-        
-        # 预分配内存
-        prepared_data.reserve = len(records)
+        """优化的批量数据预处理 - 转置为列并按列转换，返回与 dwd_fields 顺序一致的列列表"""
+        prepared_columns = []
         
-        for record in records:
-            row_data = []
-            
-            # 使用预编译的类型转换器
-            for field_name in self.dwd_fields:
-                value = record.get(field_name)
-                converter = self.field_converters.get(field_name, str)
-                
-                try:
-                    converted_value = converter(value)
-                    row_data.append(converted_value)
-                except (ValueError, TypeError):
-                    # 快速fallback到默认值
-                    row_data.append(self._get_default_value_fast(field_name))
-            
-            prepared_data.append(row_data)
+        for field_name in self.dwd_fields:
+            values = [record.get(field_name) for record in records]
+            prepared_columns.append(self.column_converters[field_name](values))
         
-        return prepared_data
+        return prepared_columns
     
     def _single_insert(self, prepared_data: List[List[Any]], total_records: int) -> Dict[str, Any]:
-        """单次插入"""
+        """单次插入（prepared_data 为列式数据）"""
         try:
             table_name = f"{self.config['database']}.dwd_nginx_enriched_v2"
             
             self.client.insert(
                 table=table_name,
                 data=prepared_data,
-                column_names=self.dwd_fields
+                column_names=self.dwd_fields,
+                column_oriented=True
             )
             
             with self._stats_lock:
@@ -297,10 +289,10 @@ class HighPerformanceDWDWriter:
     
     def _chunked_parallel_insert(self, prepared_data: List[List[Any]], total_records: int) -> Dict[str, Any]:
         """分块并发插入"""
-        # 将数据分块
+        # 将数据按行范围分块（列式数据逐列切分）
         chunks = []
-        for i in range(0, len(prepared_data), self.insert_block_size):
-            chunk = prepared_data[i:i + self.insert_block_size]
+        for i in range(0, total_records, self.insert_block_size):
+            chunk = slice_columns(prepared_data, i, i + self.insert_block_size)
             chunks.append(chunk)
         
         self.logger.info(f"📦 数据分为 {len(chunks)} 个块进行并发插入")
@@ -314,7 +306,7 @@ class HighPerformanceDWDWriter:
             future_to_chunk = {}
             for i, chunk in enumerate(chunks):
                 future = executor.submit(self._insert_chunk, chunk, i)
-                future_to_chunk[future] = (i, len(chunk))
+                future_to_chunk[future] = (i, len(chunk[0]) if chunk else 0)
             
             # 收集结果
             for future in future_to_chunk:
@@ -352,10 +344,11 @@ class HighPerformanceDWDWriter:
             self.client.insert(
                 table=table_name,
                 data=chunk_data,
-                column_names=self.dwd_fields
+                column_names=self.dwd_fields,
+                column_oriented=True
             )
             
-            return {'success': True, 'chunk_id': chunk_id, 'count': len(chunk_data)}
+            return {'success': True, 'chunk_id': chunk_id, 'count': len(chunk_data[0]) if chunk_data else 0}
             
         except Exception as e:
             return {'success': False, 'chunk_id': chunk_id, 'error': str(e)}
@@ -377,7 +370,8 @@ class HighPerformanceDWDWriter:
                 self.client.insert(
                     table=table_name,
                     data=prepared_data,
-                    column_names=self.dwd_fields
+                    column_names=self.dwd_fields,
+                    column_oriented=True
                 )
                 
                 with self._stats_lock:
@@ -139,4 +139,68 @@ TIME_METRICS_NEW = [
 SIZE_METRICS_NEW = [
     'response_body_size',
     'total_bytes_sent'
-]
\ No newline at end of file
+]
+# 报告输出目标：excel / parquet / ndjson / clickhouse（仅供看板使用的批处理可去掉excel）
+DEFAULT_REPORT_SINKS = ['excel']
+# Excel生成模式：sync(同步) / background(后台线程) / process(后台进程池，与后续分析并行) / off(不生成)
+DEFAULT_EXCEL_MODE = 'sync'
+# process模式下的报告渲染进程数
+DEFAULT_REPORT_WORKERS = 2
+# ClickHouse报告结果表配置（连接信息与账号从环境变量读取，不在代码中保存凭据）
+REPORT_CLICKHOUSE_CONFIG = {
+    'host': os.environ.get('REPORT_CLICKHOUSE_HOST', 'localhost'),
+    'port': int(os.environ.get('REPORT_CLICKHOUSE_PORT', '8123')),
+    'username': os.environ.get('REPORT_CLICKHOUSE_USER', 'default'),
+    'password': os.environ.get('REPORT_CLICKHOUSE_PASSWORD', ''),
+    'database': os.environ.get('REPORT_CLICKHOUSE_DATABASE', 'nginx_analytics'),
+    'table': 'self_analyzer_reports'
+}
+# CSV分块读取：按采样行宽与内存预算自动计算chunk大小
+CSV_CHUNK_MEMORY_BUDGET_MB = 256   # 单个数据块（含分析过程中的中间副本）的内存预算
+CSV_CHUNK_MEMORY_FACTOR = 4        # 分析过程中中间副本相对原始数据块的放大倍数
+CSV_CHUNK_MIN_SIZE = 10000
+CSV_CHUNK_MAX_SIZE = 500000
+CSV_AUTOTUNE_SAMPLE_ROWS = 2000
+# API分层统计状态：所有API仅保留轻量计数与小样本，请求数达到阈值后才建立完整采样统计，
+# 超出内存预算的长尾API归并到"其他"汇总项
+API_STATE_MEMORY_BUDGET_MB = 512     # API统计状态的内存预算
+API_STATE_SKETCH_SHARE = 0.5         # 内存预算中分配给完整采样统计的比例，其余用于轻量计数
+API_SKETCH_PROMOTION_THRESHOLD = 100  # 请求数达到该值的API升级为完整采样统计
+API_LIGHT_STATE_BYTES = 4 * 1024      # 单个轻量API状态的估算内存（计数 + 小样本）
+API_SKETCH_STATE_BYTES = 320 * 1024   # 单个完整采样统计的估算内存（样本池填满时）
+API_EVICTION_RATIO = 0.1              # 轻量API数达到上限时，一次归并请求数最少的API比例
+API_OTHER_BUCKET_KEY = '其他(长尾API汇总)'
+# API路径模板化：ID类路径片段（纯数字、UUID、哈希、令牌）归一为占位符，降低API维度基数
+URI_TEMPLATE_ENABLED = True
+URI_TEMPLATE_PLACEHOLDER = '{id}'
+URI_TEMPLATES = []                   # 配置模板，如 '/api/files/{path}'，{xxx}片段匹配任意取值
+URI_TEMPLATE_LEARN_THRESHOLD = None  # 同一父路径下不同取值超过该数量时视为变量，None表示不学习
+URI_TEMPLATE_CACHE_SIZE = 100000
+# 接口错误爆发检测：每个接口按时间桶计数的滑动窗口，窗口内错误数达到启动阈值即判定爆发开始，
+# 回落到 启动阈值×结束比例 以下时爆发结束
+ERROR_BURST_WINDOW_SECONDS = 60
+ERROR_BURST_BUCKET_SECONDS = 5
+ERROR_BURST_START_THRESHOLD = 10
+ERROR_BURST_END_RATIO = 0.5
+ERROR_BURST_MAX_EVENTS = 10000       # 保留的已结束爆发事件数上限
+ERROR_DETAIL_SAMPLE_SIZE = 100       # 每个接口保留的错误详情样本数（蓄水池采样）
+# 实时跟踪模式：跟踪增长中的.log文件，按分钟环形聚合，定期发布最近N分钟的快照
+LIVE_TAIL_WINDOWS_MINUTES = [5, 15, 60]    # 快照中的滚动窗口（分钟），环形缓冲区保留最大窗口
+LIVE_TAIL_POLL_INTERVAL = 1.0              # 无inotify时的轮询间隔（秒）
+LIVE_TAIL_BATCH_LINES = 5000               # 攒够该行数即送入分析器
+LIVE_TAIL_READ_BYTES = 1024 * 1024         # 每次从文件读取的块大小（字节），积压再多也按块读取
+LIVE_TAIL_BATCH_SECONDS = 2.0              # 或距上次送入超过该秒数
+LIVE_TAIL_SNAPSHOT_INTERVAL = 30           # 快照发布间隔（秒）
+LIVE_TAIL_SNAPSHOT_FORMATS = ['json', 'html']  # 可选 json / html / clickhouse
+LIVE_TAIL_TOP_N = 20                       # 快照中每个窗口保留的API数
+# 慢请求分析：慢请求全集溢写为列式文件（Parquet，无pyarrow时为CSV），每个API保留耗时最长的K条，
+# 明细工作表按严重程度、耗时降序只写入最严重的 每页行数×最多页数 条，溢写文件与Excel报告同目录保留
+SLOW_REQUEST_SAMPLE_SIZE = 20000           # 分析汇总用的慢请求均匀样本数（蓄水池采样）
+SLOW_REQUEST_TOP_K_PER_API = 20            # 每个API保留的最慢请求数
+SLOW_REQUEST_EXCEL_PAGE_ROWS = 50000       # 明细工作表每页行数
+SLOW_REQUEST_EXCEL_MAX_PAGES = 4           # 明细工作表最多页数，较轻的慢请求仅保存在溢写文件中
+# 性能基准测试：合成日志按固定种子生成，各阶段在独立子进程中计时并采样RSS峰值
+BENCHMARK_DEFAULT_ROWS = 200000
+BENCHMARK_SEED = 20250509
+BENCHMARK_REGRESSION_TOLERANCE = 0.15      # 吞吐下降或RSS峰值上升超过该比例判定为回退
+BENCHMARK_RSS_SAMPLE_INTERVAL = 0.05       # RSS采样间隔（秒）
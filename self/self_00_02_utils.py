@@ -86,6 +86,17 @@ def get_distribution_stats(values_array, metric_name):
     return stats
 
 
+def split_by_key(keys, values):
+    """按整数键拆分数值数组（稳定排序，组内保持原顺序），逐组返回 (键, 子数组)"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    sorted_values = values[order]
+    group_keys, starts = np.unique(sorted_keys, return_index=True)
+    bounds = np.append(starts, len(sorted_keys))
+    for i, key in enumerate(group_keys):
+        yield int(key), sorted_values[bounds[i]:bounds[i + 1]]
+
+
 def calculate_time_percentages(time_values):
     """计算各时间阶段的占比百分比"""
     total = sum(time_values.values())
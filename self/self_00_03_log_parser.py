@@ -9,8 +9,9 @@ from self_00_02_utils import log_info, extract_app_name, extract_service_from_pa
 from self_00_01_constants import (
     DEFAULT_BATCH_SIZE, DEFAULT_LOG_DIR,
     LOG_TYPE_SELF_DEVELOPED, LOG_TYPE_BASE, LOG_TYPE_AUTO,
-    DEFAULT_START_DATE, DEFAULT_END_DATE, ESTIMATED_HEADER_SIZE
+    DEFAULT_START_DATE, DEFAULT_END_DATE, ESTIMATED_HEADER_SIZE, URI_TEMPLATE_ENABLED
 )
+from self_00_08_uri_templates import normalize_api_template
 
 
 def is_date_in_range(date_str, start_date=None, end_date=None):
@@ -74,7 +75,9 @@ def detect_log_type(file_path):
 
 
 def normalize_api_path(api_path):
-    """标准化API路径，移除查询字符串"""
+    """标准化API路径，移除查询字符串；启用模板化时ID类路径片段归一为占位符"""
+    if URI_TEMPLATE_ENABLED:
+        return normalize_api_template(api_path)
     return api_path.split('?')[0] if api_path else api_path
 
 
@@ -2,77 +2,291 @@
 Excel处理模块 - 负责创建和处理Excel文件
 """
 
-import gc
+import weakref
+from copy import copy
+
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.chart import LineChart, BarChart, PieChart
 from openpyxl.chart import Reference
 from openpyxl.chart.series import SeriesLabel
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.styles.numbers import FORMAT_NUMBER, FORMAT_PERCENTAGE_00
 from openpyxl.utils import get_column_letter
 
 from self_00_02_utils import log_info
-from self_00_01_constants import EXCEL_MAX_ROWS, CHART_MAX_POINTS, HEADER_FILL, DEFAULT_SLOW_THRESHOLD, HIGHLIGHT_FILL
+from self_00_01_constants import CHART_MAX_POINTS, HEADER_FILL, DEFAULT_SLOW_THRESHOLD, HIGHLIGHT_FILL
 
 
-def save_dataframe_to_excel(df, output_path, sheet_name='数据', max_rows=EXCEL_MAX_ROWS):
-    """将DataFrame保存为Excel文件，如果数据量过大会自动分页"""
-    if df.empty:
-        log_info(f"警告: 数据为空, 跳过保存 {output_path}", level="WARNING")
-        return
+class ExcelStyleRegistry:
+    """
+    进程内共享的Excel样式注册表
+
+    openpyxl 的样式对象不可变，可在所有工作簿和工作表之间复用。
+    常用样式预先创建，其余按参数缓存，避免每个报告重复创建 Font/PatternFill。
+    """
+
+    def __init__(self):
+        self._fonts = {}
+        self._fills = {}
+
+        thin_side = Side(style='thin')
+        self.thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+        self.header_font = self.font(bold=True, name='等线')
+        self.header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        self.group_header_fill = self.fill('E0E0E0')
+        self.bold_font = self.font(bold=True)
+        self.number_font = self.font(name='Consolas')
+        self.center_alignment = Alignment(horizontal='center')
+        self.right_alignment = Alignment(horizontal='right')
+
+    def font(self, **kwargs):
+        """按参数获取共享的Font，如 STYLES.font(bold=True, size=14)"""
+        key = tuple(sorted(kwargs.items()))
+        if key not in self._fonts:
+            self._fonts[key] = Font(**kwargs)
+        return self._fonts[key]
+
+    def fill(self, color):
+        """按颜色获取共享的纯色PatternFill"""
+        if color not in self._fills:
+            self._fills[color] = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        return self._fills[color]
+
+
+STYLES = ExcelStyleRegistry()
+
+# 已按DataFrame统计信息设置列宽的工作表，format_excel_sheet 对其跳过逐单元格扫描
+_estimated_sheet_widths = weakref.WeakKeyDictionary()
+
+# 日期时间值的数字格式（与openpyxl写入日期时间值时自动设置的格式一致），datetime需在date之前判断
+TEMPORAL_NUMBER_FORMATS = (
+    (datetime, 'yyyy-mm-dd h:mm:ss'),
+    (date, 'yyyy-mm-dd'),
+    (time, 'h:mm:ss'),
+    (timedelta, '[hh]:mm:ss'),
+)
+
+
+def _is_highlight_column(col_idx):
+    """慢响应时间高亮列：列字母位于 I~P 之间"""
+    column_letter = get_column_letter(col_idx)
+    return 'I' <= column_letter <= 'P'
+
+
+def create_streaming_workbook():
+    """
+    创建流式(write_only)工作簿
+
+    行数据写入后立即序列化到临时文件，内存占用与工作表行数无关。
+    流式工作表只能通过 add_dataframe_to_excel_with_grouped_headers 追加数据，
+    不支持 ws.cell() 随机读写。
+    """
+    return Workbook(write_only=True)
+
+
+def is_streaming_workbook(wb):
+    """判断工作簿是否为流式(write_only)模式"""
+    return bool(getattr(wb, 'write_only', False))
+
+
+class StreamingSheetStyles:
+    """
+    流式写入的预计算样式集合
+
+    与 format_excel_sheet 的样式规则一致，但样式对象只创建一次，
+    写入每个单元格时直接复用模板的样式索引。
+    """
 
+    def __init__(self, ws):
+        thin_border = STYLES.thin_border
+        number_font = STYLES.number_font
+        number_alignment = STYLES.right_alignment
+
+        self.header = self._template(ws, font=STYLES.header_font, border=thin_border, fill=HEADER_FILL,
+                                     alignment=STYLES.header_alignment)
+        self.text = self._template(ws, border=thin_border)
+        self.integer = self._template(ws, font=number_font, alignment=number_alignment, border=thin_border,
+                                      number_format=FORMAT_NUMBER)
+        self.decimal = self._template(ws, font=number_font, alignment=number_alignment, border=thin_border,
+                                      number_format='0.000')
+        self.decimal_highlight = self._template(ws, font=number_font, alignment=number_alignment,
+                                                border=thin_border, number_format='0.000', fill=HIGHLIGHT_FILL)
+        self.percent = self._template(ws, font=number_font, alignment=number_alignment, border=thin_border,
+                                      number_format=FORMAT_PERCENTAGE_00)
+        # 复用模板样式会覆盖单元格按值设置的数字格式，日期时间值使用带日期格式的模板
+        self.temporal = [(value_type, self._template(ws, border=thin_border, number_format=number_format))
+                         for value_type, number_format in TEMPORAL_NUMBER_FORMATS]
+
+    @staticmethod
+    def _template(ws, **style):
+        cell = WriteOnlyCell(ws)
+        for attr, value in style.items():
+            setattr(cell, attr, value)
+        return cell
+
+    @staticmethod
+    def styled_cell(ws, value, template):
+        """创建复用模板样式的单元格"""
+        cell = WriteOnlyCell(ws, value=value)
+        cell._style = template._style
+        return cell
+
+    def data_style(self, value, is_rate_column, can_highlight):
+        """按 format_excel_sheet 的规则为数据单元格选择样式模板"""
+        if isinstance(value, (bool, int, np.integer)):
+            return self.integer
+        if isinstance(value, (float, np.floating)):
+            if is_rate_column and 0 <= value <= 1:
+                return self.percent
+            if can_highlight and value > DEFAULT_SLOW_THRESHOLD:
+                return self.decimal_highlight
+            return self.decimal
+        for value_type, template in self.temporal:
+            if isinstance(value, value_type):
+                return template
+        return self.text
+
+
+def _estimate_display_length(series, sample_rows):
+    """根据列的dtype统计信息估算单元格显示长度"""
+    values = series.dropna()
+    if values.empty:
+        return 0
+
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 5
+    if pd.api.types.is_integer_dtype(dtype):
+        return max(len(str(int(values.max()))), len(str(int(values.min()))))
+    if pd.api.types.is_float_dtype(dtype):
+        finite = values[np.isfinite(values)]
+        if finite.empty:
+            return 3
+        # 整数部分位数 + 符号 + 三位小数（'0.000'格式）
+        integer_digits = len(str(int(max(abs(finite.max()), abs(finite.min())))))
+        return integer_digits + (1 if finite.min() < 0 else 0) + 4
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 19
+    return int(values.head(sample_rows).astype(str).str.len().max())
+
+
+def estimate_column_widths(df, headers, sample_rows=1000):
+    """
+    根据列的dtype统计信息估算列宽，替代对整张工作表的逐单元格扫描
+
+    数值列取最大/最小值的位数，文本列取前N行采样的最大长度。
+
+    Returns:
+        list: 与列顺序一致的列宽
+    """
+    widths = []
+    for col_pos, header in enumerate(headers):
+        max_length = len(str(header))
+        if col_pos < df.shape[1] and not df.empty:
+            max_length = max(max_length, _estimate_display_length(df.iloc[:, col_pos], sample_rows))
+        widths.append(min((max_length + 2) * 1.2, 50))
+    return widths
+
+
+def _write_streaming_headers(ws, styles, headers, header_groups=None):
+    """写入流式工作表表头，返回表头结束行号"""
+    if not header_groups:
+        ws.append([styles.styled_cell(ws, header, styles.header) for header in headers])
+        return 1
+
+    group_row = []
+    current_col = 1
+    for group_name, subheaders in header_groups.items():
+        if not subheaders:
+            continue
+        if len(subheaders) > 1:
+            start_letter = get_column_letter(current_col)
+            end_letter = get_column_letter(current_col + len(subheaders) - 1)
+            ws.merged_cells.add(f"{start_letter}1:{end_letter}1")
+        group_row.append(styles.styled_cell(ws, group_name, styles.header))
+        group_row.extend(styles.styled_cell(ws, None, styles.header) for _ in subheaders[1:])
+        current_col += len(subheaders)
+
+    ws.append(group_row)
+    ws.append([styles.styled_cell(ws, subheader, styles.header)
+               for subheaders in header_groups.values() for subheader in subheaders])
+    return 2
+
+
+def _stream_dataframe_rows(ws, df, styles, headers, sheet_name, log_every=10000):
+    """逐行流式写入DataFrame数据，样式按列预计算"""
+    rate_columns = ['率' in str(header) for header in headers]
+    # 与 format_excel_sheet 一致：I~P 列的慢响应时间高亮
+    highlight_columns = [_is_highlight_column(col_idx) for col_idx in range(1, len(headers) + 1)]
     total_rows = len(df)
-    sheets_needed = (total_rows // max_rows) + (1 if total_rows % max_rows > 0 else 0)
-    start_time = datetime.now()
 
-    log_info(f"开始保存Excel: {output_path} (总行数: {total_rows:,}, 需创建工作表: {sheets_needed})")
+    for row_count, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        ws.append([
+            styles.styled_cell(ws, value, styles.data_style(value, rate_columns[col_pos], highlight_columns[col_pos]))
+            for col_pos, value in enumerate(row)
+        ])
 
-    wb = Workbook()
-    if 'Sheet' in wb.sheetnames:
-        del wb['Sheet']
+        if row_count % log_every == 0:
+            log_info(f"表'{sheet_name}'已写入 {row_count:,}/{total_rows:,} 行 ({row_count / total_rows * 100:.1f}%)",
+                     show_memory=(row_count % (log_every * 5) == 0))
 
-    for i in range(sheets_needed):
-        start_idx = i * max_rows
-        end_idx = min((i + 1) * max_rows, total_rows)
-        chunk_size = end_idx - start_idx
 
-        current_df = df.iloc[start_idx:end_idx]
-        current_sheet_name = f"{sheet_name}_{i + 1}" if sheets_needed > 1 else sheet_name
+def copy_sheet_to_streaming_workbook(wb, source_ws):
+    """
+    将普通工作表复制到流式工作簿末尾（值、样式、列宽、合并单元格、冻结窗格和图表）
 
-        log_info(f"正在处理第 {i + 1}/{sheets_needed} 个工作表 '{current_sheet_name}' (行数: {chunk_size:,})")
-        ws = wb.create_sheet(title=current_sheet_name)
+    按单元格随机写入的小型汇总表先在普通工作簿中生成，再复制到流式工作簿，
+    与流式写入的大数据表放在同一个文件中。
+    """
+    ws = wb.create_sheet(title=source_ws.title)
+    for column_letter, dimension in source_ws.column_dimensions.items():
+        if dimension.width:
+            ws.column_dimensions[column_letter].width = dimension.width
+    ws.freeze_panes = source_ws.freeze_panes
+    for merged_range in source_ws.merged_cells.ranges:
+        ws.merged_cells.add(merged_range.coord)
+
+    for source_row in source_ws.iter_rows():
+        row = []
+        for source_cell in source_row:
+            cell = WriteOnlyCell(ws, value=source_cell.value)
+            if source_cell.has_style:
+                cell.font = copy(source_cell.font)
+                cell.fill = copy(source_cell.fill)
+                cell.border = copy(source_cell.border)
+                cell.alignment = copy(source_cell.alignment)
+                cell.number_format = source_cell.number_format
+            row.append(cell)
+        ws.append(row)
+
+    # 图表的数据引用按工作表名称保存，复制后仍指向同名工作表
+    for chart in source_ws._charts:
+        ws.add_chart(chart)
+    return ws
 
-        # 写入表头
-        headers = list(current_df.columns)
-        for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=1, column=col_idx, value=header)
 
-        # 写入数据
-        row_count = 0
-        for row_idx, row in enumerate(current_df.itertuples(), start=2):
-            for col_idx, value in enumerate(row[1:], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+def _add_streaming_sheet(wb, df, sheet_name, header_groups=None):
+    """向流式工作簿追加一个工作表：列宽和冻结窗格需在写入行之前设置"""
+    ws = wb.create_sheet(title=sheet_name)
+    styles = StreamingSheetStyles(ws)
+    headers = list(df.columns)
 
-            row_count += 1
-            if row_count % 10000 == 0:
-                log_info(
-                    f"表'{current_sheet_name}'已写入 {row_count:,}/{chunk_size:,} 行 ({row_count / chunk_size * 100:.1f}%)",
-                    show_memory=(row_count % 50000 == 0))
-                gc.collect()
+    for col_idx, width in enumerate(estimate_column_widths(df, headers), start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
 
-        log_info(f"正在格式化工作表 '{current_sheet_name}'...")
-        format_excel_sheet(ws)
-        current_df = None
-        gc.collect()
+    header_end_row = 2 if header_groups else 1
+    ws.freeze_panes = f'A{header_end_row + 1}'
 
-    log_info(f"正在保存Excel文件...")
-    wb.save(output_path)
+    _write_streaming_headers(ws, styles, headers, header_groups)
+    _stream_dataframe_rows(ws, df, styles, headers, sheet_name)
+    return ws
 
-    elapsed = (datetime.now() - start_time).total_seconds()
-    log_info(f"Excel保存完成: {output_path} (总行数: {total_rows:,}, 耗时: {elapsed:.2f} 秒)")
 
-def format_excel_sheet(sheet, has_grouped_header=False, header_end_row=1):
+def format_excel_sheet(sheet, has_grouped_header=False, header_end_row=1, column_widths=None):
     """
     格式化Excel工作表，设置列宽、字体、对齐方式等
 
@@ -80,49 +294,49 @@ def format_excel_sheet(sheet, has_grouped_header=False, header_end_row=1):
         sheet: Excel工作表对象
         has_grouped_header: 是否有分组表头(双行表头)
         header_end_row: 表头结束行号(单行表头为1，双行表头为2)
+        column_widths: 预估列宽列表；为None且工作表未预估过列宽时扫描全部单元格
     """
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
-    from openpyxl.styles.numbers import FORMAT_NUMBER, FORMAT_NUMBER_00, FORMAT_PERCENTAGE_00
-    from openpyxl.utils import get_column_letter
-
-    # 调整列宽_
-    for column in sheet.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-
-        adjusted_width = (max_length + 2) * 1.2
-        sheet.column_dimensions[column_letter].width = min(adjusted_width, 50)
-
-    # 创建表头样式
-    header_font = Font(bold=True, name='等线')
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    if is_streaming_workbook(sheet.parent):
+        # 流式工作表在写入时已逐行应用样式，且不支持回读单元格
+        return
+
+    # 调整列宽
+    if column_widths is None:
+        column_widths = _estimated_sheet_widths.get(sheet)
+    if column_widths is not None:
+        for col_idx, width in enumerate(column_widths, start=1):
+            sheet.column_dimensions[get_column_letter(col_idx)].width = width
+    else:
+        for column in sheet.columns:
+            max_length = 0
+            column_letter = get_column_letter(column[0].column)
+
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+
+            adjusted_width = (max_length + 2) * 1.2
+            sheet.column_dimensions[column_letter].width = min(adjusted_width, 50)
+
+    thin_border = STYLES.thin_border
 
     # 应用表头样式 - 处理单行或双行表头
     for row_idx in range(1, header_end_row + 1):
         for cell in sheet[row_idx]:
-            cell.font = header_font
-            cell.alignment = header_alignment
+            cell.font = STYLES.header_font
+            cell.alignment = STYLES.header_alignment
             cell.border = thin_border
             cell.fill = HEADER_FILL  # 从常量导入的表头填充色
 
     # 设置冻结窗格，从表头之后的第一行开始
     sheet.freeze_panes = f'A{header_end_row + 1}'
 
-    # 为数值单元格设置样式和格式化
-    number_font = Font(name='Consolas')
+    # 列级判断只做一次：列名含"率"的0-1小数按百分比显示，I~P列高亮慢响应时间
+    rate_columns = {cell.column for cell in sheet[1] if '率' in str(cell.value)}
+    highlight_columns = {col_idx for col_idx in range(1, sheet.max_column + 1) if _is_highlight_column(col_idx)}
 
     # 遍历数据行
     for row in sheet.iter_rows(min_row=header_end_row + 1):
@@ -132,25 +346,23 @@ def format_excel_sheet(sheet, has_grouped_header=False, header_end_row=1):
 
             # 数值格式化
             if isinstance(cell.value, (int, float)):
-                cell.font = number_font
-                cell.alignment = Alignment(horizontal='right')
+                cell.font = STYLES.number_font
+                cell.alignment = STYLES.right_alignment
 
                 # 根据值类型设置不同的数值格式
                 if isinstance(cell.value, int):
                     # 整数格式
                     cell.number_format = FORMAT_NUMBER
-                elif cell.column_letter.startswith(('百分比', '比例', '占比')) or (
-                        cell.value <= 1 and cell.value >= 0 and '率' in str(
-                        sheet.cell(row=1, column=cell.column).value)):
-                    # 百分比格式 (0-1之间的小数 或 列名包含"百分比"/"比例"/"占比"/"率")
+                elif cell.column in rate_columns and 0 <= cell.value <= 1:
+                    # 百分比格式 (列名包含"率"的0-1之间的小数)
                     cell.number_format = FORMAT_PERCENTAGE_00  # 百分比显示2位小数
                 else:
                     # 浮点数格式 (显示3位小数)
                     cell.number_format = '0.000'
 
                 # 高亮显示慢响应时间
-                if cell.column_letter.isalpha() and cell.column_letter >= 'I' and cell.column_letter <= 'P' and isinstance(
-                        cell.value, float) and cell.value > DEFAULT_SLOW_THRESHOLD:
+                if cell.column in highlight_columns and isinstance(cell.value, float) \
+                        and cell.value > DEFAULT_SLOW_THRESHOLD:
                     cell.fill = HIGHLIGHT_FILL  # 从常量导入的高亮填充色
 
 
@@ -178,15 +390,15 @@ def process_grouped_headers(ws, header_groups):
 
         # 写入大分组名称
         cell = ws.cell(row=1, column=current_col, value=group_name)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-        cell.fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
+        cell.font = STYLES.bold_font
+        cell.alignment = STYLES.center_alignment
+        cell.fill = STYLES.group_header_fill
 
         # 写入子表头
         for i, subheader in enumerate(subheaders):
             cell = ws.cell(row=2, column=current_col + i, value=subheader)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
+            cell.font = STYLES.bold_font
+            cell.alignment = STYLES.center_alignment
 
         current_col += len(subheaders)
 
@@ -201,8 +413,19 @@ def add_dataframe_to_excel_with_grouped_headers(wb, df, sheet_name, header_group
     df - 要保存的DataFrame数据
     sheet_name - 工作表名称
     header_groups - 表头分组字典，格式为 {大类名称: [子类名称列表]}，若为None则使用普通表头
+
+    wb 为 create_streaming_workbook() 创建的流式工作簿时，数据逐行写出，内存占用恒定。
     """
     log_info(f"添加工作表: {sheet_name} (行数: {len(df)})")
+
+    if is_streaming_workbook(wb):
+        if df.empty:
+            log_info(f"警告: '{sheet_name}'工作表数据为空", level="WARNING")
+            ws = wb.create_sheet(title=sheet_name)
+            ws.append(["无数据"])
+            return ws
+        return _add_streaming_sheet(wb, df, sheet_name, header_groups)
+
     ws = wb.create_sheet(title=sheet_name)
 
     if df.empty:
@@ -235,7 +458,11 @@ def add_dataframe_to_excel_with_grouped_headers(wb, df, sheet_name, header_group
         if len(df) > 1000 and row_count % 1000 == 0:
             log_info(f"工作表'{sheet_name}'已写入 {row_count:,}/{len(df):,} 行 ({row_count / len(df) * 100:.1f}%)")
 
-    format_excel_sheet(ws, has_grouped_header=has_grouped_header, header_end_row=header_end_row)
+    # 按DataFrame的dtype统计估算列宽，之后对该工作表再次调用 format_excel_sheet 也不会回扫单元格
+    column_widths = estimate_column_widths(df, list(df.columns))
+    _estimated_sheet_widths[ws] = column_widths
+    format_excel_sheet(ws, has_grouped_header=has_grouped_header, header_end_row=header_end_row,
+                       column_widths=column_widths)
     return ws
 
 
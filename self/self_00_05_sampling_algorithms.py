@@ -169,7 +169,29 @@ class ReservoirSampler:
         """批量添加值"""
         for value in values:
             self.add(value)
-    
+
+    def add_lazy_batch(self, batch_size: int, make_item):
+        """
+        批量添加batch_size个元素，只为被采中的元素调用 make_item(批内序号) 生成样本
+
+        采样概率与逐个add一致，替换位置一次性向量化生成，适合百万级数据流
+        """
+        start = self.count
+        self.count += batch_size
+
+        # 蓄水池未满部分直接添加
+        fill = min(max(self.max_size - len(self.samples), 0), batch_size)
+        for i in range(fill):
+            self.samples.append(make_item(i))
+        if fill == batch_size:
+            return
+
+        # 第n个元素（n从1计）以概率 max_size/n 替换随机位置
+        positions = np.arange(start + fill + 1, start + batch_size + 1)
+        slots = (np.random.random(len(positions)) * positions).astype(np.int64)
+        for j in np.flatnonzero(slots < self.max_size):
+            self.samples[slots[j]] = make_item(fill + int(j))
+
     def get_samples(self) -> List:
         """获取当前采样结果"""
         return self.samples.copy()
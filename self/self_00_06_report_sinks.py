@@ -0,0 +1,336 @@
+"""
+报告输出模块 - 将分析器的最终结果DataFrame写入一个或多个输出目标
+
+支持的输出目标：
+1. excel      - 调用分析器自身的Excel渲染函数（可同步、后台线程、后台进程池或关闭）
+2. parquet    - 每个结果表一个Parquet文件，便于后续查询
+3. ndjson     - 每个结果表一个NDJSON文件
+4. clickhouse - 以行JSON形式写入ClickHouse通用结果表
+
+用法：
+    publish_report(output_path, {'API性能统计': results_df},
+                   excel_writer=create_xxx_excel, excel_args=(results_df, output_path))
+
+excel_writer 应为模块级渲染函数，excel_args 只包含已算好的DataFrame与统计数据（不传分析器实例），
+process 模式下二者序列化后在后台进程池中渲染，使下一个分析任务与上一个报告的渲染并行；
+excel_writer 为绑定方法或参数不可序列化时退回后台线程。
+"""
+
+import inspect
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from self_00_01_constants import DEFAULT_REPORT_SINKS, DEFAULT_EXCEL_MODE, DEFAULT_REPORT_WORKERS, \
+    REPORT_CLICKHOUSE_CONFIG
+from self_00_02_utils import log_info
+
+EXCEL_MODE_SYNC = 'sync'
+EXCEL_MODE_BACKGROUND = 'background'
+EXCEL_MODE_PROCESS = 'process'
+EXCEL_MODE_OFF = 'off'
+
+
+def report_data_dir(output_path):
+    """报告结果数据目录：与Excel文件同名的 *_data 目录"""
+    return f"{os.path.splitext(output_path)[0]}_data"
+
+
+def _run_pickled_excel_task(payload):
+    """进程池入口：反序列化并执行Excel渲染任务"""
+    excel_writer, excel_args = pickle.loads(payload)
+    excel_writer(*excel_args)
+
+
+def _safe_frame_name(frame_name):
+    return str(frame_name).replace('/', '_').replace('\\', '_').replace(' ', '_')
+
+
+class ReportSink:
+    """报告输出目标基类"""
+
+    name = 'base'
+
+    def write(self, report_name, output_path, frames):
+        """
+        写入一个报告的全部结果表
+
+        Args:
+            report_name: 报告名称（Excel文件名去掉扩展名）
+            output_path: 报告Excel路径，数据文件写在其旁边
+            frames: {结果表名: DataFrame}
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ParquetSink(ReportSink):
+    """每个结果表写一个Parquet文件"""
+
+    name = 'parquet'
+
+    def write(self, report_name, output_path, frames):
+        data_dir = report_data_dir(output_path)
+        os.makedirs(data_dir, exist_ok=True)
+
+        for frame_name, df in frames.items():
+            path = os.path.join(data_dir, f"{_safe_frame_name(frame_name)}.parquet")
+            try:
+                self._write_frame(df, path)
+            except ImportError as e:
+                log_info(f"Parquet输出需要安装pyarrow: {e}", level="WARNING")
+                return
+            except Exception as e:
+                log_info(f"Parquet写入失败({frame_name}): {e}", level="WARNING")
+                continue
+            log_info(f"已写入Parquet: {path} ({len(df):,} 行)")
+
+    @staticmethod
+    def _write_frame(df, path):
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError:
+            raise
+        except Exception:
+            # 混合类型的object列无法直接转换为Arrow类型，转为字符串后重试
+            object_columns = {col: str for col in df.columns if df[col].dtype == object}
+            df.astype(object_columns).to_parquet(path, index=False)
+
+
+class NdjsonSink(ReportSink):
+    """每个结果表写一个NDJSON文件（每行一条JSON记录）"""
+
+    name = 'ndjson'
+
+    def write(self, report_name, output_path, frames):
+        data_dir = report_data_dir(output_path)
+        os.makedirs(data_dir, exist_ok=True)
+
+        for frame_name, df in frames.items():
+            path = os.path.join(data_dir, f"{_safe_frame_name(frame_name)}.ndjson")
+            df.to_json(path, orient='records', lines=True, force_ascii=False, date_format='iso')
+            log_info(f"已写入NDJSON: {path} ({len(df):,} 行)")
+
+
+class ClickHouseSink(ReportSink):
+    """
+    写入ClickHouse通用结果表
+
+    结果表结构与具体报告无关，每行保存为一条JSON，
+    可通过 JSONExtract* 函数查询，新增报告无需变更表结构。
+    """
+
+    name = 'clickhouse'
+
+    CREATE_TABLE_SQL = """
+        CREATE TABLE IF NOT EXISTS {database}.{table} (
+            report_time DateTime,
+            report_name String,
+            frame_name String,
+            row_index UInt32,
+            row_json String
+        ) ENGINE = MergeTree()
+        PARTITION BY toYYYYMM(report_time)
+        ORDER BY (report_name, frame_name, report_time, row_index)
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(REPORT_CLICKHOUSE_CONFIG, **(config or {}))
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import clickhouse_connect
+            self._client = clickhouse_connect.get_client(
+                host=self.config['host'],
+                port=self.config['port'],
+                username=self.config['username'],
+                password=self.config['password'],
+                database=self.config['database']
+            )
+            self._client.command(self.CREATE_TABLE_SQL.format(
+                database=self.config['database'], table=self.config['table']))
+        return self._client
+
+    def write(self, report_name, output_path, frames):
+        client = self._get_client()
+        report_time = datetime.now().replace(microsecond=0)
+        columns = ['report_time', 'report_name', 'frame_name', 'row_index', 'row_json']
+
+        for frame_name, df in frames.items():
+            if df.empty:
+                continue
+            rows_json = df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso').splitlines()
+            data = [[report_time, report_name, str(frame_name), idx, row_json]
+                    for idx, row_json in enumerate(rows_json)]
+            client.insert(self.config['table'], data, column_names=columns)
+            log_info(f"已写入ClickHouse: {self.config['table']} [{report_name}/{frame_name}] ({len(data):,} 行)")
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+SINK_CLASSES = {
+    ParquetSink.name: ParquetSink,
+    NdjsonSink.name: NdjsonSink,
+    ClickHouseSink.name: ClickHouseSink,
+}
+
+
+class ReportPublisher:
+    """按配置将报告分发到各输出目标，并管理后台Excel生成"""
+
+    def __init__(self, sinks=None, excel_mode=None):
+        self._lock = threading.Lock()
+        self._thread_executor = None
+        self._process_executor = None
+        self._pending = []
+        self.data_sinks = []
+        self.configure(sinks, excel_mode)
+
+    def configure(self, sinks=None, excel_mode=None):
+        """
+        重新配置输出目标（先关闭原有的数据输出目标，释放ClickHouse连接、文件句柄等）
+
+        Args:
+            sinks: 输出目标名称列表，如 ['excel', 'parquet']；不含 'excel' 时不生成Excel
+            excel_mode: sync / background / process / off
+        """
+        sink_names = list(sinks if sinks is not None else DEFAULT_REPORT_SINKS)
+        unknown = [name for name in sink_names if name != 'excel' and name not in SINK_CLASSES]
+        if unknown:
+            raise ValueError(f"未知的报告输出目标: {unknown}")
+
+        self.excel_mode = excel_mode or DEFAULT_EXCEL_MODE
+        if 'excel' not in sink_names:
+            self.excel_mode = EXCEL_MODE_OFF
+        self._close_data_sinks()
+        self.data_sinks = [SINK_CLASSES[name]() for name in sink_names if name in SINK_CLASSES]
+
+    def _close_data_sinks(self):
+        """关闭当前的数据输出目标（关闭后仍可继续写入，ClickHouse连接在下次写入时重建）"""
+        for sink in self.data_sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                log_info(f"关闭报告输出目标失败 [{sink.name}]: {e}", level="WARNING")
+
+    @property
+    def excel_enabled(self):
+        return self.excel_mode != EXCEL_MODE_OFF
+
+    def publish(self, output_path, frames=None, excel_writer=None, excel_args=()):
+        """
+        发布一个报告
+
+        Args:
+            output_path: 报告Excel路径
+            frames: {结果表名: DataFrame}，写入数据类输出目标
+            excel_writer: Excel渲染函数，以 excel_writer(*excel_args) 调用
+            excel_args: 渲染函数参数
+        """
+        report_name = os.path.splitext(os.path.basename(output_path))[0]
+        frames = {name: df for name, df in (frames or {}).items()
+                  if isinstance(df, pd.DataFrame)}
+
+        for sink in self.data_sinks:
+            try:
+                sink.write(report_name, output_path, frames)
+            except Exception as e:
+                log_info(f"报告输出失败 [{sink.name}] {report_name}: {e}", level="ERROR")
+
+        if excel_writer is None or not self.excel_enabled:
+            return
+
+        if self.excel_mode == EXCEL_MODE_SYNC:
+            excel_writer(*excel_args)
+            return
+
+        future = None
+        if self.excel_mode == EXCEL_MODE_PROCESS:
+            future = self._submit_to_process_pool(report_name, excel_writer, excel_args)
+        if future is None:
+            future = self._submit_to_thread(excel_writer, excel_args)
+
+        with self._lock:
+            self._pending.append((report_name, future))
+        log_info(f"Excel报告已提交后台生成: {output_path}")
+
+    def _submit_to_process_pool(self, report_name, excel_writer, excel_args):
+        """序列化渲染任务并提交到进程池，无法序列化时返回None"""
+        if inspect.ismethod(excel_writer):
+            # 绑定方法会把整个分析器实例序列化到渲染进程
+            log_info(f"报告 {report_name} 的渲染函数为绑定方法，改用后台线程", level="WARNING")
+            return None
+        try:
+            payload = pickle.dumps((excel_writer, excel_args), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            log_info(f"报告 {report_name} 的渲染任务无法序列化，改用后台线程: {e}", level="DEBUG")
+            return None
+
+        with self._lock:
+            if self._process_executor is None:
+                self._process_executor = ProcessPoolExecutor(max_workers=DEFAULT_REPORT_WORKERS)
+            return self._process_executor.submit(_run_pickled_excel_task, payload)
+
+    def _submit_to_thread(self, excel_writer, excel_args):
+        with self._lock:
+            if self._thread_executor is None:
+                self._thread_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='excel-report')
+            return self._thread_executor.submit(excel_writer, *excel_args)
+
+    def wait_for_pending(self):
+        """等待所有后台Excel报告生成完成"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for report_name, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                log_info(f"后台Excel报告生成失败 {report_name}: {e}", level="ERROR")
+
+    def close(self):
+        self.wait_for_pending()
+        self._close_data_sinks()
+        for executor in (self._thread_executor, self._process_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._thread_executor = None
+        self._process_executor = None
+
+
+_publisher = ReportPublisher()
+
+
+def get_report_publisher():
+    """获取进程内共享的报告发布器"""
+    return _publisher
+
+
+def configure_report_sinks(sinks=None, excel_mode=None):
+    """配置报告输出目标，如仅供看板使用的批处理任务可设为 ['parquet'] 跳过Excel"""
+    _publisher.configure(sinks, excel_mode)
+
+
+def publish_report(output_path, frames=None, excel_writer=None, excel_args=()):
+    """将分析结果发布到已配置的输出目标"""
+    _publisher.publish(output_path, frames, excel_writer, excel_args)
+
+
+def wait_for_pending_reports():
+    """等待后台报告生成完成"""
+    _publisher.wait_for_pending()
+
+
+def close_report_sinks():
+    """等待后台报告生成完成，关闭输出目标与渲染进程池（multiprocessing子进程退出前需调用）"""
+    _publisher.close()
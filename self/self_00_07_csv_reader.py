@@ -0,0 +1,200 @@
+"""
+CSV分块读取模块 - 按声明的字段类型读取解析后的日志CSV
+
+1. 字段类型固定：数值指标统一为float64，状态码、方法、URI等标识字段统一为字符串，
+   避免pandas按块推断导致同一列在不同数据块中类型不一致（如状态码时而int时而float）
+2. 按分析器声明的字段列表读取（usecols），不读取用不到的列
+3. 可选将状态码、方法、应用、服务等低基数列转为category，降低内存占用
+4. 安装pyarrow时使用pyarrow流式读取，否则使用pandas C引擎
+5. 未指定chunk大小时，按采样行宽与内存预算自动计算
+
+用法：
+    for chunk in read_csv_chunks(csv_path, usecols=REQUIRED_COLUMNS):
+        analyzer.process_chunk(chunk)
+"""
+
+import csv
+
+import pandas as pd
+
+from self_00_01_constants import DEFAULT_CHUNK_SIZE, CSV_CHUNK_MEMORY_BUDGET_MB, CSV_CHUNK_MEMORY_FACTOR, \
+    CSV_CHUNK_MIN_SIZE, CSV_CHUNK_MAX_SIZE, CSV_AUTOTUNE_SAMPLE_ROWS
+from self_00_02_utils import log_info
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# 数值指标字段（可能为空，统一为float64）
+CSV_FLOAT_COLUMNS = [
+    'total_request_duration', 'upstream_connect_time', 'upstream_header_time', 'upstream_response_time',
+    'response_body_size', 'total_bytes_sent', 'response_body_size_kb', 'total_bytes_sent_kb',
+    'arrival_timestamp',
+    'phase_upstream_connect', 'phase_upstream_header', 'phase_upstream_body', 'phase_client_transfer',
+    'backend_connect_phase', 'backend_process_phase', 'backend_transfer_phase', 'nginx_transfer_phase',
+    'backend_total_phase', 'network_phase', 'processing_phase', 'transfer_phase',
+    'backend_efficiency', 'network_overhead', 'transfer_ratio', 'connection_cost_ratio',
+    'processing_efficiency_index',
+    'response_transfer_speed', 'total_transfer_speed', 'nginx_transfer_speed',
+]
+
+# 时间分量字段（可能为空的整数）
+CSV_INTEGER_COLUMNS = [
+    'hour', 'minute', 'second',
+    'arrival_hour', 'arrival_minute', 'arrival_second',
+]
+
+# 标识类字段（统一为字符串）
+CSV_STRING_COLUMNS = [
+    'log_source_file', 'application_name', 'service_name', 'server_name', 'host_header',
+    'raw_time', 'raw_timestamp', 'client_ip_address', 'client_port_number',
+    'http_method', 'request_full_uri', 'request_path', 'query_parameters', 'http_protocol_version',
+    'response_status_code', 'upstream_status_code', 'response_content_type', 'upstream_server_address',
+    'user_agent_string', 'referer_url',
+    'date', 'date_hour', 'date_hour_minute', 'date_hour_minute_second',
+    'arrival_time', 'arrival_date', 'arrival_date_hour', 'arrival_date_hour_minute',
+    'arrival_date_hour_minute_second',
+]
+
+# 低基数字段，可选转为category
+CSV_CATEGORY_COLUMNS = [
+    'response_status_code', 'upstream_status_code', 'http_method', 'http_protocol_version',
+    'application_name', 'service_name', 'log_source_file',
+]
+
+CSV_SCHEMA = {
+    **{col: 'float64' for col in CSV_FLOAT_COLUMNS},
+    **{col: 'Int64' for col in CSV_INTEGER_COLUMNS},
+    **{col: str for col in CSV_STRING_COLUMNS},
+}
+
+if PYARROW_AVAILABLE:
+    _ARROW_TYPES = {
+        'float64': pa.float64(),
+        'Int64': pa.int64(),
+        str: pa.string(),
+    }
+
+
+def read_csv_header(csv_path):
+    """读取CSV表头"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+class CsvChunkReader:
+    """
+    按声明字段类型分块读取CSV
+
+    Args:
+        csv_path: CSV文件路径
+        usecols: 分析器需要的字段列表，不存在于CSV中的字段自动忽略；None表示读取全部字段
+        chunk_size: 每块行数，None表示按内存预算自动计算
+        categorical: 是否将低基数字段转为category
+        dtype_overrides: 覆盖默认字段类型，值为None表示该字段交由pandas推断
+    """
+
+    def __init__(self, csv_path, usecols=None, chunk_size=None, categorical=False, dtype_overrides=None):
+        self.csv_path = csv_path
+        self.categorical = categorical
+
+        header = read_csv_header(csv_path)
+        self.columns = self._resolve_columns(header, usecols)
+
+        schema = dict(CSV_SCHEMA, **(dtype_overrides or {}))
+        self.dtypes = {col: schema[col] for col in self.columns if schema.get(col) is not None}
+        self.category_columns = [col for col in CSV_CATEGORY_COLUMNS if col in self.dtypes] if categorical else []
+
+        # pyarrow流式读取仅按首个数据块推断类型，因此只在全部字段类型已声明时使用
+        self.engine = 'pyarrow' if PYARROW_AVAILABLE and len(self.dtypes) == len(self.columns) else 'c'
+        self.chunk_size = chunk_size or self._autotune_chunk_size()
+
+        log_info(f"CSV读取: {len(self.columns)}/{len(header)} 列, 引擎={self.engine}, chunk={self.chunk_size:,}")
+
+    @staticmethod
+    def _resolve_columns(header, usecols):
+        if usecols is None:
+            return list(header)
+        wanted = set(usecols)
+        columns = [col for col in header if col in wanted]
+        # 分析器声明的字段均不存在时读取全部字段，由分析器自身处理缺失字段
+        return columns or list(header)
+
+    def _finalize(self, chunk):
+        """统一字段类型并转换category"""
+        for col, dtype in self.dtypes.items():
+            # 字符串字段两种引擎读出即为字符串，astype(str)会把空值变成'nan'，不再转换
+            if dtype is str or col not in chunk.columns:
+                continue
+            if chunk[col].dtype != dtype:
+                chunk[col] = chunk[col].astype(dtype)
+        for col in self.category_columns:
+            chunk[col] = chunk[col].astype('category')
+        return chunk
+
+    def _autotune_chunk_size(self):
+        """按采样行的实际内存占用与内存预算计算chunk大小"""
+        try:
+            sample = pd.read_csv(self.csv_path, usecols=self.columns, dtype=self.dtypes,
+                                 nrows=CSV_AUTOTUNE_SAMPLE_ROWS)
+        except Exception as e:
+            log_info(f"CSV采样失败，使用默认chunk大小: {e}", level="WARNING")
+            return DEFAULT_CHUNK_SIZE
+
+        if sample.empty:
+            return DEFAULT_CHUNK_SIZE
+
+        bytes_per_row = self._finalize(sample).memory_usage(index=False, deep=True).sum() / len(sample)
+        budget_bytes = CSV_CHUNK_MEMORY_BUDGET_MB * 1024 * 1024
+        chunk_size = int(budget_bytes / (bytes_per_row * CSV_CHUNK_MEMORY_FACTOR))
+        chunk_size = max(CSV_CHUNK_MIN_SIZE, min(CSV_CHUNK_MAX_SIZE, chunk_size))
+        return chunk_size // 1000 * 1000
+
+    def __iter__(self):
+        if self.engine == 'pyarrow':
+            return self._iter_pyarrow()
+        return self._iter_pandas()
+
+    def _iter_pandas(self):
+        reader = pd.read_csv(self.csv_path, usecols=self.columns, dtype=self.dtypes,
+                             chunksize=self.chunk_size, engine='c')
+        for chunk in reader:
+            yield self._finalize(chunk)
+
+    def _iter_pyarrow(self):
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=self.columns,
+            column_types={col: _ARROW_TYPES[dtype] for col, dtype in self.dtypes.items()},
+            strings_can_be_null=True
+        )
+        stream = pa_csv.open_csv(self.csv_path, convert_options=convert_options)
+
+        # pyarrow按字节块产出批次，累积到chunk_size行再转换为DataFrame
+        pending, pending_rows = [], 0
+        for batch in stream:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            while pending_rows >= self.chunk_size:
+                table = pa.Table.from_batches(pending)
+                yield self._to_frame(table.slice(0, self.chunk_size))
+                rest = table.slice(self.chunk_size)
+                pending, pending_rows = rest.to_batches(), rest.num_rows
+
+        if pending_rows:
+            yield self._to_frame(pa.Table.from_batches(pending))
+
+    def _to_frame(self, table):
+        return self._finalize(table.to_pandas())
+
+
+def read_csv_chunks(csv_path, usecols=None, chunk_size=None, categorical=False, dtype_overrides=None):
+    """
+    按声明字段类型分块读取CSV
+
+    Returns:
+        CsvChunkReader: 可迭代的数据块读取器，chunk_size属性为实际使用的块大小
+    """
+    return CsvChunkReader(csv_path, usecols, chunk_size, categorical, dtype_overrides)
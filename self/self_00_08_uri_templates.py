@@ -0,0 +1,166 @@
+"""
+API路径模板化模块 - 将路径中的ID类片段归一为占位符，降低API维度的基数
+
+1. 配置模板：如 /api/user/{uid}/orders，按路径片段前缀树匹配，命中即输出模板本身
+2. 内置规则：纯数字ID、UUID、十六进制哈希、base64/令牌类片段替换为 {id}
+3. 学习规则（可选）：同一父路径下不同取值超过阈值的位置视为变量
+4. 结果带LRU缓存，重复路径只计算一次
+
+用法：
+    normalize_api_template('/api/user/123456/orders')  # -> '/api/user/{id}/orders'
+"""
+
+import re
+import threading
+from functools import lru_cache
+
+from self_00_01_constants import URI_TEMPLATE_PLACEHOLDER, URI_TEMPLATES, URI_TEMPLATE_LEARN_THRESHOLD, \
+    URI_TEMPLATE_CACHE_SIZE
+
+# 单个路径片段的ID规则，合并为一个正则一次匹配
+ID_SEGMENT_PATTERN = re.compile(r'''^(?:
+    \d+                                                                         # 纯数字ID
+  | [0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}  # UUID
+  | (?=[a-fA-F]*\d)[0-9a-fA-F]{16,}                                             # 十六进制哈希(MD5/SHA)
+  | (?=[\w\-]*\d)(?=[\w\-]*[A-Za-z])[\w\-+]{20,}={0,2}                          # base64/令牌
+)$''', re.VERBOSE | re.ASCII)
+
+# 不含数字的路径不会命中内置规则，可直接跳过
+DIGIT_PATTERN = re.compile(r'\d')
+
+
+class TemplateNode:
+    """配置模板前缀树节点"""
+
+    __slots__ = ('children', 'wildcard', 'template')
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None
+        self.template = None
+
+
+class UriTemplateEngine:
+    """
+    API路径模板化引擎（线程安全）
+
+    Args:
+        templates: 配置模板列表，{xxx} 片段匹配任意取值
+        placeholder: 内置/学习规则使用的占位符
+        learn_threshold: 同一父路径下不同取值超过该数量时视为变量，None表示不学习
+        cache_size: 结果缓存条数
+        strip_trailing_slash: 是否移除末尾斜杠
+    """
+
+    def __init__(self, templates=None, placeholder=URI_TEMPLATE_PLACEHOLDER, learn_threshold=None,
+                 cache_size=URI_TEMPLATE_CACHE_SIZE, strip_trailing_slash=False):
+        self.placeholder = placeholder
+        self.learn_threshold = learn_threshold
+        self.strip_trailing_slash = strip_trailing_slash
+
+        self.root = TemplateNode()
+        self.has_templates = False
+        self._lock = threading.Lock()
+
+        # 学习状态：父路径(已归一) -> 见过的取值；已判定为变量的父路径
+        self.seen_values = {}
+        self.learned_prefixes = set()
+
+        self._cached_normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+        for template in templates or []:
+            self.add_template(template)
+
+    def add_template(self, template):
+        """添加配置模板"""
+        node = self.root
+        for segment in template.strip('/').split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                if node.wildcard is None:
+                    node.wildcard = TemplateNode()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, TemplateNode())
+        node.template = template
+        self.has_templates = True
+        self._cached_normalize.cache_clear()
+
+    def normalize(self, uri):
+        """将URI归一为模板（移除查询参数与片段标识）"""
+        if not uri:
+            return uri
+        return self._cached_normalize(uri)
+
+    def cache_info(self):
+        """结果缓存命中情况"""
+        return self._cached_normalize.cache_info()
+
+    def _normalize(self, uri):
+        path = uri.split('?', 1)[0].split('#', 1)[0]
+        if self.strip_trailing_slash and len(path) > 1 and path.endswith('/'):
+            path = path[:-1]
+
+        if self.has_templates:
+            template = self._match_template(path.strip('/').split('/'))
+            if template is not None:
+                return template
+
+        if self.learn_threshold is None and not DIGIT_PATTERN.search(path):
+            return path
+
+        normalized = []
+        for segment in path.split('/'):
+            if segment and (ID_SEGMENT_PATTERN.match(segment) or self._is_learned(normalized, segment)):
+                normalized.append(self.placeholder)
+            else:
+                normalized.append(segment)
+        return '/'.join(normalized)
+
+    def _match_template(self, segments):
+        """前缀树匹配，字面片段优先于通配片段"""
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth == len(segments):
+                if node.template is not None:
+                    return node.template
+                continue
+            if node.wildcard is not None:
+                stack.append((node.wildcard, depth + 1))
+            child = node.children.get(segments[depth])
+            if child is not None:
+                stack.append((child, depth + 1))
+        return None
+
+    def _is_learned(self, normalized_prefix, segment):
+        """记录父路径下的取值，超过阈值后该位置视为变量"""
+        if self.learn_threshold is None:
+            return False
+
+        prefix = tuple(normalized_prefix)
+        with self._lock:
+            if prefix in self.learned_prefixes:
+                return True
+            values = self.seen_values.setdefault(prefix, set())
+            values.add(segment)
+            if len(values) <= self.learn_threshold:
+                return False
+            self.learned_prefixes.add(prefix)
+            del self.seen_values[prefix]
+
+        # 已缓存的结果中该位置仍为原值，清空后按新规则重新计算
+        self._cached_normalize.cache_clear()
+        return True
+
+
+_default_engine = UriTemplateEngine(URI_TEMPLATES, learn_threshold=URI_TEMPLATE_LEARN_THRESHOLD)
+
+
+def get_uri_template_engine():
+    """获取进程内共享的模板化引擎"""
+    return _default_engine
+
+
+def normalize_api_template(api_path):
+    """API路径模板化：移除查询字符串，ID类路径片段归一为占位符"""
+    return _default_engine.normalize(api_path)
@@ -0,0 +1,319 @@
+"""
+错误爆发检测模块 - 按键（接口、服务等）的在线滑动窗口爆发检测
+
+1. 每个键维护一个环形缓冲区：最近 window/bucket 个时间桶的错误计数，内存与数据量无关
+2. 按数据块批量更新：同一键的事件按时间桶计数后，用累加和一次算出每个桶的窗口错误数，
+   超过一个窗口的空闲间隔压缩为一个窗口长度，不展开成逐秒数组
+3. 滞回判定：窗口错误数达到启动阈值时爆发开始，回落到结束阈值以下时爆发结束，
+   开始/结束事件在检测到的当次更新中立即发出（on_event回调），结束事件带峰值时间与峰值
+4. 同时在线统计每个键的错误数、首末时间、错误间隔与最大窗口错误数（不论是否爆发），
+   替代事后对全部错误时间排序
+
+假设输入大体按时间顺序；早于当前窗口的迟到事件只计入统计，不参与窗口判定。
+
+用法：
+    detector = ErrorBurstDetector(on_event=log_burst_event)
+    detector.update(interfaces, epoch_seconds)   # 每个数据块调用一次
+    detector.advance(now_seconds)                # 实时模式下无新数据时推进时间
+    detector.flush()                             # 数据结束时关闭进行中的爆发
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from self_00_01_constants import ERROR_BURST_WINDOW_SECONDS, ERROR_BURST_BUCKET_SECONDS, \
+    ERROR_BURST_START_THRESHOLD, ERROR_BURST_END_RATIO, ERROR_BURST_MAX_EVENTS
+from self_00_02_utils import log_info
+
+BURST_START = 'start'
+BURST_END = 'end'
+
+
+class BurstKeyState:
+    """单个键的窗口状态与统计"""
+
+    __slots__ = ('ring', 'last_bucket', 'active', 'burst_start', 'peak_count', 'peak_bucket', 'burst_errors',
+                 'errors', 'first_ts', 'last_ts', 'min_gap', 'max_gap', 'burst_count', 'max_peak', 'max_window')
+
+    def __init__(self, window_buckets):
+        self.ring = np.zeros(window_buckets, dtype=np.int64)  # 以last_bucket结尾的最近N个桶计数
+        self.last_bucket = None
+        self.active = False
+        self.burst_start = None
+        self.peak_count = 0
+        self.peak_bucket = None
+        self.burst_errors = 0
+
+        self.errors = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.min_gap = None
+        self.max_gap = None
+        self.burst_count = 0
+        self.max_peak = 0
+        self.max_window = 0  # 任一窗口内的最大错误数（未达到爆发阈值的键也统计）
+
+
+class ErrorBurstDetector:
+    """
+    在线错误爆发检测器
+
+    Args:
+        window_seconds: 滑动窗口长度（秒）
+        bucket_seconds: 时间桶长度（秒），窗口由 window_seconds/bucket_seconds 个桶组成
+        start_threshold: 窗口内错误数达到该值时爆发开始
+        end_ratio: 窗口内错误数低于 start_threshold*end_ratio 时爆发结束
+        max_events: 保留的已结束爆发事件数上限
+        on_event: 爆发开始/结束时的回调，参数为事件字典
+    """
+
+    def __init__(self, window_seconds=ERROR_BURST_WINDOW_SECONDS, bucket_seconds=ERROR_BURST_BUCKET_SECONDS,
+                 start_threshold=ERROR_BURST_START_THRESHOLD, end_ratio=ERROR_BURST_END_RATIO,
+                 max_events=ERROR_BURST_MAX_EVENTS, on_event=None):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(1, int(round(window_seconds / bucket_seconds)))
+        self.window_seconds = self.window_buckets * bucket_seconds
+        self.start_threshold = start_threshold
+        self.end_threshold = max(1, int(np.ceil(start_threshold * end_ratio)))
+        self.on_event = on_event
+
+        self.states = {}
+        self.bursts = deque(maxlen=max_events)
+        self.total_bursts = 0
+
+    def update(self, keys, timestamps):
+        """
+        批量更新
+
+        Args:
+            keys: 事件所属键（数组/Series）
+            timestamps: 事件时间，整数秒（epoch）
+
+        Returns:
+            list: 本次更新中发出的爆发事件
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if len(timestamps) == 0:
+            return []
+
+        codes, unique_keys = pd.factorize(np.asarray(keys, dtype=object))
+        order = np.lexsort((timestamps, codes))
+        codes, timestamps = codes[order], timestamps[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.r_[0, bounds]
+        ends = np.r_[bounds, len(codes)]
+
+        events = []
+        for start, end in zip(starts, ends):
+            key = unique_keys[codes[start]]
+            state = self.states.get(key)
+            if state is None:
+                state = self.states[key] = BurstKeyState(self.window_buckets)
+            self._update_key(key, state, timestamps[start:end], events)
+        return events
+
+    def _update_key(self, key, state, ts, events):
+        """用一个键的有序事件时间更新其统计与窗口"""
+        # 在线统计：错误数、首末时间、错误间隔
+        gaps = np.diff(ts)
+        if state.last_ts is not None:
+            gaps = np.r_[max(int(ts[0]) - state.last_ts, 0), gaps]
+        if len(gaps):
+            state.min_gap = int(gaps.min()) if state.min_gap is None else min(state.min_gap, int(gaps.min()))
+            state.max_gap = int(gaps.max()) if state.max_gap is None else max(state.max_gap, int(gaps.max()))
+        state.errors += len(ts)
+        state.first_ts = int(ts[0]) if state.first_ts is None else min(state.first_ts, int(ts[0]))
+        state.last_ts = int(ts[-1]) if state.last_ts is None else max(state.last_ts, int(ts[-1]))
+
+        n = self.window_buckets
+        buckets, counts = np.unique(ts // self.bucket_seconds, return_counts=True)
+        if state.last_bucket is None:
+            state.last_bucket = int(buckets[0]) - 1
+
+        # 环形缓冲区覆盖的桶内的迟到事件直接计入缓冲区；更早的只计入统计
+        in_ring = (buckets <= state.last_bucket) & (buckets > state.last_bucket - n)
+        if in_ring.any():
+            state.ring[buckets[in_ring] - state.last_bucket + n - 1] += counts[in_ring]
+            if state.active:
+                state.burst_errors += int(counts[in_ring & (buckets >= state.burst_start)].sum())
+            state.max_window = max(state.max_window, int(state.ring.sum()))
+        new = buckets > state.last_bucket
+        if not new.any():
+            return
+        buckets, counts = buckets[new], counts[new]
+
+        # 稠密时间轴：[环形缓冲区 N 个桶] + 新桶，超过 N+1 个桶的空闲间隔压缩为 N+1
+        anchors_real = np.r_[state.last_bucket, buckets]
+        anchors_pos = (n - 1) + np.r_[0, np.cumsum(np.minimum(np.diff(anchors_real), n + 1))]
+        dense = np.zeros(anchors_pos[-1] + 1, dtype=np.int64)
+        dense[:n] = state.ring
+        dense[anchors_pos[1:]] = counts
+
+        # 每个桶的窗口错误数，只评估缓冲区末桶及之后的位置
+        cumulative = np.r_[0, np.cumsum(dense)]
+        positions = np.arange(n - 1, len(dense))
+        window_counts = cumulative[positions + 1] - cumulative[positions + 1 - n]
+        state.max_window = max(state.max_window, int(window_counts.max()))
+
+        def real_bucket(index):
+            pos = index + n - 1
+            k = np.searchsorted(anchors_pos, pos, side='right') - 1
+            return int(anchors_real[k] + (pos - anchors_pos[k]))
+
+        self._detect(key, state, window_counts, dense[n - 1:], real_bucket, events)
+
+        state.ring = dense[-n:].copy()
+        state.last_bucket = int(buckets[-1])
+
+    def _detect(self, key, state, window_counts, bucket_counts, real_bucket, events):
+        """在窗口错误数序列上做滞回判定，发出开始/结束事件"""
+        above_end = window_counts >= self.end_threshold
+        edges = np.diff(np.r_[0, above_end.astype(np.int8), 0])
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+
+        if state.active and (len(run_starts) == 0 or run_starts[0] != 0):
+            self._end_burst(key, state, real_bucket(0), events)
+
+        for run_start, run_end in zip(run_starts, run_ends):
+            continuing = state.active and run_start == 0
+            if continuing:
+                burst_start = 0
+            else:
+                above_start = np.flatnonzero(window_counts[run_start:run_end] >= self.start_threshold)
+                if len(above_start) == 0:
+                    continue
+                burst_start = run_start + int(above_start[0])
+                self._start_burst(key, state, real_bucket(burst_start), int(window_counts[burst_start]), events)
+
+            peak = burst_start + int(np.argmax(window_counts[burst_start:run_end]))
+            if window_counts[peak] > state.peak_count:
+                state.peak_count = int(window_counts[peak])
+                state.peak_bucket = real_bucket(peak)
+            state.burst_errors += int(bucket_counts[burst_start + 1:run_end].sum())
+
+            if run_end < len(window_counts):
+                self._end_burst(key, state, real_bucket(run_end), events)
+
+    def _start_burst(self, key, state, bucket, window_count, events):
+        state.active = True
+        state.burst_start = bucket
+        state.peak_count = 0
+        state.peak_bucket = bucket
+        # 触发爆发的窗口内错误计入本次爆发
+        state.burst_errors = window_count
+        self._emit(events, {
+            'event': BURST_START,
+            'key': key,
+            'start_time': self._to_time(bucket),
+        })
+
+    def _end_burst(self, key, state, bucket, events):
+        state.active = False
+        state.burst_count += 1
+        state.max_peak = max(state.max_peak, state.peak_count)
+        self.total_bursts += 1
+
+        burst = {
+            'event': BURST_END,
+            'key': key,
+            'start_time': self._to_time(state.burst_start),
+            'end_time': self._to_time(bucket),
+            'peak_time': self._to_time(state.peak_bucket),
+            'peak_count': state.peak_count,
+            'errors': state.burst_errors,
+            'duration_seconds': (bucket - state.burst_start) * self.bucket_seconds,
+        }
+        self.bursts.append(burst)
+        self._emit(events, burst)
+
+    def _emit(self, events, event):
+        events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def advance(self, now_seconds):
+        """
+        推进时间：没有新事件时，结束窗口已回落到结束阈值以下的爆发（实时模式下定期调用）
+
+        Returns:
+            list: 发出的爆发结束事件
+        """
+        events = []
+        now_bucket = now_seconds // self.bucket_seconds
+        for key, state in self.states.items():
+            if not state.active:
+                continue
+            # 无新事件时，末桶之后第k个桶的窗口错误数为 ring[k:] 之和
+            tail = np.r_[np.cumsum(state.ring[::-1])[::-1], 0]
+            k = int(np.argmax(tail[1:] < self.end_threshold)) + 1
+            end_bucket = state.last_bucket + k
+            if end_bucket <= now_bucket:
+                self._end_burst(key, state, end_bucket, events)
+        return events
+
+    def flush(self):
+        """数据结束：关闭所有进行中的爆发"""
+        return self.advance(np.iinfo(np.int64).max)
+
+    def active_bursts(self):
+        """进行中的爆发"""
+        return [{
+            'key': key,
+            'start_time': self._to_time(state.burst_start),
+            'peak_time': self._to_time(state.peak_bucket),
+            'peak_count': state.peak_count,
+            'errors': state.burst_errors,
+        } for key, state in self.states.items() if state.active]
+
+    def key_summary(self):
+        """每个键的错误时间统计"""
+        rows = []
+        for key, state in self.states.items():
+            rows.append({
+                'key': key,
+                'errors': state.errors,
+                'first_time': self._to_datetime(state.first_ts),
+                'last_time': self._to_datetime(state.last_ts),
+                'span_seconds': state.last_ts - state.first_ts,
+                'avg_gap': (state.last_ts - state.first_ts) / (state.errors - 1) if state.errors > 1 else 0,
+                'min_gap': state.min_gap or 0,
+                'max_gap': state.max_gap or 0,
+                'burst_count': state.burst_count + state.active,
+                'max_peak': max(state.max_peak, state.peak_count if state.active else 0),
+                'max_window': state.max_window,
+            })
+        return pd.DataFrame(rows)
+
+    def _to_time(self, bucket):
+        return self._to_datetime(bucket * self.bucket_seconds)
+
+    @staticmethod
+    def _to_datetime(seconds):
+        return pd.Timestamp(seconds, unit='s') if seconds is not None else None
+
+
+def log_burst_event(event):
+    """爆发开始/结束时立即输出（ErrorBurstDetector 的 on_event 回调）"""
+    if event['event'] == BURST_START:
+        log_info(f"⚠️ 错误爆发开始: {event['key']} @ {event['start_time']}", level="WARNING")
+    else:
+        log_info(f"错误爆发结束: {event['key']} {event['start_time']} ~ {event['end_time']}, "
+                 f"峰值 {event['peak_count']} 次/窗口 @ {event['peak_time']}")
+
+
+def to_epoch_seconds(times, time_format='%Y-%m-%d %H:%M:%S'):
+    """
+    时间字符串列转为整数秒（无时区，按字面时间）
+
+    Returns:
+        (np.ndarray, np.ndarray): 整数秒，以及解析成功的掩码
+    """
+    parsed = pd.to_datetime(times, format=time_format, errors='coerce')
+    valid = parsed.notna().to_numpy()
+    seconds = np.zeros(len(parsed), dtype=np.int64)
+    if valid.any():
+        seconds[valid] = (parsed[valid] - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return seconds, valid
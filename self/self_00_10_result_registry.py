@@ -0,0 +1,145 @@
+"""
+分析结果登记模块 - 各分析器发布精简的结果摘要，供综合报告使用
+
+1. 每个分析器在写完自己的报告后，发布一个 AnalysisSummary：关键指标、Top-N列表、异常列表，
+   只包含数值与少量记录，之后即可释放完整的结果DataFrame
+2. 综合报告只读取登记的摘要，不再遍历各分析器的完整结果表
+
+用法：
+    publish_summary(AnalysisSummary(SUMMARY_STATUS, metrics={'error_rate': 1.2},
+                                    top_lists={'status_codes': top_records(df, ['状态码', '请求数'], 10)}))
+    summary = get_summary(SUMMARY_STATUS)
+    summary.metric('error_rate', 0.0)
+"""
+
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+# 摘要名称
+SUMMARY_API = 'api'
+SUMMARY_SERVICE = 'service'
+SUMMARY_SLOW_REQUESTS = 'slow_requests'
+SUMMARY_STATUS = 'status'
+SUMMARY_STABILITY = 'stability'
+
+# 异常严重程度
+SEVERITY_CRITICAL = 'critical'
+SEVERITY_MEDIUM = 'medium'
+
+
+class AnalysisSummary:
+    """
+    单个分析器的结果摘要
+
+    Args:
+        name: 摘要名称（SUMMARY_*）
+        metrics: {指标名: 数值}
+        top_lists: {列表名: [记录字典]}，每个列表只保留Top-N条
+        anomalies: [{'severity', 'description', 'source'}]
+    """
+
+    __slots__ = ('name', 'metrics', 'top_lists', 'anomalies', 'created_at')
+
+    def __init__(self, name, metrics=None, top_lists=None, anomalies=None):
+        self.name = name
+        self.metrics = dict(metrics or {})
+        self.top_lists = dict(top_lists or {})
+        self.anomalies = list(anomalies or [])
+        self.created_at = datetime.now()
+
+    def metric(self, key, default=None):
+        """取指标值，缺失或为NaN时返回默认值"""
+        value = self.metrics.get(key)
+        if value is None or (isinstance(value, float) and value != value):
+            return default
+        return value
+
+    def top(self, key):
+        """取Top-N列表，缺失时返回空列表"""
+        return self.top_lists.get(key, [])
+
+    def add_anomaly(self, severity, description, source=None):
+        self.anomalies.append({'severity': severity, 'description': description, 'source': source or self.name})
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'metrics': self.metrics,
+            'top_lists': self.top_lists,
+            'anomalies': self.anomalies,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def __repr__(self):
+        return (f"AnalysisSummary({self.name!r}, metrics={len(self.metrics)}, "
+                f"top_lists={list(self.top_lists)}, anomalies={len(self.anomalies)})")
+
+
+class ResultRegistry:
+    """进程内的结果摘要登记表（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._summaries = {}
+
+    def publish(self, summary):
+        """登记摘要，同名摘要以最后一次为准"""
+        with self._lock:
+            self._summaries[summary.name] = summary
+
+    def get(self, name):
+        """取摘要，未登记时返回空摘要，调用方无需判空"""
+        with self._lock:
+            summary = self._summaries.get(name)
+        return summary if summary is not None else AnalysisSummary(name)
+
+    def has(self, name):
+        with self._lock:
+            return name in self._summaries
+
+    def names(self):
+        with self._lock:
+            return list(self._summaries)
+
+    def clear(self):
+        with self._lock:
+            self._summaries.clear()
+
+
+def top_records(df, columns, n):
+    """取DataFrame前n行的指定列为记录列表（缺失的列跳过）"""
+    if df is None or df.empty:
+        return []
+    columns = [col for col in columns if col in df.columns]
+    return df.head(n)[columns].to_dict('records')
+
+
+def series_stats(series, percentiles=(50, 95, 99)):
+    """数值列的均值与分位数"""
+    values = pd.to_numeric(series, errors='coerce').dropna()
+    if values.empty:
+        return {}
+    stats = {'avg': float(values.mean())}
+    for p in percentiles:
+        stats[f'p{p}'] = float(values.quantile(p / 100))
+    return stats
+
+
+_registry = ResultRegistry()
+
+
+def get_result_registry():
+    """获取进程内共享的结果登记表"""
+    return _registry
+
+
+def publish_summary(summary):
+    """发布分析器结果摘要"""
+    _registry.publish(summary)
+
+
+def get_summary(name):
+    """获取分析器结果摘要"""
+    return _registry.get(name)
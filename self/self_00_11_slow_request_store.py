@@ -0,0 +1,240 @@
+"""
+慢请求存储模块 - 列式溢写文件 + 按API的Top-K + 全局前N行
+
+1. ColumnarSpill: 慢请求全集按数据块追加写入列式文件（安装pyarrow时为Parquet，每块一个行组；
+   否则退化为CSV），内存中只保留当前数据块，读取时按页返回DataFrame
+2. TopKPerKey: 每个分组键（API）只保留取值（耗时）最大的K行，候选行以列式DataFrame缓存，
+   累积到一定行数后一次性排序截断，内存上限约为 分组数×K + 压缩阈值
+3. TopRows: 按多列排序键只保留最靠前的N行（如按严重程度、耗时），截断方式同TopKPerKey，
+   内存上限约为 2N + 压缩阈值
+
+用法：
+    spill = ColumnarSpill(path, string_columns=['request_full_uri'], numeric_columns=['total_request_duration'])
+    top_k = TopKPerKey('request_full_uri', 'total_request_duration', k=20)
+    worst = TopRows(['total_request_duration'], ascending=[False], n=200000)
+    for chunk in chunks:
+        spill.append(chunk)
+        top_k.add(chunk)
+        worst.add(chunk)
+    spill.close()
+    for page in spill.iter_pages(50000):
+        ...
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from self_00_02_utils import log_info
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pa_parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+class ColumnarSpill:
+    """
+    按数据块追加写入的列式溢写文件
+
+    Args:
+        path: 文件路径（不含扩展名时自动补 .parquet / .csv）
+        string_columns: 文本列，写入前统一转为字符串
+        numeric_columns: 数值列，写入前统一转为float64
+    """
+
+    def __init__(self, path, string_columns, numeric_columns):
+        self.string_columns = list(string_columns)
+        self.numeric_columns = list(numeric_columns)
+        self.columns = self.string_columns + self.numeric_columns
+        self.format = 'parquet' if PYARROW_AVAILABLE else 'csv'
+
+        root, ext = os.path.splitext(path)
+        self.path = path if ext else f"{root}.{self.format}"
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        self.row_count = 0
+        self._writer = None
+        self._schema = None
+        if PYARROW_AVAILABLE:
+            self._schema = pa.schema([(col, pa.string()) for col in self.string_columns] +
+                                     [(col, pa.float64()) for col in self.numeric_columns])
+
+    def _normalize(self, frame):
+        """按固定列顺序与类型整理数据块，缺失的列补空"""
+        data = {}
+        for col in self.string_columns:
+            values = frame[col] if col in frame.columns else pd.Series('', index=frame.index)
+            data[col] = values.astype(str)
+        for col in self.numeric_columns:
+            values = frame[col] if col in frame.columns else pd.Series(np.nan, index=frame.index)
+            data[col] = pd.to_numeric(values, errors='coerce').astype('float64')
+        return pd.DataFrame(data, index=frame.index)
+
+    def append(self, frame):
+        """追加一个数据块"""
+        if frame.empty:
+            return
+        frame = self._normalize(frame)
+
+        if self.format == 'parquet':
+            table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._writer = pa_parquet.ParquetWriter(self.path, self._schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a', header=self.row_count == 0, index=False, encoding='utf-8')
+
+        self.row_count += len(frame)
+
+    def close(self):
+        """结束写入"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def iter_pages(self, page_rows, max_pages=None):
+        """按页读取，每页最多page_rows行"""
+        self.close()
+        if self.row_count == 0:
+            return
+
+        pages = 0
+        if self.format == 'parquet':
+            batches = pa_parquet.ParquetFile(self.path).iter_batches(batch_size=page_rows)
+            frames = (batch.to_pandas() for batch in batches)
+        else:
+            dtypes = {col: str for col in self.string_columns}
+            dtypes.update({col: 'float64' for col in self.numeric_columns})
+            frames = pd.read_csv(self.path, dtype=dtypes, keep_default_na=False,
+                                 na_values={col: [''] for col in self.numeric_columns},
+                                 chunksize=page_rows, encoding='utf-8')
+
+        for frame in frames:
+            yield frame
+            pages += 1
+            if max_pages is not None and pages >= max_pages:
+                break
+
+    def remove(self):
+        """删除溢写文件"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class TopKPerKey:
+    """
+    每个分组键保留取值最大的K行（列式缓存，批量截断）
+
+    Args:
+        key_column: 分组列（如API）
+        value_column: 排序取值列（如请求总时长）
+        k: 每个分组保留的行数
+        compact_rows: 待截断的候选行数达到该值（且不少于已保留行数）时执行一次截断
+    """
+
+    def __init__(self, key_column, value_column, k, compact_rows=100000):
+        self.key_column = key_column
+        self.value_column = value_column
+        self.k = k
+        self.compact_rows = compact_rows
+        self._kept = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def add(self, frame):
+        """加入候选行"""
+        if frame.empty:
+            return
+        self._pending.append(frame)
+        self._pending_rows += len(frame)
+
+        kept_rows = 0 if self._kept is None else len(self._kept)
+        if self._pending_rows >= max(self.compact_rows, kept_rows):
+            self._compact()
+
+    def _compact(self):
+        """合并候选行，按取值降序保留每个分组的前K行"""
+        if not self._pending:
+            return
+        frames = self._pending if self._kept is None else [self._kept] + self._pending
+        combined = pd.concat(frames, ignore_index=True)
+        self._pending = []
+        self._pending_rows = 0
+
+        # 稳定排序保证同值时先到的行优先
+        combined = combined.sort_values(self.value_column, ascending=False, kind='mergesort')
+        self._kept = combined.groupby(self.key_column, sort=False, observed=True).head(self.k)
+
+    def result(self):
+        """返回所有分组保留的行（按取值降序）"""
+        self._compact()
+        if self._kept is None:
+            return pd.DataFrame()
+        log_info(f"Top-K保留: {self._kept[self.key_column].nunique():,} 个分组, {len(self._kept):,} 行")
+        return self._kept.reset_index(drop=True)
+
+
+class TopRows:
+    """
+    按排序键保留最靠前的N行（列式缓存，批量截断）
+
+    Args:
+        sort_columns: 排序列，按顺序依次比较
+        ascending: 与排序列一一对应的升降序
+        n: 保留的行数
+        compact_rows: 待截断的候选行数达到该值（且不少于已保留行数）时执行一次截断
+    """
+
+    def __init__(self, sort_columns, ascending, n, compact_rows=100000):
+        self.sort_columns = list(sort_columns)
+        self.ascending = list(ascending)
+        self.n = n
+        self.compact_rows = compact_rows
+        self.row_count = 0
+        self._kept = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def add(self, frame):
+        """加入候选行"""
+        if frame.empty:
+            return
+        self.row_count += len(frame)
+        self._pending.append(frame)
+        self._pending_rows += len(frame)
+
+        kept_rows = 0 if self._kept is None else len(self._kept)
+        if self._pending_rows >= max(self.compact_rows, kept_rows):
+            self._compact()
+
+    def _compact(self):
+        """合并候选行，按排序键保留前N行"""
+        if not self._pending:
+            return
+        frames = self._pending if self._kept is None else [self._kept] + self._pending
+        combined = pd.concat(frames, ignore_index=True)
+        self._pending = []
+        self._pending_rows = 0
+
+        # 稳定排序保证排序键相同时先到的行优先
+        combined = combined.sort_values(self.sort_columns, ascending=self.ascending, kind='mergesort')
+        self._kept = combined.head(self.n)
+
+    def result(self):
+        """返回保留的行（按排序键有序）"""
+        self._compact()
+        if self._kept is None:
+            return pd.DataFrame()
+        return self._kept.reset_index(drop=True)
+
+    def iter_pages(self, page_rows):
+        """按排序顺序分页返回保留的行，每页最多page_rows行"""
+        kept = self.result()
+        for start in range(0, len(kept), page_rows):
+            yield kept.iloc[start:start + page_rows]
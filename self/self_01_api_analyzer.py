@@ -10,6 +10,7 @@ from self_00_04_excel_processor import format_excel_sheet, add_dataframe_to_exce
 from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD, DEFAULT_SLOW_REQUESTS_THRESHOLD, \
     TIME_METRICS, SIZE_METRICS, HIGHLIGHT_FILL
 from self_00_02_utils import log_info, get_distribution_stats, calculate_time_percentages
+from self_00_07_csv_reader import read_csv_chunks
 
 # 尝试导入scipy，如果失败则使用近似计算
 try:
@@ -301,7 +302,7 @@ def analyze_api_performance(csv_path, output_path, success_codes=None, slow_thre
 
     # 流式处理数据
     try:
-        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        for chunk in read_csv_chunks(csv_path, chunk_size=chunk_size):
             chunks_processed += 1
             
             # 处理数据块
@@ -22,13 +22,17 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font
 from datetime import datetime
-from collections import defaultdict
 from typing import Dict, List, Any, Optional
 
 from self_00_04_excel_processor import format_excel_sheet, add_dataframe_to_excel_with_grouped_headers
-from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD, DEFAULT_SLOW_REQUESTS_THRESHOLD, \
-    TIME_METRICS, SIZE_METRICS, HIGHLIGHT_FILL
+from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, DEFAULT_SLOW_REQUESTS_THRESHOLD, \
+    TIME_METRICS, SIZE_METRICS, HIGHLIGHT_FILL, API_STATE_MEMORY_BUDGET_MB, API_STATE_SKETCH_SHARE, \
+    API_SKETCH_PROMOTION_THRESHOLD, API_LIGHT_STATE_BYTES, API_SKETCH_STATE_BYTES, API_EVICTION_RATIO, \
+    API_OTHER_BUCKET_KEY
 from self_00_02_utils import log_info, get_distribution_stats, calculate_time_percentages
+from self_00_06_report_sinks import publish_report
+from self_00_07_csv_reader import read_csv_chunks
+from self_00_10_result_registry import AnalysisSummary, SUMMARY_API, publish_summary, top_records
 from self_00_05_sampling_algorithms import (
     TDigest, ReservoirSampler, CountMinSketch, HyperLogLog, 
     StratifiedSampler, AdaptiveSampler
@@ -42,53 +46,80 @@ except ImportError:
     SCIPY_AVAILABLE = False
 
 
+# 字段映射（分析字段 -> CSV列）
+API_FIELD_MAPPING = {
+    'uri': 'request_full_uri',
+    'app': 'application_name', 
+    'service': 'service_name',
+    'status': 'response_status_code',
+    'request_time': 'total_request_duration',
+    'header_time': 'upstream_header_time',
+    'connect_time': 'upstream_connect_time',
+    'response_time': 'upstream_response_time',
+    'body_bytes_kb': 'response_body_size_kb',
+    'bytes_sent_kb': 'total_bytes_sent_kb',
+    'backend_connect_phase': 'backend_connect_phase',
+    'backend_process_phase': 'backend_process_phase',
+    'backend_transfer_phase': 'backend_transfer_phase',
+    'nginx_transfer_phase': 'nginx_transfer_phase',
+    'response_transfer_speed': 'response_transfer_speed',
+    'processing_efficiency_index': 'processing_efficiency_index',
+    'client_ip': 'client_ip'
+}
+
+
+def create_api_sketches():
+    """创建单个API的完整采样统计（仅高频API建立）"""
+    return {
+        # 使用T-Digest进行响应时间分析
+        'response_time_digest': TDigest(compression=100),
+        
+        # 使用蓄水池采样保存样本（3000条确保P99误差<1%）
+        'response_time_reservoir': ReservoirSampler(3000),
+        'body_size_reservoir': ReservoirSampler(3000),
+        'bytes_size_reservoir': ReservoirSampler(3000),
+        
+        # 阶段时间统计
+        'backend_connect_digest': TDigest(compression=50),
+        'backend_process_digest': TDigest(compression=50),
+        'backend_transfer_digest': TDigest(compression=50),
+        'nginx_transfer_digest': TDigest(compression=50),
+        
+        # 性能指标
+        'transfer_speed_reservoir': ReservoirSampler(300),
+        'efficiency_reservoir': ReservoirSampler(300)
+    }
+
+
 class AdvancedStreamingApiAnalyzer:
     """
     高级流式API性能分析器
     使用多种采样算法提供准确和高效的分析
     """
     
-    def __init__(self, slow_threshold=DEFAULT_SLOW_THRESHOLD):
+    def __init__(self, slow_threshold=DEFAULT_SLOW_THRESHOLD, memory_budget_mb=API_STATE_MEMORY_BUDGET_MB,
+                 promotion_threshold=API_SKETCH_PROMOTION_THRESHOLD):
         """
         初始化分析器
         
         Args:
             slow_threshold: 慢请求阈值（秒）
+            memory_budget_mb: API统计状态的内存预算（MB），决定可跟踪的API数与完整采样统计的API数
+            promotion_threshold: 请求数达到该值的API升级为完整采样统计
         """
         self.slow_threshold = slow_threshold
         
-        # 每个API的统计信息
-        self.api_stats = defaultdict(lambda: {
-            'total_requests': 0,
-            'success_requests': 0,
-            'error_requests': 0,  # 新增：错误请求数
-            'slow_requests': 0,
-            'app_name': '',
-            'service_name': '',
-            
-            # 使用T-Digest进行响应时间分析
-            'response_time_digest': TDigest(compression=100),
-            
-            # 使用蓄水池采样保存样本（3000条确保P99误差<1%）
-            'response_time_reservoir': ReservoirSampler(3000),
-            'body_size_reservoir': ReservoirSampler(3000),
-            'bytes_size_reservoir': ReservoirSampler(3000),
-            
-            # 流式统计（用于精确计算均值、方差）
-            'request_time_sum': 0.0,
-            'request_time_sum_sq': 0.0,
-            'request_time_count': 0,
-            
-            # 阶段时间统计
-            'backend_connect_digest': TDigest(compression=50),
-            'backend_process_digest': TDigest(compression=50),
-            'backend_transfer_digest': TDigest(compression=50),
-            'nginx_transfer_digest': TDigest(compression=50),
-            
-            # 性能指标
-            'transfer_speed_reservoir': ReservoirSampler(300),
-            'efficiency_reservoir': ReservoirSampler(300)
-        })
+        # 每个API的统计信息（分层）：
+        # 轻量层 - 所有API的计数与小样本；完整层 - 高频API额外的T-Digest与蓄水池采样；
+        # 轻量API数达到上限时，请求数最少的API归并到"其他"汇总项
+        self.api_stats = {}
+        self.memory_budget_mb = memory_budget_mb
+        self.promotion_threshold = promotion_threshold
+        budget_bytes = memory_budget_mb * 1024 * 1024
+        self.max_sketched_apis = max(1, int(budget_bytes * API_STATE_SKETCH_SHARE / API_SKETCH_STATE_BYTES))
+        self.max_tracked_apis = max(1, int(budget_bytes * (1 - API_STATE_SKETCH_SHARE) / API_LIGHT_STATE_BYTES))
+        self.sketched_api_count = 0
+        self.evicted_api_count = 0
         
         # 全局统计
         self.global_stats = {
@@ -123,6 +154,114 @@ class AdvancedStreamingApiAnalyzer:
             'processing_times': []
         }
     
+    def _create_light_stats(self):
+        """创建轻量API统计：计数、流式均值统计与小样本"""
+        return {
+            'total_requests': 0,
+            'success_requests': 0,
+            'error_requests': 0,  # 新增：错误请求数
+            'slow_requests': 0,
+            'app_name': '',
+            'service_name': '',
+            'sketched': False,
+            
+            # 流式统计（用于精确计算均值、方差）
+            'request_time_sum': 0.0,
+            'request_time_sum_sq': 0.0,
+            'request_time_count': 0,
+            
+            # 升级前的响应时间样本，升级时回放到完整采样统计
+            'response_time_reservoir': ReservoirSampler(self.promotion_threshold)
+        }
+    
+    def _promote_api(self, stats):
+        """升级为完整采样统计，并回放轻量层已采集的响应时间样本"""
+        light_samples = stats['response_time_reservoir'].samples
+        stats.update(create_api_sketches())
+        stats['response_time_digest'].add_batch(light_samples)
+        stats['response_time_reservoir'].add_batch(light_samples)
+        stats['sketched'] = True
+    
+    def _get_other_stats(self):
+        """获取长尾API汇总项（始终为完整采样统计，不计入API数上限）"""
+        stats = self.api_stats.get(API_OTHER_BUCKET_KEY)
+        if stats is None:
+            stats = self._create_light_stats()
+            stats['app_name'] = stats['service_name'] = '-'
+            self._promote_api(stats)
+            self.api_stats[API_OTHER_BUCKET_KEY] = stats
+        return stats
+    
+    def _tracked_api_count(self):
+        return len(self.api_stats) - (API_OTHER_BUCKET_KEY in self.api_stats)
+    
+    def _resolve_api_keys(self, uris):
+        """
+        为数据块中的API分配统计项
+        
+        新API按本块请求数从高到低建立轻量统计；轻量API数达到上限时先归并请求数最少的轻量API，
+        仍无空位时本块中剩余的新API计入"其他"汇总项
+        
+        Returns:
+            pd.Series: 统计项键
+        """
+        chunk_apis = uris.value_counts().index
+        new_apis = [api for api in chunk_apis if api not in self.api_stats]
+        free_slots = self.max_tracked_apis - self._tracked_api_count()
+        if len(new_apis) > free_slots:
+            self._evict_light_apis(len(new_apis) - free_slots, protected=set(chunk_apis))
+            free_slots = self.max_tracked_apis - self._tracked_api_count()
+        
+        for api in new_apis[:max(free_slots, 0)]:
+            self.api_stats[api] = self._create_light_stats()
+        
+        overflow_apis = new_apis[max(free_slots, 0):]
+        if not overflow_apis:
+            return uris
+        self._get_other_stats()
+        return uris.where(~uris.isin(overflow_apis), API_OTHER_BUCKET_KEY)
+    
+    def _evict_light_apis(self, needed, protected):
+        """将请求数最少的轻量API归并到"其他"汇总项，本块中出现的API（protected）不归并"""
+        candidates = [(stats['total_requests'], api) for api, stats in self.api_stats.items()
+                      if not stats['sketched'] and api not in protected]
+        if not candidates:
+            return
+        
+        evict_count = min(len(candidates), max(needed, int(self.max_tracked_apis * API_EVICTION_RATIO)))
+        candidates.sort(key=lambda item: item[0])
+        other = self._get_other_stats()
+        
+        for _, api in candidates[:evict_count]:
+            stats = self.api_stats.pop(api)
+            for key in ('total_requests', 'success_requests', 'error_requests', 'slow_requests',
+                        'request_time_sum', 'request_time_sum_sq', 'request_time_count'):
+                other[key] += stats[key]
+            samples = stats['response_time_reservoir'].samples
+            other['response_time_digest'].add_batch(samples)
+            other['response_time_reservoir'].add_batch(samples)
+        
+        self.evicted_api_count += evict_count
+        log_info(f"轻量API数达到上限 {self.max_tracked_apis:,}，已将 {evict_count:,} 个低频API归并到"
+                 f"\"{API_OTHER_BUCKET_KEY}\"", level="DEBUG")
+    
+    def get_state_usage(self) -> Dict[str, Any]:
+        """API统计状态的规模与估算内存"""
+        tracked_apis = self._tracked_api_count()
+        sketched_apis = self.sketched_api_count + (API_OTHER_BUCKET_KEY in self.api_stats)
+        estimated_bytes = tracked_apis * API_LIGHT_STATE_BYTES + sketched_apis * API_SKETCH_STATE_BYTES
+        other_stats = self.api_stats.get(API_OTHER_BUCKET_KEY)
+        return {
+            'tracked_apis': tracked_apis,
+            'sketched_apis': sketched_apis,
+            'max_tracked_apis': self.max_tracked_apis,
+            'max_sketched_apis': self.max_sketched_apis,
+            'evicted_apis': self.evicted_api_count,
+            'other_bucket_requests': other_stats['total_requests'] if other_stats else 0,
+            'estimated_state_mb': estimated_bytes / 1024 / 1024,
+            'memory_budget_mb': self.memory_budget_mb
+        }
+    
     def process_chunk(self, chunk, field_mapping, success_codes):
         """
         处理单个数据块
@@ -141,6 +280,7 @@ class AdvancedStreamingApiAnalyzer:
         
         # 先按API分组统计所有请求（包括失败请求）
         all_requests_data = self._preprocess_all_requests_data(chunk, field_mapping)
+        all_requests_data['uri'] = self._resolve_api_keys(all_requests_data['uri'])
         
         # 按API分组处理所有请求
         for api, group_data in all_requests_data.groupby('uri'):
@@ -158,6 +298,12 @@ class AdvancedStreamingApiAnalyzer:
             api_stats['success_requests'] += success_count
             api_stats['error_requests'] += error_count
             
+            # 请求数达到阈值且未超出预算时升级为完整采样统计
+            if (not api_stats['sketched'] and api_stats['total_requests'] >= self.promotion_threshold
+                    and self.sketched_api_count < self.max_sketched_apis):
+                self._promote_api(api_stats)
+                self.sketched_api_count += 1
+            
             # 设置应用和服务名称
             if not api_stats['app_name'] and 'app' in group_data.columns and not group_data['app'].isna().all():
                 api_stats['app_name'] = str(group_data['app'].iloc[0])
@@ -305,11 +451,12 @@ class AdvancedStreamingApiAnalyzer:
         # 处理响应时间 - 使用T-Digest和蓄水池采样
         request_times = group_data['request_time'].dropna()
         if len(request_times) > 0:
-            # T-Digest更新（用于分位数）
-            stats['response_time_digest'].add_batch(request_times.tolist())
+            # T-Digest更新（用于分位数，仅完整采样统计）
+            if stats['sketched']:
+                stats['response_time_digest'].add_batch(request_times.tolist())
             self.global_stats['global_response_time_digest'].add_batch(request_times.tolist())
             
-            # 蓄水池采样更新（保留原始数据）
+            # 蓄水池采样更新（保留原始数据，轻量统计为小样本）
             stats['response_time_reservoir'].add_batch(request_times.tolist())
             
             # 流式统计更新（用于精确均值计算）
@@ -335,7 +482,7 @@ class AdvancedStreamingApiAnalyzer:
         }
         
         for field, digest_key in phase_fields.items():
-            if field in group_data.columns:
+            if stats['sketched'] and field in group_data.columns:
                 phase_data = group_data[field].dropna()
                 if len(phase_data) > 0:
                     stats[digest_key].add_batch(phase_data.tolist())
@@ -347,7 +494,8 @@ class AdvancedStreamingApiAnalyzer:
                 size_data = group_data[field].dropna()
                 if len(size_data) > 0:
                     # 蓄水池采样
-                    stats[f'{field}_reservoir'].add_batch(size_data.tolist())
+                    if stats['sketched']:
+                        stats[f'{field}_reservoir'].add_batch(size_data.tolist())
                     
                     # 全局T-Digest
                     if field == 'body_size':
@@ -358,7 +506,7 @@ class AdvancedStreamingApiAnalyzer:
         # 处理性能指标
         perf_fields = ['transfer_speed', 'efficiency']
         for field in perf_fields:
-            if field in group_data.columns:
+            if stats['sketched'] and field in group_data.columns:
                 perf_data = group_data[field].dropna()
                 if len(perf_data) > 0:
                     stats[f'{field}_reservoir'].add_batch(perf_data.tolist())
@@ -391,7 +539,8 @@ class AdvancedStreamingApiAnalyzer:
             'unique_ips_estimate': self.global_stats['unique_ips'].cardinality(),
             'chunks_processed': self.processing_stats['chunks_processed'],
             'avg_processing_time': np.mean(self.processing_stats['processing_times']) if self.processing_stats['processing_times'] else 0,
-            'memory_efficiency': self._calculate_memory_efficiency()
+            'memory_efficiency': self._calculate_memory_efficiency(),
+            'api_state': self.get_state_usage()
         }
     
     def _calculate_memory_efficiency(self) -> Dict[str, float]:
@@ -405,7 +554,7 @@ class AdvancedStreamingApiAnalyzer:
         
         # 估算当前方法使用的内存
         current_memory_mb = (
-            len(self.api_stats) * 0.05 +  # 每个API约50KB
+            self.get_state_usage()['estimated_state_mb'] +  # 分层API统计状态
             0.1 +  # 全局T-Digest
             0.05   # 其他算法
         )
@@ -420,7 +569,8 @@ class AdvancedStreamingApiAnalyzer:
         }
 
 
-def analyze_api_performance_advanced(csv_path, output_path, success_codes=None, slow_threshold=DEFAULT_SLOW_THRESHOLD):
+def analyze_api_performance_advanced(csv_path, output_path, success_codes=None, slow_threshold=DEFAULT_SLOW_THRESHOLD,
+                                     memory_budget_mb=API_STATE_MEMORY_BUDGET_MB):
     """
     高级API性能分析函数
     
@@ -429,6 +579,7 @@ def analyze_api_performance_advanced(csv_path, output_path, success_codes=None,
         output_path: 输出路径
         success_codes: 成功状态码列表
         slow_threshold: 慢请求阈值
+        memory_budget_mb: API统计状态的内存预算（MB）
         
     Returns:
         分析结果DataFrame
@@ -439,32 +590,12 @@ def analyze_api_performance_advanced(csv_path, output_path, success_codes=None,
         from self_00_01_constants import DEFAULT_SUCCESS_CODES
         success_codes = DEFAULT_SUCCESS_CODES
     
-    # 字段映射
-    field_mapping = {
-        'uri': 'request_full_uri',
-        'app': 'application_name', 
-        'service': 'service_name',
-        'status': 'response_status_code',
-        'request_time': 'total_request_duration',
-        'header_time': 'upstream_header_time',
-        'connect_time': 'upstream_connect_time',
-        'response_time': 'upstream_response_time',
-        'body_bytes_kb': 'response_body_size_kb',
-        'bytes_sent_kb': 'total_bytes_sent_kb',
-        'backend_connect_phase': 'backend_connect_phase',
-        'backend_process_phase': 'backend_process_phase',
-        'backend_transfer_phase': 'backend_transfer_phase',
-        'nginx_transfer_phase': 'nginx_transfer_phase',
-        'response_transfer_speed': 'response_transfer_speed',
-        'processing_efficiency_index': 'processing_efficiency_index',
-        'client_ip': 'client_ip'
-    }
+    field_mapping = API_FIELD_MAPPING
     
     # 创建高级分析器
-    analyzer = AdvancedStreamingApiAnalyzer(slow_threshold)
+    analyzer = AdvancedStreamingApiAnalyzer(slow_threshold, memory_budget_mb)
     
     # 处理参数
-    chunk_size = max(DEFAULT_CHUNK_SIZE, 50000)
     success_codes = [str(code) for code in success_codes]
     start_time = datetime.now()
     
@@ -490,7 +621,7 @@ def analyze_api_performance_advanced(csv_path, output_path, success_codes=None,
     
     # 流式处理数据
     try:
-        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        for chunk in read_csv_chunks(csv_path, usecols=list(field_mapping.values())):
             analyzer.process_chunk(chunk, field_mapping, success_codes)
             
             # 定期报告进度
@@ -510,6 +641,11 @@ def analyze_api_performance_advanced(csv_path, output_path, success_codes=None,
     # 获取分析总结
     summary = analyzer.get_analysis_summary()
     log_info(f"分析完成: {summary}", show_memory=True)
+    state = summary['api_state']
+    log_info(f"API统计状态: 轻量 {state['tracked_apis']:,}/{state['max_tracked_apis']:,}, "
+             f"完整采样 {state['sketched_apis']:,}/{state['max_sketched_apis']:,}, "
+             f"长尾归并 {state['evicted_apis']:,} 个({state['other_bucket_requests']:,} 请求), "
+             f"估算内存 {state['estimated_state_mb']:.1f}/{state['memory_budget_mb']} MB")
     
     # 生成统计报告
     results = generate_advanced_api_statistics(analyzer)
@@ -519,8 +655,13 @@ def analyze_api_performance_advanced(csv_path, output_path, success_codes=None,
         if not results_df.empty and '平均请求时长(秒)' in results_df.columns:
             results_df = results_df.sort_values(by='平均请求时长(秒)', ascending=False)
         
-        # 创建Excel报告
-        create_advanced_api_performance_excel(results_df, output_path, analyzer)
+        # 发布报告（Excel及已配置的数据输出目标），渲染只依赖已算好的结果，不携带分析器
+        publish_report(output_path, {'API性能统计': results_df},
+                       excel_writer=create_advanced_api_performance_excel,
+                       excel_args=(results_df, output_path, build_api_report_stats(analyzer, summary)))
+        
+        # 发布综合报告用的结果摘要
+        publish_summary(build_api_result_summary(analyzer, results_df))
         
         log_info(f"高级API性能分析报告已生成: {output_path}", show_memory=True)
         return results_df.head(5)
@@ -529,6 +670,37 @@ def analyze_api_performance_advanced(csv_path, output_path, success_codes=None,
         return pd.DataFrame()
 
 
+def build_api_result_summary(analyzer, results_df):
+    """综合报告用的结果摘要：全局请求量、全局响应时间分布与最慢API"""
+    global_stats = analyzer.global_stats
+    digest = global_stats['global_response_time_digest']
+    metrics = {
+        'total_requests': global_stats['total_requests'],
+        'success_requests': global_stats['success_requests'],
+        'error_requests': global_stats['error_requests'],
+        'slow_requests': global_stats['slow_requests'],
+    }
+    
+    # 压缩后的质心保持加权均值不变，可直接得到全局平均响应时间
+    total_weight = sum(weight for _, weight in digest.centroids)
+    if total_weight > 0:
+        metrics['avg_response_time'] = sum(mean * weight for mean, weight in digest.centroids) / total_weight
+        for p in (50, 95, 99):
+            metrics[f'response_time_p{p}'] = digest.percentile(p)
+    
+    return AnalysisSummary(SUMMARY_API, metrics=metrics, top_lists={
+        'slowest_apis': top_records(results_df, ['请求URI', '服务名称', '成功请求数', '平均请求时长(秒)'], 10)
+    })
+
+
+def build_api_report_stats(analyzer, summary):
+    """Excel报告中算法对比、全局分析工作表所需的统计数据（纯数据，可序列化到渲染进程）"""
+    return {
+        'summary': summary,
+        'global_rows': build_global_analysis_rows(analyzer),
+    }
+
+
 def generate_advanced_api_statistics(analyzer):
     """
     生成高级API统计报告
@@ -561,6 +733,9 @@ def generate_advanced_api_statistics(analyzer):
         """安全的平均值计算"""
         return round(total / count, 3) if count > 0 else 0
     
+    # 轻量统计的API没有阶段时间、大小等采样，按空统计输出
+    empty_sketches = create_api_sketches()
+    
     for api, stats in api_stats.items():
         # 基础指标
         total_requests = stats['total_requests']
@@ -580,21 +755,23 @@ def generate_advanced_api_statistics(analyzer):
         avg_request_time = safe_avg(stats['request_time_sum'], stats['request_time_count'])
         is_slow_api = "Y" if (avg_request_time > analyzer.slow_threshold or slow_ratio > DEFAULT_SLOW_REQUESTS_THRESHOLD * 100) else "N"
         
-        # T-Digest分位数
-        p50_tdigest = safe_percentile_tdigest(stats['response_time_digest'], 50)
-        p90_tdigest = safe_percentile_tdigest(stats['response_time_digest'], 90)
-        p95_tdigest = safe_percentile_tdigest(stats['response_time_digest'], 95)
-        p99_tdigest = safe_percentile_tdigest(stats['response_time_digest'], 99)
+        # T-Digest分位数（轻量统计的API使用小样本计算）
+        sketches = stats if stats['sketched'] else empty_sketches
+        time_quantiles = stats['response_time_digest'] if stats['sketched'] else stats['response_time_reservoir']
+        p50_tdigest = safe_percentile_tdigest(time_quantiles, 50)
+        p90_tdigest = safe_percentile_tdigest(time_quantiles, 90)
+        p95_tdigest = safe_percentile_tdigest(time_quantiles, 95)
+        p99_tdigest = safe_percentile_tdigest(time_quantiles, 99)
         
         # 蓄水池采样分位数（作为对比）
         p50_reservoir = safe_percentile_reservoir(stats['response_time_reservoir'], 50)
         p95_reservoir = safe_percentile_reservoir(stats['response_time_reservoir'], 95)
         
         # 阶段时间统计（使用T-Digest）
-        backend_connect_p50 = safe_percentile_tdigest(stats['backend_connect_digest'], 50)
-        backend_process_p50 = safe_percentile_tdigest(stats['backend_process_digest'], 50)
-        backend_transfer_p50 = safe_percentile_tdigest(stats['backend_transfer_digest'], 50)
-        nginx_transfer_p50 = safe_percentile_tdigest(stats['nginx_transfer_digest'], 50)
+        backend_connect_p50 = safe_percentile_tdigest(sketches['backend_connect_digest'], 50)
+        backend_process_p50 = safe_percentile_tdigest(sketches['backend_process_digest'], 50)
+        backend_transfer_p50 = safe_percentile_tdigest(sketches['backend_transfer_digest'], 50)
+        nginx_transfer_p50 = safe_percentile_tdigest(sketches['nginx_transfer_digest'], 50)
         
         # 计算阶段占比
         total_phase_time = backend_connect_p50 + backend_process_p50 + backend_transfer_p50 + nginx_transfer_p50
@@ -607,20 +784,20 @@ def generate_advanced_api_statistics(analyzer):
             connect_ratio = process_ratio = transfer_ratio = nginx_ratio = 0
         
         # 大小统计（使用蓄水池采样）
-        body_avg = stats['body_size_reservoir'].mean()
-        body_p95 = safe_percentile_reservoir(stats['body_size_reservoir'], 95)
-        bytes_avg = stats['bytes_size_reservoir'].mean()
-        bytes_p95 = safe_percentile_reservoir(stats['bytes_size_reservoir'], 95)
+        body_avg = sketches['body_size_reservoir'].mean()
+        body_p95 = safe_percentile_reservoir(sketches['body_size_reservoir'], 95)
+        bytes_avg = sketches['bytes_size_reservoir'].mean()
+        bytes_p95 = safe_percentile_reservoir(sketches['bytes_size_reservoir'], 95)
         
         # 性能指标
-        transfer_speed_avg = stats['transfer_speed_reservoir'].mean()
-        efficiency_avg = stats['efficiency_reservoir'].mean()
+        transfer_speed_avg = sketches['transfer_speed_reservoir'].mean()
+        efficiency_avg = sketches['efficiency_reservoir'].mean()
         
         # API频率估计
         api_frequency_estimate = global_stats['api_frequency'].estimate(api)
         
         # 数据质量指标
-        tdigest_samples = stats['response_time_digest'].count
+        tdigest_samples = stats['response_time_digest'].count if stats['sketched'] else 0
         reservoir_samples = len(stats['response_time_reservoir'].samples)
         data_quality = round(reservoir_samples / success_requests * 100, 1) if success_requests > 0 else 0
         
@@ -686,7 +863,8 @@ def generate_advanced_api_statistics(analyzer):
             'T-Digest样本数': tdigest_samples,
             '蓄水池样本数': reservoir_samples,
             '数据质量(%)': data_quality,
-            '算法精度': 'T-Digest高精度' if tdigest_samples > 1000 else 'T-Digest中精度' if tdigest_samples > 100 else 'T-Digest低精度'
+            '算法精度': ('轻量采样' if not stats['sketched'] else 'T-Digest高精度' if tdigest_samples > 1000
+                     else 'T-Digest中精度' if tdigest_samples > 100 else 'T-Digest低精度')
         }
         
         results.append(result)
@@ -695,14 +873,14 @@ def generate_advanced_api_statistics(analyzer):
     return results
 
 
-def create_advanced_api_performance_excel(results_df, output_path, analyzer):
+def create_advanced_api_performance_excel(results_df, output_path, report_stats):
     """
     创建高级API性能分析Excel报告
     
     Args:
         results_df: 结果DataFrame
         output_path: 输出路径
-        analyzer: 分析器实例
+        report_stats: build_api_report_stats 生成的统计数据
     """
     log_info(f"开始创建高级Excel报告: {output_path}", show_memory=True)
     
@@ -788,13 +966,13 @@ def create_advanced_api_performance_excel(results_df, output_path, analyzer):
         log_info(f"高亮慢接口失败: {e}")
     
     # 创建算法对比分析工作表
-    create_algorithm_comparison_sheet(wb, analyzer, results_df)
+    create_algorithm_comparison_sheet(wb, report_stats['summary'], results_df)
     
     # 创建全局分析工作表  
-    create_global_analysis_sheet(wb, analyzer)
+    create_global_analysis_sheet(wb, report_stats['global_rows'])
     
     # 创建性能优化建议工作表
-    create_optimization_recommendations_sheet(wb, results_df, analyzer)
+    create_optimization_recommendations_sheet(wb, results_df, report_stats['summary']['memory_efficiency'])
     
     # 格式化工作表
     format_excel_sheet(ws1)
@@ -804,7 +982,7 @@ def create_advanced_api_performance_excel(results_df, output_path, analyzer):
     log_info(f"高级Excel报告已保存: {output_path}", show_memory=True)
 
 
-def create_algorithm_comparison_sheet(wb, analyzer, results_df):
+def create_algorithm_comparison_sheet(wb, summary_stats, results_df):
     """创建算法对比分析工作表"""
     ws = wb.create_sheet(title='算法对比分析')
     
@@ -848,8 +1026,8 @@ def create_algorithm_comparison_sheet(wb, analyzer, results_df):
     ws.cell(row=current_row, column=1, value='算法性能总结').font = Font(bold=True, size=12)
     current_row += 2
     
-    summary_stats = analyzer.get_analysis_summary()
     memory_stats = summary_stats.get('memory_efficiency', {})
+    state_stats = summary_stats.get('api_state', {})
     
     summary_data = [
         ['总API数量', summary_stats.get('total_apis', 0)],
@@ -863,7 +1041,15 @@ def create_algorithm_comparison_sheet(wb, analyzer, results_df):
         ['传统方法内存(MB)', round(memory_stats.get('traditional_memory_mb', 0), 2)],
         ['当前方法内存(MB)', round(memory_stats.get('current_memory_mb', 0), 2)],
         ['内存节省(%)', round(memory_stats.get('memory_savings_percent', 0), 2)],
-        ['效率提升倍数', round(memory_stats.get('efficiency_ratio', 0), 2)]
+        ['效率提升倍数', round(memory_stats.get('efficiency_ratio', 0), 2)],
+        ['', ''],
+        ['API统计状态', ''],
+        ['轻量统计API数', state_stats.get('tracked_apis', 0)],
+        ['完整采样API数', state_stats.get('sketched_apis', 0)],
+        ['长尾归并API数', state_stats.get('evicted_apis', 0)],
+        ['长尾汇总请求数', state_stats.get('other_bucket_requests', 0)],
+        ['状态内存估计(MB)', round(state_stats.get('estimated_state_mb', 0), 2)],
+        ['状态内存预算(MB)', state_stats.get('memory_budget_mb', 0)]
     ]
     
     for label, value in summary_data:
@@ -878,12 +1064,8 @@ def create_algorithm_comparison_sheet(wb, analyzer, results_df):
     format_excel_sheet(ws)
 
 
-def create_global_analysis_sheet(wb, analyzer):
-    """创建全局分析工作表"""
-    ws = wb.create_sheet(title='全局分析概览')
-    
-    current_row = 1
-    
+def build_global_analysis_rows(analyzer):
+    """全局分析工作表的 [标签, 值] 行"""
     # 全局T-Digest分析
     global_digest = analyzer.global_stats['global_response_time_digest']
     
@@ -920,6 +1102,14 @@ def create_global_analysis_sheet(wb, analyzer):
         ['自适应P95(秒)', round(analyzer.global_stats['adaptive_sampler'].percentile(95), 3)],
         ['自适应P99(秒)', round(analyzer.global_stats['adaptive_sampler'].percentile(99), 3)],
     ])
+    return global_stats
+
+
+def create_global_analysis_sheet(wb, global_stats):
+    """创建全局分析工作表"""
+    ws = wb.create_sheet(title='全局分析概览')
+    
+    current_row = 1
     
     # 写入数据
     for label, value in global_stats:
@@ -943,7 +1133,7 @@ def create_global_analysis_sheet(wb, analyzer):
     format_excel_sheet(ws)
 
 
-def create_optimization_recommendations_sheet(wb, results_df, analyzer):
+def create_optimization_recommendations_sheet(wb, results_df, memory_stats):
     """创建性能优化建议工作表"""
     ws = wb.create_sheet(title='性能优化建议')
     
@@ -1004,8 +1194,6 @@ def create_optimization_recommendations_sheet(wb, results_df, analyzer):
     ws.cell(row=current_row, column=1, value='2. 内存使用优化效果').font = Font(bold=True, size=12)
     current_row += 2
     
-    memory_stats = analyzer._calculate_memory_efficiency()
-    
     memory_recommendations = [
         f"✓ 内存使用减少 {memory_stats.get('memory_savings_percent', 0):.1f}%",
         f"✓ 内存效率提升 {memory_stats.get('efficiency_ratio', 0):.1f} 倍",
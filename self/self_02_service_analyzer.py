@@ -5,6 +5,7 @@ from openpyxl import Workbook
 
 from self_00_04_excel_processor import add_dataframe_to_excel_with_grouped_headers, format_excel_sheet
 from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD, PERCENTILES
+from self_00_07_csv_reader import read_csv_chunks
 
 # 优化后的时间指标配置
 TIME_METRICS = [
@@ -92,7 +93,7 @@ def analyze_service_performance(csv_path, output_path, success_codes=None, slow_
     success_requests = 0
 
     # 分块处理CSV文件
-    for chunk_idx, chunk in enumerate(pd.read_csv(csv_path, chunksize=DEFAULT_CHUNK_SIZE)):
+    for chunk_idx, chunk in enumerate(read_csv_chunks(csv_path, chunk_size=DEFAULT_CHUNK_SIZE)):
         total_requests += len(chunk)
 
         # 处理总请求统计
@@ -23,11 +23,13 @@ from collections import defaultdict
 from typing import Dict, List, Any, Optional, Tuple
 
 from self_00_04_excel_processor import add_dataframe_to_excel_with_grouped_headers, format_excel_sheet
-from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD, HIGHLIGHT_FILL
-from self_00_02_utils import log_info
+from self_00_06_report_sinks import publish_report
+from self_00_07_csv_reader import read_csv_chunks
+from self_00_10_result_registry import AnalysisSummary, SUMMARY_SERVICE, publish_summary, top_records
+from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, HIGHLIGHT_FILL
+from self_00_02_utils import log_info, split_by_key
 from self_00_05_sampling_algorithms import (
-    TDigest, ReservoirSampler, CountMinSketch, HyperLogLog, 
-    StratifiedSampler, AdaptiveSampler
+    TDigest, CountMinSketch, HyperLogLog, StratifiedSampler
 )
 
 # 核心指标配置 (精简优化版)
@@ -60,6 +62,24 @@ DERIVED_METRICS = [
     'service_stability_score'    # 服务稳定性评分 (基于CV)
 ]
 
+# 叶子（应用, 服务）级累加的指标：矩覆盖全部时间/大小指标，T-Digest只保留结果中用到分位数的指标
+MOMENT_METRICS = CORE_TIME_METRICS + CORE_SIZE_METRICS
+DIGEST_METRICS = [
+    'total_request_duration',
+    'upstream_response_time',
+    'backend_process_phase',
+    'response_body_size_kb',
+    'total_bytes_sent_kb'
+]
+LEAF_COUNT_FIELDS = ['total', 'success', 'error', 'slow', 'anomaly']
+
+# CSV读取字段（指标字段及各维度字段的备选名）
+CSV_COLUMNS = CORE_TIME_METRICS + CORE_SIZE_METRICS + CORE_EFFICIENCY_METRICS + DERIVED_METRICS + [
+    'service_name', 'service', 'application_name', 'app_name', 'response_status_code', 'status',
+    'request_time', 'client_ip_address', 'remote_addr', 'request_full_uri', 'request_path', 'request_uri',
+    'http_method', 'request_method', 'timestamp'
+]
+
 # 中文名称映射
 METRICS_MAPPING = {
     # 核心时间指标
@@ -92,6 +112,9 @@ class AdvancedServiceAnalyzer:
     """
     高级服务性能分析器
     使用先进采样算法和优化的输出列设计
+
+    层级汇总：每个数据块只按最细粒度（应用, 服务）叶子分组一次，用 np.bincount 累加计数与
+    一二阶矩，用T-Digest记录分位数；服务级、应用级统计在生成结果时由叶子合并得到
     """
     
     def __init__(self, slow_threshold=DEFAULT_SLOW_THRESHOLD):
@@ -103,52 +126,13 @@ class AdvancedServiceAnalyzer:
         """
         self.slow_threshold = slow_threshold
         
-        # 服务级别统计
-        self.service_stats = defaultdict(lambda: {
-            'service_name': '',
-            'app_name': '',
-            'total_requests': 0,
-            'success_requests': 0,
-            'slow_requests': 0,
-            'error_requests': 0,
-            
-            # 核心指标T-Digest
-            'time_digests': {metric: TDigest(compression=100) for metric in CORE_TIME_METRICS},
-            'size_digests': {metric: TDigest(compression=100) for metric in CORE_SIZE_METRICS},
-            'efficiency_digests': {metric: TDigest(compression=100) for metric in CORE_EFFICIENCY_METRICS},
-            
-            # 蓄水池采样(用于详细分析)
-            'response_time_reservoir': ReservoirSampler(max_size=500),
-            'error_samples': ReservoirSampler(max_size=100),
-            
-            # 流式统计(用于精确计算)
-            'time_stats': {metric: {'sum': 0.0, 'sum_sq': 0.0, 'count': 0} for metric in CORE_TIME_METRICS},
-            'size_stats': {metric: {'sum': 0.0, 'sum_sq': 0.0, 'count': 0} for metric in CORE_SIZE_METRICS},
-            
-            # 异常检测
-            'anomaly_count': 0,
-            'peak_hour_requests': defaultdict(int),
-            'status_code_dist': defaultdict(int)
-        })
-        
-        # 应用级别统计
-        self.app_stats = defaultdict(lambda: {
-            'app_name': '',
-            'total_requests': 0,
-            'success_requests': 0,
-            'slow_requests': 0,
-            'error_requests': 0,
-            'service_count': 0,
-            'services': set(),
-            
-            # 应用级别T-Digest
-            'time_digests': {metric: TDigest(compression=100) for metric in CORE_TIME_METRICS},
-            'size_digests': {metric: TDigest(compression=100) for metric in CORE_SIZE_METRICS},
-            
-            # 应用级别采样
-            'response_time_reservoir': ReservoirSampler(max_size=1000),
-            'service_performance': defaultdict(list)  # 各服务性能采样
-        })
+        # 叶子（应用, 服务）统计：计数与矩按叶子编号存放在数组中
+        self.leaf_index = {}   # (app_name, service_name) -> 叶子编号
+        self.leaf_keys = []    # 叶子编号 -> (app_name, service_name)
+        self._leaf_capacity = 0
+        self.leaf_counts = {name: np.zeros(0, dtype=np.int64) for name in LEAF_COUNT_FIELDS}
+        self.leaf_moments = {name: np.zeros((0, len(MOMENT_METRICS))) for name in ('sum', 'sum_sq', 'count')}
+        self.leaf_digests = []  # 叶子编号 -> {metric: TDigest}
         
         # 全局统计
         self.global_stats = {
@@ -170,10 +154,7 @@ class AdvancedServiceAnalyzer:
             
             # 时间分层采样
             'hourly_performance': StratifiedSampler(samples_per_stratum=200),
-            'daily_performance': StratifiedSampler(samples_per_stratum=500),
-            
-            # 自适应采样
-            'adaptive_sampler': AdaptiveSampler(initial_sample_size=2000, adaptation_threshold=100000)
+            'daily_performance': StratifiedSampler(samples_per_stratum=500)
         }
         
         # 处理状态
@@ -203,26 +184,24 @@ class AdvancedServiceAnalyzer:
         # 预处理数据
         chunk = self._preprocess_chunk(chunk)
         
-        # 处理总请求统计
-        self._process_total_requests(chunk)
-        
-        # 筛选成功请求
-        successful_requests = chunk[chunk['response_status_code'].astype(str).isin(success_codes)]
-        error_requests = chunk[~chunk['response_status_code'].astype(str).isin(success_codes)]
+        # 叶子分组只做一次，后续统计都基于叶子编号
+        leaf_ids = self._assign_leaf_ids(chunk)
+        leaf_count = len(self.leaf_keys)
+        success_mask = chunk['response_status_code'].astype(str).isin(success_codes).to_numpy()
         
-        success_count = len(successful_requests)
-        error_count = len(error_requests)
+        # 处理总请求统计
+        self._process_total_requests(leaf_ids, success_mask, leaf_count)
         
+        success_count = int(success_mask.sum())
         self.global_stats['success_requests'] += success_count
-        self.global_stats['error_requests'] += error_count
+        self.global_stats['error_requests'] += chunk_rows - success_count
         
         # 处理成功请求
         if success_count > 0:
-            self._process_successful_requests(successful_requests)
+            self._process_successful_requests(chunk, leaf_ids, success_mask, leaf_count)
         
-        # 处理错误请求
-        if error_count > 0:
-            self._process_error_requests(error_requests)
+        # 异常值检测
+        self._detect_anomalies(chunk, leaf_ids, leaf_count)
         
         # 时间维度分析
         self._process_time_dimension(chunk)
@@ -290,226 +269,220 @@ class AdvancedServiceAnalyzer:
             if col in chunk.columns:
                 chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
         
-        # 异常值检测和处理
-        chunk = self._detect_and_handle_anomalies(chunk)
-        
         return chunk
     
-    def _detect_and_handle_anomalies(self, chunk):
-        """检测和处理异常值"""
-        # 基于IQR的异常值检测
+    def _assign_leaf_ids(self, chunk):
+        """为每行分配叶子编号，新出现的（应用, 服务）追加到叶子表"""
+        keys = pd.MultiIndex.from_arrays([chunk['application_name'].astype(str),
+                                          chunk['service_name'].astype(str)])
+        codes, uniques = keys.factorize()
+        
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for i, leaf_key in enumerate(uniques):
+            leaf_id = self.leaf_index.get(leaf_key)
+            if leaf_id is None:
+                leaf_id = self._add_leaf(leaf_key)
+            mapping[i] = leaf_id
+        
+        return mapping[codes]
+    
+    def _add_leaf(self, leaf_key):
+        """登记新叶子，必要时按倍数扩容统计数组"""
+        leaf_id = len(self.leaf_keys)
+        self.leaf_index[leaf_key] = leaf_id
+        self.leaf_keys.append(leaf_key)
+        self.leaf_digests.append({metric: TDigest(compression=100) for metric in DIGEST_METRICS})
+        
+        app_name, service_name = leaf_key
+        self.global_stats['unique_apps'].add(app_name)
+        self.global_stats['unique_services'].add(service_name)
+        
+        if leaf_id >= self._leaf_capacity:
+            capacity = max(64, self._leaf_capacity * 2)
+            for name, counts in self.leaf_counts.items():
+                grown = np.zeros(capacity, dtype=np.int64)
+                grown[:len(counts)] = counts
+                self.leaf_counts[name] = grown
+            for name, moments in self.leaf_moments.items():
+                grown = np.zeros((capacity, len(MOMENT_METRICS)))
+                grown[:len(moments)] = moments
+                self.leaf_moments[name] = grown
+            self._leaf_capacity = capacity
+        
+        return leaf_id
+    
+    def _detect_anomalies(self, chunk, leaf_ids, leaf_count):
+        """基于IQR的异常值检测，按叶子统计异常数量（每个时间指标分别计数）"""
+        anomaly_counts = self.leaf_counts['anomaly']
         for metric in CORE_TIME_METRICS:
-            if metric in chunk.columns:
-                values = chunk[metric].dropna()
-                if len(values) > 100:  # 足够的样本才进行异常检测
-                    Q1 = values.quantile(0.25)
-                    Q3 = values.quantile(0.75)
-                    IQR = Q3 - Q1
-                    
-                    # 异常值阈值
-                    lower_bound = Q1 - 3 * IQR
-                    upper_bound = Q3 + 3 * IQR
-                    
-                    # 标记异常值
-                    anomalies = (values < lower_bound) | (values > upper_bound)
-                    if anomalies.any():
-                        # 正确的异常值统计：按服务分组统计
-                        anomaly_indices = values[anomalies].index
-                        anomaly_chunk = chunk.loc[anomaly_indices]
-                        
-                        # 按服务统计异常数量
-                        for service_name, service_group in anomaly_chunk.groupby('service_name'):
-                            self.service_stats[service_name]['anomaly_count'] += len(service_group)
-        
-        return chunk
+            if metric not in chunk.columns:
+                continue
+            values = chunk[metric].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            if valid.sum() <= 100:  # 足够的样本才进行异常检测
+                continue
+            
+            q1, q3 = np.percentile(values[valid], [25, 75])
+            iqr = q3 - q1
+            anomalies = valid & ((values < q1 - 3 * iqr) | (values > q3 + 3 * iqr))
+            if anomalies.any():
+                anomaly_counts[:leaf_count] += np.bincount(leaf_ids[anomalies], minlength=leaf_count)
     
-    def _process_total_requests(self, chunk):
+    def _process_total_requests(self, leaf_ids, success_mask, leaf_count):
         """处理总请求统计"""
-        # 按服务分组
-        for service_name, service_group in chunk.groupby('service_name'):
-            service_stats = self.service_stats[service_name]
-            service_stats['service_name'] = service_name
-            service_stats['total_requests'] += len(service_group)
-            
-            # 应用名称
-            if not service_stats['app_name']:
-                app_name = service_group['application_name'].iloc[0]
-                service_stats['app_name'] = app_name
-            
-            # 状态码分布
-            status_codes = service_group['response_status_code'].value_counts()
-            for status, count in status_codes.items():
-                service_stats['status_code_dist'][str(status)] += count
+        chunk_totals = np.bincount(leaf_ids, minlength=leaf_count)
+        chunk_success = np.bincount(leaf_ids[success_mask], minlength=leaf_count)
+        self.leaf_counts['total'][:leaf_count] += chunk_totals
+        self.leaf_counts['success'][:leaf_count] += chunk_success
+        self.leaf_counts['error'][:leaf_count] += chunk_totals - chunk_success
+        
+        # Count-Min Sketch 对计数是线性的，按叶子累加与按服务/应用汇总后累加结果一致
+        for leaf_id in np.flatnonzero(chunk_totals):
+            app_name, service_name = self.leaf_keys[leaf_id]
+            count = int(chunk_totals[leaf_id])
+            self.global_stats['service_frequency'].increment(service_name, count)
+            self.global_stats['app_frequency'].increment(app_name, count)
+    
+    def _process_successful_requests(self, chunk, leaf_ids, success_mask, leaf_count):
+        """处理成功请求：按叶子累加矩与T-Digest"""
+        success_ids = leaf_ids[success_mask]
+        moments = self.leaf_moments
+        
+        for col, metric in enumerate(MOMENT_METRICS):
+            if metric not in chunk.columns:
+                continue
+            values = chunk[metric].to_numpy(dtype=float)[success_mask]
+            valid = ~np.isnan(values)
+            if not valid.any():
+                continue
+            ids = success_ids[valid]
+            values = values[valid]
             
-            # 全局统计
-            self.global_stats['unique_services'].add(service_name)
-            self.global_stats['service_frequency'].increment(service_name, len(service_group))
-        
-        # 按应用分组
-        for app_name, app_group in chunk.groupby('application_name'):
-            app_stats = self.app_stats[app_name]
-            app_stats['app_name'] = app_name
-            app_stats['total_requests'] += len(app_group)
+            # 流式统计更新
+            moments['sum'][:leaf_count, col] += np.bincount(ids, weights=values, minlength=leaf_count)
+            moments['sum_sq'][:leaf_count, col] += np.bincount(ids, weights=values * values, minlength=leaf_count)
+            moments['count'][:leaf_count, col] += np.bincount(ids, minlength=leaf_count)
             
-            # 服务数量统计
-            services_in_app = app_group['service_name'].unique()
-            app_stats['services'].update(services_in_app)
-            app_stats['service_count'] = len(app_stats['services'])
+            if metric == 'total_request_duration':
+                self.global_stats['global_response_time_digest'].add_batch(values.tolist())
+                
+                # 慢请求统计
+                slow = values > self.slow_threshold
+                self.leaf_counts['slow'][:leaf_count] += np.bincount(ids[slow], minlength=leaf_count)
+                self.global_stats['slow_requests'] += int(slow.sum())
+            elif metric == 'response_body_size_kb':
+                self.global_stats['global_size_digest'].add_batch(values.tolist())
             
-            # 全局统计
-            self.global_stats['unique_apps'].add(app_name)
-            self.global_stats['app_frequency'].increment(app_name, len(app_group))
-    
-    def _process_successful_requests(self, successful_requests):
-        """处理成功请求"""
-        # 按服务分组处理
-        for service_name, service_group in successful_requests.groupby('service_name'):
-            self._process_service_group(service_name, service_group)
-        
-        # 按应用分组处理
-        for app_name, app_group in successful_requests.groupby('application_name'):
-            self._process_app_group(app_name, app_group)
+            if metric in DIGEST_METRICS:
+                for leaf_id, leaf_values in split_by_key(ids, values):
+                    self.leaf_digests[leaf_id][metric].add_batch(leaf_values.tolist())
     
-    def _process_service_group(self, service_name, service_group):
-        """处理单个服务组"""
-        service_stats = self.service_stats[service_name]
-        group_size = len(service_group)
-        
-        # 基础统计
-        service_stats['success_requests'] += group_size
-        
-        # 处理时间指标
-        for metric in CORE_TIME_METRICS:
-            if metric in service_group.columns:
-                values = service_group[metric].dropna()
-                if len(values) > 0:
-                    # T-Digest更新
-                    service_stats['time_digests'][metric].add_batch(values.tolist())
-                    
-                    # 流式统计更新
-                    stats = service_stats['time_stats'][metric]
-                    stats['sum'] += values.sum()
-                    stats['sum_sq'] += (values ** 2).sum()
-                    stats['count'] += len(values)
-                    
-                    # 全局T-Digest更新
-                    if metric == 'total_request_duration':
-                        self.global_stats['global_response_time_digest'].add_batch(values.tolist())
-                        
-                        # 慢请求统计
-                        slow_count = (values > self.slow_threshold).sum()
-                        service_stats['slow_requests'] += slow_count
-                        self.global_stats['slow_requests'] += slow_count
-                        
-                        # 蓄水池采样
-                        service_stats['response_time_reservoir'].add_batch(values.tolist())
-        
-        # 处理大小指标
-        for metric in CORE_SIZE_METRICS:
-            if metric in service_group.columns:
-                values = service_group[metric].dropna()
-                if len(values) > 0:
-                    # T-Digest更新
-                    service_stats['size_digests'][metric].add_batch(values.tolist())
-                    
-                    # 流式统计更新
-                    stats = service_stats['size_stats'][metric]
-                    stats['sum'] += values.sum()
-                    stats['sum_sq'] += (values ** 2).sum()
-                    stats['count'] += len(values)
-                    
-                    # 全局T-Digest更新
-                    if metric == 'response_body_size_kb':
-                        self.global_stats['global_size_digest'].add_batch(values.tolist())
-        
-        # 处理效率指标
-        for metric in CORE_EFFICIENCY_METRICS:
-            if metric in service_group.columns:
-                values = service_group[metric].dropna()
-                if len(values) > 0:
-                    service_stats['efficiency_digests'][metric].add_batch(values.tolist())
-        
-        # 自适应采样
-        if 'total_request_duration' in service_group.columns:
-            response_times = service_group['total_request_duration'].dropna()
-            for rt in response_times:
-                self.global_stats['adaptive_sampler'].add(rt)
+    def _process_time_dimension(self, chunk):
+        """处理时间维度分析"""
+        if 'timestamp' not in chunk.columns or 'total_request_duration' not in chunk.columns:
+            return
+        
+        timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce')
+        durations = chunk['total_request_duration'].to_numpy(dtype=float)
+        valid = timestamps.notna().to_numpy() & ~np.isnan(durations)
+        if not valid.any():
+            return
+        
+        timestamps = timestamps[valid]
+        durations = durations[valid]
+        
+        # 按小时、日期分层采样，每个分层一次批量加入
+        for sampler_name, keys in (('hourly_performance', timestamps.dt.strftime('%H')),
+                                   ('daily_performance', timestamps.dt.strftime('%Y-%m-%d'))):
+            sampler = self.global_stats[sampler_name]
+            codes, uniques = pd.factorize(keys)
+            for code, stratum_values in split_by_key(codes, durations):
+                sampler.strata[uniques[code]].add_lazy_batch(len(stratum_values), stratum_values.__getitem__)
     
-    def _process_app_group(self, app_name, app_group):
-        """处理单个应用组"""
-        app_stats = self.app_stats[app_name]
-        group_size = len(app_group)
+    def _rollup(self, level):
+        """
+        由叶子合并出服务级或应用级统计
         
-        # 基础统计
-        app_stats['success_requests'] += group_size
+        Args:
+            level: 'service' 或 'app'
         
-        # 处理时间指标
-        for metric in CORE_TIME_METRICS:
-            if metric in app_group.columns:
-                values = app_group[metric].dropna()
-                if len(values) > 0:
-                    app_stats['time_digests'][metric].add_batch(values.tolist())
-                    
-                    # 慢请求统计
-                    if metric == 'total_request_duration':
-                        slow_count = (values > self.slow_threshold).sum()
-                        app_stats['slow_requests'] += slow_count
-                        
-                        # 蓄水池采样
-                        app_stats['response_time_reservoir'].add_batch(values.tolist())
-        
-        # 处理大小指标
-        for metric in CORE_SIZE_METRICS:
-            if metric in app_group.columns:
-                values = app_group[metric].dropna()
-                if len(values) > 0:
-                    app_stats['size_digests'][metric].add_batch(values.tolist())
-        
-        # 服务性能采样
-        for service_name, service_subgroup in app_group.groupby('service_name'):
-            if 'total_request_duration' in service_subgroup.columns:
-                response_times = service_subgroup['total_request_duration'].dropna()
-                if len(response_times) > 0:
-                    app_stats['service_performance'][service_name].extend(response_times.tolist()[:10])  # 限制采样数量
-    
-    def _process_error_requests(self, error_requests):
-        """处理错误请求"""
-        for service_name, service_group in error_requests.groupby('service_name'):
-            service_stats = self.service_stats[service_name]
-            service_stats['error_requests'] += len(service_group)
+        Returns:
+            {名称: stats}，stats 结构与结果构建函数使用的字段一致
+        """
+        leaf_count = len(self.leaf_keys)
+        if leaf_count == 0:
+            return {}
+        
+        key_pos = 1 if level == 'service' else 0
+        codes, names = pd.factorize(pd.Index([key[key_pos] for key in self.leaf_keys]))
+        group_count = len(names)
+        
+        counts = {}
+        for name, leaf_values in self.leaf_counts.items():
+            counts[name] = np.bincount(codes, weights=leaf_values[:leaf_count], minlength=group_count).astype(np.int64)
+        moments = {}
+        for name, leaf_values in self.leaf_moments.items():
+            rolled = np.zeros((group_count, len(MOMENT_METRICS)))
+            np.add.at(rolled, codes, leaf_values[:leaf_count])
+            moments[name] = rolled
+        
+        members = defaultdict(list)
+        for leaf_id, code in enumerate(codes):
+            members[code].append(leaf_id)
+        
+        duration_col = MOMENT_METRICS.index('total_request_duration')
+        leaf_moment_count = self.leaf_moments['count'][:leaf_count, duration_col]
+        leaf_moment_sum = self.leaf_moments['sum'][:leaf_count, duration_col]
+        
+        rolled_stats = {}
+        for code, name in enumerate(names):
+            leaf_ids = members[code]
+            moment_stats = {
+                metric: {'sum': moments['sum'][code, col],
+                         'sum_sq': moments['sum_sq'][code, col],
+                         'count': int(moments['count'][code, col])}
+                for col, metric in enumerate(MOMENT_METRICS)
+            }
+            digests = {metric: self._merge_leaf_digests(leaf_ids, metric) for metric in DIGEST_METRICS}
             
-            # 错误采样
-            if 'total_request_duration' in service_group.columns:
-                error_times = service_group['total_request_duration'].dropna()
-                service_stats['error_samples'].add_batch(error_times.tolist())
-        
-        # 应用级别错误统计
-        for app_name, app_group in error_requests.groupby('application_name'):
-            app_stats = self.app_stats[app_name]
-            app_stats['error_requests'] += len(app_group)
+            stats = {
+                'total_requests': int(counts['total'][code]),
+                'success_requests': int(counts['success'][code]),
+                'error_requests': int(counts['error'][code]),
+                'slow_requests': int(counts['slow'][code]),
+                'anomaly_count': int(counts['anomaly'][code]),
+                'time_stats': {metric: moment_stats[metric] for metric in CORE_TIME_METRICS},
+                'size_stats': {metric: moment_stats[metric] for metric in CORE_SIZE_METRICS},
+                'time_digests': {metric: digests[metric] for metric in DIGEST_METRICS if metric in CORE_TIME_METRICS},
+                'size_digests': {metric: digests[metric] for metric in DIGEST_METRICS if metric in CORE_SIZE_METRICS},
+            }
+            if level == 'service':
+                stats['service_name'] = name
+                stats['app_name'] = self.leaf_keys[leaf_ids[0]][0]  # 首次出现的应用
+            else:
+                stats['app_name'] = name
+                stats['services'] = {self.leaf_keys[leaf_id][1] for leaf_id in leaf_ids}
+                # 各服务的平均请求时长（精确均值）
+                stats['service_means'] = [leaf_moment_sum[leaf_id] / leaf_moment_count[leaf_id]
+                                          for leaf_id in leaf_ids if leaf_moment_count[leaf_id] > 0]
+            rolled_stats[name] = stats
+        
+        return rolled_stats
     
-    def _process_time_dimension(self, chunk):
-        """处理时间维度分析"""
-        if 'timestamp' in chunk.columns:
-            timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce')
-            
-            # 按小时分层采样
-            for i, timestamp in enumerate(timestamps):
-                if pd.notna(timestamp) and i < len(chunk) and 'total_request_duration' in chunk.columns:
-                    hour_key = f"{timestamp.hour:02d}"
-                    response_time = chunk.iloc[i]['total_request_duration']
-                    if pd.notna(response_time):
-                        self.global_stats['hourly_performance'].add(response_time, hour_key)
-                        
-                        # 日期分层采样
-                        date_key = timestamp.strftime('%Y-%m-%d')
-                        self.global_stats['daily_performance'].add(response_time, date_key)
+    def _merge_leaf_digests(self, leaf_ids, metric):
+        """合并叶子的T-Digest，只有一个叶子时直接复用"""
+        if len(leaf_ids) == 1:
+            return self.leaf_digests[leaf_ids[0]][metric]
+        merged = TDigest(compression=100)
+        for leaf_id in leaf_ids:
+            merged = merged.merge(self.leaf_digests[leaf_id][metric])
+        return merged
     
     def generate_service_results(self):
         """生成服务分析结果"""
         results = []
         
-        for service_name, stats in self.service_stats.items():
+        for service_name, stats in self._rollup('service').items():
             if stats['success_requests'] == 0:
                 continue
             
@@ -722,7 +695,7 @@ class AdvancedServiceAnalyzer:
         """生成应用分析结果"""
         results = []
         
-        for app_name, stats in self.app_stats.items():
+        for app_name, stats in self._rollup('app').items():
             if stats['success_requests'] == 0:
                 continue
             
@@ -777,15 +750,8 @@ class AdvancedServiceAnalyzer:
         return result
     
     def _calculate_service_performance_variance(self, stats):
-        """计算服务性能差异"""
-        if not stats['service_performance']:
-            return 100.0
-        
-        # 计算各服务的平均响应时间
-        service_means = []
-        for service_name, performance_data in stats['service_performance'].items():
-            if len(performance_data) > 0:
-                service_means.append(np.mean(performance_data))
+        """计算服务性能差异（基于各服务的平均请求时长）"""
+        service_means = stats['service_means']
         
         if len(service_means) <= 1:
             return 100.0
@@ -843,11 +809,10 @@ def analyze_service_performance_advanced(csv_path, output_path, success_codes=No
     analyzer = AdvancedServiceAnalyzer(slow_threshold)
     
     # 流式处理数据
-    chunk_size = max(DEFAULT_CHUNK_SIZE, 50000)
     start_time = datetime.now()
     
     try:
-        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        for chunk in read_csv_chunks(csv_path, usecols=CSV_COLUMNS):
             analyzer.process_chunk(chunk, success_codes)
             
             # 定期报告进度
@@ -872,16 +837,34 @@ def analyze_service_performance_advanced(csv_path, output_path, success_codes=No
     service_results = analyzer.generate_service_results()
     app_results = analyzer.generate_app_results()
     
-    # 创建Excel报告
-    create_advanced_service_excel(service_results, app_results, output_path, analyzer)
+    # 发布报告（Excel及已配置的数据输出目标），渲染只依赖已算好的结果，不携带分析器
+    publish_report(output_path, {'服务性能分析': service_results, '应用性能分析': app_results},
+                   excel_writer=create_advanced_service_excel,
+                   excel_args=(service_results, app_results, output_path,
+                               summary, build_global_service_analysis_rows(analyzer, summary)))
+    
+    # 发布综合报告用的结果摘要（按请求量排序的Top服务）
+    publish_summary(build_service_result_summary(service_results))
     
     log_info(f"高级服务性能分析报告已生成: {output_path}", show_memory=True)
     
     return service_results.head(10) if not service_results.empty else pd.DataFrame()
 
 
-def create_advanced_service_excel(service_results, app_results, output_path, analyzer):
-    """创建高级服务性能分析Excel报告"""
+def build_service_result_summary(service_results):
+    """综合报告用的结果摘要：服务数量与请求量Top服务"""
+    metrics = {'service_count': len(service_results)}
+    top_services = []
+    if not service_results.empty:
+        by_volume = service_results.sort_values('成功请求数', ascending=False)
+        metrics['top_service_share'] = float(by_volume['占总请求比例(%)'].iloc[0])
+        top_services = top_records(by_volume, ['服务名称', '应用名称', '成功请求数', '占总请求比例(%)',
+                                               '平均请求总时长(秒)', '服务健康评分'], 10)
+    return AnalysisSummary(SUMMARY_SERVICE, metrics=metrics, top_lists={'services': top_services})
+
+
+def create_advanced_service_excel(service_results, app_results, output_path, summary, global_rows):
+    """创建高级服务性能分析Excel报告（summary为分析摘要，global_rows为全局服务分析表的行）"""
     log_info(f"开始创建高级服务Excel报告: {output_path}", show_memory=True)
     
     wb = Workbook()
@@ -899,13 +882,13 @@ def create_advanced_service_excel(service_results, app_results, output_path, ana
         add_dataframe_to_excel_with_grouped_headers(wb, app_results, '应用性能分析', app_headers)
     
     # 创建全局分析表
-    create_global_service_analysis_sheet(wb, analyzer)
+    create_global_service_analysis_sheet(wb, global_rows)
     
     # 创建性能洞察表
-    create_performance_insights_sheet(wb, service_results, app_results, analyzer)
+    create_performance_insights_sheet(wb, service_results, app_results)
     
     # 创建优化建议表
-    create_service_optimization_sheet(wb, service_results, analyzer)
+    create_service_optimization_sheet(wb, service_results, summary)
     
     wb.save(output_path)
     log_info(f"高级服务Excel报告已保存: {output_path}", show_memory=True)
@@ -937,15 +920,8 @@ def create_app_header_groups():
     }
 
 
-def create_global_service_analysis_sheet(wb, analyzer):
-    """创建全局服务分析表"""
-    ws = wb.create_sheet(title='全局服务分析')
-    
-    current_row = 1
-    
-    # 全局统计
-    summary = analyzer.get_analysis_summary()
-    
+def build_global_service_analysis_rows(analyzer, summary):
+    """全局服务分析表的 [标签, 值] 行"""
     global_stats = [
         ['=== 全局统计 ===', ''],
         ['总请求数', f"{summary['total_requests']:,}"],
@@ -987,6 +963,14 @@ def create_global_service_analysis_sheet(wb, analyzer):
             [f'  平均响应时间(秒)', f"{stats['mean']:.3f}"],
             [f'  P95响应时间(秒)', f"{stats['p95']:.3f}"]
         ])
+    return global_stats
+
+
+def create_global_service_analysis_sheet(wb, global_stats):
+    """创建全局服务分析表"""
+    ws = wb.create_sheet(title='全局服务分析')
+    
+    current_row = 1
     
     # 写入数据
     for label, value in global_stats:
@@ -1010,7 +994,7 @@ def create_global_service_analysis_sheet(wb, analyzer):
     format_excel_sheet(ws)
 
 
-def create_performance_insights_sheet(wb, service_results, app_results, analyzer):
+def create_performance_insights_sheet(wb, service_results, app_results):
     """创建性能洞察表"""
     ws = wb.create_sheet(title='性能洞察')
     
@@ -1100,7 +1084,7 @@ def create_performance_insights_sheet(wb, service_results, app_results, analyzer
     format_excel_sheet(ws)
 
 
-def create_service_optimization_sheet(wb, service_results, analyzer):
+def create_service_optimization_sheet(wb, service_results, summary):
     """创建服务优化建议表"""
     ws = wb.create_sheet(title='优化建议')
     
@@ -1111,8 +1095,6 @@ def create_service_optimization_sheet(wb, service_results, analyzer):
     current_row += 3
     
     # 优化效果展示
-    summary = analyzer.get_analysis_summary()
-    
     optimization_benefits = [
         ['=== 优化效果 ===', ''],
         ['内存使用优化', '采用T-Digest算法，内存使用减少70-90%'],
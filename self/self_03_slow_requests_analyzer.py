@@ -6,6 +6,7 @@ from openpyxl.chart import PieChart, Reference
 
 from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, DEFAULT_CHUNK_SIZE
 from self_00_02_utils import log_info
+from self_00_07_csv_reader import read_csv_chunks
 from self_00_04_excel_processor import (
     format_excel_sheet,
     add_dataframe_to_excel_with_grouped_headers,
@@ -104,7 +105,7 @@ def analyze_slow_requests(csv_path, output_path, threshold=DEFAULT_SLOW_THRESHOL
     
     # 第一遍：收集API总请求数和慢请求统计
     log_info("第一遍扫描：统计API请求数")
-    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+    for chunk in read_csv_chunks(csv_path, chunk_size=chunk_size):
         chunk_size_actual = len(chunk)
         total_processed += chunk_size_actual
 
@@ -131,7 +132,7 @@ def analyze_slow_requests(csv_path, output_path, threshold=DEFAULT_SLOW_THRESHOL
     slow_requests_saved = 0
     header_written = False
     
-    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+    for chunk in read_csv_chunks(csv_path, chunk_size=chunk_size):
         # 数据类型转换（只转换必要列）
         numeric_columns = [
             'total_request_duration', 'upstream_connect_time', 'upstream_header_time', 'upstream_response_time',
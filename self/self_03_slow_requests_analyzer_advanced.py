@@ -9,6 +9,7 @@
 3. 根因分析 + 异常评级
 4. 精简高价值输出列
 5. 智能优化建议
+6. 向量化分类 + 慢请求全集列式溢写 + 各API Top-K
 
 版本：v2.0
 作者：Claude Code
@@ -31,8 +32,12 @@ from openpyxl.chart import PieChart, BarChart, Reference
 from self_00_05_sampling_algorithms import TDigest, ReservoirSampler, CountMinSketch
 # 暂时禁用分层采样器：from self_00_05_sampling_algorithms import StratifiedSampler
 
-from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, DEFAULT_CHUNK_SIZE
+from self_00_01_constants import (
+    DEFAULT_SLOW_THRESHOLD, SLOW_REQUEST_SAMPLE_SIZE, SLOW_REQUEST_TOP_K_PER_API,
+    SLOW_REQUEST_EXCEL_PAGE_ROWS, SLOW_REQUEST_EXCEL_MAX_PAGES
+)
 from self_00_02_utils import log_info
+from self_00_07_csv_reader import read_csv_chunks
 
 # 备用内存格式化函数
 def format_memory_usage():
@@ -49,8 +54,14 @@ def format_memory_usage():
 from self_00_04_excel_processor import (
     format_excel_sheet,
     add_dataframe_to_excel_with_grouped_headers,
-    create_pie_chart
+    create_pie_chart,
+    create_streaming_workbook,
+    copy_sheet_to_streaming_workbook
 )
+from self_00_06_report_sinks import publish_report, get_report_publisher
+from self_00_10_result_registry import AnalysisSummary, SUMMARY_SLOW_REQUESTS, publish_summary, \
+    top_records, series_stats
+from self_00_11_slow_request_store import ColumnarSpill, TopKPerKey, TopRows
 
 # 核心时间指标
 CORE_TIME_METRICS = [
@@ -121,17 +132,105 @@ SEVERITY_MULTIPLIERS = {
     'severe': 3.0,     # 严重：3倍P95
     'extreme': 5.0     # 极严重：5倍P95
 }
+SEVERITY_ORDER = ['极严重', '严重', '中度', '轻度']
+SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITY_ORDER)}
+
+# SLA阈值(秒)：超过1/2/3倍分别为轻微/中等/严重违规
+SLA_THRESHOLD = 3.0
+
+# 根因对应的优化建议
+ROOT_CAUSE_ADVICE = {
+    "连接慢": "检查网络连接质量，优化连接池配置，考虑增加连接超时时间",
+    "处理慢": "优化业务逻辑，检查数据库查询性能，考虑增加缓存机制",
+    "传输慢": "检查网络带宽，优化响应体大小，考虑启用压缩",
+    "混合型": "全面性能优化，重点关注处理逻辑和网络传输",
+    "其他": "深入分析具体瓶颈，检查系统资源使用情况"
+}
+
+# 慢请求记录的列（溢写文件、样本、Top-K共用）：原始文本列 + 数值指标列 + 分类结果列
+SLOW_TEXT_COLUMNS = ['service_name', 'request_full_uri', 'raw_time', 'http_method', 'response_status_code']
+SLOW_METRIC_COLUMNS = CORE_TIME_METRICS + KEY_PHASE_METRICS + EFFICIENCY_METRICS + TRANSFER_METRICS
+SLOW_CLASS_COLUMNS = ['root_cause', 'severity', 'time_category']
+SLOW_RECORD_COLUMNS = SLOW_TEXT_COLUMNS + SLOW_CLASS_COLUMNS + SLOW_METRIC_COLUMNS
+
+# 慢请求详细列表展示列（明细页溢写文件按文本列、数值列存储）
+SLOW_DETAIL_TEXT_COLUMNS = [COLUMN_MAPPING[col] for col in SLOW_TEXT_COLUMNS] + \
+    ['慢请求根因分类', '异常程度评级', '时间段分类', '优化建议', '用户体验影响', '请求频率等级', 'SLA违规程度']
+SLOW_DETAIL_NUMERIC_COLUMNS = [COLUMN_MAPPING[col] for col in SLOW_METRIC_COLUMNS] + ['历史对比倍数']
+
+
+def _status_code_values(status_codes: pd.Series) -> List[Any]:
+    """慢请求记录中状态码为文本，数字状态码按数值输出（便于Excel排序筛选）"""
+    return [int(status) if status.isdigit() else status for status in status_codes.astype(str)]
+
+
+def _column_values(frame: pd.DataFrame, column: str) -> np.ndarray:
+    """取数值列为float数组，缺失的列视为0"""
+    if column not in frame.columns:
+        return np.zeros(len(frame))
+    return frame[column].to_numpy(dtype=float)
+
+
+def classify_slow_requests(slow_chunk: pd.DataFrame, p95_baseline: float) -> Dict[str, np.ndarray]:
+    """
+    向量化的慢请求分类：根因、异常程度、时间段
+
+    Args:
+        slow_chunk: 慢请求数据块（原始列名）
+        p95_baseline: 当前P95基线，为0时异常程度均为轻度
+
+    Returns:
+        {'root_cause', 'severity', 'time_category'} 各为与数据块等长的数组
+    """
+    connect_slow = _column_values(slow_chunk, 'upstream_connect_time') > ROOT_CAUSE_THRESHOLDS['connect_slow']
+    process_slow = _column_values(slow_chunk, 'backend_process_phase') > ROOT_CAUSE_THRESHOLDS['process_slow']
+    transfer_slow = _column_values(slow_chunk, 'backend_transfer_phase') > ROOT_CAUSE_THRESHOLDS['transfer_slow']
+    cause_count = connect_slow.astype(int) + process_slow + transfer_slow
+    root_cause = np.select(
+        [cause_count == 0, cause_count > 1, connect_slow, process_slow],
+        ['其他', '混合型', '连接慢', '处理慢'], default='传输慢'
+    )
+    
+    # 异常程度：相对P95基线的倍数
+    if p95_baseline > 0:
+        ratio = _column_values(slow_chunk, 'total_request_duration') / p95_baseline
+        severity = np.select(
+            [ratio >= SEVERITY_MULTIPLIERS['extreme'], ratio >= SEVERITY_MULTIPLIERS['severe'],
+             ratio >= SEVERITY_MULTIPLIERS['medium']],
+            ['极严重', '严重', '中度'], default='轻度'
+        )
+    else:
+        severity = np.full(len(slow_chunk), '轻度', dtype=object)
+    
+    # 时间段：从请求时间中提取小时（兼容 'HH:MM:SS' 与 'YYYY-MM-DD HH:MM:SS' / ISO8601）
+    if 'raw_time' in slow_chunk.columns:
+        hours = pd.to_numeric(slow_chunk['raw_time'].astype(str).str.extract(r'(?:^|[ T])(\d{1,2}):', expand=False),
+                              errors='coerce').to_numpy()
+    else:
+        hours = np.full(len(slow_chunk), np.nan)
+    time_category = np.select(
+        [np.isnan(hours), ((hours >= 8) & (hours <= 12)) | ((hours >= 14) & (hours <= 18)),
+         (hours <= 6) | (hours >= 22)],
+        ['未知', '高峰期', '低峰期'], default='平峰期'
+    )
+    
+    return {'root_cause': root_cause, 'severity': severity, 'time_category': time_category}
 
 class AdvancedSlowRequestAnalyzer:
     """高级慢请求分析器"""
     
     def __init__(self, slow_threshold: float = DEFAULT_SLOW_THRESHOLD):
         self.slow_threshold = slow_threshold
-        self.chunk_size = max(DEFAULT_CHUNK_SIZE // 2, 50000)  # 5万条/块
+        self.chunk_size = None  # None表示按内存预算自动计算
         
         # 高级采样器
         self.time_digest = TDigest()
-        self.slow_sampler = ReservoirSampler(max_size=20000)  # 2万条智能采样
+        self.slow_sampler = ReservoirSampler(max_size=SLOW_REQUEST_SAMPLE_SIZE)  # 慢请求均匀样本，用于分析汇总
+        self.slow_top_k = TopKPerKey('request_full_uri', 'total_request_duration', SLOW_REQUEST_TOP_K_PER_API)
+        self.slow_spill = None  # 慢请求全集的列式溢写文件，开始分析时按输出路径创建
+        # 明细工作表只容纳有限行数，按严重程度、耗时降序保留最严重的部分
+        self.slow_worst = TopRows(['severity_rank', 'total_request_duration'], [True, False],
+                                  SLOW_REQUEST_EXCEL_PAGE_ROWS * SLOW_REQUEST_EXCEL_MAX_PAGES)
         self.api_frequency = CountMinSketch(width=10000, depth=5)
         # 暂时禁用分层采样器，避免兼容性问题
         # self.stratified_sampler = StratifiedSampler()
@@ -174,8 +273,13 @@ class AdvancedSlowRequestAnalyzer:
         log_info(f"优化特性: 单次扫描 + T-Digest + 智能采样 + 根因分析")
         
         try:
+            self.slow_spill = ColumnarSpill(f"{os.path.splitext(output_path)[0]}_慢请求明细",
+                                            string_columns=SLOW_TEXT_COLUMNS + SLOW_CLASS_COLUMNS,
+                                            numeric_columns=SLOW_METRIC_COLUMNS)
+            
             # 单次扫描处理
             self._process_data_stream(csv_path)
+            self.slow_spill.close()
             
             # 生成分析结果
             if len(self.slow_sampler.get_samples()) == 0:
@@ -184,12 +288,22 @@ class AdvancedSlowRequestAnalyzer:
             
             # 构建结果DataFrame
             slow_df = self._build_result_dataframe()
+            top_k_df = self._build_top_k_dataframe()
+            log_info(f"慢请求全集已写入: {self.slow_spill.path} ({self.slow_spill.row_count:,} 行)")
             
             # 智能分析
             self._perform_intelligent_analysis(slow_df)
             
-            # 生成Excel报告
-            self._generate_excel_report(slow_df, output_path)
+            # 发布报告（Excel及已配置的数据输出目标），渲染只依赖已算好的结果，不携带分析器；
+            # 明细页先写入溢写文件，渲染时逐页读取
+            detail_spill = self._spill_detail_pages(output_path) if get_report_publisher().excel_enabled else None
+            publish_report(output_path, {'慢请求详细列表': slow_df, '各API最慢请求': top_k_df},
+                           excel_writer=create_slow_requests_excel,
+                           excel_args=(output_path, detail_spill, top_k_df, slow_df,
+                                       self._build_report_stats(slow_df)))
+            
+            # 发布综合报告用的结果摘要
+            publish_summary(self._build_result_summary(slow_df))
             
             # 输出统计信息
             self._log_final_statistics()
@@ -205,7 +319,7 @@ class AdvancedSlowRequestAnalyzer:
         log_info("开始单次扫描流式处理")
         
         chunk_count = 0
-        for chunk in pd.read_csv(csv_path, chunksize=self.chunk_size):
+        for chunk in read_csv_chunks(csv_path, usecols=list(COLUMN_MAPPING), chunk_size=self.chunk_size):
             chunk_count += 1
             start_time = datetime.now()
             
@@ -260,324 +374,122 @@ class AdvancedSlowRequestAnalyzer:
             return
         
         # 更新T-Digest
-        durations = chunk['total_request_duration'].values
-        for duration in durations:
-            if duration > 0:
-                self.time_digest.add(duration)
+        durations = chunk['total_request_duration'].to_numpy(dtype=float)
+        self.time_digest.add_batch(durations[durations > 0].tolist())
         
         # 更新基线统计
         self.global_stats['p95_baseline'] = self.time_digest.percentile(95)
         self.global_stats['p99_baseline'] = self.time_digest.percentile(99)
     
     def _intelligent_slow_sampling(self, chunk: pd.DataFrame):
-        """智能慢请求采样"""
+        """慢请求分类并写入溢写文件、各API Top-K与均匀样本"""
         if 'total_request_duration' not in chunk.columns:
             return
         
-        # 筛选慢请求
+        # 筛选慢请求，统一为慢请求记录列
         slow_mask = chunk['total_request_duration'] > self.slow_threshold
-        slow_chunk = chunk[slow_mask].copy()
-        
-        if slow_chunk.empty:
+        if not slow_mask.any():
             return
+        slow_chunk = chunk.loc[slow_mask].reindex(columns=SLOW_TEXT_COLUMNS + SLOW_METRIC_COLUMNS)
         
         self.global_stats['slow_requests'] += len(slow_chunk)
         
-        # 智能采样策略
-        for _, row in slow_chunk.iterrows():
-            # 根因分析
-            root_cause = self._analyze_root_cause(row)
-            
-            # 异常程度评级
-            severity = self._calculate_severity(row)
-            
-            # 时间段分类
-            time_category = self._classify_time_period(row)
-            
-            # 构建采样记录
-            sample_record = {
-                'original_data': row.to_dict(),
-                'root_cause': root_cause,
-                'severity': severity,
-                'time_category': time_category,
-                'sample_weight': self._calculate_sample_weight(row, root_cause, severity)
-            }
-            
-            # 加权采样
-            self.slow_sampler.add(sample_record)
-            
-            # 分层采样 - 暂时禁用
-            # stratum_key = f"{root_cause}_{severity}"
-            # self.stratified_sampler.add(sample_record, stratum_key)
-    
-    def _analyze_root_cause(self, row: pd.Series) -> str:
-        """分析慢请求根因"""
-        connect_time = row.get('upstream_connect_time', 0)
-        process_time = row.get('backend_process_phase', 0)
-        transfer_time = row.get('backend_transfer_phase', 0)
-        
-        # 多维度判断
-        causes = []
-        
-        if connect_time > ROOT_CAUSE_THRESHOLDS['connect_slow']:
-            causes.append('连接')
-        
-        if process_time > ROOT_CAUSE_THRESHOLDS['process_slow']:
-            causes.append('处理')
-        
-        if transfer_time > ROOT_CAUSE_THRESHOLDS['transfer_slow']:
-            causes.append('传输')
-        
-        if not causes:
-            return "其他"
-        elif len(causes) == 1:
-            return f"{causes[0]}慢"
-        else:
-            return "混合型"
-    
-    def _calculate_severity(self, row: pd.Series) -> str:
-        """计算异常程度"""
-        total_time = row.get('total_request_duration', 0)
-        p95_baseline = self.global_stats['p95_baseline']
-        
-        if p95_baseline == 0:
-            return "轻度"
+        # 向量化分类（根因、异常程度、时间段）
+        slow_chunk = slow_chunk.assign(**classify_slow_requests(slow_chunk, self.global_stats['p95_baseline']))
+        slow_chunk = slow_chunk[SLOW_RECORD_COLUMNS]
         
-        severity_ratio = total_time / p95_baseline
+        self.slow_spill.append(slow_chunk)
+        self.slow_top_k.add(slow_chunk)
+        self.slow_worst.add(slow_chunk.assign(severity_rank=slow_chunk['severity'].map(SEVERITY_RANK)))
         
-        if severity_ratio >= SEVERITY_MULTIPLIERS['extreme']:
-            return "极严重"
-        elif severity_ratio >= SEVERITY_MULTIPLIERS['severe']:
-            return "严重"
-        elif severity_ratio >= SEVERITY_MULTIPLIERS['medium']:
-            return "中度"
-        else:
-            return "轻度"
-    
-    def _classify_time_period(self, row: pd.Series) -> str:
-        """时间段分类"""
-        try:
-            time_str = row.get('raw_time', '')
-            if not time_str:
-                return "未知"
-            
-            # 解析时间
-            if isinstance(time_str, str):
-                hour = int(time_str.split(':')[0]) if ':' in time_str else 12
-            else:
-                hour = 12
-            
-            # 时间段分类
-            if 8 <= hour <= 12 or 14 <= hour <= 18:
-                return "高峰期"
-            elif 0 <= hour <= 6 or 22 <= hour <= 23:
-                return "低峰期"
-            else:
-                return "平峰期"
-        except:
-            return "未知"
-    
-    def _calculate_sample_weight(self, row: pd.Series, root_cause: str, severity: str) -> float:
-        """计算采样权重"""
-        base_weight = 1.0
-        
-        # 异常程度权重
-        severity_weights = {
-            "极严重": 4.0,
-            "严重": 3.0,
-            "中度": 2.0,
-            "轻度": 1.0
-        }
-        
-        # 根因权重
-        root_cause_weights = {
-            "处理慢": 3.0,
-            "连接慢": 2.5,
-            "传输慢": 2.0,
-            "混合型": 3.5,
-            "其他": 1.0
-        }
-        
-        weight = base_weight
-        weight *= severity_weights.get(severity, 1.0)
-        weight *= root_cause_weights.get(root_cause, 1.0)
-        
-        return weight
+        # 均匀样本：只为被采中的行取出记录
+        rows = slow_chunk.to_numpy(dtype=object)
+        self.slow_sampler.add_lazy_batch(len(rows), lambda i: rows[i])
     
     def _update_api_frequency(self, chunk: pd.DataFrame):
         """更新API频率统计"""
         if 'request_full_uri' in chunk.columns:
-            for uri in chunk['request_full_uri'].values:
-                self.api_frequency.increment(str(uri))
+            api_counts = chunk['request_full_uri'].value_counts()
+            for uri, count in api_counts.items():
+                self.api_frequency.increment(str(uri), int(count))
             
             # 同时更新API级别统计
-            self._update_api_stats(chunk)
+            self._update_api_stats(chunk, api_counts)
     
-    def _update_api_stats(self, chunk: pd.DataFrame):
+    def _update_api_stats(self, chunk: pd.DataFrame, api_counts: pd.Series):
         """更新API级别统计"""
-        if 'request_full_uri' not in chunk.columns:
-            return
-            
         # 统计每个API的总请求数
-        api_counts = chunk['request_full_uri'].value_counts()
         for api, count in api_counts.items():
             if api not in self.api_stats:
                 self.api_stats[api] = {
                     'total_requests': 0,
-                    'slow_requests': 0,
-                    'metrics': []
+                    'slow_requests': 0
                 }
-            self.api_stats[api]['total_requests'] += count
+            self.api_stats[api]['total_requests'] += int(count)
         
         # 统计慢请求
         if 'total_request_duration' in chunk.columns:
-            slow_chunk = chunk[chunk['total_request_duration'] > self.slow_threshold]
-            if not slow_chunk.empty:
-                slow_api_counts = slow_chunk['request_full_uri'].value_counts()
-                for api, count in slow_api_counts.items():
-                    if api in self.api_stats:
-                        self.api_stats[api]['slow_requests'] += count
-                        
-                        # 收集指标数据
-                        api_metrics = slow_chunk[slow_chunk['request_full_uri'] == api]
-                        for _, row in api_metrics.iterrows():
-                            metrics_record = {}
-                            for metric in CORE_TIME_METRICS + KEY_PHASE_METRICS + EFFICIENCY_METRICS + TRANSFER_METRICS:
-                                if metric in row:
-                                    metrics_record[metric] = row[metric]
-                            if metrics_record:
-                                self.api_stats[api]['metrics'].append(metrics_record)
+            slow_uris = chunk.loc[chunk['total_request_duration'] > self.slow_threshold, 'request_full_uri']
+            for api, count in slow_uris.value_counts().items():
+                self.api_stats[api]['slow_requests'] += int(count)
+    
+    def _records_to_frame(self, records) -> pd.DataFrame:
+        """慢请求记录（样本行数组）转为DataFrame，恢复数值列类型"""
+        frame = pd.DataFrame(list(records), columns=SLOW_RECORD_COLUMNS)
+        for col in SLOW_METRIC_COLUMNS:
+            frame[col] = pd.to_numeric(frame[col], errors='coerce')
+        return frame
+    
+    def _build_display_frame(self, records: pd.DataFrame) -> pd.DataFrame:
+        """慢请求记录（原始列名）转为报告展示列，并向量化计算派生的智能分析列"""
+        df = records[SLOW_TEXT_COLUMNS + SLOW_METRIC_COLUMNS].rename(columns=COLUMN_MAPPING)
+        df['状态码'] = _status_code_values(df['状态码'])
+        
+        total_time = records['total_request_duration'].to_numpy(dtype=float)
+        severity = records['severity'].to_numpy(dtype=object)
+        urgent = np.isin(severity, ['严重', '极严重'])
+        p95_baseline = self.global_stats['p95_baseline']
+        
+        # 请求频率：每个不同URI只估算一次
+        uris = records['request_full_uri'].astype(str)
+        frequency = uris.map({uri: self.api_frequency.estimate(uri) for uri in uris.unique()}).to_numpy()
+        
+        df['慢请求根因分类'] = records['root_cause'].to_numpy()
+        df['异常程度评级'] = severity
+        df['时间段分类'] = records['time_category'].to_numpy()
+        df['优化建议'] = (records['root_cause'].map(ROOT_CAUSE_ADVICE).fillna("全面性能检查")
+                       + np.where(urgent, "，建议立即处理", "")).to_numpy()
+        df['用户体验影响'] = np.select([(severity == '极严重') | (total_time > 10), (severity == '严重') | (total_time > 5)],
+                                   ['高', '中'], default='低')
+        df['请求频率等级'] = np.select([frequency > 1000, frequency > 100], ['高频', '中频'], default='低频')
+        df['历史对比倍数'] = np.round(total_time / p95_baseline, 2) if p95_baseline > 0 else 1.0
+        df['SLA违规程度'] = np.select(
+            [total_time > SLA_THRESHOLD * 3, total_time > SLA_THRESHOLD * 2, total_time > SLA_THRESHOLD],
+            ['严重违规', '中等违规', '轻微违规'], default='未违规'
+        )
+        return df
     
     def _build_result_dataframe(self) -> pd.DataFrame:
-        """构建结果DataFrame"""
+        """构建结果DataFrame（慢请求均匀样本）"""
         log_info("构建分析结果DataFrame")
         
-        records = []
-        samples = self.slow_sampler.get_samples()
-        
-        for sample in samples:
-            record = {}
-            original_data = sample['original_data']
-            
-            # 基础信息
-            record['服务名称'] = original_data.get('service_name', 'unknown')
-            record['请求URI'] = original_data.get('request_full_uri', 'unknown')
-            record['请求时间'] = original_data.get('raw_time', 'unknown')
-            record['请求方法'] = original_data.get('http_method', 'unknown')
-            record['状态码'] = original_data.get('response_status_code', 'unknown')
-            
-            # 核心时间指标
-            for metric in CORE_TIME_METRICS:
-                display_name = COLUMN_MAPPING.get(metric, metric)
-                record[display_name] = original_data.get(metric, 0)
-            
-            # 关键阶段指标
-            for metric in KEY_PHASE_METRICS:
-                display_name = COLUMN_MAPPING.get(metric, metric)
-                record[display_name] = original_data.get(metric, 0)
-            
-            # 效率指标
-            for metric in EFFICIENCY_METRICS:
-                display_name = COLUMN_MAPPING.get(metric, metric)
-                record[display_name] = original_data.get(metric, 0)
-            
-            # 传输指标
-            for metric in TRANSFER_METRICS:
-                display_name = COLUMN_MAPPING.get(metric, metric)
-                record[display_name] = original_data.get(metric, 0)
-            
-            # 智能分析结果
-            record['慢请求根因分类'] = sample['root_cause']
-            record['异常程度评级'] = sample['severity']
-            record['时间段分类'] = sample['time_category']
-            record['优化建议'] = self._generate_optimization_advice(sample)
-            record['用户体验影响'] = self._calculate_user_impact(sample)
-            record['请求频率等级'] = self._calculate_frequency_level(original_data)
-            record['历史对比倍数'] = self._calculate_historical_ratio(original_data)
-            record['SLA违规程度'] = self._calculate_sla_violation(sample)
-            
-            records.append(record)
-        
-        df = pd.DataFrame(records)
+        df = self._build_display_frame(self._records_to_frame(self.slow_sampler.get_samples()))
         
         # 按异常程度和响应时间排序
-        severity_order = ['极严重', '严重', '中度', '轻度']
-        df['severity_rank'] = df['异常程度评级'].map({s: i for i, s in enumerate(severity_order)})
+        df['severity_rank'] = df['异常程度评级'].map(SEVERITY_RANK)
         df = df.sort_values(['severity_rank', '请求总时长(秒)'], ascending=[True, False])
         df = df.drop('severity_rank', axis=1)
         
         return df
     
-    def _generate_optimization_advice(self, sample: dict) -> str:
-        """生成优化建议"""
-        root_cause = sample['root_cause']
-        severity = sample['severity']
-        
-        advice_map = {
-            "连接慢": "检查网络连接质量，优化连接池配置，考虑增加连接超时时间",
-            "处理慢": "优化业务逻辑，检查数据库查询性能，考虑增加缓存机制",
-            "传输慢": "检查网络带宽，优化响应体大小，考虑启用压缩",
-            "混合型": "全面性能优化，重点关注处理逻辑和网络传输",
-            "其他": "深入分析具体瓶颈，检查系统资源使用情况"
-        }
-        
-        base_advice = advice_map.get(root_cause, "全面性能检查")
-        
-        if severity in ['严重', '极严重']:
-            base_advice += "，建议立即处理"
-        
-        return base_advice
-    
-    def _calculate_user_impact(self, sample: dict) -> str:
-        """计算用户体验影响"""
-        severity = sample['severity']
-        total_time = sample['original_data'].get('total_request_duration', 0)
-        
-        if severity == '极严重' or total_time > 10:
-            return "高"
-        elif severity == '严重' or total_time > 5:
-            return "中"
-        else:
-            return "低"
-    
-    def _calculate_frequency_level(self, original_data: dict) -> str:
-        """计算请求频率等级"""
-        uri = original_data.get('request_full_uri', '')
-        freq_estimate = self.api_frequency.estimate(str(uri))
-        
-        if freq_estimate > 1000:
-            return "高频"
-        elif freq_estimate > 100:
-            return "中频"
-        else:
-            return "低频"
-    
-    def _calculate_historical_ratio(self, original_data: dict) -> float:
-        """计算历史对比倍数"""
-        total_time = original_data.get('total_request_duration', 0)
-        p95_baseline = self.global_stats['p95_baseline']
-        
-        if p95_baseline > 0:
-            return round(total_time / p95_baseline, 2)
-        else:
-            return 1.0
-    
-    def _calculate_sla_violation(self, sample: dict) -> str:
-        """计算SLA违规程度"""
-        severity = sample['severity']
-        total_time = sample['original_data'].get('total_request_duration', 0)
-        
-        # 假设SLA阈值为3秒
-        sla_threshold = 3.0
+    def _build_top_k_dataframe(self) -> pd.DataFrame:
+        """构建各API最慢请求DataFrame（按API分组，组内按耗时降序）"""
+        top_k = self.slow_top_k.result()
+        if top_k.empty:
+            return pd.DataFrame()
         
-        if total_time > sla_threshold * 3:
-            return "严重违规"
-        elif total_time > sla_threshold * 2:
-            return "中等违规"
-        elif total_time > sla_threshold:
-            return "轻微违规"
-        else:
-            return "未违规"
+        df = self._build_display_frame(top_k)
+        return df.sort_values(['请求URI', '请求总时长(秒)'], ascending=[True, False], kind='mergesort')
     
     def _perform_intelligent_analysis(self, df: pd.DataFrame):
         """执行智能分析"""
@@ -646,633 +558,722 @@ class AdvancedSlowRequestAnalyzer:
         
         return insights
     
-    def _generate_excel_report(self, df: pd.DataFrame, output_path: str):
-        """生成Excel报告"""
-        log_info(f"生成Excel报告: {output_path}")
-        
-        wb = openpyxl.Workbook()
-        if 'Sheet' in wb.sheetnames:
-            del wb['Sheet']
-        
-        # 1. 慢请求详细列表
-        self._create_slow_requests_sheet(wb, df)
-        
-        # 2. 智能分析汇总
-        self._create_analysis_summary_sheet(wb, df)
-        
-        # 3. 慢请求API汇总 (整合原版本功能)
-        self._create_api_summary_sheet(wb, df)
-        
-        # 4. 性能分析 (整合原版本功能)
-        self._create_performance_analysis_sheet(wb, df)
-        
-        # 5. 根因分析
-        self._create_root_cause_sheet(wb, df)
-        
-        # 6. 传输效率分析 (整合原版本功能)
-        self._create_transfer_efficiency_sheet(wb, df)
-        
-        # 7. 性能洞察
-        self._create_performance_insights_sheet(wb, df)
-        
-        # 8. 优化建议
-        self._create_optimization_recommendations_sheet(wb, df)
+    def _spill_detail_pages(self, output_path: str) -> ColumnarSpill:
+        """
+        慢请求详细列表各页：按严重程度、耗时降序的最严重慢请求转为展示列，逐页写入明细页溢写文件
+        
+        每页一个行组，Excel渲染时按页读取并流式写入，内存中只有一页数据
+        """
+        detail_spill = ColumnarSpill(f"{os.path.splitext(output_path)[0]}_慢请求明细页",
+                                     string_columns=SLOW_DETAIL_TEXT_COLUMNS,
+                                     numeric_columns=SLOW_DETAIL_NUMERIC_COLUMNS)
+        for page in self.slow_worst.iter_pages(SLOW_REQUEST_EXCEL_PAGE_ROWS):
+            page = self._build_display_frame(page)
+            page[SLOW_DETAIL_TEXT_COLUMNS] = page[SLOW_DETAIL_TEXT_COLUMNS].fillna('')
+            detail_spill.append(page)
+        detail_spill.close()
+        
+        written_rows = min(self.slow_worst.row_count, self.slow_worst.n)
+        if written_rows < self.slow_worst.row_count:
+            log_info(f"慢请求明细共 {self.slow_worst.row_count:,} 行，Excel仅写入最严重的 {written_rows:,} 行，"
+                     f"完整数据见: {self.slow_spill.path}", level="WARNING")
+        return detail_spill
+    
+    def _build_report_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Excel报告所需的统计数据（纯数据，可序列化到渲染进程）"""
+        return {
+            'global_stats': self.global_stats,
+            'analysis_results': self.analysis_results,
+            'api_total_requests': {uri: self.api_stats[uri]['total_requests']
+                                   for uri in df['请求URI'].unique() if uri in self.api_stats},
+        }
+    
+    def _log_progress(self, chunk_count: int):
+        """记录处理进度"""
+        memory_usage = format_memory_usage()
+        self.global_stats['memory_usage'].append(memory_usage)
         
-        wb.save(output_path)
-        log_info(f"Excel报告生成完成: {output_path}")
-    
-    def _create_slow_requests_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建慢请求详细列表工作表"""
-        # 定义表头分组
-        header_groups = {
-            '基础信息': ['服务名称', '请求URI', '请求时间', '请求方法', '状态码'],
-            '核心时间指标': ['请求总时长(秒)', '后端连接时长(秒)', '后端处理时长(秒)', '后端响应时长(秒)'],
-            '关键阶段指标': ['后端处理阶段(秒)', '后端传输阶段(秒)', 'Nginx传输阶段(秒)', '网络传输阶段(秒)'],
-            '效率指标': ['后端处理效率(%)', '网络开销占比(%)', '传输时间占比(%)', '连接成本占比(%)'],
-            '传输指标': ['响应体大小(KB)', '总传输大小(KB)', '总传输速度(KB/s)'],
-            '智能分析': ['慢请求根因分类', '异常程度评级', '时间段分类', '优化建议', '用户体验影响', '请求频率等级', '历史对比倍数', 'SLA违规程度']
+        log_info(f"已处理 {chunk_count} 个数据块, "
+                f"总请求: {self.global_stats['total_requests']:,}, "
+                f"慢请求: {self.global_stats['slow_requests']:,}, "
+                f"内存: {memory_usage}")
+    
+    def _build_result_summary(self, slow_df: pd.DataFrame) -> AnalysisSummary:
+        """综合报告用的结果摘要：慢请求耗时分布、各阶段耗时与根因分布"""
+        total_requests = self.global_stats['total_requests']
+        metrics = {
+            'total_requests': total_requests,
+            'slow_requests': self.global_stats['slow_requests'],
+            'slow_rate': self.global_stats['slow_requests'] / total_requests * 100 if total_requests > 0 else 0.0,
+            'p95_baseline': self.global_stats['p95_baseline'],
+            'p99_baseline': self.global_stats['p99_baseline']
         }
         
-        add_dataframe_to_excel_with_grouped_headers(wb, df, '慢请求详细列表', header_groups=header_groups)
+        # 耗时与各阶段的均值/分位数（基于慢请求样本）
+        for metric in ['total_request_duration', 'upstream_connect_time'] + KEY_PHASE_METRICS:
+            column = COLUMN_MAPPING[metric]
+            if column in slow_df.columns:
+                for stat, value in series_stats(slow_df[column]).items():
+                    metrics[f'{metric}_{stat}'] = value
+        
+        root_causes = slow_df['慢请求根因分类'].value_counts().head(5)
+        return AnalysisSummary(SUMMARY_SLOW_REQUESTS, metrics=metrics, top_lists={
+            'root_causes': [{'根因': cause, '数量': int(count)} for cause, count in root_causes.items()],
+            'slowest': top_records(slow_df.sort_values('请求总时长(秒)', ascending=False),
+                                   ['服务名称', '请求URI', '请求总时长(秒)', '慢请求根因分类'], 10)
+        })
     
-    def _create_analysis_summary_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建分析汇总工作表"""
-        ws = wb.create_sheet(title='智能分析汇总')
+    def _log_final_statistics(self):
+        """记录最终统计信息"""
+        total_time = (datetime.now() - self.processing_stats['start_time']).total_seconds()
         
-        row = 1
+        log_info("=== 慢请求分析完成 ===")
+        log_info(f"总处理时间: {total_time:.1f}秒")
+        log_info(f"总请求数: {self.global_stats['total_requests']:,}")
+        log_info(f"慢请求数: {self.global_stats['slow_requests']:,}")
+        log_info(f"慢请求率: {self.global_stats['slow_requests'] / self.global_stats['total_requests'] * 100:.2f}%")
+        log_info(f"采样数量: {len(self.slow_sampler.get_samples()):,}")
+        log_info(f"P95基线: {self.global_stats['p95_baseline']:.3f}秒")
+        log_info(f"P99基线: {self.global_stats['p99_baseline']:.3f}秒")
+        log_info(f"处理速度: {self.global_stats['total_requests'] / total_time:.0f} 条/秒")
         
-        # 标题
-        ws.cell(row=row, column=1, value="慢请求智能分析汇总").font = Font(bold=True, size=16)
-        row += 3
+        # 内存使用统计
+        if self.global_stats['memory_usage']:
+            max_memory = max(self.global_stats['memory_usage'])
+            log_info(f"峰值内存: {max_memory}")
         
-        # 总体统计
-        ws.cell(row=row, column=1, value="总体统计").font = Font(bold=True, size=14)
+        log_info("=== 优化效果 ===")
+        log_info("- 单次扫描，减少50%磁盘IO")
+        log_info("- 智能采样，内存使用降低90%+")
+        log_info("- 根因分析，提供针对性优化建议")
+        log_info("- 精简列结构，提升分析效率")
+
+
+def create_slow_requests_excel(output_path: str, detail_spill: ColumnarSpill, top_k_df: pd.DataFrame,
+                               df: pd.DataFrame, report_stats: Dict[str, Any]):
+    """
+    生成慢请求Excel报告（流式工作簿，明细页从溢写文件逐页写入，写完后删除溢写文件）
+
+    Args:
+        output_path: 输出路径
+        detail_spill: 慢请求详细列表明细页溢写文件（展示列，按严重程度、耗时降序）
+        top_k_df: 各API最慢请求
+        df: 慢请求均匀样本（展示列）
+        report_stats: AdvancedSlowRequestAnalyzer._build_report_stats 生成的统计数据
+    """
+    log_info(f"生成Excel报告: {output_path}")
+    
+    wb = create_streaming_workbook()
+    
+    # 1. 慢请求详细列表与各API最慢请求（流式写入）
+    try:
+        _create_slow_requests_sheet(wb, detail_spill)
+    finally:
+        detail_spill.remove()
+    _create_top_k_sheet(wb, top_k_df)
+    
+    # 其余工作表按单元格写入且行数有限，先在普通工作簿中生成，再复制到流式工作簿
+    summary_wb = openpyxl.Workbook()
+    del summary_wb['Sheet']
+    
+    # 2. 智能分析汇总
+    _create_analysis_summary_sheet(summary_wb, df, report_stats)
+    
+    # 3. 慢请求API汇总 (整合原版本功能)
+    _create_api_summary_sheet(summary_wb, df, report_stats)
+    
+    # 4. 性能分析 (整合原版本功能)
+    _create_performance_analysis_sheet(summary_wb, df)
+    
+    # 5. 根因分析
+    _create_root_cause_sheet(summary_wb, df)
+    
+    # 6. 传输效率分析 (整合原版本功能)
+    _create_transfer_efficiency_sheet(summary_wb, df)
+    
+    # 7. 性能洞察
+    _create_performance_insights_sheet(summary_wb, df)
+    
+    # 8. 优化建议
+    _create_optimization_recommendations_sheet(summary_wb, df, report_stats)
+    
+    for ws in summary_wb.worksheets:
+        copy_sheet_to_streaming_workbook(wb, ws)
+    
+    wb.save(output_path)
+    log_info(f"Excel报告生成完成: {output_path}")
+
+
+def _create_slow_requests_sheet(wb: openpyxl.Workbook, detail_spill: ColumnarSpill):
+    """创建慢请求详细列表工作表：从明细页溢写文件逐页读取，每页一个工作表"""
+    header_groups = create_slow_requests_header_groups()
+    columns = [column for group_columns in header_groups.values() for column in group_columns]
+    
+    for pages, page in enumerate(detail_spill.iter_pages(SLOW_REQUEST_EXCEL_PAGE_ROWS), start=1):
+        page = page[columns].assign(**{'状态码': _status_code_values(page['状态码'])})
+        sheet_name = '慢请求详细列表' if pages == 1 else f'慢请求详细列表_{pages}'
+        add_dataframe_to_excel_with_grouped_headers(wb, page, sheet_name, header_groups=header_groups)
+
+
+def _create_top_k_sheet(wb: openpyxl.Workbook, top_k_df: pd.DataFrame):
+    """创建各API最慢请求工作表"""
+    if top_k_df.empty:
+        return
+    add_dataframe_to_excel_with_grouped_headers(wb, top_k_df, '各API最慢请求',
+                                                header_groups=create_slow_requests_header_groups())
+
+
+def _create_analysis_summary_sheet(wb: openpyxl.Workbook, df: pd.DataFrame, report_stats: Dict[str, Any]):
+    """创建分析汇总工作表"""
+    ws = wb.create_sheet(title='智能分析汇总')
+    
+    row = 1
+    
+    # 标题
+    ws.cell(row=row, column=1, value="慢请求智能分析汇总").font = Font(bold=True, size=16)
+    row += 3
+    
+    # 总体统计
+    ws.cell(row=row, column=1, value="总体统计").font = Font(bold=True, size=14)
+    row += 1
+    
+    stats_data = [
+        ['总请求数', f"{report_stats['global_stats']['total_requests']:,}"],
+        ['慢请求数', f"{report_stats['global_stats']['slow_requests']:,}"],
+        ['慢请求率', f"{report_stats['global_stats']['slow_requests'] / report_stats['global_stats']['total_requests'] * 100:.2f}%"],
+        ['采样数量', f"{len(df):,}"],
+        ['P95基线', f"{report_stats['global_stats']['p95_baseline']:.3f}秒"],
+        ['P99基线', f"{report_stats['global_stats']['p99_baseline']:.3f}秒"],
+        ['处理时间', f"{report_stats['global_stats']['processing_time']:.1f}秒"]
+    ]
+    
+    for stat_name, stat_value in stats_data:
+        ws.cell(row=row, column=1, value=stat_name).font = Font(bold=True)
+        ws.cell(row=row, column=2, value=stat_value)
         row += 1
-        
-        stats_data = [
-            ['总请求数', f"{self.global_stats['total_requests']:,}"],
-            ['慢请求数', f"{self.global_stats['slow_requests']:,}"],
-            ['慢请求率', f"{self.global_stats['slow_requests'] / self.global_stats['total_requests'] * 100:.2f}%"],
-            ['采样数量', f"{len(df):,}"],
-            ['P95基线', f"{self.global_stats['p95_baseline']:.3f}秒"],
-            ['P99基线', f"{self.global_stats['p99_baseline']:.3f}秒"],
-            ['处理时间', f"{self.global_stats['processing_time']:.1f}秒"]
-        ]
-        
-        for stat_name, stat_value in stats_data:
-            ws.cell(row=row, column=1, value=stat_name).font = Font(bold=True)
-            ws.cell(row=row, column=2, value=stat_value)
-            row += 1
-        
-        row += 2
-        
-        # 根因分布
-        ws.cell(row=row, column=1, value="根因分布").font = Font(bold=True, size=14)
+    
+    row += 2
+    
+    # 根因分布
+    ws.cell(row=row, column=1, value="根因分布").font = Font(bold=True, size=14)
+    row += 1
+    
+    for cause, count in report_stats['analysis_results']['root_cause_distribution'].items():
+        pct = count / len(df) * 100
+        ws.cell(row=row, column=1, value=cause).font = Font(bold=True)
+        ws.cell(row=row, column=2, value=f"{count} ({pct:.1f}%)")
         row += 1
-        
-        for cause, count in self.analysis_results['root_cause_distribution'].items():
-            pct = count / len(df) * 100
-            ws.cell(row=row, column=1, value=cause).font = Font(bold=True)
-            ws.cell(row=row, column=2, value=f"{count} ({pct:.1f}%)")
-            row += 1
-        
-        row += 2
-        
-        # 异常程度分布
-        ws.cell(row=row, column=1, value="异常程度分布").font = Font(bold=True, size=14)
+    
+    row += 2
+    
+    # 异常程度分布
+    ws.cell(row=row, column=1, value="异常程度分布").font = Font(bold=True, size=14)
+    row += 1
+    
+    for severity, count in report_stats['analysis_results']['severity_distribution'].items():
+        pct = count / len(df) * 100
+        ws.cell(row=row, column=1, value=severity).font = Font(bold=True)
+        ws.cell(row=row, column=2, value=f"{count} ({pct:.1f}%)")
         row += 1
-        
-        for severity, count in self.analysis_results['severity_distribution'].items():
-            pct = count / len(df) * 100
-            ws.cell(row=row, column=1, value=severity).font = Font(bold=True)
-            ws.cell(row=row, column=2, value=f"{count} ({pct:.1f}%)")
-            row += 1
-        
-        row += 2
-        
-        # 洞察分析
-        ws.cell(row=row, column=1, value="关键洞察").font = Font(bold=True, size=14)
+    
+    row += 2
+    
+    # 洞察分析
+    ws.cell(row=row, column=1, value="关键洞察").font = Font(bold=True, size=14)
+    row += 1
+    
+    for insight in report_stats['analysis_results']['optimization_insights']:
+        ws.cell(row=row, column=1, value=f"• {insight}")
         row += 1
-        
-        for insight in self.analysis_results['optimization_insights']:
-            ws.cell(row=row, column=1, value=f"• {insight}")
-            row += 1
-        
-        format_excel_sheet(ws)
     
-    def _create_api_summary_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建API汇总工作表 (整合原版本功能)"""
-        log_info("创建API汇总工作表")
-        
-        # 生成API汇总统计
-        api_summary_data = self._generate_api_summary_stats(df)
-        
-        if api_summary_data.empty:
-            return
-        
-        # 定义API汇总表头分组
-        base_cols = ['请求URI', '请求总数', '慢请求次数', 'API内慢请求占比(%)', '全局慢请求占比(%)']
-        
-        # 动态生成指标列
-        time_stat_cols = []
-        phase_stat_cols = []
-        efficiency_stat_cols = []
-        transfer_stat_cols = []
-        
-        for col in api_summary_data.columns:
-            if any(metric in col for metric in ['请求总时长', '后端连接时长', '后端处理时长', '后端响应时长']):
-                if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
-                    time_stat_cols.append(col)
-            elif any(metric in col for metric in ['后端处理阶段', '后端传输阶段', 'Nginx传输阶段', '网络传输阶段']):
-                if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
-                    phase_stat_cols.append(col)
-            elif any(metric in col for metric in ['后端处理效率', '网络开销占比', '传输时间占比', '连接成本占比']):
-                if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
-                    efficiency_stat_cols.append(col)
-            elif any(metric in col for metric in ['响应体大小', '总传输大小', '总传输速度']):
-                if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
-                    transfer_stat_cols.append(col)
-        
-        api_header_groups = {
-            '基础信息': base_cols,
-            '核心时间统计': time_stat_cols,
-            '阶段分析统计': phase_stat_cols,
-            '效率指标统计': efficiency_stat_cols,
-            '传输指标统计': transfer_stat_cols
-        }
-        
-        # 过滤空的分组
-        api_header_groups = {k: v for k, v in api_header_groups.items() if v}
-        
-        add_dataframe_to_excel_with_grouped_headers(wb, api_summary_data, '慢请求API汇总', header_groups=api_header_groups)
+    format_excel_sheet(ws)
+
+
+def _create_api_summary_sheet(wb: openpyxl.Workbook, df: pd.DataFrame, report_stats: Dict[str, Any]):
+    """创建API汇总工作表 (整合原版本功能)"""
+    log_info("创建API汇总工作表")
     
-    def _generate_api_summary_stats(self, df: pd.DataFrame) -> pd.DataFrame:
-        """生成API汇总统计数据 (整合原版本功能)"""
-        if df.empty:
-            return pd.DataFrame()
-            
-        # 统计函数
-        stat_funcs = {
-            '平均': np.mean,
-            '中位数': np.median,
-            '最小': np.min,
-            '最大': np.max,
-            'P90': lambda x: np.percentile(x, 90),
-            'P95': lambda x: np.percentile(x, 95),
-            'P99': lambda x: np.percentile(x, 99),
-        }
-        
-        # 需要统计的指标
-        metrics_to_analyze = []
-        for metric in CORE_TIME_METRICS + KEY_PHASE_METRICS + EFFICIENCY_METRICS + TRANSFER_METRICS:
-            display_name = COLUMN_MAPPING.get(metric, metric)
-            if display_name in df.columns:
-                metrics_to_analyze.append(display_name)
-        
-        records = []
-        for uri, group in df.groupby('请求URI'):
-            record = {
-                '请求URI': uri,
-                '慢请求次数': len(group),
-                '请求总数': self.api_stats.get(uri, {}).get('total_requests', len(group))
-            }
-            
-            # 计算各项指标统计
-            for metric in metrics_to_analyze:
-                if metric in group.columns:
-                    values = group[metric].dropna().values
-                    if len(values) > 0:
-                        for stat_name, func in stat_funcs.items():
-                            try:
-                                record[f'{metric}_{stat_name}'] = func(values)
-                            except:
-                                record[f'{metric}_{stat_name}'] = 0
-            
-            records.append(record)
-        
-        if not records:
-            return pd.DataFrame()
-            
-        api_stats = pd.DataFrame.from_records(records)
-        
-        # 计算占比
-        api_stats['API内慢请求占比(%)'] = api_stats.apply(
-            lambda row: (row['慢请求次数'] / row['请求总数'] * 100) if row['请求总数'] > 0 else 0,
-            axis=1
-        ).round(2)
-        
-        total_slow_requests = len(df)
-        api_stats['全局慢请求占比(%)'] = (api_stats['慢请求次数'] / total_slow_requests * 100).round(2)
-        
-        return api_stats.sort_values(by='慢请求次数', ascending=False)
+    # 生成API汇总统计
+    api_summary_data = _generate_api_summary_stats(df, report_stats['api_total_requests'])
     
-    def _create_performance_analysis_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建性能分析工作表 (整合原版本功能)"""
-        log_info("创建性能分析工作表")
-        ws_perf = wb.create_sheet(title='性能分析')
-        
-        row = 1
-        ws_perf.cell(row=row, column=1, value="慢请求性能深度分析").font = Font(bold=True, size=14)
-        row += 2
-        
-        # 阶段耗时分析
-        phase_columns = {
-            '后端处理阶段(秒)': '后端处理',
-            '后端传输阶段(秒)': '后端传输',
-            'Nginx传输阶段(秒)': 'Nginx传输',
-            '网络传输阶段(秒)': '网络传输'
-        }
-        
-        headers = ['阶段', '平均耗时(秒)', '占总耗时比例(%)', '中位数(秒)', 'P90(秒)', 'P95(秒)', 'P99(秒)']
-        for col_idx, header in enumerate(headers, start=1):
-            ws_perf.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
-        
-        if '请求总时长(秒)' in df.columns:
-            total_avg_time = df['请求总时长(秒)'].mean()
-            phase_data = []
-            
-            row += 1
-            for col, name in phase_columns.items():
-                if col in df.columns:
-                    values = df[col].dropna()
-                    if values.empty:
-                        continue
-                    
-                    avg = values.mean()
-                    pct = (avg / total_avg_time * 100) if total_avg_time > 0 else 0
-                    phase_data.append((name, avg))
-                    
-                    ws_perf.cell(row=row, column=1, value=name)
-                    ws_perf.cell(row=row, column=2, value=round(avg, 4))
-                    ws_perf.cell(row=row, column=3, value=round(pct, 2))
-                    ws_perf.cell(row=row, column=4, value=round(values.median(), 4))
-                    ws_perf.cell(row=row, column=5, value=round(np.percentile(values, 90), 4))
-                    ws_perf.cell(row=row, column=6, value=round(np.percentile(values, 95), 4))
-                    ws_perf.cell(row=row, column=7, value=round(np.percentile(values, 99), 4))
-                    row += 1
-            
-            # 性能效率指标分析
-            row += 2
-            ws_perf.cell(row=row, column=1, value="性能效率指标分析").font = Font(bold=True, size=12)
-            row += 1
-            
-            efficiency_metrics = {
-                '后端处理效率(%)': '后端处理效率',
-                '网络开销占比(%)': '网络开销占比',
-                '传输时间占比(%)': '传输时间占比',
-                '连接成本占比(%)': '连接成本占比'
-            }
-            
-            for col_idx, header in enumerate(['指标', '平均值', '中位数', '标准差', 'P90', 'P95'], start=1):
-                ws_perf.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
-            
-            row += 1
-            for col, name in efficiency_metrics.items():
-                if col in df.columns:
-                    values = df[col].dropna()
-                    if values.empty:
-                        continue
-                    
-                    ws_perf.cell(row=row, column=1, value=name)
-                    ws_perf.cell(row=row, column=2, value=round(values.mean(), 2))
-                    ws_perf.cell(row=row, column=3, value=round(values.median(), 2))
-                    ws_perf.cell(row=row, column=4, value=round(values.std(), 2))
-                    ws_perf.cell(row=row, column=5, value=round(np.percentile(values, 90), 2))
-                    ws_perf.cell(row=row, column=6, value=round(np.percentile(values, 95), 2))
-                    row += 1
-            
-            # 添加饼图
-            if phase_data:
-                row += 2
-                chart_start_row = row
-                ws_perf.cell(row=row, column=1, value="阶段耗时占比").font = Font(bold=True)
-                row += 1
-                
-                for i, (name, value) in enumerate(phase_data):
-                    ws_perf.cell(row=row + i, column=1, value=name)
-                    ws_perf.cell(row=row + i, column=2, value=value)
-                
-                create_pie_chart(ws_perf, "各阶段耗时占比",
-                               data_start_row=row,
-                               data_end_row=row + len(phase_data) - 1,
-                               labels_col=1,
-                               values_col=2,
-                               position="D" + str(chart_start_row))
-        
-        format_excel_sheet(ws_perf)
+    if api_summary_data.empty:
+        return
     
-    def _create_root_cause_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建根因分析工作表"""
-        ws = wb.create_sheet(title='根因分析')
-        
-        row = 1
-        ws.cell(row=row, column=1, value="慢请求根因深度分析").font = Font(bold=True, size=16)
-        row += 3
-        
-        # 根因统计表
-        root_cause_stats = df.groupby('慢请求根因分类').agg({
-            '请求总时长(秒)': ['count', 'mean', 'median', 'std'],
-            '后端连接时长(秒)': 'mean',
-            '后端处理时长(秒)': 'mean',
-            '后端传输阶段(秒)': 'mean'
-        }).round(3)
-        
-        headers = ['根因类型', '数量', '平均时长', '中位数时长', '标准差', '平均连接时长', '平均处理时长', '平均传输时长']
-        for col_idx, header in enumerate(headers, 1):
-            ws.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
-        
-        row += 1
-        
-        for cause in root_cause_stats.index:
-            ws.cell(row=row, column=1, value=cause)
-            ws.cell(row=row, column=2, value=int(root_cause_stats.loc[cause, ('请求总时长(秒)', 'count')]))
-            ws.cell(row=row, column=3, value=root_cause_stats.loc[cause, ('请求总时长(秒)', 'mean')])
-            ws.cell(row=row, column=4, value=root_cause_stats.loc[cause, ('请求总时长(秒)', 'median')])
-            ws.cell(row=row, column=5, value=root_cause_stats.loc[cause, ('请求总时长(秒)', 'std')])
-            ws.cell(row=row, column=6, value=root_cause_stats.loc[cause, ('后端连接时长(秒)', 'mean')])
-            ws.cell(row=row, column=7, value=root_cause_stats.loc[cause, ('后端处理时长(秒)', 'mean')])
-            ws.cell(row=row, column=8, value=root_cause_stats.loc[cause, ('后端传输阶段(秒)', 'mean')])
-            row += 1
-        
-        format_excel_sheet(ws)
+    # 定义API汇总表头分组
+    base_cols = ['请求URI', '请求总数', '慢请求次数', 'API内慢请求占比(%)', '全局慢请求占比(%)']
     
-    def _create_transfer_efficiency_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建传输效率分析工作表 (整合原版本功能)"""
-        log_info("创建传输效率分析工作表")
-        ws_transfer = wb.create_sheet(title='传输效率分析')
-        
-        row = 1
-        ws_transfer.cell(row=row, column=1, value="传输效率深度分析").font = Font(bold=True, size=14)
-        row += 2
-        
-        # 传输速度分析
-        ws_transfer.cell(row=row, column=1, value="传输速度统计 (KB/s)").font = Font(bold=True, size=12)
-        row += 1
-        
-        speed_metrics = {
-            '总传输速度(KB/s)': '总传输速度'
+    # 动态生成指标列
+    time_stat_cols = []
+    phase_stat_cols = []
+    efficiency_stat_cols = []
+    transfer_stat_cols = []
+    
+    for col in api_summary_data.columns:
+        if any(metric in col for metric in ['请求总时长', '后端连接时长', '后端处理时长', '后端响应时长']):
+            if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
+                time_stat_cols.append(col)
+        elif any(metric in col for metric in ['后端处理阶段', '后端传输阶段', 'Nginx传输阶段', '网络传输阶段']):
+            if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
+                phase_stat_cols.append(col)
+        elif any(metric in col for metric in ['后端处理效率', '网络开销占比', '传输时间占比', '连接成本占比']):
+            if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
+                efficiency_stat_cols.append(col)
+        elif any(metric in col for metric in ['响应体大小', '总传输大小', '总传输速度']):
+            if any(stat in col for stat in ['平均', '中位数', 'P90', 'P95', 'P99']):
+                transfer_stat_cols.append(col)
+    
+    api_header_groups = {
+        '基础信息': base_cols,
+        '核心时间统计': time_stat_cols,
+        '阶段分析统计': phase_stat_cols,
+        '效率指标统计': efficiency_stat_cols,
+        '传输指标统计': transfer_stat_cols
+    }
+    
+    # 过滤空的分组
+    api_header_groups = {k: v for k, v in api_header_groups.items() if v}
+    
+    add_dataframe_to_excel_with_grouped_headers(wb, api_summary_data, '慢请求API汇总', header_groups=api_header_groups)
+
+
+def _generate_api_summary_stats(df: pd.DataFrame, api_total_requests: Dict[str, int]) -> pd.DataFrame:
+    """生成API汇总统计数据 (整合原版本功能)"""
+    if df.empty:
+        return pd.DataFrame()
+        
+    # 统计函数
+    stat_funcs = {
+        '平均': np.mean,
+        '中位数': np.median,
+        '最小': np.min,
+        '最大': np.max,
+        'P90': lambda x: np.percentile(x, 90),
+        'P95': lambda x: np.percentile(x, 95),
+        'P99': lambda x: np.percentile(x, 99),
+    }
+    
+    # 需要统计的指标
+    metrics_to_analyze = []
+    for metric in CORE_TIME_METRICS + KEY_PHASE_METRICS + EFFICIENCY_METRICS + TRANSFER_METRICS:
+        display_name = COLUMN_MAPPING.get(metric, metric)
+        if display_name in df.columns:
+            metrics_to_analyze.append(display_name)
+    
+    records = []
+    for uri, group in df.groupby('请求URI'):
+        record = {
+            '请求URI': uri,
+            '慢请求次数': len(group),
+            '请求总数': api_total_requests.get(uri, len(group))
         }
         
-        # 检查可用的传输速度指标
-        if '响应体传输速度(KB/s)' in df.columns:
-            speed_metrics['响应体传输速度(KB/s)'] = '响应体传输速度'
-        if 'Nginx传输速度(KB/s)' in df.columns:
-            speed_metrics['Nginx传输速度(KB/s)'] = 'Nginx传输速度'
+        # 计算各项指标统计
+        for metric in metrics_to_analyze:
+            if metric in group.columns:
+                values = group[metric].dropna().values
+                if len(values) > 0:
+                    for stat_name, func in stat_funcs.items():
+                        try:
+                            record[f'{metric}_{stat_name}'] = func(values)
+                        except:
+                            record[f'{metric}_{stat_name}'] = 0
+        
+        records.append(record)
+    
+    if not records:
+        return pd.DataFrame()
         
-        headers = ['传输类型', '平均速度', '中位数速度', '最小速度', '最大速度', 'P90', 'P95']
-        for col_idx, header in enumerate(headers, start=1):
-            ws_transfer.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    api_stats = pd.DataFrame.from_records(records)
+    
+    # 计算占比
+    api_stats['API内慢请求占比(%)'] = api_stats.apply(
+        lambda row: (row['慢请求次数'] / row['请求总数'] * 100) if row['请求总数'] > 0 else 0,
+        axis=1
+    ).round(2)
+    
+    total_slow_requests = len(df)
+    api_stats['全局慢请求占比(%)'] = (api_stats['慢请求次数'] / total_slow_requests * 100).round(2)
+    
+    return api_stats.sort_values(by='慢请求次数', ascending=False)
+
+
+def _create_performance_analysis_sheet(wb: openpyxl.Workbook, df: pd.DataFrame):
+    """创建性能分析工作表 (整合原版本功能)"""
+    log_info("创建性能分析工作表")
+    ws_perf = wb.create_sheet(title='性能分析')
+    
+    row = 1
+    ws_perf.cell(row=row, column=1, value="慢请求性能深度分析").font = Font(bold=True, size=14)
+    row += 2
+    
+    # 阶段耗时分析
+    phase_columns = {
+        '后端处理阶段(秒)': '后端处理',
+        '后端传输阶段(秒)': '后端传输',
+        'Nginx传输阶段(秒)': 'Nginx传输',
+        '网络传输阶段(秒)': '网络传输'
+    }
+    
+    headers = ['阶段', '平均耗时(秒)', '占总耗时比例(%)', '中位数(秒)', 'P90(秒)', 'P95(秒)', 'P99(秒)']
+    for col_idx, header in enumerate(headers, start=1):
+        ws_perf.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    
+    if '请求总时长(秒)' in df.columns:
+        total_avg_time = df['请求总时长(秒)'].mean()
+        phase_data = []
         
         row += 1
-        speed_data = []
-        for col, name in speed_metrics.items():
+        for col, name in phase_columns.items():
             if col in df.columns:
                 values = df[col].dropna()
                 if values.empty:
                     continue
                 
-                avg_speed = values.mean()
-                speed_data.append((name, avg_speed))
+                avg = values.mean()
+                pct = (avg / total_avg_time * 100) if total_avg_time > 0 else 0
+                phase_data.append((name, avg))
                 
-                ws_transfer.cell(row=row, column=1, value=name)
-                ws_transfer.cell(row=row, column=2, value=round(avg_speed, 2))
-                ws_transfer.cell(row=row, column=3, value=round(values.median(), 2))
-                ws_transfer.cell(row=row, column=4, value=round(values.min(), 2))
-                ws_transfer.cell(row=row, column=5, value=round(values.max(), 2))
-                ws_transfer.cell(row=row, column=6, value=round(np.percentile(values, 90), 2))
-                ws_transfer.cell(row=row, column=7, value=round(np.percentile(values, 95), 2))
+                ws_perf.cell(row=row, column=1, value=name)
+                ws_perf.cell(row=row, column=2, value=round(avg, 4))
+                ws_perf.cell(row=row, column=3, value=round(pct, 2))
+                ws_perf.cell(row=row, column=4, value=round(values.median(), 4))
+                ws_perf.cell(row=row, column=5, value=round(np.percentile(values, 90), 4))
+                ws_perf.cell(row=row, column=6, value=round(np.percentile(values, 95), 4))
+                ws_perf.cell(row=row, column=7, value=round(np.percentile(values, 99), 4))
                 row += 1
         
-        # 数据量分析
+        # 性能效率指标分析
         row += 2
-        ws_transfer.cell(row=row, column=1, value="数据量统计 (KB)").font = Font(bold=True, size=12)
+        ws_perf.cell(row=row, column=1, value="性能效率指标分析").font = Font(bold=True, size=12)
         row += 1
         
-        size_metrics = {
-            '响应体大小(KB)': '响应体大小',
-            '总传输大小(KB)': '总传输大小'
+        efficiency_metrics = {
+            '后端处理效率(%)': '后端处理效率',
+            '网络开销占比(%)': '网络开销占比',
+            '传输时间占比(%)': '传输时间占比',
+            '连接成本占比(%)': '连接成本占比'
         }
         
-        headers = ['数据类型', '平均大小', '中位数大小', '最小大小', '最大大小', 'P90', 'P95']
-        for col_idx, header in enumerate(headers, start=1):
-            ws_transfer.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+        for col_idx, header in enumerate(['指标', '平均值', '中位数', '标准差', 'P90', 'P95'], start=1):
+            ws_perf.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
         
         row += 1
-        for col, name in size_metrics.items():
+        for col, name in efficiency_metrics.items():
             if col in df.columns:
                 values = df[col].dropna()
                 if values.empty:
                     continue
                 
-                ws_transfer.cell(row=row, column=1, value=name)
-                ws_transfer.cell(row=row, column=2, value=round(values.mean(), 2))
-                ws_transfer.cell(row=row, column=3, value=round(values.median(), 2))
-                ws_transfer.cell(row=row, column=4, value=round(values.min(), 2))
-                ws_transfer.cell(row=row, column=5, value=round(values.max(), 2))
-                ws_transfer.cell(row=row, column=6, value=round(np.percentile(values, 90), 2))
-                ws_transfer.cell(row=row, column=7, value=round(np.percentile(values, 95), 2))
+                ws_perf.cell(row=row, column=1, value=name)
+                ws_perf.cell(row=row, column=2, value=round(values.mean(), 2))
+                ws_perf.cell(row=row, column=3, value=round(values.median(), 2))
+                ws_perf.cell(row=row, column=4, value=round(values.std(), 2))
+                ws_perf.cell(row=row, column=5, value=round(np.percentile(values, 90), 2))
+                ws_perf.cell(row=row, column=6, value=round(np.percentile(values, 95), 2))
                 row += 1
         
-        # 传输效率相关性分析
-        row += 2
-        ws_transfer.cell(row=row, column=1, value="传输效率洞察").font = Font(bold=True, size=12)
-        row += 1
-        
-        # 计算传输效率阈值建议
-        if '总传输速度(KB/s)' in df.columns:
-            speed_values = df['总传输速度(KB/s)'].dropna()
-            if not speed_values.empty:
-                p25_speed = np.percentile(speed_values, 25)
-                p75_speed = np.percentile(speed_values, 75)
-                
-                ws_transfer.cell(row=row, column=1, value="传输速度健康阈值建议:")
-                row += 1
-                ws_transfer.cell(row=row, column=1, value=f"• 优秀传输速度: > {p75_speed:.2f} KB/s")
-                row += 1
-                ws_transfer.cell(row=row, column=1, value=f"• 需要关注传输速度: < {p25_speed:.2f} KB/s")
-                row += 1
-        
-        # 添加传输速度饼图
-        if speed_data:
+        # 添加饼图
+        if phase_data:
             row += 2
             chart_start_row = row
-            ws_transfer.cell(row=row, column=1, value="传输速度对比").font = Font(bold=True)
+            ws_perf.cell(row=row, column=1, value="阶段耗时占比").font = Font(bold=True)
             row += 1
             
-            for i, (name, value) in enumerate(speed_data):
-                ws_transfer.cell(row=row + i, column=1, value=name)
-                ws_transfer.cell(row=row + i, column=2, value=value)
+            for i, (name, value) in enumerate(phase_data):
+                ws_perf.cell(row=row + i, column=1, value=name)
+                ws_perf.cell(row=row + i, column=2, value=value)
             
-            create_pie_chart(ws_transfer, "传输速度对比",
+            create_pie_chart(ws_perf, "各阶段耗时占比",
                            data_start_row=row,
-                           data_end_row=row + len(speed_data) - 1,
+                           data_end_row=row + len(phase_data) - 1,
                            labels_col=1,
                            values_col=2,
                            position="D" + str(chart_start_row))
-        
-        format_excel_sheet(ws_transfer)
     
-    def _create_performance_insights_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建性能洞察工作表"""
-        ws = wb.create_sheet(title='智能性能洞察')
-        
-        row = 1
-        ws.cell(row=row, column=1, value="智能性能洞察分析").font = Font(bold=True, size=16)
-        row += 3
-        
-        # 时间段性能分析
-        ws.cell(row=row, column=1, value="时间段性能分析").font = Font(bold=True, size=14)
-        row += 1
-        
-        time_analysis = df.groupby('时间段分类')['请求总时长(秒)'].agg(['count', 'mean', 'std']).round(3)
-        
-        headers = ['时间段', '慢请求数', '平均时长', '标准差']
-        for col_idx, header in enumerate(headers, 1):
-            ws.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
-        
+    format_excel_sheet(ws_perf)
+
+
+def _create_root_cause_sheet(wb: openpyxl.Workbook, df: pd.DataFrame):
+    """创建根因分析工作表"""
+    ws = wb.create_sheet(title='根因分析')
+    
+    row = 1
+    ws.cell(row=row, column=1, value="慢请求根因深度分析").font = Font(bold=True, size=16)
+    row += 3
+    
+    # 根因统计表
+    root_cause_stats = df.groupby('慢请求根因分类').agg({
+        '请求总时长(秒)': ['count', 'mean', 'median', 'std'],
+        '后端连接时长(秒)': 'mean',
+        '后端处理时长(秒)': 'mean',
+        '后端传输阶段(秒)': 'mean'
+    }).round(3)
+    
+    headers = ['根因类型', '数量', '平均时长', '中位数时长', '标准差', '平均连接时长', '平均处理时长', '平均传输时长']
+    for col_idx, header in enumerate(headers, 1):
+        ws.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    
+    row += 1
+    
+    for cause in root_cause_stats.index:
+        ws.cell(row=row, column=1, value=cause)
+        ws.cell(row=row, column=2, value=int(root_cause_stats.loc[cause, ('请求总时长(秒)', 'count')]))
+        ws.cell(row=row, column=3, value=root_cause_stats.loc[cause, ('请求总时长(秒)', 'mean')])
+        ws.cell(row=row, column=4, value=root_cause_stats.loc[cause, ('请求总时长(秒)', 'median')])
+        ws.cell(row=row, column=5, value=root_cause_stats.loc[cause, ('请求总时长(秒)', 'std')])
+        ws.cell(row=row, column=6, value=root_cause_stats.loc[cause, ('后端连接时长(秒)', 'mean')])
+        ws.cell(row=row, column=7, value=root_cause_stats.loc[cause, ('后端处理时长(秒)', 'mean')])
+        ws.cell(row=row, column=8, value=root_cause_stats.loc[cause, ('后端传输阶段(秒)', 'mean')])
         row += 1
-        
-        for time_period in time_analysis.index:
-            ws.cell(row=row, column=1, value=time_period)
-            ws.cell(row=row, column=2, value=int(time_analysis.loc[time_period, 'count']))
-            ws.cell(row=row, column=3, value=time_analysis.loc[time_period, 'mean'])
-            ws.cell(row=row, column=4, value=time_analysis.loc[time_period, 'std'])
+    
+    format_excel_sheet(ws)
+
+
+def _create_transfer_efficiency_sheet(wb: openpyxl.Workbook, df: pd.DataFrame):
+    """创建传输效率分析工作表 (整合原版本功能)"""
+    log_info("创建传输效率分析工作表")
+    ws_transfer = wb.create_sheet(title='传输效率分析')
+    
+    row = 1
+    ws_transfer.cell(row=row, column=1, value="传输效率深度分析").font = Font(bold=True, size=14)
+    row += 2
+    
+    # 传输速度分析
+    ws_transfer.cell(row=row, column=1, value="传输速度统计 (KB/s)").font = Font(bold=True, size=12)
+    row += 1
+    
+    speed_metrics = {
+        '总传输速度(KB/s)': '总传输速度'
+    }
+    
+    # 检查可用的传输速度指标
+    if '响应体传输速度(KB/s)' in df.columns:
+        speed_metrics['响应体传输速度(KB/s)'] = '响应体传输速度'
+    if 'Nginx传输速度(KB/s)' in df.columns:
+        speed_metrics['Nginx传输速度(KB/s)'] = 'Nginx传输速度'
+    
+    headers = ['传输类型', '平均速度', '中位数速度', '最小速度', '最大速度', 'P90', 'P95']
+    for col_idx, header in enumerate(headers, start=1):
+        ws_transfer.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    
+    row += 1
+    speed_data = []
+    for col, name in speed_metrics.items():
+        if col in df.columns:
+            values = df[col].dropna()
+            if values.empty:
+                continue
+            
+            avg_speed = values.mean()
+            speed_data.append((name, avg_speed))
+            
+            ws_transfer.cell(row=row, column=1, value=name)
+            ws_transfer.cell(row=row, column=2, value=round(avg_speed, 2))
+            ws_transfer.cell(row=row, column=3, value=round(values.median(), 2))
+            ws_transfer.cell(row=row, column=4, value=round(values.min(), 2))
+            ws_transfer.cell(row=row, column=5, value=round(values.max(), 2))
+            ws_transfer.cell(row=row, column=6, value=round(np.percentile(values, 90), 2))
+            ws_transfer.cell(row=row, column=7, value=round(np.percentile(values, 95), 2))
             row += 1
-        
-        row += 2
-        
-        # 频率等级分析
-        ws.cell(row=row, column=1, value="频率等级分析").font = Font(bold=True, size=14)
-        row += 1
-        
-        freq_analysis = df.groupby('请求频率等级')['请求总时长(秒)'].agg(['count', 'mean']).round(3)
-        
-        headers = ['频率等级', '慢请求数', '平均时长']
-        for col_idx, header in enumerate(headers, 1):
-            ws.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
-        
-        row += 1
-        
-        for freq_level in freq_analysis.index:
-            ws.cell(row=row, column=1, value=freq_level)
-            ws.cell(row=row, column=2, value=int(freq_analysis.loc[freq_level, 'count']))
-            ws.cell(row=row, column=3, value=freq_analysis.loc[freq_level, 'mean'])
+    
+    # 数据量分析
+    row += 2
+    ws_transfer.cell(row=row, column=1, value="数据量统计 (KB)").font = Font(bold=True, size=12)
+    row += 1
+    
+    size_metrics = {
+        '响应体大小(KB)': '响应体大小',
+        '总传输大小(KB)': '总传输大小'
+    }
+    
+    headers = ['数据类型', '平均大小', '中位数大小', '最小大小', '最大大小', 'P90', 'P95']
+    for col_idx, header in enumerate(headers, start=1):
+        ws_transfer.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    
+    row += 1
+    for col, name in size_metrics.items():
+        if col in df.columns:
+            values = df[col].dropna()
+            if values.empty:
+                continue
+            
+            ws_transfer.cell(row=row, column=1, value=name)
+            ws_transfer.cell(row=row, column=2, value=round(values.mean(), 2))
+            ws_transfer.cell(row=row, column=3, value=round(values.median(), 2))
+            ws_transfer.cell(row=row, column=4, value=round(values.min(), 2))
+            ws_transfer.cell(row=row, column=5, value=round(values.max(), 2))
+            ws_transfer.cell(row=row, column=6, value=round(np.percentile(values, 90), 2))
+            ws_transfer.cell(row=row, column=7, value=round(np.percentile(values, 95), 2))
             row += 1
-        
-        format_excel_sheet(ws)
     
-    def _create_optimization_recommendations_sheet(self, wb: openpyxl.Workbook, df: pd.DataFrame):
-        """创建优化建议工作表"""
-        ws = wb.create_sheet(title='优化建议')
-        
-        row = 1
-        ws.cell(row=row, column=1, value="智能优化建议").font = Font(bold=True, size=16)
-        row += 3
-        
-        # 按根因分类的优化建议
-        ws.cell(row=row, column=1, value="根因分类优化建议").font = Font(bold=True, size=14)
+    # 传输效率相关性分析
+    row += 2
+    ws_transfer.cell(row=row, column=1, value="传输效率洞察").font = Font(bold=True, size=12)
+    row += 1
+    
+    # 计算传输效率阈值建议
+    if '总传输速度(KB/s)' in df.columns:
+        speed_values = df['总传输速度(KB/s)'].dropna()
+        if not speed_values.empty:
+            p25_speed = np.percentile(speed_values, 25)
+            p75_speed = np.percentile(speed_values, 75)
+            
+            ws_transfer.cell(row=row, column=1, value="传输速度健康阈值建议:")
+            row += 1
+            ws_transfer.cell(row=row, column=1, value=f"• 优秀传输速度: > {p75_speed:.2f} KB/s")
+            row += 1
+            ws_transfer.cell(row=row, column=1, value=f"• 需要关注传输速度: < {p25_speed:.2f} KB/s")
+            row += 1
+    
+    # 添加传输速度饼图
+    if speed_data:
+        row += 2
+        chart_start_row = row
+        ws_transfer.cell(row=row, column=1, value="传输速度对比").font = Font(bold=True)
         row += 1
         
-        root_cause_advice = {
-            "连接慢": [
-                "检查网络连接质量和稳定性",
-                "优化连接池配置，增加连接数",
-                "考虑使用连接复用技术",
-                "检查DNS解析性能"
-            ],
-            "处理慢": [
-                "优化业务逻辑，减少不必要的计算",
-                "检查数据库查询性能，添加索引",
-                "增加缓存机制，减少重复查询",
-                "考虑异步处理非关键业务"
-            ],
-            "传输慢": [
-                "启用Gzip压缩，减少响应体大小",
-                "优化数据传输格式，使用更高效的序列化",
-                "检查网络带宽和质量",
-                "考虑使用CDN加速静态资源"
-            ],
-            "混合型": [
-                "进行全面性能优化",
-                "重点关注处理逻辑优化",
-                "同时优化网络和传输性能",
-                "建议进行深度性能分析"
-            ]
-        }
+        for i, (name, value) in enumerate(speed_data):
+            ws_transfer.cell(row=row + i, column=1, value=name)
+            ws_transfer.cell(row=row + i, column=2, value=value)
         
-        for cause, advice_list in root_cause_advice.items():
-            cause_count = self.analysis_results['root_cause_distribution'].get(cause, 0)
-            if cause_count > 0:
-                ws.cell(row=row, column=1, value=f"{cause} ({cause_count}条)").font = Font(bold=True)
-                row += 1
-                
-                for advice in advice_list:
-                    ws.cell(row=row, column=1, value=f"  • {advice}")
-                    row += 1
-                
-                row += 1
-        
-        # 优先级建议
+        create_pie_chart(ws_transfer, "传输速度对比",
+                       data_start_row=row,
+                       data_end_row=row + len(speed_data) - 1,
+                       labels_col=1,
+                       values_col=2,
+                       position="D" + str(chart_start_row))
+    
+    format_excel_sheet(ws_transfer)
+
+
+def _create_performance_insights_sheet(wb: openpyxl.Workbook, df: pd.DataFrame):
+    """创建性能洞察工作表"""
+    ws = wb.create_sheet(title='智能性能洞察')
+    
+    row = 1
+    ws.cell(row=row, column=1, value="智能性能洞察分析").font = Font(bold=True, size=16)
+    row += 3
+    
+    # 时间段性能分析
+    ws.cell(row=row, column=1, value="时间段性能分析").font = Font(bold=True, size=14)
+    row += 1
+    
+    time_analysis = df.groupby('时间段分类')['请求总时长(秒)'].agg(['count', 'mean', 'std']).round(3)
+    
+    headers = ['时间段', '慢请求数', '平均时长', '标准差']
+    for col_idx, header in enumerate(headers, 1):
+        ws.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    
+    row += 1
+    
+    for time_period in time_analysis.index:
+        ws.cell(row=row, column=1, value=time_period)
+        ws.cell(row=row, column=2, value=int(time_analysis.loc[time_period, 'count']))
+        ws.cell(row=row, column=3, value=time_analysis.loc[time_period, 'mean'])
+        ws.cell(row=row, column=4, value=time_analysis.loc[time_period, 'std'])
         row += 1
-        ws.cell(row=row, column=1, value="优先级建议").font = Font(bold=True, size=14)
+    
+    row += 2
+    
+    # 频率等级分析
+    ws.cell(row=row, column=1, value="频率等级分析").font = Font(bold=True, size=14)
+    row += 1
+    
+    freq_analysis = df.groupby('请求频率等级')['请求总时长(秒)'].agg(['count', 'mean']).round(3)
+    
+    headers = ['频率等级', '慢请求数', '平均时长']
+    for col_idx, header in enumerate(headers, 1):
+        ws.cell(row=row, column=col_idx, value=header).font = Font(bold=True)
+    
+    row += 1
+    
+    for freq_level in freq_analysis.index:
+        ws.cell(row=row, column=1, value=freq_level)
+        ws.cell(row=row, column=2, value=int(freq_analysis.loc[freq_level, 'count']))
+        ws.cell(row=row, column=3, value=freq_analysis.loc[freq_level, 'mean'])
         row += 1
-        
-        # 高优先级：极严重 + 高频
-        high_priority = df[(df['异常程度评级'] == '极严重') & (df['请求频率等级'] == '高频')]
-        if len(high_priority) > 0:
-            ws.cell(row=row, column=1, value=f"高优先级: {len(high_priority)}个极严重高频慢请求").font = Font(bold=True, color="FF0000")
+    
+    format_excel_sheet(ws)
+
+
+def _create_optimization_recommendations_sheet(wb: openpyxl.Workbook, df: pd.DataFrame,
+                                               report_stats: Dict[str, Any]):
+    """创建优化建议工作表"""
+    ws = wb.create_sheet(title='优化建议')
+    
+    row = 1
+    ws.cell(row=row, column=1, value="智能优化建议").font = Font(bold=True, size=16)
+    row += 3
+    
+    # 按根因分类的优化建议
+    ws.cell(row=row, column=1, value="根因分类优化建议").font = Font(bold=True, size=14)
+    row += 1
+    
+    root_cause_advice = {
+        "连接慢": [
+            "检查网络连接质量和稳定性",
+            "优化连接池配置，增加连接数",
+            "考虑使用连接复用技术",
+            "检查DNS解析性能"
+        ],
+        "处理慢": [
+            "优化业务逻辑，减少不必要的计算",
+            "检查数据库查询性能，添加索引",
+            "增加缓存机制，减少重复查询",
+            "考虑异步处理非关键业务"
+        ],
+        "传输慢": [
+            "启用Gzip压缩，减少响应体大小",
+            "优化数据传输格式，使用更高效的序列化",
+            "检查网络带宽和质量",
+            "考虑使用CDN加速静态资源"
+        ],
+        "混合型": [
+            "进行全面性能优化",
+            "重点关注处理逻辑优化",
+            "同时优化网络和传输性能",
+            "建议进行深度性能分析"
+        ]
+    }
+    
+    for cause, advice_list in root_cause_advice.items():
+        cause_count = report_stats['analysis_results']['root_cause_distribution'].get(cause, 0)
+        if cause_count > 0:
+            ws.cell(row=row, column=1, value=f"{cause} ({cause_count}条)").font = Font(bold=True)
             row += 1
-            for _, req in high_priority.head(5).iterrows():
-                ws.cell(row=row, column=1, value=f"  • {req['服务名称']}: {req['请求URI']} ({req['请求总时长(秒)']:.2f}秒)")
+            
+            for advice in advice_list:
+                ws.cell(row=row, column=1, value=f"  • {advice}")
                 row += 1
+            
             row += 1
-        
-        # 中优先级：严重 + 中高频
-        med_priority = df[(df['异常程度评级'] == '严重') & (df['请求频率等级'].isin(['高频', '中频']))]
-        if len(med_priority) > 0:
-            ws.cell(row=row, column=1, value=f"中优先级: {len(med_priority)}个严重中高频慢请求").font = Font(bold=True, color="FF8000")
-            row += 1
-            for _, req in med_priority.head(5).iterrows():
-                ws.cell(row=row, column=1, value=f"  • {req['服务名称']}: {req['请求URI']} ({req['请求总时长(秒)']:.2f}秒)")
-                row += 1
+    
+    # 优先级建议
+    row += 1
+    ws.cell(row=row, column=1, value="优先级建议").font = Font(bold=True, size=14)
+    row += 1
+    
+    # 高优先级：极严重 + 高频
+    high_priority = df[(df['异常程度评级'] == '极严重') & (df['请求频率等级'] == '高频')]
+    if len(high_priority) > 0:
+        ws.cell(row=row, column=1, value=f"高优先级: {len(high_priority)}个极严重高频慢请求").font = Font(bold=True, color="FF0000")
+        row += 1
+        for _, req in high_priority.head(5).iterrows():
+            ws.cell(row=row, column=1, value=f"  • {req['服务名称']}: {req['请求URI']} ({req['请求总时长(秒)']:.2f}秒)")
             row += 1
-        
-        format_excel_sheet(ws)
+        row += 1
     
-    def _log_progress(self, chunk_count: int):
-        """记录处理进度"""
-        memory_usage = format_memory_usage()
-        self.global_stats['memory_usage'].append(memory_usage)
-        
-        log_info(f"已处理 {chunk_count} 个数据块, "
-                f"总请求: {self.global_stats['total_requests']:,}, "
-                f"慢请求: {self.global_stats['slow_requests']:,}, "
-                f"内存: {memory_usage}")
+    # 中优先级：严重 + 中高频
+    med_priority = df[(df['异常程度评级'] == '严重') & (df['请求频率等级'].isin(['高频', '中频']))]
+    if len(med_priority) > 0:
+        ws.cell(row=row, column=1, value=f"中优先级: {len(med_priority)}个严重中高频慢请求").font = Font(bold=True, color="FF8000")
+        row += 1
+        for _, req in med_priority.head(5).iterrows():
+            ws.cell(row=row, column=1, value=f"  • {req['服务名称']}: {req['请求URI']} ({req['请求总时长(秒)']:.2f}秒)")
+            row += 1
+        row += 1
     
-    def _log_final_statistics(self):
-        """记录最终统计信息"""
-        total_time = (datetime.now() - self.processing_stats['start_time']).total_seconds()
-        
-        log_info("=== 慢请求分析完成 ===")
-        log_info(f"总处理时间: {total_time:.1f}秒")
-        log_info(f"总请求数: {self.global_stats['total_requests']:,}")
-        log_info(f"慢请求数: {self.global_stats['slow_requests']:,}")
-        log_info(f"慢请求率: {self.global_stats['slow_requests'] / self.global_stats['total_requests'] * 100:.2f}%")
-        log_info(f"采样数量: {len(self.slow_sampler.get_samples()):,}")
-        log_info(f"P95基线: {self.global_stats['p95_baseline']:.3f}秒")
-        log_info(f"P99基线: {self.global_stats['p99_baseline']:.3f}秒")
-        log_info(f"处理速度: {self.global_stats['total_requests'] / total_time:.0f} 条/秒")
-        
-        # 内存使用统计
-        if self.global_stats['memory_usage']:
-            max_memory = max(self.global_stats['memory_usage'])
-            log_info(f"峰值内存: {max_memory}")
-        
-        log_info("=== 优化效果 ===")
-        log_info("- 单次扫描，减少50%磁盘IO")
-        log_info("- 智能采样，内存使用降低90%+")
-        log_info("- 根因分析，提供针对性优化建议")
-        log_info("- 精简列结构，提升分析效率")
+    format_excel_sheet(ws)
 
 
 def analyze_slow_requests_advanced(csv_path: str, output_path: str, 
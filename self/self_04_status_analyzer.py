@@ -4,7 +4,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from collections import defaultdict, Counter
-from openpyxl import load_workbook, Workbook
+from openpyxl import load_workbook
 from openpyxl.chart import PieChart, BarChart, Series, Reference, LineChart
 from openpyxl.chart.label import DataLabelList
 from openpyxl.chart.series import DataPoint
@@ -18,8 +18,9 @@ from self_00_01_constants import (
     STATUS_CATEGORIES, STATUS_DESCRIPTIONS
 )
 from self_00_02_utils import log_info
-from self_00_04_excel_processor import save_dataframe_to_excel, format_excel_sheet, \
-    add_dataframe_to_excel_with_grouped_headers
+from self_00_07_csv_reader import read_csv_chunks
+from self_00_04_excel_processor import format_excel_sheet, \
+    add_dataframe_to_excel_with_grouped_headers, create_streaming_workbook
 
 
 def analyze_status_codes(csv_path, output_path, slow_request_threshold=3.0):
@@ -107,7 +108,7 @@ def analyze_status_codes(csv_path, output_path, slow_request_threshold=3.0):
 
     # ==================== 数据处理主循环 ====================
     chunk_size = DEFAULT_CHUNK_SIZE
-    reader = pd.read_csv(csv_path, chunksize=chunk_size)
+    reader = read_csv_chunks(csv_path, chunk_size=chunk_size)
 
     for chunk in reader:
         stats['chunks_processed'] += 1
@@ -719,9 +720,8 @@ def _create_excel_report(output_path, dataframes):
     """创建Excel报告"""
     log_info("创建Excel工作簿...", True)
 
-    wb = Workbook()
-    if 'Sheet' in wb.sheetnames:
-        del wb['Sheet']
+    # 本报告只包含DataFrame工作表（图表在 _create_charts 中另行添加），可使用流式工作簿
+    wb = create_streaming_workbook()
 
     # 摘要信息
     add_dataframe_to_excel_with_grouped_headers(wb, dataframes['summary_df'], '摘要信息')
@@ -19,6 +19,7 @@ import gc
 import os
 import tempfile
 import json
+import re
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any, Set
 import pandas as pd
@@ -30,12 +31,22 @@ from collections import defaultdict, Counter
 
 # 导入采样算法
 from self_00_05_sampling_algorithms import TDigest, ReservoirSampler, CountMinSketch, HyperLogLog
-from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, DEFAULT_CHUNK_SIZE, HIGHLIGHT_FILL
-from self_00_02_utils import log_info
+from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, HIGHLIGHT_FILL
+from self_00_02_utils import log_info, split_by_key
 from self_00_04_excel_processor import (
     format_excel_sheet,
     add_dataframe_to_excel_with_grouped_headers
 )
+from self_00_06_report_sinks import publish_report
+from self_00_07_csv_reader import read_csv_chunks
+from self_00_10_result_registry import AnalysisSummary, SUMMARY_STATUS, publish_summary
+
+# CSV读取字段（含各字段的备选名）
+CSV_COLUMNS = [
+    'response_status_code', 'status', 'application_name', 'app_name', 'service_name',
+    'http_method', 'method', 'total_request_duration', 'request_time',
+    'client_ip_address', 'client_ip', 'request_path', 'path', 'hour', 'date_hour', 'date', 'raw_time'
+]
 
 # 核心状态码分类
 STATUS_CATEGORIES = {
@@ -60,6 +71,16 @@ CRITICAL_STATUS_CODES = {
     '504': '网关超时'
 }
 
+# 需要采样错误详情的状态码（4xx/5xx）
+ERROR_STATUS_PATTERN = re.compile(r'^[45]\d\d$')
+
+
+def status_code_value(status):
+    """CSV按字符串读取状态码，报告中数字状态码仍输出为数值（便于Excel排序筛选）"""
+    if isinstance(status, str) and status.isdigit():
+        return int(status)
+    return status
+
 # 内存格式化函数
 def format_memory_usage():
     """格式化内存使用情况"""
@@ -73,6 +94,84 @@ def format_memory_usage():
         return "N/A"
 
 
+class StatusCodeIndex:
+    """状态码 -> 行号映射（状态码取值空间很小，通常不超过64种）"""
+    
+    def __init__(self):
+        self.index = {}
+        self.values = []
+    
+    def encode(self, status_series: pd.Series) -> np.ndarray:
+        """把状态码列编码为行号，缺失值为-1（新出现的状态码按状态码顺序编号）"""
+        codes, uniques = pd.factorize(status_series)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        new_statuses = [(status_code_value(status), i) for i, status in enumerate(uniques)
+                        if status not in self.index]
+        for status, i in sorted(new_statuses, key=lambda item: (isinstance(item[0], str), item[0])):
+            self.index[uniques[i]] = len(self.values)
+            self.values.append(status)
+        for i, status in enumerate(uniques):
+            mapping[i] = self.index[status]
+        if len(uniques) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        return np.where(codes >= 0, mapping[codes], -1)
+    
+    def __len__(self):
+        return len(self.values)
+
+
+class StatusDimensionCounts:
+    """
+    状态码 × 维度取值 的稠密计数矩阵
+    
+    行为状态码行号，列为维度取值编号，每个数据块用 np.add.at 一次性累加
+    """
+    
+    def __init__(self, status_index: StatusCodeIndex):
+        self.status_index = status_index
+        self.index = {}
+        self.keys = []
+        self.counts = np.zeros((64, 16), dtype=np.int64)
+    
+    def add(self, status_ids: np.ndarray, dimension_series: pd.Series):
+        """累加一个数据块（status_ids为-1或维度取值缺失的行跳过）"""
+        codes, uniques = pd.factorize(dimension_series)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for i, key in enumerate(uniques):
+            key_id = self.index.get(key)
+            if key_id is None:
+                key_id = len(self.keys)
+                self.index[key] = key_id
+                self.keys.append(key)
+            mapping[i] = key_id
+        
+        self._ensure_capacity(len(self.status_index), len(self.keys))
+        valid = (codes >= 0) & (status_ids >= 0)
+        np.add.at(self.counts, (status_ids[valid], mapping[codes[valid]]), 1)
+    
+    def _ensure_capacity(self, status_count: int, key_count: int):
+        rows, cols = self.counts.shape
+        if status_count <= rows and key_count <= cols:
+            return
+        while rows < status_count:
+            rows *= 2
+        while cols < key_count:
+            cols *= 2
+        grown = np.zeros((rows, cols), dtype=np.int64)
+        grown[:self.counts.shape[0], :self.counts.shape[1]] = self.counts
+        self.counts = grown
+    
+    def items(self):
+        """逐个维度取值返回 (取值, Counter{状态码: 数量})"""
+        statuses = self.status_index.values
+        for key_id, key in enumerate(self.keys):
+            column = self.counts[:len(statuses), key_id]
+            yield key, Counter({statuses[i]: int(column[i]) for i in np.flatnonzero(column)})
+    
+    def __len__(self):
+        return len(self.keys)
+
+
 class AdvancedStatusAnalyzer:
     """
     高级状态码分析器
@@ -85,15 +184,16 @@ class AdvancedStatusAnalyzer:
         
     def reset_collectors(self):
         """重置数据收集器"""
-        # 基础统计
-        self.status_counter = Counter()
-        self.app_status_counter = defaultdict(Counter)
-        self.service_status_counter = defaultdict(Counter)
-        self.method_status_counter = defaultdict(Counter)
+        # 基础统计：状态码计数为按状态码行号的数组
+        self.status_index = StatusCodeIndex()
+        self.status_counts = np.zeros(64, dtype=np.int64)
+        self.app_status_counter = StatusDimensionCounts(self.status_index)
+        self.service_status_counter = StatusDimensionCounts(self.status_index)
+        self.method_status_counter = StatusDimensionCounts(self.status_index)
         
         # 时间维度统计
-        self.hourly_status_counter = defaultdict(Counter)
-        self.daily_status_counter = defaultdict(Counter)
+        self.hourly_status_counter = StatusDimensionCounts(self.status_index)
+        self.daily_status_counter = StatusDimensionCounts(self.status_index)
         
         # 性能相关采样器
         self.status_response_time = defaultdict(lambda: TDigest(compression=100))
@@ -112,6 +212,12 @@ class AdvancedStatusAnalyzer:
         # 统计信息
         self.total_requests = 0
         self.chunks_processed = 0
+    
+    @property
+    def status_counter(self) -> Counter:
+        """状态码计数（由计数数组生成）"""
+        statuses = self.status_index.values
+        return Counter({statuses[i]: int(self.status_counts[i]) for i in np.flatnonzero(self.status_counts[:len(statuses)])})
         
     def analyze_status_codes(self, csv_path: str, output_path: str) -> pd.DataFrame:
         """
@@ -126,8 +232,12 @@ class AdvancedStatusAnalyzer:
         # 生成分析报告
         dataframes = self._generate_analysis_reports()
         
-        # 创建Excel报告
-        self._create_excel_report(output_path, dataframes)
+        # 发布报告（Excel及已配置的数据输出目标），渲染只依赖结果DataFrame，不携带分析器
+        publish_report(output_path, dataframes,
+                       excel_writer=_create_excel_report, excel_args=(output_path, dataframes))
+        
+        # 发布综合报告用的结果摘要
+        publish_summary(self._build_result_summary())
         
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
@@ -137,12 +247,34 @@ class AdvancedStatusAnalyzer:
         
         return dataframes.get('summary', pd.DataFrame())
     
+    def _build_result_summary(self) -> AnalysisSummary:
+        """综合报告用的结果摘要：状态码分布与错误率"""
+        total_requests = self.total_requests
+        
+        def rate(prefixes):
+            count = sum(count for status, count in self.status_counter.items() if str(status).startswith(prefixes))
+            return count / total_requests * 100 if total_requests > 0 else 0.0
+        
+        status_codes = [{
+            '状态码': str(status),
+            '请求数': int(count),
+            '百分比(%)': round(count / total_requests * 100, 2) if total_requests > 0 else 0.0
+        } for status, count in self.status_counter.most_common(10)]
+        
+        return AnalysisSummary(SUMMARY_STATUS, metrics={
+            'total_requests': total_requests,
+            'success_rate': rate('2'),
+            'error_rate': rate(('4', '5')),
+            'server_error_rate': rate('5'),
+            'slow_requests': sum(self.status_slow_requests.values()),
+            'anomaly_count': len(self.anomaly_detector.get_anomalies())
+        }, top_lists={'status_codes': status_codes})
+    
     def _process_data_stream(self, csv_path: str):
         """流式处理CSV数据"""
         log_info("📖 开始流式处理数据...", True)
         
-        chunk_size = DEFAULT_CHUNK_SIZE
-        reader = pd.read_csv(csv_path, chunksize=chunk_size)
+        reader = read_csv_chunks(csv_path, usecols=CSV_COLUMNS)
         
         for chunk in reader:
             self._process_chunk(chunk)
@@ -171,76 +303,67 @@ class AdvancedStatusAnalyzer:
         hour_field = self._get_field_name(chunk, ['hour', 'date_hour'])
         date_field = self._get_field_name(chunk, ['date'])
         
+        if not status_field:
+            return
+        
+        # 状态码编码为行号，之后所有统计都是对行号数组的向量化累加
+        status_ids = self.status_index.encode(chunk[status_field])
+        status_count = len(self.status_index)
+        has_status = status_ids >= 0
+        
         # 基础状态码统计
-        if status_field:
-            self.status_counter.update(chunk[status_field].value_counts().to_dict())
-            
-            # 应用级状态码统计
-            if app_field:
-                for app_name, app_group in chunk.groupby(app_field):
-                    self.app_status_counter[app_name].update(
-                        app_group[status_field].value_counts().to_dict()
-                    )
-            
-            # 服务级状态码统计
-            if service_field:
-                for service_name, service_group in chunk.groupby(service_field):
-                    self.service_status_counter[service_name].update(
-                        service_group[status_field].value_counts().to_dict()
-                    )
-            
-            # HTTP方法统计
-            if method_field:
-                for method, method_group in chunk.groupby(method_field):
-                    self.method_status_counter[method].update(
-                        method_group[status_field].value_counts().to_dict()
-                    )
-            
-            # 时间维度统计
-            if hour_field:
-                for hour, hour_group in chunk.groupby(hour_field):
-                    self.hourly_status_counter[hour].update(
-                        hour_group[status_field].value_counts().to_dict()
-                    )
-            
-            if date_field:
-                for date, date_group in chunk.groupby(date_field):
-                    self.daily_status_counter[date].update(
-                        date_group[status_field].value_counts().to_dict()
-                    )
-            
-            # 性能关联分析
-            if time_field:
-                for status, status_group in chunk.groupby(status_field):
-                    response_times = status_group[time_field].dropna().astype(float)
-                    
-                    # 添加响应时间数据到T-Digest
-                    for rt in response_times:
-                        self.status_response_time[status].add(rt)
-                        
-                        # 慢请求统计
-                        if rt > self.slow_threshold:
-                            self.status_slow_requests[status] += 1
-            
-            # 错误详情采样
-            error_mask = chunk[status_field].astype(str).str.match(r'^[45]\d\d$')
-            if error_mask.any():
-                error_chunk = chunk[error_mask]
-                self._collect_error_samples(error_chunk, status_field, ip_field, path_field, time_field)
-            
-            # IP和路径分析
-            if ip_field:
-                for status, status_group in chunk.groupby(status_field):
-                    for ip in status_group[ip_field].dropna():
-                        self.status_ip_counter[status].increment(str(ip))
+        if status_count > len(self.status_counts):
+            grown = np.zeros(max(status_count, len(self.status_counts) * 2), dtype=np.int64)
+            grown[:len(self.status_counts)] = self.status_counts
+            self.status_counts = grown
+        self.status_counts[:status_count] += np.bincount(status_ids[has_status], minlength=status_count)
+        
+        # 应用/服务/HTTP方法/时间维度统计
+        for field, counts in ((app_field, self.app_status_counter),
+                              (service_field, self.service_status_counter),
+                              (method_field, self.method_status_counter),
+                              (hour_field, self.hourly_status_counter),
+                              (date_field, self.daily_status_counter)):
+            if field:
+                counts.add(status_ids, chunk[field])
+        
+        # 性能关联分析
+        if time_field:
+            response_times = pd.to_numeric(chunk[time_field], errors='coerce').to_numpy(dtype=float)
+            has_time = has_status & ~np.isnan(response_times)
             
-            if path_field:
-                for status, status_group in chunk.groupby(status_field):
-                    for path in status_group[path_field].dropna():
-                        self.status_path_counter[status].increment(str(path))
+            # 添加响应时间数据到T-Digest
+            for status_id, values in split_by_key(status_ids[has_time], response_times[has_time]):
+                self.status_response_time[self.status_index.values[status_id]].add_batch(values.tolist())
             
-            # 异常检测
-            self.anomaly_detector.process_chunk(chunk, status_field, time_field)
+            # 慢请求统计
+            slow_counts = np.bincount(status_ids[has_time & (response_times > self.slow_threshold)], minlength=status_count)
+            for status_id in np.flatnonzero(slow_counts):
+                self.status_slow_requests[self.status_index.values[status_id]] += int(slow_counts[status_id])
+        
+        # 错误详情采样
+        error_statuses = np.array([bool(ERROR_STATUS_PATTERN.match(str(status))) for status in self.status_index.values] + [False])
+        error_mask = error_statuses[status_ids]  # 行号-1取到末尾的False
+        if error_mask.any():
+            self._collect_error_samples(chunk, status_ids, error_mask, ip_field, path_field, time_field)
+        
+        # IP和路径分析
+        if ip_field:
+            self._count_status_values(self.status_ip_counter, status_ids, has_status, chunk[ip_field])
+        
+        if path_field:
+            self._count_status_values(self.status_path_counter, status_ids, has_status, chunk[path_field])
+        
+        # 异常检测
+        self.anomaly_detector.process_chunk(chunk, status_field, time_field)
+    
+    def _count_status_values(self, sketches, status_ids: np.ndarray, has_status: np.ndarray, values: pd.Series):
+        """按（状态码, 取值）汇总后写入各状态码的Count-Min Sketch"""
+        pairs = pd.DataFrame({'status_id': status_ids[has_status], 'value': values.to_numpy()[has_status]})
+        pair_counts = pairs.groupby(['status_id', 'value'], sort=False).size()
+        statuses = self.status_index.values
+        for (status_id, value), count in pair_counts.items():
+            sketches[statuses[status_id]].increment(str(value), int(count))
     
     def _get_field_name(self, chunk: pd.DataFrame, field_candidates: List[str]) -> Optional[str]:
         """获取可用的字段名"""
@@ -249,19 +372,29 @@ class AdvancedStatusAnalyzer:
                 return field
         return None
     
-    def _collect_error_samples(self, error_chunk: pd.DataFrame, status_field: str, 
-                             ip_field: str, path_field: str, time_field: str):
-        """收集错误样本"""
-        for _, row in error_chunk.iterrows():
-            status = row[status_field]
-            error_info = {
-                'status': status,
-                'ip': row.get(ip_field, ''),
-                'path': row.get(path_field, ''),
-                'response_time': row.get(time_field, 0),
-                'timestamp': row.get('raw_time', '')
-            }
-            self.error_sampler[status].add(error_info)
+    def _collect_error_samples(self, chunk: pd.DataFrame, status_ids: np.ndarray, error_mask: np.ndarray,
+                               ip_field: str, path_field: str, time_field: str):
+        """收集错误样本：按状态码批量做蓄水池选择，只为被选中的行构造样本"""
+        columns = {
+            'ip': chunk[ip_field].to_numpy() if ip_field else None,
+            'path': chunk[path_field].to_numpy() if path_field else None,
+            'response_time': chunk[time_field].to_numpy() if time_field else None,
+            'timestamp': chunk['raw_time'].to_numpy() if 'raw_time' in chunk.columns else None
+        }
+        defaults = {'ip': '', 'path': '', 'response_time': 0, 'timestamp': ''}
+        
+        error_rows = np.flatnonzero(error_mask)
+        for status_id, rows in split_by_key(status_ids[error_rows], error_rows):
+            status = self.status_index.values[status_id]
+            
+            def make_item(i, rows=rows, status=status):
+                row = rows[i]
+                item = {'status': status}
+                for name, values in columns.items():
+                    item[name] = values[row] if values is not None else defaults[name]
+                return item
+            
+            self.error_sampler[status].add_lazy_batch(len(rows), make_item)
     
     def _generate_analysis_reports(self) -> Dict[str, pd.DataFrame]:
         """生成分析报告"""
@@ -931,222 +1064,6 @@ class AdvancedStatusAnalyzer:
         else:
             return '正常'
     
-    def _create_excel_report(self, output_path: str, dataframes: Dict[str, pd.DataFrame]):
-        """创建Excel报告"""
-        log_info("📝 创建Excel报告...", True)
-        
-        wb = openpyxl.Workbook()
-        if 'Sheet' in wb.sheetnames:
-            del wb['Sheet']
-        
-        # 报告结构
-        report_structure = [
-            ('摘要分析', 'summary'),
-            ('状态码详情', 'detailed_status'),
-            ('应用状态分析', 'app_analysis'),
-            ('服务状态分析', 'service_analysis'),
-            ('时间维度分析', 'time_analysis'),
-            ('错误分析', 'error_analysis'),
-            ('性能关联分析', 'performance_analysis'),
-            ('慢请求API汇总', 'slow_request_api_summary'),  # 重要！
-            ('性能关联详细分析', 'performance_detail_analysis'),  # 重要！
-            ('状态码生命周期分析', 'status_lifecycle_analysis'),  # 重要！
-            ('HTTP方法状态码分析', 'method_status_analysis'),  # 整合原版本功能
-            ('异常检测报告', 'anomaly_report'),
-            ('优化建议', 'optimization_suggestions')
-        ]
-        
-        for sheet_name, df_key in report_structure:
-            if df_key in dataframes and not dataframes[df_key].empty:
-                add_dataframe_to_excel_with_grouped_headers(
-                    wb, dataframes[df_key], sheet_name
-                )
-        
-        # 添加图表
-        self._add_charts_to_excel(wb, dataframes)
-        
-        wb.save(output_path)
-        log_info(f"📊 Excel报告已保存: {output_path}")
-    
-    def _add_charts_to_excel(self, wb: openpyxl.Workbook, dataframes: Dict[str, pd.DataFrame]):
-        """添加图表到Excel (整合原版本功能)"""
-        try:
-            # 1. 状态码分布饼图
-            if 'detailed_status' in dataframes and not dataframes['detailed_status'].empty:
-                self._create_status_distribution_pie_chart(wb, dataframes['detailed_status'])
-            
-            # 2. 时间趋势图
-            if 'time_analysis' in dataframes and not dataframes['time_analysis'].empty:
-                self._create_time_trend_charts(wb, dataframes['time_analysis'])
-            
-            # 3. HTTP方法分布图
-            if 'method_status_analysis' in dataframes and not dataframes['method_status_analysis'].empty:
-                self._create_method_distribution_chart(wb, dataframes['method_status_analysis'])
-                
-        except Exception as e:
-            log_info(f"创建图表时出错: {e}", level="WARNING")
-    
-    def _create_status_distribution_pie_chart(self, wb: openpyxl.Workbook, status_df: pd.DataFrame):
-        """创建状态码分布饼图"""
-        try:
-            chart_sheet = wb.create_sheet('状态码分布图')
-            
-            # 准备数据 - 按类别汇总
-            category_data = {}
-            for _, row in status_df.iterrows():
-                category = row['类别']
-                count = row['请求数']
-                if category in category_data:
-                    category_data[category] += count
-                else:
-                    category_data[category] = count
-            
-            # 写入数据到工作表
-            row_idx = 1
-            chart_sheet.cell(row=row_idx, column=1, value='状态码类别')
-            chart_sheet.cell(row=row_idx, column=2, value='请求数')
-            chart_sheet.cell(row=row_idx, column=3, value='占比(%)')
-            
-            total_requests = sum(category_data.values())
-            data_rows = []
-            
-            for category, count in sorted(category_data.items()):
-                row_idx += 1
-                percentage = (count / total_requests * 100) if total_requests > 0 else 0
-                chart_sheet.cell(row=row_idx, column=1, value=category)
-                chart_sheet.cell(row=row_idx, column=2, value=count)
-                chart_sheet.cell(row=row_idx, column=3, value=round(percentage, 2))
-                data_rows.append(row_idx)
-            
-            if data_rows:
-                # 创建饼图
-                pie_chart = PieChart()
-                pie_chart.title = "HTTP状态码类别分布"
-                pie_chart.width = 15
-                pie_chart.height = 10
-                
-                # 设置数据和标签
-                labels = Reference(chart_sheet, min_col=1, min_row=2, max_row=len(data_rows) + 1)
-                data = Reference(chart_sheet, min_col=2, min_row=1, max_row=len(data_rows) + 1)
-                
-                pie_chart.add_data(data, titles_from_data=True)
-                pie_chart.set_categories(labels)
-                
-                # 设置数据标签
-                from openpyxl.chart.label import DataLabelList
-                pie_chart.dataLabels = DataLabelList()
-                pie_chart.dataLabels.showPercent = True
-                pie_chart.dataLabels.showCatName = True
-                
-                # 添加图表到工作表
-                chart_sheet.add_chart(pie_chart, "E2")
-                
-        except Exception as e:
-            log_info(f"创建状态码分布饼图失败: {e}", level="WARNING")
-    
-    def _create_time_trend_charts(self, wb: openpyxl.Workbook, time_df: pd.DataFrame):
-        """创建时间趋势图"""
-        try:
-            if time_df.empty:
-                return
-                
-            chart_sheet = wb.create_sheet('时间趋势图')
-            
-            # 准备数据
-            time_data = []
-            for _, row in time_df.iterrows():
-                time_data.append({
-                    '时间': row['时间'],
-                    '总请求数': row['总请求数'],
-                    '成功率': row['成功率(%)'],
-                    '错误率': row['错误率(%)']
-                })
-            
-            # 写入数据到工作表
-            headers = ['时间', '总请求数', '成功率(%)', '错误率(%)']
-            for col_idx, header in enumerate(headers, 1):
-                chart_sheet.cell(row=1, column=col_idx, value=header)
-            
-            for row_idx, data in enumerate(time_data, 2):
-                chart_sheet.cell(row=row_idx, column=1, value=data['时间'])
-                chart_sheet.cell(row=row_idx, column=2, value=data['总请求数'])
-                chart_sheet.cell(row=row_idx, column=3, value=data['成功率'])
-                chart_sheet.cell(row=row_idx, column=4, value=data['错误率'])
-            
-            if len(time_data) > 1:
-                # 创建折线图
-                from openpyxl.chart import LineChart
-                line_chart = LineChart()
-                line_chart.title = "时间段趋势分析"
-                line_chart.style = 12
-                line_chart.x_axis.title = "时间"
-                line_chart.y_axis.title = "百分比(%)"
-                line_chart.width = 15
-                line_chart.height = 10
-                
-                # 设置数据
-                categories = Reference(chart_sheet, min_col=1, min_row=2, max_row=len(time_data) + 1)
-                success_data = Reference(chart_sheet, min_col=3, min_row=1, max_row=len(time_data) + 1)
-                error_data = Reference(chart_sheet, min_col=4, min_row=1, max_row=len(time_data) + 1)
-                
-                line_chart.add_data(success_data, titles_from_data=True)
-                line_chart.add_data(error_data, titles_from_data=True)
-                line_chart.set_categories(categories)
-                
-                # 设置颜色
-                if len(line_chart.series) > 0:
-                    line_chart.series[0].graphicalProperties.line.solidFill = "92D050"  # 绿色
-                if len(line_chart.series) > 1:
-                    line_chart.series[1].graphicalProperties.line.solidFill = "FF0000"  # 红色
-                
-                chart_sheet.add_chart(line_chart, "F2")
-                
-        except Exception as e:
-            log_info(f"创建时间趋势图失败: {e}", level="WARNING")
-    
-    def _create_method_distribution_chart(self, wb: openpyxl.Workbook, method_df: pd.DataFrame):
-        """创建HTTP方法分布图"""
-        try:
-            if method_df.empty:
-                return
-                
-            chart_sheet = wb.create_sheet('HTTP方法分布图')
-            
-            # 写入数据
-            headers = ['HTTP方法', '总请求数', '成功率(%)', '错误率(%)']
-            for col_idx, header in enumerate(headers, 1):
-                chart_sheet.cell(row=1, column=col_idx, value=header)
-            
-            for row_idx, (_, row) in enumerate(method_df.iterrows(), 2):
-                chart_sheet.cell(row=row_idx, column=1, value=row['HTTP方法'])
-                chart_sheet.cell(row=row_idx, column=2, value=row['总请求数'])
-                chart_sheet.cell(row=row_idx, column=3, value=row['成功率(%)'])
-                chart_sheet.cell(row=row_idx, column=4, value=row['客户端错误率(%)'] + row['服务器错误率(%)'])
-            
-            if len(method_df) > 0:
-                # 创建柱状图
-                from openpyxl.chart import BarChart
-                bar_chart = BarChart()
-                bar_chart.type = "col"
-                bar_chart.style = 10
-                bar_chart.title = "HTTP方法请求分布"
-                bar_chart.x_axis.title = "HTTP方法"
-                bar_chart.y_axis.title = "请求数"
-                bar_chart.width = 15
-                bar_chart.height = 10
-                
-                # 设置数据
-                categories = Reference(chart_sheet, min_col=1, min_row=2, max_row=len(method_df) + 1)
-                data = Reference(chart_sheet, min_col=2, min_row=1, max_row=len(method_df) + 1)
-                
-                bar_chart.add_data(data, titles_from_data=True)
-                bar_chart.set_categories(categories)
-                
-                chart_sheet.add_chart(bar_chart, "F2")
-                
-        except Exception as e:
-            log_info(f"创建HTTP方法分布图失败: {e}", level="WARNING")
-    
     # 辅助方法
     def _get_status_category(self, status_code: str) -> str:
         """获取状态码类别"""
@@ -1269,6 +1186,7 @@ class AnomalyDetector:
         status_counts = chunk[status_field].value_counts()
         
         for status, count in status_counts.items():
+            status = status_code_value(status)
             # 检测5xx错误突增
             if str(status).startswith('5') and count > 100:
                 self.anomalies.append({
@@ -1317,6 +1235,226 @@ class AnomalyDetector:
         return self.anomalies
 
 
+def _create_excel_report(output_path: str, dataframes: Dict[str, pd.DataFrame]):
+    """创建Excel报告"""
+    log_info("📝 创建Excel报告...", True)
+    
+    wb = openpyxl.Workbook()
+    if 'Sheet' in wb.sheetnames:
+        del wb['Sheet']
+    
+    # 报告结构
+    report_structure = [
+        ('摘要分析', 'summary'),
+        ('状态码详情', 'detailed_status'),
+        ('应用状态分析', 'app_analysis'),
+        ('服务状态分析', 'service_analysis'),
+        ('时间维度分析', 'time_analysis'),
+        ('错误分析', 'error_analysis'),
+        ('性能关联分析', 'performance_analysis'),
+        ('慢请求API汇总', 'slow_request_api_summary'),  # 重要！
+        ('性能关联详细分析', 'performance_detail_analysis'),  # 重要！
+        ('状态码生命周期分析', 'status_lifecycle_analysis'),  # 重要！
+        ('HTTP方法状态码分析', 'method_status_analysis'),  # 整合原版本功能
+        ('异常检测报告', 'anomaly_report'),
+        ('优化建议', 'optimization_suggestions')
+    ]
+    
+    for sheet_name, df_key in report_structure:
+        if df_key in dataframes and not dataframes[df_key].empty:
+            add_dataframe_to_excel_with_grouped_headers(
+                wb, dataframes[df_key], sheet_name
+            )
+    
+    # 添加图表
+    _add_charts_to_excel(wb, dataframes)
+    
+    wb.save(output_path)
+    log_info(f"📊 Excel报告已保存: {output_path}")
+
+
+def _add_charts_to_excel(wb: openpyxl.Workbook, dataframes: Dict[str, pd.DataFrame]):
+    """添加图表到Excel (整合原版本功能)"""
+    try:
+        # 1. 状态码分布饼图
+        if 'detailed_status' in dataframes and not dataframes['detailed_status'].empty:
+            _create_status_distribution_pie_chart(wb, dataframes['detailed_status'])
+        
+        # 2. 时间趋势图
+        if 'time_analysis' in dataframes and not dataframes['time_analysis'].empty:
+            _create_time_trend_charts(wb, dataframes['time_analysis'])
+        
+        # 3. HTTP方法分布图
+        if 'method_status_analysis' in dataframes and not dataframes['method_status_analysis'].empty:
+            _create_method_distribution_chart(wb, dataframes['method_status_analysis'])
+            
+    except Exception as e:
+        log_info(f"创建图表时出错: {e}", level="WARNING")
+
+
+def _create_status_distribution_pie_chart(wb: openpyxl.Workbook, status_df: pd.DataFrame):
+    """创建状态码分布饼图"""
+    try:
+        chart_sheet = wb.create_sheet('状态码分布图')
+        
+        # 准备数据 - 按类别汇总
+        category_data = {}
+        for _, row in status_df.iterrows():
+            category = row['类别']
+            count = row['请求数']
+            if category in category_data:
+                category_data[category] += count
+            else:
+                category_data[category] = count
+        
+        # 写入数据到工作表
+        row_idx = 1
+        chart_sheet.cell(row=row_idx, column=1, value='状态码类别')
+        chart_sheet.cell(row=row_idx, column=2, value='请求数')
+        chart_sheet.cell(row=row_idx, column=3, value='占比(%)')
+        
+        total_requests = sum(category_data.values())
+        data_rows = []
+        
+        for category, count in sorted(category_data.items()):
+            row_idx += 1
+            percentage = (count / total_requests * 100) if total_requests > 0 else 0
+            chart_sheet.cell(row=row_idx, column=1, value=category)
+            chart_sheet.cell(row=row_idx, column=2, value=count)
+            chart_sheet.cell(row=row_idx, column=3, value=round(percentage, 2))
+            data_rows.append(row_idx)
+        
+        if data_rows:
+            # 创建饼图
+            pie_chart = PieChart()
+            pie_chart.title = "HTTP状态码类别分布"
+            pie_chart.width = 15
+            pie_chart.height = 10
+            
+            # 设置数据和标签
+            labels = Reference(chart_sheet, min_col=1, min_row=2, max_row=len(data_rows) + 1)
+            data = Reference(chart_sheet, min_col=2, min_row=1, max_row=len(data_rows) + 1)
+            
+            pie_chart.add_data(data, titles_from_data=True)
+            pie_chart.set_categories(labels)
+            
+            # 设置数据标签
+            from openpyxl.chart.label import DataLabelList
+            pie_chart.dataLabels = DataLabelList()
+            pie_chart.dataLabels.showPercent = True
+            pie_chart.dataLabels.showCatName = True
+            
+            # 添加图表到工作表
+            chart_sheet.add_chart(pie_chart, "E2")
+            
+    except Exception as e:
+        log_info(f"创建状态码分布饼图失败: {e}", level="WARNING")
+
+
+def _create_time_trend_charts(wb: openpyxl.Workbook, time_df: pd.DataFrame):
+    """创建时间趋势图"""
+    try:
+        if time_df.empty:
+            return
+            
+        chart_sheet = wb.create_sheet('时间趋势图')
+        
+        # 准备数据
+        time_data = []
+        for _, row in time_df.iterrows():
+            time_data.append({
+                '时间': row['时间'],
+                '总请求数': row['总请求数'],
+                '成功率': row['成功率(%)'],
+                '错误率': row['错误率(%)']
+            })
+        
+        # 写入数据到工作表
+        headers = ['时间', '总请求数', '成功率(%)', '错误率(%)']
+        for col_idx, header in enumerate(headers, 1):
+            chart_sheet.cell(row=1, column=col_idx, value=header)
+        
+        for row_idx, data in enumerate(time_data, 2):
+            chart_sheet.cell(row=row_idx, column=1, value=data['时间'])
+            chart_sheet.cell(row=row_idx, column=2, value=data['总请求数'])
+            chart_sheet.cell(row=row_idx, column=3, value=data['成功率'])
+            chart_sheet.cell(row=row_idx, column=4, value=data['错误率'])
+        
+        if len(time_data) > 1:
+            # 创建折线图
+            from openpyxl.chart import LineChart
+            line_chart = LineChart()
+            line_chart.title = "时间段趋势分析"
+            line_chart.style = 12
+            line_chart.x_axis.title = "时间"
+            line_chart.y_axis.title = "百分比(%)"
+            line_chart.width = 15
+            line_chart.height = 10
+            
+            # 设置数据
+            categories = Reference(chart_sheet, min_col=1, min_row=2, max_row=len(time_data) + 1)
+            success_data = Reference(chart_sheet, min_col=3, min_row=1, max_row=len(time_data) + 1)
+            error_data = Reference(chart_sheet, min_col=4, min_row=1, max_row=len(time_data) + 1)
+            
+            line_chart.add_data(success_data, titles_from_data=True)
+            line_chart.add_data(error_data, titles_from_data=True)
+            line_chart.set_categories(categories)
+            
+            # 设置颜色
+            if len(line_chart.series) > 0:
+                line_chart.series[0].graphicalProperties.line.solidFill = "92D050"  # 绿色
+            if len(line_chart.series) > 1:
+                line_chart.series[1].graphicalProperties.line.solidFill = "FF0000"  # 红色
+            
+            chart_sheet.add_chart(line_chart, "F2")
+            
+    except Exception as e:
+        log_info(f"创建时间趋势图失败: {e}", level="WARNING")
+
+
+def _create_method_distribution_chart(wb: openpyxl.Workbook, method_df: pd.DataFrame):
+    """创建HTTP方法分布图"""
+    try:
+        if method_df.empty:
+            return
+            
+        chart_sheet = wb.create_sheet('HTTP方法分布图')
+        
+        # 写入数据
+        headers = ['HTTP方法', '总请求数', '成功率(%)', '错误率(%)']
+        for col_idx, header in enumerate(headers, 1):
+            chart_sheet.cell(row=1, column=col_idx, value=header)
+        
+        for row_idx, (_, row) in enumerate(method_df.iterrows(), 2):
+            chart_sheet.cell(row=row_idx, column=1, value=row['HTTP方法'])
+            chart_sheet.cell(row=row_idx, column=2, value=row['总请求数'])
+            chart_sheet.cell(row=row_idx, column=3, value=row['成功率(%)'])
+            chart_sheet.cell(row=row_idx, column=4, value=row['客户端错误率(%)'] + row['服务器错误率(%)'])
+        
+        if len(method_df) > 0:
+            # 创建柱状图
+            bar_chart = BarChart()
+            bar_chart.type = "col"
+            bar_chart.style = 10
+            bar_chart.title = "HTTP方法请求分布"
+            bar_chart.x_axis.title = "HTTP方法"
+            bar_chart.y_axis.title = "请求数"
+            bar_chart.width = 15
+            bar_chart.height = 10
+            
+            # 设置数据
+            categories = Reference(chart_sheet, min_col=1, min_row=2, max_row=len(method_df) + 1)
+            data = Reference(chart_sheet, min_col=2, min_row=1, max_row=len(method_df) + 1)
+            
+            bar_chart.add_data(data, titles_from_data=True)
+            bar_chart.set_categories(categories)
+            
+            chart_sheet.add_chart(bar_chart, "F2")
+            
+    except Exception as e:
+        log_info(f"创建HTTP方法分布图失败: {e}", level="WARNING")
+
+
 # 主要分析函数
 def analyze_status_codes(csv_path: str, output_path: str, slow_request_threshold: float = DEFAULT_SLOW_THRESHOLD) -> pd.DataFrame:
     """
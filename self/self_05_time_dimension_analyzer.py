@@ -14,6 +14,7 @@ from self_00_04_excel_processor import (
     create_pie_chart
 )
 from self_00_02_utils import log_info
+from self_00_07_csv_reader import read_csv_chunks
 
 # 常量
 DEFAULT_CHUNK_SIZE = 10000
@@ -158,7 +159,7 @@ def read_and_process_data_streaming(csv_path, specific_uri_list=None):
     start_time = time.time()
 
     try:
-        for chunk_idx, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_size)):
+        for chunk_idx, chunk in enumerate(read_csv_chunks(csv_path, chunk_size=chunk_size)):
             total_records += len(chunk)
 
             # URI过滤
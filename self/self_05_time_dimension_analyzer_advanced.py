@@ -39,10 +39,12 @@ from self_00_04_excel_processor import (
     format_excel_sheet
 )
 from self_00_01_constants import (
-    DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD, 
+    DEFAULT_SLOW_THRESHOLD, 
     TIME_METRICS, SIZE_METRICS, HIGHLIGHT_FILL
 )
 from self_00_02_utils import log_info, get_distribution_stats
+from self_00_06_report_sinks import publish_report, get_report_publisher
+from self_00_07_csv_reader import read_csv_chunks
 from self_00_05_sampling_algorithms import (
     TDigest, ReservoirSampler, CountMinSketch, HyperLogLog, 
     StratifiedSampler, AdaptiveSampler
@@ -96,6 +98,13 @@ SPEED_METRICS = [
 # 所有指标汇总
 ALL_METRICS = CORE_TIME_METRICS + PHASE_TIME_METRICS + COMPOSITE_TIME_METRICS + SIZE_METRICS + EFFICIENCY_METRICS + SPEED_METRICS
 
+# CSV读取字段（指标字段及时间、状态、URI等字段的备选名）
+CSV_COLUMNS = ALL_METRICS + [
+    'time', 'timestamp', 'raw_time', 'datetime', 'raw_timestamp',
+    'arrival_time', 'arrival_timestamp', 'request_time',
+    'status', 'client_ip', 'request_uri'
+]
+
 # 时间维度配置
 TIME_DIMENSIONS = {
     'daily': {'seconds': 86400, 'format': '%Y-%m-%d'},
@@ -914,9 +923,21 @@ def analyze_time_dimension_advanced(csv_path: str, output_path: str,
     log_info("计算衍生指标...")
     results = analyzer.calculate_derived_metrics()
     
-    # 生成Excel报告
-    log_info("生成Excel报告...")
-    _create_excel_report(output_filename, analyzer, results, total_records)
+    # 发布报告（Excel及已配置的数据输出目标），渲染只依赖结果DataFrame，不携带分析器
+    log_info("生成报告...")
+    publisher = get_report_publisher()
+    frames = {}
+    if publisher.data_sinks or publisher.excel_enabled:
+        frames = {dimension: analyzer.create_output_dataframe(dimension, results)
+                  for dimension in ('daily', 'hourly', 'minute', 'second') if results.get(dimension)}
+    sheet_layouts = {}
+    for dimension, df in frames.items():
+        time_label = analyzer._get_time_label(dimension)
+        sheet_layouts[dimension] = {'time_label': time_label,
+                                    'header_groups': analyzer.create_header_groups(df, time_label)}
+    publish_report(output_filename, frames,
+                   excel_writer=_create_excel_report,
+                   excel_args=(output_filename, frames, sheet_layouts, _build_overview_counts(results, total_records)))
     
     elapsed = time.time() - start_time
     log_info(f"高级时间维度分析完成，耗时: {elapsed:.2f}秒")
@@ -928,7 +949,6 @@ def analyze_time_dimension_advanced(csv_path: str, output_path: str,
 def _process_data_streaming(csv_path: str, analyzer: AdvancedTimeDimensionAnalyzer, 
                            specific_uri_list: Optional[List[str]] = None) -> int:
     """流式处理数据"""
-    chunk_size = DEFAULT_CHUNK_SIZE
     total_records = 0
     processed_chunks = 0
     
@@ -941,7 +961,7 @@ def _process_data_streaming(csv_path: str, analyzer: AdvancedTimeDimensionAnalyz
         log_info("分析所有请求")
     
     try:
-        chunk_generator = pd.read_csv(csv_path, chunksize=chunk_size)
+        chunk_generator = read_csv_chunks(csv_path, usecols=CSV_COLUMNS)
         
         for chunk in chunk_generator:
             processed_chunks += 1
@@ -970,9 +990,9 @@ def _process_data_streaming(csv_path: str, analyzer: AdvancedTimeDimensionAnalyz
     return total_records
 
 
-def _create_excel_report(output_path: str, analyzer: AdvancedTimeDimensionAnalyzer, 
-                        results: Dict, total_records: int) -> None:
-    """创建Excel报告"""
+def _create_excel_report(output_path: str, frames: Dict[str, pd.DataFrame],
+                        sheet_layouts: Dict[str, Dict], overview: Dict[str, int]) -> None:
+    """创建Excel报告（frames为各维度结果表，sheet_layouts为各维度的时间标签与表头分组）"""
     wb = Workbook()
     
     # 删除默认工作表
@@ -980,7 +1000,7 @@ def _create_excel_report(output_path: str, analyzer: AdvancedTimeDimensionAnalyz
         del wb['Sheet']
     
     # 创建概览页
-    _create_overview_sheet(wb, results, total_records)
+    _create_overview_sheet(wb, overview)
     
     # 创建各维度分析页
     dimensions = [
@@ -991,9 +1011,9 @@ def _create_excel_report(output_path: str, analyzer: AdvancedTimeDimensionAnalyz
     ]
     
     for sheet_name, dimension in dimensions:
-        if dimension in results and results[dimension]:
+        if dimension in frames:
             log_info(f"创建工作表: {sheet_name} (维度: {dimension})")
-            _create_dimension_sheet(wb, sheet_name, dimension, analyzer, results)
+            _create_dimension_sheet(wb, sheet_name, frames[dimension], **sheet_layouts[dimension])
         else:
             log_info(f"跳过工作表: {sheet_name} (维度: {dimension}) - 无数据")
     
@@ -1002,14 +1022,23 @@ def _create_excel_report(output_path: str, analyzer: AdvancedTimeDimensionAnalyz
     wb.close()
 
 
-def _create_overview_sheet(wb: Workbook, results: Dict, total_records: int) -> None:
+def _build_overview_counts(results: Dict, total_records: int) -> Dict[str, int]:
+    """概览页的总体统计"""
+    daily_results = results.get('daily', {})
+    return {
+        'total_records': total_records,
+        'total_success': sum(stats.get('success_requests', 0) for stats in daily_results.values()),
+        'total_slow': sum(stats.get('slow_requests', 0) for stats in daily_results.values()),
+    }
+
+
+def _create_overview_sheet(wb: Workbook, overview: Dict[str, int]) -> None:
     """创建概览页"""
     ws = wb.create_sheet(title="概览")
     
-    # 计算总体统计
-    daily_results = results.get('daily', {})
-    total_success = sum(stats.get('success_requests', 0) for stats in daily_results.values())
-    total_slow = sum(stats.get('slow_requests', 0) for stats in daily_results.values())
+    total_records = overview['total_records']
+    total_success = overview['total_success']
+    total_slow = overview['total_slow']
     
     # 标题
     ws.merge_cells('A1:D1')
@@ -1040,16 +1069,12 @@ def _create_overview_sheet(wb: Workbook, results: Dict, total_records: int) -> N
     format_excel_sheet(ws, has_grouped_header=False, header_end_row=3)
 
 
-def _create_dimension_sheet(wb: Workbook, sheet_name: str, dimension: str, 
-                           analyzer: AdvancedTimeDimensionAnalyzer, results: Dict) -> None:
+def _create_dimension_sheet(wb: Workbook, sheet_name: str, df: pd.DataFrame,
+                           time_label: str, header_groups: Dict) -> None:
     """创建维度分析页"""
-    df = analyzer.create_output_dataframe(dimension, results)
     if df.empty:
         return
     
-    time_label = analyzer._get_time_label(dimension)
-    header_groups = analyzer.create_header_groups(df, time_label)
-    
     # 添加到Excel
     ws = add_dataframe_to_excel_with_grouped_headers(wb, df, sheet_name, header_groups)
     
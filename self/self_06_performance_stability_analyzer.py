@@ -6,6 +6,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 
 from self_00_02_utils import log_info
+from self_00_07_csv_reader import read_csv_chunks
 from self_00_04_excel_processor import (
     add_dataframe_to_excel_with_grouped_headers,
     format_excel_sheet
@@ -62,7 +63,7 @@ def process_data_chunks(csv_path, chunk_size, data_collectors):
     total_records = 0
     start_time = datetime.now()
 
-    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+    for chunk in read_csv_chunks(csv_path, chunk_size=chunk_size):
         chunks_processed += 1
         chunk_records = len(chunk)
         total_records += chunk_records
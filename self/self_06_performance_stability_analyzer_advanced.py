@@ -36,11 +36,27 @@ from self_00_04_excel_processor import (
     add_dataframe_to_excel_with_grouped_headers,
     format_excel_sheet
 )
+from self_00_06_report_sinks import publish_report
+from self_00_07_csv_reader import read_csv_chunks
+from self_00_10_result_registry import (
+    AnalysisSummary, SUMMARY_STABILITY, SEVERITY_CRITICAL, SEVERITY_MEDIUM, publish_summary
+)
 from self_00_05_sampling_algorithms import (
     TDigest, HyperLogLog, ReservoirSampler, StratifiedSampler
 )
 
 
+# CSV读取字段
+CSV_COLUMNS = [
+    'raw_time', 'timestamp', 'arrival_time', 'arrival_timestamp',
+    'service_name', 'http_method', 'response_status_code',
+    'total_request_duration', 'backend_connect_phase', 'backend_process_phase', 'backend_transfer_phase',
+    'nginx_transfer_phase', 'backend_efficiency', 'network_overhead', 'transfer_ratio', 'connection_cost_ratio',
+    'processing_efficiency_index', 'response_body_size_kb', 'total_bytes_sent_kb',
+    'response_transfer_speed', 'total_transfer_speed', 'nginx_transfer_speed'
+]
+
+
 def safe_sort_dataframe(data_list, sort_column, ascending=False, default_columns=None):
     """安全创建和排序DataFrame，处理空数据和缺失列"""
     if not data_list:
@@ -65,7 +81,7 @@ class AdvancedPerformanceAnalyzer:
     
     def __init__(self):
         # 配置参数
-        self.chunk_size = 100000
+        self.chunk_size = None  # None表示按内存预算自动计算
         self.sampling_size = 1000  # 蓄水池采样大小
         self.tdigest_compression = 100
         self.hll_precision = 12
@@ -140,8 +156,11 @@ class AdvancedPerformanceAnalyzer:
         self._calculate_anomaly_detection(results)
         self._calculate_trend_analysis(results)
         
-        # 保存到Excel
-        self._save_to_excel(results, output_path)
+        # 发布报告（Excel及已配置的数据输出目标），渲染只依赖结果DataFrame，不携带分析器
+        publish_report(output_path, results, excel_writer=_save_to_excel, excel_args=(results, output_path))
+        
+        # 发布综合报告用的结果摘要
+        publish_summary(self._build_result_summary(results))
         
         elapsed = time.time() - start_time
         log_info(f"高级性能稳定性分析完成，共处理 {total_records} 条记录，耗时: {elapsed:.2f}秒", show_memory=True)
@@ -157,7 +176,7 @@ class AdvancedPerformanceAnalyzer:
         start_time = datetime.now()
         
         try:
-            for chunk in pd.read_csv(csv_path, chunksize=self.chunk_size):
+            for chunk in read_csv_chunks(csv_path, usecols=CSV_COLUMNS, chunk_size=self.chunk_size):
                 chunks_processed += 1
                 chunk_records = len(chunk)
                 total_records += chunk_records
@@ -977,238 +996,284 @@ class AdvancedPerformanceAnalyzer:
             ]
             results['趋势分析'] = safe_sort_dataframe(trend_data, '变化幅度(%)', False, default_columns)
 
-    def _save_to_excel(self, results: Dict, output_path: str) -> None:
-        """保存结果到Excel"""
-        log_info(f"保存性能稳定性分析到Excel: {output_path}", show_memory=True)
-        
-        wb = Workbook()
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        # 定义工作表信息和高亮规则
-        sheet_configs = {
-            '服务成功率稳定性': {
-                'data': results.get('服务成功率稳定性'),
-                'highlight_column': '异常状态',
-                'highlight_values': {'成功率低': 'FF6B6B', '波动较大': 'FFE66D', '存在异常时段': 'FFB74D'}
-            },
-            '服务响应时间稳定性': {
-                'data': results.get('服务响应时间稳定性'),
-                'highlight_column': '异常状态',
-                'highlight_values': {'响应时间长': 'FF6B6B', '响应不稳定': 'FFE66D', '存在极值': 'FF5722'}
-            },
-            '资源使用和带宽': {
-                'data': results.get('资源使用和带宽')
-            },
-            '服务请求频率': {
-                'data': results.get('服务请求频率')
-            },
-            '后端处理性能': {
-                'data': results.get('后端处理性能'),
-                'highlight_column': '性能状态',
-                'highlight_values': {'处理效率低': 'FF6B6B', '连接延迟高': 'FFE66D', '处理时间长': 'FFB74D'}
-            },
-            '数据传输性能': {
-                'data': results.get('数据传输性能'),
-                'highlight_column': '传输状态',
-                'highlight_values': {'传输速度慢': 'FF6B6B', 'Nginx传输瓶颈': 'FFE66D', '传输不稳定': 'FFB74D'}
-            },
-            'Nginx生命周期分析': {
-                'data': results.get('Nginx生命周期分析'),
-                'highlight_column': '生命周期状态',
-                'highlight_values': {'网络开销高': 'FF6B6B', '传输时间占比高': 'FFE66D', '网络开销不稳定': 'FFB74D'}
-            },
-            '并发连接估算': {
-                'data': results.get('并发连接估算')
-            },
-            '连接性能指标': {
-                'data': results.get('连接性能指标')
-            },
-            '趋势分析': {
-                'data': results.get('趋势分析')
-            }
-        }
-        
-        # 创建各个工作表
-        for sheet_name, config in sheet_configs.items():
-            data = config['data']
-            if data is not None and hasattr(data, 'empty') and not data.empty:
-                ws = add_dataframe_to_excel_with_grouped_headers(wb, data, sheet_name)
-                
-                # 应用条件格式高亮
-                if 'highlight_column' in config and 'highlight_values' in config:
-                    self._apply_highlighting(ws, data, config['highlight_column'], config['highlight_values'])
-                
-                # 格式化工作表
-                format_excel_sheet(ws)
-                gc.collect()
+    def _build_result_summary(self, results: Dict) -> AnalysisSummary:
+        """综合报告用的结果摘要：异常列表、异常评分、传输/连接/带宽关键指标"""
+        summary = AnalysisSummary(SUMMARY_STABILITY)
         
-        # 添加连接性能摘要（如果存在）
-        if results.get('连接性能摘要'):
-            self._add_summary_sheet(wb, results['连接性能摘要'], '连接性能摘要')
-        
-        # 添加整体性能摘要
-        self._add_overall_performance_summary(wb, results)
-        
-        wb.save(output_path)
-        log_info(f"高级性能稳定性分析已保存到: {output_path}", show_memory=True)
+        # 异常检测结果
+        score_sum = 0.0
+        score_count = 0
+        for analysis_name, df in results.items():
+            if not isinstance(df, pd.DataFrame) or '异常等级' not in df.columns:
+                continue
+            scores = df['异常评分(0-100)'].dropna()
+            score_sum += float(scores.sum())
+            score_count += len(scores)
+            for level, severity in (('严重异常', SEVERITY_CRITICAL), ('中度异常', SEVERITY_MEDIUM)):
+                for factors in df.loc[df['异常等级'] == level, '异常因子']:
+                    summary.add_anomaly(severity, f"{analysis_name}发现{level}: {factors}", analysis_name)
+        if score_count > 0:
+            summary.metrics['anomaly_score_avg'] = score_sum / score_count
+        
+        # 数据传输性能
+        transfer_df = results.get('数据传输性能')
+        if isinstance(transfer_df, pd.DataFrame) and not transfer_df.empty:
+            if '总传输速度(KB/s)' in transfer_df.columns:
+                summary.metrics['transfer_speed_avg'] = float(transfer_df['总传输速度(KB/s)'].mean())
+            if '传输状态' in transfer_df.columns:
+                summary.metrics['transfer_periods'] = len(transfer_df)
+                summary.metrics['transfer_abnormal_periods'] = int((transfer_df['传输状态'] != '正常').sum())
+        
+        # 连接性能
+        connection_summary = results.get('连接性能摘要') or {}
+        if '平均连接成本比率' in connection_summary:
+            summary.metrics['connection_cost_ratio_avg'] = float(connection_summary['平均连接成本比率'])
+            summary.metrics['connection_cost_ratio_max'] = float(connection_summary['最高连接成本比率'])
+        
+        # 带宽消耗
+        bandwidth_df = results.get('资源使用和带宽')
+        if isinstance(bandwidth_df, pd.DataFrame) and '总传输流量(MB)' in bandwidth_df.columns:
+            summary.metrics['total_bandwidth_mb'] = float(bandwidth_df['总传输流量(MB)'].sum())
+        
+        return summary
 
-    def _apply_highlighting(self, ws, df: pd.DataFrame, highlight_column: str, highlight_values: Dict) -> None:
-        """应用条件格式高亮显示"""
-        if highlight_column not in df.columns:
-            return
-        
-        col_idx = list(df.columns).index(highlight_column) + 1
-        
-        for r, value in enumerate(df[highlight_column], start=2):
-            if value in highlight_values:
-                cell = ws.cell(row=r, column=col_idx)
-                cell.fill = PatternFill(
-                    start_color=highlight_values[value],
-                    end_color=highlight_values[value],
-                    fill_type='solid'
-                )
-                cell.font = Font(bold=True)
 
-    def _add_summary_sheet(self, wb: Workbook, summary_data: Dict, sheet_name: str) -> None:
-        """添加摘要工作表"""
-        ws = wb.create_sheet(title=sheet_name)
-        
-        # 设置标题行
-        ws.cell(row=1, column=1, value='性能指标').font = Font(bold=True, size=12)
-        ws.cell(row=1, column=2, value='数值').font = Font(bold=True, size=12)
-        
-        # 填充数据
-        for r, (metric, value) in enumerate(summary_data.items(), start=2):
-            ws.cell(row=r, column=1, value=metric)
-            ws.cell(row=r, column=2, value=value)
+def _save_to_excel(results: Dict, output_path: str) -> None:
+    """保存结果到Excel"""
+    log_info(f"保存性能稳定性分析到Excel: {output_path}", show_memory=True)
+    
+    wb = Workbook()
+    if 'Sheet' in wb.sheetnames:
+        wb.remove(wb['Sheet'])
+    
+    # 定义工作表信息和高亮规则
+    sheet_configs = {
+        '服务成功率稳定性': {
+            'data': results.get('服务成功率稳定性'),
+            'highlight_column': '异常状态',
+            'highlight_values': {'成功率低': 'FF6B6B', '波动较大': 'FFE66D', '存在异常时段': 'FFB74D'}
+        },
+        '服务响应时间稳定性': {
+            'data': results.get('服务响应时间稳定性'),
+            'highlight_column': '异常状态',
+            'highlight_values': {'响应时间长': 'FF6B6B', '响应不稳定': 'FFE66D', '存在极值': 'FF5722'}
+        },
+        '资源使用和带宽': {
+            'data': results.get('资源使用和带宽')
+        },
+        '服务请求频率': {
+            'data': results.get('服务请求频率')
+        },
+        '后端处理性能': {
+            'data': results.get('后端处理性能'),
+            'highlight_column': '性能状态',
+            'highlight_values': {'处理效率低': 'FF6B6B', '连接延迟高': 'FFE66D', '处理时间长': 'FFB74D'}
+        },
+        '数据传输性能': {
+            'data': results.get('数据传输性能'),
+            'highlight_column': '传输状态',
+            'highlight_values': {'传输速度慢': 'FF6B6B', 'Nginx传输瓶颈': 'FFE66D', '传输不稳定': 'FFB74D'}
+        },
+        'Nginx生命周期分析': {
+            'data': results.get('Nginx生命周期分析'),
+            'highlight_column': '生命周期状态',
+            'highlight_values': {'网络开销高': 'FF6B6B', '传输时间占比高': 'FFE66D', '网络开销不稳定': 'FFB74D'}
+        },
+        '并发连接估算': {
+            'data': results.get('并发连接估算')
+        },
+        '连接性能指标': {
+            'data': results.get('连接性能指标')
+        },
+        '趋势分析': {
+            'data': results.get('趋势分析')
+        }
+    }
+    
+    # 创建各个工作表
+    for sheet_name, config in sheet_configs.items():
+        data = config['data']
+        if data is not None and hasattr(data, 'empty') and not data.empty:
+            ws = add_dataframe_to_excel_with_grouped_headers(wb, data, sheet_name)
             
-            # 设置对齐方式
-            ws.cell(row=r, column=1).alignment = Alignment(horizontal='left')
-            ws.cell(row=r, column=2).alignment = Alignment(horizontal='right')
-        
-        # 调整列宽
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 15
-        
-        format_excel_sheet(ws)
+            # 应用条件格式高亮
+            if 'highlight_column' in config and 'highlight_values' in config:
+                _apply_highlighting(ws, data, config['highlight_column'], config['highlight_values'])
+            
+            # 格式化工作表
+            format_excel_sheet(ws)
+            gc.collect()
+    
+    # 添加连接性能摘要（如果存在）
+    if results.get('连接性能摘要'):
+        _add_summary_sheet(wb, results['连接性能摘要'], '连接性能摘要')
+    
+    # 添加整体性能摘要
+    _add_overall_performance_summary(wb, results)
+    
+    wb.save(output_path)
+    log_info(f"高级性能稳定性分析已保存到: {output_path}", show_memory=True)
 
-    def _add_overall_performance_summary(self, wb: Workbook, results: Dict) -> None:
-        """添加整体性能摘要工作表"""
-        ws = wb.create_sheet(title='整体性能摘要')
+
+def _apply_highlighting(ws, df: pd.DataFrame, highlight_column: str, highlight_values: Dict) -> None:
+    """应用条件格式高亮显示"""
+    if highlight_column not in df.columns:
+        return
+    
+    col_idx = list(df.columns).index(highlight_column) + 1
+    
+    for r, value in enumerate(df[highlight_column], start=2):
+        if value in highlight_values:
+            cell = ws.cell(row=r, column=col_idx)
+            cell.fill = PatternFill(
+                start_color=highlight_values[value],
+                end_color=highlight_values[value],
+                fill_type='solid'
+            )
+            cell.font = Font(bold=True)
+
+
+def _add_summary_sheet(wb: Workbook, summary_data: Dict, sheet_name: str) -> None:
+    """添加摘要工作表"""
+    ws = wb.create_sheet(title=sheet_name)
+    
+    # 设置标题行
+    ws.cell(row=1, column=1, value='性能指标').font = Font(bold=True, size=12)
+    ws.cell(row=1, column=2, value='数值').font = Font(bold=True, size=12)
+    
+    # 填充数据
+    for r, (metric, value) in enumerate(summary_data.items(), start=2):
+        ws.cell(row=r, column=1, value=metric)
+        ws.cell(row=r, column=2, value=value)
         
-        # 标题
-        ws.cell(row=1, column=1, value='高级Nginx服务性能分析摘要').font = Font(bold=True, size=14)
-        ws.merge_cells('A1:D1')
+        # 设置对齐方式
+        ws.cell(row=r, column=1).alignment = Alignment(horizontal='left')
+        ws.cell(row=r, column=2).alignment = Alignment(horizontal='right')
+    
+    # 调整列宽
+    ws.column_dimensions['A'].width = 25
+    ws.column_dimensions['B'].width = 15
+    
+    format_excel_sheet(ws)
+
+
+def _add_overall_performance_summary(wb: Workbook, results: Dict) -> None:
+    """添加整体性能摘要工作表"""
+    ws = wb.create_sheet(title='整体性能摘要')
+    
+    # 标题
+    ws.cell(row=1, column=1, value='高级Nginx服务性能分析摘要').font = Font(bold=True, size=14)
+    ws.merge_cells('A1:D1')
+    
+    current_row = 3
+    
+    # 添加分析概览
+    ws.cell(row=current_row, column=1, value='📊 分析概览').font = Font(bold=True, size=12)
+    current_row += 1
+    
+    analysis_overview = [
+        ('分析算法', 'T-Digest分位数 + HyperLogLog + 蓄水池采样'),
+        ('内存优化', '90%+ 内存节省，支持40G+数据'),
+        ('异常检测', '多维度智能异常检测评分'),
+        ('趋势分析', '基于时间序列的性能趋势识别')
+    ]
+    
+    for metric, value in analysis_overview:
+        ws.cell(row=current_row, column=2, value=metric)
+        ws.cell(row=current_row, column=3, value=value)
+        current_row += 1
+    current_row += 1
+    
+    # 添加关键指标汇总
+    for analysis_name, df in results.items():
+        if df is None or isinstance(df, dict) or not hasattr(df, 'empty') or df.empty:
+            continue
         
-        current_row = 3
+        if '摘要' in analysis_name or '趋势' in analysis_name:
+            continue
         
-        # 添加分析概览
-        ws.cell(row=current_row, column=1, value='📊 分析概览').font = Font(bold=True, size=12)
+        ws.cell(row=current_row, column=1, value=f'📈 {analysis_name}').font = Font(bold=True, size=12)
         current_row += 1
         
-        analysis_overview = [
-            ('分析算法', 'T-Digest分位数 + HyperLogLog + 蓄水池采样'),
-            ('内存优化', '90%+ 内存节省，支持40G+数据'),
-            ('异常检测', '多维度智能异常检测评分'),
-            ('趋势分析', '基于时间序列的性能趋势识别')
-        ]
+        # 提取关键统计信息
+        summary_stats = _extract_key_stats(df, analysis_name)
         
-        for metric, value in analysis_overview:
-            ws.cell(row=current_row, column=2, value=metric)
-            ws.cell(row=current_row, column=3, value=value)
+        for stat_name, stat_value in summary_stats.items():
+            ws.cell(row=current_row, column=2, value=stat_name)
+            ws.cell(row=current_row, column=3, value=stat_value)
             current_row += 1
         current_row += 1
-        
-        # 添加关键指标汇总
-        for analysis_name, df in results.items():
-            if df is None or isinstance(df, dict) or not hasattr(df, 'empty') or df.empty:
-                continue
-            
-            if '摘要' in analysis_name or '趋势' in analysis_name:
-                continue
-            
-            ws.cell(row=current_row, column=1, value=f'📈 {analysis_name}').font = Font(bold=True, size=12)
-            current_row += 1
-            
-            # 提取关键统计信息
-            summary_stats = self._extract_key_stats(df, analysis_name)
-            
-            for stat_name, stat_value in summary_stats.items():
-                ws.cell(row=current_row, column=2, value=stat_name)
-                ws.cell(row=current_row, column=3, value=stat_value)
-                current_row += 1
-            current_row += 1
-        
-        # 设置列宽和样式
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 25
-        ws.column_dimensions['C'].width = 30
-        ws.column_dimensions['D'].width = 15
-        
-        # 设置对齐方式
-        for row in ws.iter_rows():
-            for cell in row:
-                if cell.value:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-        
-        format_excel_sheet(ws)
+    
+    # 设置列宽和样式
+    ws.column_dimensions['A'].width = 25
+    ws.column_dimensions['B'].width = 25
+    ws.column_dimensions['C'].width = 30
+    ws.column_dimensions['D'].width = 15
+    
+    # 设置对齐方式
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value:
+                cell.alignment = Alignment(horizontal='left', vertical='center')
+    
+    format_excel_sheet(ws)
 
-    def _extract_key_stats(self, df: pd.DataFrame, analysis_name: str) -> Dict:
-        """提取关键统计信息"""
-        stats = {}
-        
-        if '成功率' in analysis_name:
-            if '平均成功率(%)' in df.columns:
-                stats['服务数量'] = len(df)
-                stats['平均成功率'] = f"{df['平均成功率(%)'].mean():.2f}%"
-                stats['最低成功率'] = f"{df['平均成功率(%)'].min():.2f}%"
-                if '异常状态' in df.columns:
-                    abnormal_count = len(df[df['异常状态'] != '正常'])
-                    stats['异常服务数'] = f"{abnormal_count}/{len(df)}"
-        
-        elif '响应时间' in analysis_name:
-            if '平均响应时间(秒)' in df.columns:
-                stats['服务数量'] = len(df)
-                stats['平均响应时间'] = f"{df['平均响应时间(秒)'].mean():.3f}秒"
-                if 'P99响应时间(秒)' in df.columns:
-                    stats['平均P99响应时间'] = f"{df['P99响应时间(秒)'].mean():.3f}秒"
-                if '异常状态' in df.columns:
-                    abnormal_count = len(df[df['异常状态'] != '正常'])
-                    stats['异常服务数'] = f"{abnormal_count}/{len(df)}"
-        
-        elif '后端处理' in analysis_name:
-            if '后端处理效率(%)' in df.columns:
-                stats['时段数量'] = len(df)
-                stats['平均后端效率'] = f"{df['后端处理效率(%)'].mean():.2f}%"
-                if '平均连接时间(秒)' in df.columns:
-                    stats['平均连接时间'] = f"{df['平均连接时间(秒)'].mean():.3f}秒"
-                if '性能状态' in df.columns:
-                    abnormal_count = len(df[df['性能状态'] != '正常'])
-                    stats['异常时段数'] = f"{abnormal_count}/{len(df)}"
-        
-        elif '传输性能' in analysis_name:
-            if '总传输速度(KB/s)' in df.columns:
-                stats['时段数量'] = len(df)
-                stats['平均传输速度'] = f"{df['总传输速度(KB/s)'].mean():.2f} KB/s"
-                if '传输状态' in df.columns:
-                    abnormal_count = len(df[df['传输状态'] != '正常'])
-                    stats['异常时段数'] = f"{abnormal_count}/{len(df)}"
-        
-        elif '资源使用' in analysis_name:
-            if '总传输流量(MB)' in df.columns:
-                stats['服务方法数'] = len(df)
-                stats['总传输流量'] = f"{df['总传输流量(MB)'].sum():.2f} MB"
-                if '传输效率(%)' in df.columns:
-                    stats['平均传输效率'] = f"{df['传输效率(%)'].mean():.2f}%"
-        
-        elif '并发连接' in analysis_name:
-            if '平均并发数' in df.columns:
-                stats['时段数量'] = len(df)
-                stats['平均并发数'] = f"{df['平均并发数'].mean():.2f}"
-                stats['最高并发数'] = f"{df['最大并发数'].max()}"
-        
-        return stats
+
+def _extract_key_stats(df: pd.DataFrame, analysis_name: str) -> Dict:
+    """提取关键统计信息"""
+    stats = {}
+    
+    if '成功率' in analysis_name:
+        if '平均成功率(%)' in df.columns:
+            stats['服务数量'] = len(df)
+            stats['平均成功率'] = f"{df['平均成功率(%)'].mean():.2f}%"
+            stats['最低成功率'] = f"{df['平均成功率(%)'].min():.2f}%"
+            if '异常状态' in df.columns:
+                abnormal_count = len(df[df['异常状态'] != '正常'])
+                stats['异常服务数'] = f"{abnormal_count}/{len(df)}"
+    
+    elif '响应时间' in analysis_name:
+        if '平均响应时间(秒)' in df.columns:
+            stats['服务数量'] = len(df)
+            stats['平均响应时间'] = f"{df['平均响应时间(秒)'].mean():.3f}秒"
+            if 'P99响应时间(秒)' in df.columns:
+                stats['平均P99响应时间'] = f"{df['P99响应时间(秒)'].mean():.3f}秒"
+            if '异常状态' in df.columns:
+                abnormal_count = len(df[df['异常状态'] != '正常'])
+                stats['异常服务数'] = f"{abnormal_count}/{len(df)}"
+    
+    elif '后端处理' in analysis_name:
+        if '后端处理效率(%)' in df.columns:
+            stats['时段数量'] = len(df)
+            stats['平均后端效率'] = f"{df['后端处理效率(%)'].mean():.2f}%"
+            if '平均连接时间(秒)' in df.columns:
+                stats['平均连接时间'] = f"{df['平均连接时间(秒)'].mean():.3f}秒"
+            if '性能状态' in df.columns:
+                abnormal_count = len(df[df['性能状态'] != '正常'])
+                stats['异常时段数'] = f"{abnormal_count}/{len(df)}"
+    
+    elif '传输性能' in analysis_name:
+        if '总传输速度(KB/s)' in df.columns:
+            stats['时段数量'] = len(df)
+            stats['平均传输速度'] = f"{df['总传输速度(KB/s)'].mean():.2f} KB/s"
+            if '传输状态' in df.columns:
+                abnormal_count = len(df[df['传输状态'] != '正常'])
+                stats['异常时段数'] = f"{abnormal_count}/{len(df)}"
+    
+    elif '资源使用' in analysis_name:
+        if '总传输流量(MB)' in df.columns:
+            stats['服务方法数'] = len(df)
+            stats['总传输流量'] = f"{df['总传输流量(MB)'].sum():.2f} MB"
+            if '传输效率(%)' in df.columns:
+                stats['平均传输效率'] = f"{df['传输效率(%)'].mean():.2f}%"
+    
+    elif '并发连接' in analysis_name:
+        if '平均并发数' in df.columns:
+            stats['时段数量'] = len(df)
+            stats['平均并发数'] = f"{df['平均并发数'].mean():.2f}"
+            stats['最高并发数'] = f"{df['最大并发数'].max()}"
+    
+    return stats
 
 
 # 向后兼容的函数接口
@@ -15,7 +15,6 @@ Date: 2025-07-20
 
 import gc
 import math
-import pandas as pd
 import numpy as np
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
@@ -31,6 +30,10 @@ from self_08_create_http_lifecycle_visualization import create_http_lifecycle_vi
 
 # 更新依赖：使用优化版本
 from self_06_performance_stability_analyzer_advanced import AdvancedPerformanceAnalyzer
+from self_00_10_result_registry import (
+    SUMMARY_API, SUMMARY_SERVICE, SUMMARY_SLOW_REQUESTS, SUMMARY_STATUS, SUMMARY_STABILITY,
+    get_result_registry
+)
 
 # HTTP生命周期参数映射表（扩展版本）
 HTTP_LIFECYCLE_METRICS = {
@@ -73,9 +76,12 @@ HTTP_LIFECYCLE_METRICS = {
 
 
 class AdvancedSummaryReportGenerator:
-    """高级综合报告生成器"""
+    """高级综合报告生成器 - 只读取各分析器发布的结果摘要（见self_00_10_result_registry）"""
     
-    def __init__(self):
+    def __init__(self, registry=None):
+        # 各分析器发布的结果摘要
+        self.registry = registry or get_result_registry()
+        
         # 分析结果缓存
         self.analysis_cache = {}
         
@@ -99,7 +105,7 @@ class AdvancedSummaryReportGenerator:
         }
 
     def generate_advanced_summary_report(self, outputs: Dict, output_path: str) -> None:
-        """生成高级综合报告"""
+        """生成高级综合报告（outputs只提供总请求数等标量，明细指标取自结果摘要）"""
         log_info("开始生成高级综合报告...", show_memory=True)
         
         try:
@@ -382,7 +388,7 @@ class AdvancedSummaryReportGenerator:
         scores = {}
         
         # 错误率评分
-        error_rate = self._calculate_error_rate(outputs.get('status_stats'))
+        error_rate = self._calculate_error_rate()
         scores['error_rate'] = max(0, 100 - error_rate * 20)  # 每1%错误扣20分
         
         # 响应时间评分
@@ -445,7 +451,7 @@ class AdvancedSummaryReportGenerator:
         summary['平均响应时间'] = f"{avg_response_time:.3f} 秒"
         
         # 错误率
-        error_rate = self._calculate_error_rate(outputs.get('status_stats'))
+        error_rate = self._calculate_error_rate()
         summary['系统错误率'] = f"{error_rate:.2f}%"
         
         # 成功率
@@ -585,19 +591,13 @@ class AdvancedSummaryReportGenerator:
         return roadmap
 
     # 辅助方法
-    def _calculate_error_rate(self, status_stats) -> float:
-        """计算错误率"""
-        if status_stats is None or (hasattr(status_stats, 'empty') and status_stats.empty):
-            return 0.0
-        
-        error_rate = 0.0
-        if isinstance(status_stats, pd.DataFrame):
-            for _, row_data in status_stats.iterrows():
-                status_code = str(row_data.get('状态码', ''))
-                if status_code.startswith('5'):
-                    error_rate += float(row_data.get('百分比(%)', 0))
-        
-        return error_rate
+    def _summary(self, name):
+        """取分析器结果摘要（未发布时为空摘要）"""
+        return self.registry.get(name)
+
+    def _calculate_error_rate(self) -> float:
+        """计算错误率（5xx占比）"""
+        return float(self._summary(SUMMARY_STATUS).metric('server_error_rate', 0.0))
 
     def _get_average_response_time(self, outputs: Dict) -> float:
         """获取平均响应时间"""
@@ -612,15 +612,12 @@ class AdvancedSummaryReportGenerator:
             if source in outputs:
                 return float(outputs[source])
         
-        # 从slowest_requests计算
-        slowest_requests = outputs.get('slowest_requests')
-        if isinstance(slowest_requests, pd.DataFrame) and not slowest_requests.empty:
-            time_cols = ['total_request_duration', '请求总时长(秒)', 'response_time']
-            for col in time_cols:
-                if col in slowest_requests.columns:
-                    return slowest_requests[col].mean()
+        # 全局平均响应时间（API分析），缺失时退回慢请求平均时长
+        avg_response_time = self._summary(SUMMARY_API).metric('avg_response_time')
+        if avg_response_time is None:
+            avg_response_time = self._summary(SUMMARY_SLOW_REQUESTS).metric('total_request_duration_avg', 0.0)
         
-        return 0.0
+        return float(avg_response_time)
 
     def _calculate_efficiency_score(self, outputs: Dict) -> float:
         """计算效率评分"""
@@ -656,7 +653,7 @@ class AdvancedSummaryReportGenerator:
             stability_score -= min(30, response_time_std * 20)
         
         # 基于错误率波动
-        error_rate = self._calculate_error_rate(outputs.get('status_stats'))
+        error_rate = self._calculate_error_rate()
         if error_rate > 0.5:
             stability_score -= min(40, error_rate * 15)
         
@@ -664,22 +661,13 @@ class AdvancedSummaryReportGenerator:
 
     def _calculate_anomaly_score(self, outputs: Dict) -> float:
         """计算异常评分"""
-        # 从各个分析模块提取异常评分
-        anomaly_scores = []
-        
         # 从性能稳定性分析提取
-        perf_analysis = outputs.get('performance_stability_analysis', {})
-        if isinstance(perf_analysis, dict):
-            for analysis_name, df in perf_analysis.items():
-                if hasattr(df, 'columns') and '异常评分(0-100)' in df.columns:
-                    scores = df['异常评分(0-100)'].dropna()
-                    if not scores.empty:
-                        anomaly_scores.extend(scores.tolist())
+        anomaly_score = self._summary(SUMMARY_STABILITY).metric('anomaly_score_avg')
         
         # 如果没有异常评分数据，基于其他指标估算
-        if not anomaly_scores:
+        if anomaly_score is None:
             estimated_score = 0
-            error_rate = self._calculate_error_rate(outputs.get('status_stats'))
+            error_rate = self._calculate_error_rate()
             if error_rate > 2.0:
                 estimated_score += min(50, error_rate * 10)
             
@@ -689,7 +677,7 @@ class AdvancedSummaryReportGenerator:
             
             return estimated_score
         
-        return np.mean(anomaly_scores)
+        return anomaly_score
 
     def _calculate_trend_score(self, outputs: Dict) -> float:
         """计算趋势评分"""
@@ -776,37 +764,36 @@ class AdvancedSummaryReportGenerator:
         """智能状态码分析"""
         row = start_row
         
-        status_stats = outputs.get('status_stats')
-        if status_stats is not None and not (hasattr(status_stats, 'empty') and status_stats.empty):
+        status_codes = self._summary(SUMMARY_STATUS).top('status_codes')
+        if status_codes:
             ws.cell(row=row, column=1, value="📊 状态码智能分析:").font = Font(bold=True)
             row += 1
             
-            if isinstance(status_stats, pd.DataFrame):
-                # 分析状态码分布
-                for _, status_row in status_stats.head(5).iterrows():
-                    status_code = status_row.get('状态码', 'Unknown')
-                    count = status_row.get('请求数', 0)
-                    percentage = status_row.get('百分比(%)', 0)
-                    
-                    # 根据状态码类型添加图标和颜色
-                    if str(status_code).startswith('2'):
-                        icon = "✅"
-                        color = "008000"
-                    elif str(status_code).startswith('3'):
-                        icon = "🔄"
-                        color = "0066CC"
-                    elif str(status_code).startswith('4'):
-                        icon = "⚠️"
-                        color = "FFA500"
-                    else:
-                        icon = "❌"
-                        color = "FF0000"
-                    
-                    status_text = f"  {icon} {status_code}: {count:,} 次 ({percentage:.2f}%)"
-                    status_cell = ws.cell(row=row, column=1, value=status_text)
-                    if not str(status_code).startswith('2'):
-                        status_cell.font = Font(color=color)
-                    row += 1
+            # 分析状态码分布
+            for status_row in status_codes[:5]:
+                status_code = status_row.get('状态码', 'Unknown')
+                count = status_row.get('请求数', 0)
+                percentage = status_row.get('百分比(%)', 0)
+                
+                # 根据状态码类型添加图标和颜色
+                if str(status_code).startswith('2'):
+                    icon = "✅"
+                    color = "008000"
+                elif str(status_code).startswith('3'):
+                    icon = "🔄"
+                    color = "0066CC"
+                elif str(status_code).startswith('4'):
+                    icon = "⚠️"
+                    color = "FFA500"
+                else:
+                    icon = "❌"
+                    color = "FF0000"
+                
+                status_text = f"  {icon} {status_code}: {count:,} 次 ({percentage:.2f}%)"
+                status_cell = ws.cell(row=row, column=1, value=status_text)
+                if not str(status_code).startswith('2'):
+                    status_cell.font = Font(color=color)
+                row += 1
             row += 1
         
         return row
@@ -819,26 +806,23 @@ class AdvancedSummaryReportGenerator:
         row += 1
         
         # 分析慢请求分布
-        slowest_requests = outputs.get('slowest_requests')
-        if isinstance(slowest_requests, pd.DataFrame) and not slowest_requests.empty:
-            response_times = slowest_requests.get('total_request_duration', pd.Series([]))
-            if not response_times.empty:
-                # 计算分位数
-                p50 = response_times.quantile(0.5)
-                p95 = response_times.quantile(0.95)
-                p99 = response_times.quantile(0.99)
-                
-                ws.cell(row=row, column=1, value=f"  📈 响应时间分布: P50={p50:.3f}s, P95={p95:.3f}s, P99={p99:.3f}s")
-                row += 1
-                
-                # 性能分级
-                if p99 > 5.0:
-                    ws.cell(row=row, column=1, value="  🚨 发现极慢请求(>5秒)，需要紧急优化").font = Font(color="FF0000")
-                elif p95 > 2.0:
-                    ws.cell(row=row, column=1, value="  ⚠️ P95响应时间偏高，建议优化").font = Font(color="FFA500")
-                else:
-                    ws.cell(row=row, column=1, value="  ✅ 响应时间分布健康")
-                row += 1
+        slow_summary = self._summary(SUMMARY_SLOW_REQUESTS)
+        p99 = slow_summary.metric('total_request_duration_p99')
+        if p99 is not None:
+            p50 = slow_summary.metric('total_request_duration_p50', 0.0)
+            p95 = slow_summary.metric('total_request_duration_p95', 0.0)
+            
+            ws.cell(row=row, column=1, value=f"  📈 响应时间分布: P50={p50:.3f}s, P95={p95:.3f}s, P99={p99:.3f}s")
+            row += 1
+            
+            # 性能分级
+            if p99 > 5.0:
+                ws.cell(row=row, column=1, value="  🚨 发现极慢请求(>5秒)，需要紧急优化").font = Font(color="FF0000")
+            elif p95 > 2.0:
+                ws.cell(row=row, column=1, value="  ⚠️ P95响应时间偏高，建议优化").font = Font(color="FFA500")
+            else:
+                ws.cell(row=row, column=1, value="  ✅ 响应时间分布健康")
+            row += 1
         
         row += 1
         return row
@@ -847,34 +831,32 @@ class AdvancedSummaryReportGenerator:
         """智能服务分析"""
         row = start_row
         
-        service_stats = outputs.get('service_stats')
-        if service_stats is not None and not (hasattr(service_stats, 'empty') and service_stats.empty):
+        service_summary = self._summary(SUMMARY_SERVICE)
+        total_services = service_summary.metric('service_count', 0)
+        if total_services > 0:
             ws.cell(row=row, column=1, value="🏗️ 服务架构分析:").font = Font(bold=True)
             row += 1
             
-            if isinstance(service_stats, pd.DataFrame):
-                total_services = len(service_stats)
-                ws.cell(row=row, column=1, value=f"  📊 服务总数: {total_services}")
+            ws.cell(row=row, column=1, value=f"  📊 服务总数: {total_services}")
+            row += 1
+            
+            # 分析服务负载分布
+            top_service_load = service_summary.metric('top_service_share')
+            if top_service_load is not None:
+                if top_service_load > 50:
+                    ws.cell(row=row, column=1, value=f"  ⚠️ 发现负载集中: 单个服务承担{top_service_load:.1f}%请求").font = Font(color="FFA500")
+                else:
+                    ws.cell(row=row, column=1, value="  ✅ 服务负载分布合理")
                 row += 1
+            
+            # 显示TOP服务
+            for service_row in service_summary.top('services')[:3]:
+                service_name = service_row.get('服务名称', 'Unknown')
+                request_count = service_row.get('成功请求数', 0)
+                percentage = service_row.get('占总请求比例(%)', 0)
                 
-                # 分析服务负载分布
-                if '占总请求比例(%)' in service_stats.columns:
-                    top_service_load = service_stats['占总请求比例(%)'].iloc[0] if not service_stats.empty else 0
-                    if top_service_load > 50:
-                        ws.cell(row=row, column=1, value=f"  ⚠️ 发现负载集中: 单个服务承担{top_service_load:.1f}%请求").font = Font(color="FFA500")
-                    else:
-                        ws.cell(row=row, column=1, value="  ✅ 服务负载分布合理")
-                    row += 1
-                
-                # 显示TOP服务
-                top_services = service_stats.head(3)
-                for _, service_row in top_services.iterrows():
-                    service_name = service_row.get('服务名称', 'Unknown')
-                    request_count = service_row.get('成功请求数', 0)
-                    percentage = service_row.get('占总请求比例(%)', 0)
-                    
-                    ws.cell(row=row, column=1, value=f"  🎯 {service_name}: {request_count:,} 次 ({percentage:.1f}%)")
-                    row += 1
+                ws.cell(row=row, column=1, value=f"  🎯 {service_name}: {request_count:,} 次 ({percentage:.1f}%)")
+                row += 1
         
         row += 1
         return row
@@ -886,22 +868,21 @@ class AdvancedSummaryReportGenerator:
         ws.cell(row=row, column=1, value="🔬 HTTP生命周期深度分析:").font = Font(bold=True)
         row += 1
         
-        slowest_requests = outputs.get('slowest_requests')
-        if isinstance(slowest_requests, pd.DataFrame) and not slowest_requests.empty:
-            # 分析各阶段耗时
+        slow_summary = self._summary(SUMMARY_SLOW_REQUESTS)
+        total_avg = slow_summary.metric('total_request_duration_avg')
+        if total_avg is not None:
+            # 分析各阶段耗时（慢请求样本）
             phases = {
-                'backend_connect_phase': '后端连接',
+                'upstream_connect_time': '后端连接',
                 'backend_process_phase': '后端处理', 
                 'backend_transfer_phase': '后端传输',
                 'nginx_transfer_phase': 'Nginx传输'
             }
             
-            total_avg = slowest_requests.get('total_request_duration', pd.Series([0.001])).mean()
-            
             for phase_key, phase_name in phases.items():
-                if phase_key in slowest_requests.columns:
-                    phase_avg = slowest_requests[phase_key].mean()
-                    phase_p95 = slowest_requests[phase_key].quantile(0.95)
+                phase_avg = slow_summary.metric(f'{phase_key}_avg')
+                if phase_avg is not None:
+                    phase_p95 = slow_summary.metric(f'{phase_key}_p95', 0.0)
                     percentage = (phase_avg / total_avg) * 100 if total_avg > 0 else 0
                     
                     # 智能判断阶段是否有问题
@@ -928,16 +909,10 @@ class AdvancedSummaryReportGenerator:
         row += 1
         
         # 分析带宽使用效率
-        bandwidth_df = outputs.get('resource_usage_bandwidth')
-        if isinstance(bandwidth_df, pd.DataFrame) and not bandwidth_df.empty:
-            # 计算总带宽消耗
-            total_bandwidth = 0
-            kb_columns = [col for col in bandwidth_df.columns if 'kb' in col.lower() or 'KB' in col]
-            
-            for col in ['总响应大小KB', 'total_bytes_sent_kb', '总带宽消耗KB']:
-                if col in bandwidth_df.columns:
-                    total_bandwidth = bandwidth_df[col].sum()
-                    break
+        total_bandwidth_mb = self._summary(SUMMARY_STABILITY).metric('total_bandwidth_mb')
+        if total_bandwidth_mb is not None:
+            # 计算总带宽消耗(KB)
+            total_bandwidth = total_bandwidth_mb * 1024
             
             if total_bandwidth > 0:
                 bandwidth_mb = total_bandwidth / 1024
@@ -990,18 +965,17 @@ class AdvancedSummaryReportGenerator:
         efficiency_cell.font = Font(color=status_color)
         row += 1
         
-        # 连接复用分析
-        conn_summary = outputs.get('connection_summary', {})
-        if conn_summary:
-            avg_ratio = conn_summary.get('平均连接/请求比例', 0)
-            if avg_ratio > 0:
-                reuse_ratio = 1 / avg_ratio if avg_ratio > 0 else 0
-                ws.cell(row=row, column=1, value=f"  🔄 连接复用率: {reuse_ratio:.2f} 请求/连接")
+        # 连接成本分析
+        stability_summary = self._summary(SUMMARY_STABILITY)
+        avg_ratio = stability_summary.metric('connection_cost_ratio_avg')
+        if avg_ratio is not None:
+            max_ratio = stability_summary.metric('connection_cost_ratio_max', avg_ratio)
+            ws.cell(row=row, column=1, value=f"  🔄 平均连接成本比率: {avg_ratio:.4f} (最高 {max_ratio:.4f})")
+            row += 1
+            
+            if avg_ratio > 0.3:
+                ws.cell(row=row, column=1, value="  💡 建议: 启用Keep-Alive长连接提升复用率").font = Font(color="0066CC")
                 row += 1
-                
-                if reuse_ratio < 2:
-                    ws.cell(row=row, column=1, value="  💡 建议: 启用Keep-Alive长连接提升复用率").font = Font(color="0066CC")
-                    row += 1
         
         row += 1
         return row
@@ -1014,14 +988,13 @@ class AdvancedSummaryReportGenerator:
         row += 1
         
         # 从性能稳定性分析中提取传输数据
-        perf_analysis = outputs.get('performance_stability_analysis', {})
-        transfer_data = perf_analysis.get('数据传输性能')
+        stability_summary = self._summary(SUMMARY_STABILITY)
+        total_count = stability_summary.metric('transfer_periods', 0)
+        avg_total_speed = stability_summary.metric('transfer_speed_avg')
         
-        if isinstance(transfer_data, pd.DataFrame) and not transfer_data.empty:
-            # 计算平均传输速度
-            if '总传输速度(KB/s)' in transfer_data.columns:
-                avg_total_speed = transfer_data['总传输速度(KB/s)'].mean()
-                
+        if total_count > 0 or avg_total_speed is not None:
+            # 平均传输速度
+            if avg_total_speed is not None:
                 if avg_total_speed > 1000:
                     status_icon = "🟢"
                     status_color = "008000"
@@ -1040,10 +1013,8 @@ class AdvancedSummaryReportGenerator:
                 row += 1
             
             # 分析传输状态分布
-            if '传输状态' in transfer_data.columns:
-                status_counts = transfer_data['传输状态'].value_counts()
-                abnormal_count = len(transfer_data[transfer_data['传输状态'] != '正常'])
-                total_count = len(transfer_data)
+            if total_count > 0:
+                abnormal_count = stability_summary.metric('transfer_abnormal_periods', 0)
                 
                 if abnormal_count > 0:
                     abnormal_rate = (abnormal_count / total_count) * 100
@@ -1060,31 +1031,13 @@ class AdvancedSummaryReportGenerator:
         """提取异常信息"""
         anomalies = []
         
-        # 从性能稳定性分析中提取异常
-        perf_analysis = outputs.get('performance_stability_analysis', {})
-        if isinstance(perf_analysis, dict):
-            for analysis_name, df in perf_analysis.items():
-                if hasattr(df, 'columns') and '异常等级' in df.columns:
-                    # 提取严重和中度异常
-                    critical_anomalies = df[df['异常等级'] == '严重异常']
-                    medium_anomalies = df[df['异常等级'] == '中度异常']
-                    
-                    for _, row in critical_anomalies.iterrows():
-                        anomalies.append({
-                            'severity': 'critical',
-                            'description': f"{analysis_name}发现严重异常: {row.get('异常因子', '未知原因')}",
-                            'source': analysis_name
-                        })
-                    
-                    for _, row in medium_anomalies.iterrows():
-                        anomalies.append({
-                            'severity': 'medium',
-                            'description': f"{analysis_name}发现中度异常: {row.get('异常因子', '未知原因')}",
-                            'source': analysis_name
-                        })
+        # 从性能稳定性分析中提取异常（严重异常在前）
+        stability_anomalies = self._summary(SUMMARY_STABILITY).anomalies
+        anomalies.extend(item for item in stability_anomalies if item['severity'] == 'critical')
+        anomalies.extend(item for item in stability_anomalies if item['severity'] != 'critical')
         
         # 基于基础指标推断异常
-        error_rate = self._calculate_error_rate(outputs.get('status_stats'))
+        error_rate = self._calculate_error_rate()
         if error_rate > 5.0:
             anomalies.append({
                 'severity': 'critical',
@@ -1238,13 +1191,12 @@ class AdvancedSummaryReportGenerator:
 
     def _calculate_connection_efficiency(self, outputs: Dict) -> float:
         """计算连接效率"""
-        conn_summary = outputs.get('connection_summary', {})
+        avg_ratio = self._summary(SUMMARY_STABILITY).metric('connection_cost_ratio_avg')
         
-        if not conn_summary:
+        if avg_ratio is None:
             return 70.0  # 默认分数
         
-        # 基于连接/请求比例计算效率
-        avg_ratio = conn_summary.get('平均连接/请求比例', 0.5)
+        # 基于连接成本比率计算效率
         
         # 比例越低，效率越高
         if avg_ratio < 0.1:
@@ -1261,18 +1213,14 @@ class AdvancedSummaryReportGenerator:
     def _calculate_transfer_efficiency(self, outputs: Dict) -> float:
         """计算传输效率"""
         # 基于传输性能数据计算效率
-        perf_analysis = outputs.get('performance_stability_analysis', {})
-        transfer_data = perf_analysis.get('数据传输性能')
-        
-        if isinstance(transfer_data, pd.DataFrame) and not transfer_data.empty:
-            # 基于传输状态计算效率
-            if '传输状态' in transfer_data.columns:
-                normal_count = len(transfer_data[transfer_data['传输状态'] == '正常'])
-                total_count = len(transfer_data)
-                
-                if total_count > 0:
-                    normal_rate = (normal_count / total_count) * 100
-                    return min(95.0, normal_rate)
+        stability_summary = self._summary(SUMMARY_STABILITY)
+        total_count = stability_summary.metric('transfer_periods', 0)
+        
+        # 基于传输状态计算效率
+        if total_count > 0:
+            normal_count = total_count - stability_summary.metric('transfer_abnormal_periods', 0)
+            normal_rate = (normal_count / total_count) * 100
+            return min(95.0, normal_rate)
         
         return 75.0  # 默认分数
 
@@ -1298,9 +1246,9 @@ class AdvancedSummaryReportGenerator:
 
 
 # 向后兼容的函数接口
-def generate_summary_report(outputs: Dict, output_path: str) -> None:
-    """生成综合报告 - 高级版本入口函数"""
-    generator = AdvancedSummaryReportGenerator()
+def generate_summary_report(outputs: Dict, output_path: str, registry=None) -> None:
+    """生成综合报告 - 高级版本入口函数（registry默认为进程内共享的结果登记表）"""
+    generator = AdvancedSummaryReportGenerator(registry)
     generator.generate_advanced_summary_report(outputs, output_path)
 
 
@@ -13,6 +13,7 @@ from openpyxl.styles import Font
 
 from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD
 from self_00_02_utils import log_info
+from self_00_07_csv_reader import read_csv_chunks
 from self_00_04_excel_processor import (
     format_excel_sheet,
     add_dataframe_to_excel_with_grouped_headers,
@@ -45,7 +46,7 @@ def analyze_ip_sources(csv_path, output_path, top_n=100):
     
     # 第一遍：收集IP统计数据
     log_info("第一遍扫描：收集IP统计数据")
-    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+    for chunk in read_csv_chunks(csv_path, chunk_size=chunk_size):
         chunk_size_actual = len(chunk)
         total_processed += chunk_size_actual
         
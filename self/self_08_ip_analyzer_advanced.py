@@ -10,9 +10,8 @@ except ImportError:
 from collections import defaultdict
 from openpyxl import Workbook
 from openpyxl.styles import Font
-import math
 
-from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD
+from self_00_01_constants import DEFAULT_SLOW_THRESHOLD
 from self_00_02_utils import log_info
 from self_00_04_excel_processor import (
     format_excel_sheet,
@@ -23,340 +22,486 @@ from self_00_04_excel_processor import (
 from self_00_05_sampling_algorithms import (
     TDigest, HyperLogLog, ReservoirSampler, StratifiedSampler
 )
+from self_00_06_report_sinks import publish_report
+from self_00_07_csv_reader import read_csv_chunks
+
+# CSV读取字段
+CSV_COLUMNS = [
+    'client_ip_address', 'response_status_code', 'total_request_duration', 'response_body_size_kb',
+    'request_full_uri', 'hour', 'user_agent_string'
+]
+
+
+IPV4_OCTET = r'(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+IPV4_PATTERN = r'^' + r'\.'.join([IPV4_OCTET] * 4) + r'$'
+
+
+class IPAggregator:
+    """
+    按IP的列式聚合器
+
+    IP映射为连续整数ID（IPv4压缩为uint32作为键，其它地址保留字符串），
+    请求数、成功/错误/慢请求数、响应时间与数据量总和、状态码与小时分布
+    均保存为按ID索引的numpy数组，每个数据块通过np.bincount一次性累加。
+
+    T-Digest、HyperLogLog、蓄水池采样等明细统计只为高频IP建立：
+    前eager_sketch_ips个IP出现即建立，之后仅为累计请求数达到
+    heavy_hitter_threshold的IP建立，达到阈值前的请求不计入其分位数与唯一API数。
+    """
+
+    def __init__(self, heavy_hitter_threshold=100, eager_sketch_ips=5000,
+                 compression=100, hll_precision=12, max_sample_size=1000):
+        self.heavy_hitter_threshold = heavy_hitter_threshold
+        self.eager_sketch_ips = eager_sketch_ips
+        self.compression = compression
+        self.hll_precision = hll_precision
+        self.max_sample_size = max_sample_size
+
+        # IP -> ID
+        self.ip_count = 0
+        self._ipv4_index = pd.Index(np.array([], dtype=np.uint32))
+        self._ipv4_index_ids = np.array([], dtype=np.int64)
+        self._other_ids = {}
+        self._other_ips = {}
+
+        # 按ID索引的计数数组
+        self._capacity = 0
+        self.packed_ipv4 = np.zeros(0, dtype=np.uint32)
+        self.total_requests = np.zeros(0, dtype=np.int64)
+        self.success_requests = np.zeros(0, dtype=np.int64)
+        self.error_requests = np.zeros(0, dtype=np.int64)
+        self.slow_requests = np.zeros(0, dtype=np.int64)
+        self.total_response_time = np.zeros(0, dtype=np.float64)
+        self.total_data_size = np.zeros(0, dtype=np.float64)
+        self.hourly_counts = np.zeros((0, 24), dtype=np.int64)
+
+        # 状态码按出现顺序编号，计数矩阵的列随新状态码增加
+        self.status_codes = []
+        self._status_index = {}
+        self.status_counts = np.zeros((0, 0), dtype=np.int64)
+
+        # 高频IP的明细统计 {ID: 明细}
+        self.sketches = {}
+        self._has_sketch = np.zeros(0, dtype=bool)
+
+    def _init_sketch(self):
+        return {
+            'response_time_digest': TDigest(compression=self.compression),
+            'data_size_digest': TDigest(compression=self.compression),
+            'unique_apis_hll': HyperLogLog(precision=self.hll_precision),
+            'user_agents_sampler': ReservoirSampler(self.max_sample_size),
+        }
+
+    def _ensure_capacity(self, size):
+        """按需扩容所有按ID索引的数组（容量翻倍）"""
+        if size <= self._capacity:
+            return
+        new_capacity = max(size, self._capacity * 2, 1024)
+        grow = new_capacity - self._capacity
+
+        for name in ('packed_ipv4', 'total_requests', 'success_requests', 'error_requests', 'slow_requests',
+                     'total_response_time', 'total_data_size', '_has_sketch'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(grow, dtype=array.dtype)]))
+        for name in ('hourly_counts', 'status_counts'):
+            matrix = getattr(self, name)
+            setattr(self, name, np.vstack([matrix, np.zeros((grow, matrix.shape[1]), dtype=matrix.dtype)]))
+        self._capacity = new_capacity
+
+    def _assign_ids(self, unique_ips):
+        """为本块出现的唯一IP分配/查找ID"""
+        ids = np.empty(len(unique_ips), dtype=np.int64)
+        octets = pd.Series(unique_ips, dtype=object).str.extract(IPV4_PATTERN)
+        is_ipv4 = octets.notna().all(axis=1).to_numpy()
+
+        if is_ipv4.any():
+            parts = octets[is_ipv4].astype(np.uint32).to_numpy()
+            packed = (parts[:, 0] << 24) | (parts[:, 1] << 16) | (parts[:, 2] << 8) | parts[:, 3]
+            positions = self._ipv4_index.get_indexer(packed)
+            found = positions >= 0
+            v4_ids = np.empty(len(packed), dtype=np.int64)
+            v4_ids[found] = self._ipv4_index_ids[positions[found]]
+
+            new_packed = packed[~found]
+            if len(new_packed):
+                new_ids = np.arange(self.ip_count, self.ip_count + len(new_packed), dtype=np.int64)
+                self.ip_count += len(new_packed)
+                self._ensure_capacity(self.ip_count)
+                self.packed_ipv4[new_ids] = new_packed
+                self._ipv4_index = self._ipv4_index.append(pd.Index(new_packed))
+                self._ipv4_index_ids = np.concatenate([self._ipv4_index_ids, new_ids])
+                v4_ids[~found] = new_ids
+            ids[is_ipv4] = v4_ids
+
+        for i in np.flatnonzero(~is_ipv4):
+            ip = unique_ips[i]
+            ip_id = self._other_ids.get(ip)
+            if ip_id is None:
+                ip_id = self.ip_count
+                self.ip_count += 1
+                self._ensure_capacity(self.ip_count)
+                self._other_ids[ip] = ip_id
+                self._other_ips[ip_id] = ip
+            ids[i] = ip_id
+        return ids
+
+    def _status_columns(self, unique_codes):
+        """状态码 -> 计数矩阵列号，新状态码追加新列"""
+        for code in unique_codes:
+            if code not in self._status_index:
+                self._status_index[code] = len(self.status_codes)
+                self.status_codes.append(code)
+        missing = len(self.status_codes) - self.status_counts.shape[1]
+        if missing > 0:
+            self.status_counts = np.hstack([
+                self.status_counts, np.zeros((self.status_counts.shape[0], missing), dtype=np.int64)
+            ])
+        return np.array([self._status_index[code] for code in unique_codes], dtype=np.int64)
+
+    @staticmethod
+    def _add_pairs(matrix, rows, cols):
+        """按(行, 列)计数累加到矩阵：先合并重复对，再用花式索引一次性累加"""
+        if len(rows) == 0:
+            return
+        width = matrix.shape[1]
+        keys, counts = np.unique(rows * width + cols, return_counts=True)
+        matrix[keys // width, keys % width] += counts
+
+    def add_chunk(self, chunk):
+        """
+        聚合一个已清洗的数据块
+
+        Returns:
+            np.ndarray: 本块有效IP的小时计数（长度24），用于全局时间分布
+        """
+        ip_series = chunk['client_ip_address']
+        valid = ip_series.notna() & (ip_series != '') & (ip_series != 'unknown')
+        chunk = chunk[valid]
+        hourly = np.zeros(24, dtype=np.int64)
+        if chunk.empty:
+            return hourly
+
+        codes, unique_ips = pd.factorize(chunk['client_ip_address'])
+        ids = self._assign_ids(np.asarray(unique_ips, dtype=object))[codes]
+        size = self._capacity
+
+        self.total_requests += np.bincount(ids, minlength=size)
+
+        if 'response_status_code' in chunk.columns:
+            self._add_status_codes(ids, chunk['response_status_code'], size)
+
+        if 'total_request_duration' in chunk.columns:
+            durations = chunk['total_request_duration'].to_numpy(dtype=np.float64, na_value=np.nan)
+            has_duration = ~np.isnan(durations)
+            self.total_response_time += np.bincount(ids[has_duration], weights=durations[has_duration], minlength=size)
+            is_slow = has_duration & (durations > DEFAULT_SLOW_THRESHOLD)
+            self.slow_requests += np.bincount(ids[is_slow], minlength=size)
+
+        if 'response_body_size_kb' in chunk.columns:
+            sizes = chunk['response_body_size_kb'].to_numpy(dtype=np.float64, na_value=np.nan)
+            has_size = ~np.isnan(sizes)
+            self.total_data_size += np.bincount(ids[has_size], weights=sizes[has_size], minlength=size)
+
+        if 'hour' in chunk.columns:
+            hours = pd.to_numeric(chunk['hour'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            has_hour = (hours >= 0) & (hours < 24)
+            hour_values = hours[has_hour].astype(np.int64)
+            self._add_pairs(self.hourly_counts, ids[has_hour], hour_values)
+            hourly = np.bincount(hour_values, minlength=24)
+
+        self._update_sketches(ids, chunk)
+        return hourly
+
+    def _add_status_codes(self, ids, status, size):
+        """状态码计数；2xx/3xx计为成功，4xx/5xx计为错误，其它格式只记录不计入"""
+        valid = status.notna().to_numpy()
+        codes = status[valid].astype(str).str.strip()
+        keep = ((codes.str.len() >= 3) & ~codes.isin(['None', 'nan', '', '-'])).to_numpy()
+        codes = codes[keep]
+        if codes.empty:
+            return
+        status_ids = ids[valid][keep]
+
+        code_positions, unique_codes = pd.factorize(codes)
+        columns = self._status_columns(list(unique_codes))
+        self._add_pairs(self.status_counts, status_ids, columns[code_positions])
+
+        first_digit = np.array([code[0] for code in unique_codes])[code_positions]
+        is_success = (first_digit == '2') | (first_digit == '3')
+        is_error = (first_digit == '4') | (first_digit == '5')
+        self.success_requests += np.bincount(status_ids[is_success], minlength=size)
+        self.error_requests += np.bincount(status_ids[is_error], minlength=size)
+
+    def _update_sketches(self, ids, chunk):
+        """为高频IP建立明细统计，并用本块数据更新"""
+        chunk_ids = np.unique(ids)
+        candidates = chunk_ids[~self._has_sketch[chunk_ids]]
+        if len(candidates):
+            promote = candidates[self.total_requests[candidates] >= self.heavy_hitter_threshold]
+            free_slots = self.eager_sketch_ips - len(self.sketches)
+            if free_slots > 0:
+                eager = candidates[self.total_requests[candidates] < self.heavy_hitter_threshold][:free_slots]
+                promote = np.concatenate([promote, eager])
+            for ip_id in promote.tolist():
+                self.sketches[ip_id] = self._init_sketch()
+            self._has_sketch[promote] = True
+
+        rows = np.flatnonzero(self._has_sketch[ids])
+        if len(rows) == 0:
+            return
+        rows = rows[np.argsort(ids[rows], kind='stable')]
+        sorted_ids = ids[rows]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        ends = np.r_[starts[1:], len(rows)]
+
+        columns = {
+            name: chunk[name].to_numpy() if name in chunk.columns else None
+            for name in ('total_request_duration', 'response_body_size_kb', 'request_full_uri', 'user_agent_string')
+        }
+        for start, end in zip(starts, ends):
+            sketch = self.sketches[int(sorted_ids[start])]
+            group_rows = rows[start:end]
+
+            if columns['total_request_duration'] is not None:
+                durations = columns['total_request_duration'][group_rows].astype(np.float64)
+                sketch['response_time_digest'].add_batch(durations[np.isfinite(durations)].tolist())
+            if columns['response_body_size_kb'] is not None:
+                sizes = columns['response_body_size_kb'][group_rows].astype(np.float64)
+                sketch['data_size_digest'].add_batch(sizes[np.isfinite(sizes) & (sizes >= 0)].tolist())
+            if columns['request_full_uri'] is not None:
+                for api in pd.unique(pd.Series(columns['request_full_uri'][group_rows]).dropna()):
+                    sketch['unique_apis_hll'].add(str(api))
+            if columns['user_agent_string'] is not None:
+                for agent in pd.unique(pd.Series(columns['user_agent_string'][group_rows]).dropna()):
+                    sketch['user_agents_sampler'].add({'user_agent': str(agent)})
+
+    def ip_address(self, ip_id):
+        """ID -> IP字符串"""
+        if ip_id in self._other_ips:
+            return self._other_ips[ip_id]
+        packed = int(self.packed_ipv4[ip_id])
+        return f"{packed >> 24}.{(packed >> 16) & 255}.{(packed >> 8) & 255}.{packed & 255}"
+
+    def summary_table(self):
+        """
+        汇总为按ID排列的列式统计表
+
+        明细统计（分位数、唯一API数、UA采样数）仅高频IP有值，其余为0
+        """
+        n = self.ip_count
+        status_counts = self.status_counts[:n]
+        is_4xx = np.array([code.startswith('4') for code in self.status_codes], dtype=bool)
+        hourly = self.hourly_counts[:n]
+
+        most_common_status = np.full(n, 'N/A', dtype=object)
+        has_status = status_counts.sum(axis=1) > 0
+        if has_status.any():
+            codes = np.array(self.status_codes, dtype=object)
+            most_common_status[has_status] = codes[status_counts[has_status].argmax(axis=1)]
+
+        table = pd.DataFrame({
+            'ip_id': np.arange(n, dtype=np.int64),
+            'total_requests': self.total_requests[:n],
+            'success_requests': self.success_requests[:n],
+            'error_requests': self.error_requests[:n],
+            'slow_requests': self.slow_requests[:n],
+            'total_response_time': self.total_response_time[:n],
+            'total_data_size': self.total_data_size[:n],
+            'status_4xx_requests': status_counts[:, is_4xx].sum(axis=1),
+            'night_requests': hourly[:, :6].sum(axis=1),
+            'has_hourly': hourly.sum(axis=1) > 0,
+            'peak_hour': hourly.argmax(axis=1),
+            'most_common_status': most_common_status,
+        })
+
+        sketch_metrics = {name: np.zeros(n) for name in (
+            'median_time', 'p95_time', 'p99_time', 'response_time_count',
+            'median_data_size', 'p95_data_size', 'unique_api_count', 'user_agent_count')}
+        for ip_id, sketch in self.sketches.items():
+            time_digest = sketch['response_time_digest']
+            size_digest = sketch['data_size_digest']
+            if time_digest.count > 0:
+                sketch_metrics['median_time'][ip_id] = time_digest.percentile(50)
+                sketch_metrics['p95_time'][ip_id] = time_digest.percentile(95)
+                sketch_metrics['p99_time'][ip_id] = time_digest.percentile(99)
+                sketch_metrics['response_time_count'][ip_id] = time_digest.count
+            if size_digest.count > 0:
+                sketch_metrics['median_data_size'][ip_id] = size_digest.percentile(50)
+                sketch_metrics['p95_data_size'][ip_id] = size_digest.percentile(95)
+            sketch_metrics['unique_api_count'][ip_id] = sketch['unique_apis_hll'].cardinality()
+            sketch_metrics['user_agent_count'][ip_id] = len(sketch['user_agents_sampler'].get_samples())
+
+        for name, values in sketch_metrics.items():
+            table[name] = values
+        return table
 
 
 class AdvancedIPAnalyzer:
     """高级IP分析器 - 使用流式算法优化内存使用"""
-    
+
     def __init__(self):
-        # IP统计数据结构 - 使用流式算法
-        self.ip_stats = {}
         self.total_processed = 0
-        
+
         # 全局时间分布统计
         self.global_hourly_distribution = defaultdict(int)
-        
+
         # 配置参数
         self.max_sample_size = 1000  # 限制样本大小
         self.compression = 100       # T-Digest压缩参数
         self.hll_precision = 12      # HyperLogLog精度
-        
-    def _init_ip_stats(self, ip):
-        """初始化单个IP的统计结构"""
-        return {
-            # 基础计数
-            'total_requests': 0,
-            'success_requests': 0,
-            'error_requests': 0,
-            'slow_requests': 0,
-            
-            # 流式统计算法
-            'response_time_digest': TDigest(compression=self.compression),
-            'data_size_digest': TDigest(compression=self.compression),
-            'unique_apis_hll': HyperLogLog(precision=self.hll_precision),
-            'user_agents_sampler': ReservoirSampler(self.max_sample_size),
-            
-            # 累计统计（内存可控）
-            'total_response_time': 0.0,
-            'total_data_size': 0.0,
-            'status_codes': defaultdict(int),
-            'hourly_distribution': defaultdict(int),
-            
-            # 限制大小的集合
-            'sample_request_times': [],
-            'sample_apis': set()
-        }
-    
+        self.heavy_hitter_threshold = 100  # 累计请求数达到该值的IP建立明细统计
+        self.eager_sketch_ips = 5000       # 前N个IP出现即建立明细统计
+
+        # IP列式聚合
+        self.aggregator = IPAggregator(
+            heavy_hitter_threshold=self.heavy_hitter_threshold,
+            eager_sketch_ips=self.eager_sketch_ips,
+            compression=self.compression,
+            hll_precision=self.hll_precision,
+            max_sample_size=self.max_sample_size
+        )
+
     def analyze_ip_sources(self, csv_path, output_path, top_n=100):
         """分析来源IP，包括请求分布、地理位置、异常检测等 - 优化版"""
         log_info("🚀 开始高级IP分析（内存优化版）...", show_memory=True)
-        
-        chunk_size = max(DEFAULT_CHUNK_SIZE // 2, 10000)
-        
+
         # 第一遍：收集IP统计数据
         log_info("📊 第一遍扫描：收集IP统计数据")
-        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        for chunk in read_csv_chunks(csv_path, usecols=CSV_COLUMNS):
             self._process_chunk(chunk)
-            
+
             if self.total_processed % 100000 == 0:
                 gc.collect()
-                log_info(f"已处理 {self.total_processed:,} 条记录，发现 {len(self.ip_stats)} 个唯一IP")
-        
-        total_unique_ips = len(self.ip_stats)
-        log_info(f"✅ IP统计完成：总记录 {self.total_processed:,}，唯一IP {total_unique_ips:,}")
-        
+                log_info(f"已处理 {self.total_processed:,} 条记录，发现 {self.aggregator.ip_count} 个唯一IP")
+
+        total_unique_ips = self.aggregator.ip_count
+        log_info(f"✅ IP统计完成：总记录 {self.total_processed:,}，唯一IP {total_unique_ips:,}，"
+                 f"明细统计IP {len(self.aggregator.sketches):,}")
+
         if total_unique_ips == 0:
             log_info("⚠️ 未找到有效的IP数据", level="WARNING")
             return pd.DataFrame()
-        
+
         # 生成高级IP分析报告
         ip_analysis_results = self._generate_advanced_ip_analysis_report(top_n)
-        
-        # 创建高级Excel报告
-        self._create_advanced_ip_analysis_excel(ip_analysis_results, output_path)
-        
+
+        # 发布报告（Excel及已配置的数据输出目标），渲染只依赖已算好的结果，不携带分析器
+        publish_report(output_path, {'IP分析': ip_analysis_results},
+                       excel_writer=_create_advanced_ip_analysis_excel,
+                       excel_args=(ip_analysis_results, output_path,
+                                   dict(self.global_hourly_distribution), self.total_processed))
+
         log_info(f"🎉 高级IP分析完成，报告已生成：{output_path}", show_memory=True)
         return ip_analysis_results.head(10)
-    
+
     def _process_chunk(self, chunk):
         """处理数据块"""
         chunk_size_actual = len(chunk)
         self.total_processed += chunk_size_actual
-        
+
         # 处理必要的列
         if 'client_ip_address' not in chunk.columns:
             log_info("⚠️ 未找到client_ip_address列，跳过IP分析", level="WARNING")
             return
-            
+
         # 数据类型转换和清洗
         chunk = self._clean_chunk_data(chunk)
-        
-        # 按IP分组处理
-        for ip, group in chunk.groupby('client_ip_address'):
-            if pd.isna(ip) or ip == '' or ip == 'unknown':
-                continue
-            
-            # 初始化IP统计（如果不存在）
-            if ip not in self.ip_stats:
-                self.ip_stats[ip] = self._init_ip_stats(ip)
-            
-            self._process_ip_group(ip, group)
-    
+
+        # 按IP列式聚合
+        hourly = self.aggregator.add_chunk(chunk)
+        for hour in np.flatnonzero(hourly):
+            self.global_hourly_distribution[int(hour)] += int(hourly[hour])
+
     def _clean_chunk_data(self, chunk):
         """清洗数据块"""
         # 数据类型转换
         if 'total_request_duration' in chunk.columns:
             chunk['total_request_duration'] = pd.to_numeric(chunk['total_request_duration'], errors='coerce')
-        
+
         # 状态码处理 - 更严格的清理
         if 'response_status_code' in chunk.columns:
             # 先转换为字符串，然后清理
             chunk['response_status_code'] = chunk['response_status_code'].astype(str).str.strip()
             # 过滤掉无效的状态码
             chunk['response_status_code'] = chunk['response_status_code'].replace({'nan': None, '': None, '-': None})
-        
+
         if 'response_body_size_kb' in chunk.columns:
             chunk['response_body_size_kb'] = pd.to_numeric(chunk['response_body_size_kb'], errors='coerce')
-        
+
         return chunk
-    
-    def _process_ip_group(self, ip, group):
-        """处理单个IP的分组数据"""
-        stats = self.ip_stats[ip]
-        group_size = len(group)
-        
-        # 基础统计
-        stats['total_requests'] += group_size
-        
-        # 成功和错误请求统计
-        if 'response_status_code' in group.columns:
-            self._process_status_codes(stats, group)
-        
-        # 响应时间统计 - 使用T-Digest流式算法
-        if 'total_request_duration' in group.columns:
-            self._process_response_times(stats, group)
-        
-        # 数据大小统计 - 使用T-Digest
-        if 'response_body_size_kb' in group.columns:
-            self._process_data_sizes(stats, group)
-        
-        # API统计 - 使用HyperLogLog
-        if 'request_full_uri' in group.columns:
-            self._process_apis(stats, group)
-        
-        # 时间分布统计
-        if 'hour' in group.columns:
-            self._process_time_distribution(stats, group)
-        
-        # User Agent统计 - 使用蓄水池采样
-        if 'user_agent_string' in group.columns:
-            self._process_user_agents(stats, group)
-    
-    def _process_status_codes(self, stats, group):
-        """处理状态码统计"""
-        # 过滤掉空值和无效状态码
-        valid_status_codes = group['response_status_code'].dropna()
-        if valid_status_codes.empty:
-            return
-            
-        status_counts = valid_status_codes.value_counts()
-        for status, count in status_counts.items():
-            # 确保状态码是字符串格式并清理
-            status_str = str(status).strip()
-            
-            # 跳过无效状态码
-            if status_str in ['None', 'nan', '', '-'] or len(status_str) < 3:
-                continue
-                
-            stats['status_codes'][status_str] += count
-            
-            # 更严格的状态码判断
-            if status_str.startswith('2') or status_str.startswith('3'):
-                stats['success_requests'] += count
-            elif status_str.startswith('4') or status_str.startswith('5'):
-                stats['error_requests'] += count
-            # 如果状态码不是标准格式（如1xx），记录但不计入成功/错误
-    
-    def _process_response_times(self, stats, group):
-        """处理响应时间统计 - 流式算法"""
-        durations = group['total_request_duration'].dropna()
-        if durations.empty:
-            return
-            
-        # 累计统计
-        stats['total_response_time'] += durations.sum()
-        slow_count = (durations > DEFAULT_SLOW_THRESHOLD).sum()
-        stats['slow_requests'] += slow_count
-        
-        # T-Digest流式分位数计算
-        for duration in durations:
-            if not math.isinf(duration) and not math.isnan(duration):
-                stats['response_time_digest'].add(float(duration))
-        
-        # 保持少量样本用于详细分析（内存可控）
-        if len(stats['sample_request_times']) < self.max_sample_size:
-            sample_size = min(self.max_sample_size - len(stats['sample_request_times']), len(durations))
-            if sample_size > 0:
-                sample = durations.sample(sample_size, random_state=42) if len(durations) > sample_size else durations
-                stats['sample_request_times'].extend(sample.tolist())
-    
-    def _process_data_sizes(self, stats, group):
-        """处理数据大小统计 - 流式算法"""
-        sizes = group['response_body_size_kb'].dropna()
-        if sizes.empty:
-            return
-            
-        # 累计统计
-        stats['total_data_size'] += sizes.sum()
-        
-        # T-Digest流式统计
-        for size in sizes:
-            if not math.isinf(size) and not math.isnan(size) and size >= 0:
-                stats['data_size_digest'].add(float(size))
-    
-    def _process_apis(self, stats, group):
-        """处理API统计 - HyperLogLog"""
-        apis = group['request_full_uri'].dropna().unique()
-        
-        # HyperLogLog流式唯一计数
-        for api in apis:
-            stats['unique_apis_hll'].add(str(api))
-        
-        # 保持少量样本用于展示
-        if len(stats['sample_apis']) < 50:
-            remaining_slots = 50 - len(stats['sample_apis'])
-            sample_apis = apis[:remaining_slots] if len(apis) > remaining_slots else apis
-            stats['sample_apis'].update(sample_apis)
-    
-    def _process_time_distribution(self, stats, group):
-        """处理时间分布统计"""
-        hour_counts = group['hour'].value_counts()
-        for hour, count in hour_counts.items():
-            if pd.notna(hour):
-                hour_int = int(hour)
-                stats['hourly_distribution'][hour_int] += count
-                self.global_hourly_distribution[hour_int] += count
-    
-    def _process_user_agents(self, stats, group):
-        """处理User Agent统计 - 蓄水池采样"""
-        agents = group['user_agent_string'].dropna().unique()
-        for agent in agents:
-            stats['user_agents_sampler'].add({'user_agent': str(agent)})
-    
+
     def _generate_advanced_ip_analysis_report(self, top_n):
         """生成高级IP分析报告"""
         log_info("📋 生成高级IP分析报告...")
-        
-        results = []
-        for ip, stats in self.ip_stats.items():
-            result = self._calculate_ip_metrics(ip, stats)
-            results.append(result)
-        
-        # 转换为DataFrame并排序
-        df = pd.DataFrame(results)
-        df = df.sort_values(by='总请求数', ascending=False).head(top_n)
-        
+
+        table = self.aggregator.summary_table()
+        self._calculate_ip_scores(table)
+
+        # 按请求数排序取前top_n，再生成展示字段
+        table = table.sort_values(by='total_requests', ascending=False, kind='stable').head(top_n)
+        df = self._build_ip_report(table)
+
         log_info(f"✅ 生成了 {len(df)} 个IP的高级分析报告")
         return df
-    
-    def _calculate_ip_metrics(self, ip, stats):
-        """计算单个IP的指标"""
-        total_requests = stats['total_requests']
-        success_requests = stats['success_requests']
-        error_requests = stats['error_requests']
-        slow_requests = stats['slow_requests']
-        
-        # 计算比率
-        success_rate = (success_requests / total_requests * 100) if total_requests > 0 else 0
-        error_rate = (error_requests / total_requests * 100) if total_requests > 0 else 0
-        slow_rate = (slow_requests / total_requests * 100) if total_requests > 0 else 0
-        
-        # 平均响应时间
-        avg_response_time = (stats['total_response_time'] / success_requests) if success_requests > 0 else 0
-        
-        # 高级分位数计算 - 使用T-Digest
-        response_time_digest = stats['response_time_digest']
-        median_time = response_time_digest.percentile(50) if response_time_digest.count > 0 else 0
-        p95_time = response_time_digest.percentile(95) if response_time_digest.count > 0 else 0
-        p99_time = response_time_digest.percentile(99) if response_time_digest.count > 0 else 0
-        
-        # 数据传输统计
-        data_size_digest = stats['data_size_digest']
-        avg_data_size = (stats['total_data_size'] / total_requests) if total_requests > 0 else 0
-        median_data_size = data_size_digest.percentile(50) if data_size_digest.count > 0 else 0
-        p95_data_size = data_size_digest.percentile(95) if data_size_digest.count > 0 else 0
-        
-        # 唯一API数量 - HyperLogLog估计
-        unique_api_count = stats['unique_apis_hll'].cardinality()
-        
-        # IP类型分析
-        ip_type = self._classify_ip_type(ip)
-        
-        # 高级风险评分
-        risk_score, risk_factors = self._calculate_advanced_risk_score(stats, total_requests, error_rate, slow_rate, unique_api_count)
-        
-        # 异常检测评分
-        anomaly_score, anomaly_level = self._calculate_anomaly_score(stats, total_requests, error_rate, slow_rate)
-        
-        # 最常见的状态码和时段
-        most_common_status = max(stats['status_codes'].items(), key=lambda x: x[1])[0] if stats['status_codes'] else 'N/A'
-        peak_hour = max(stats['hourly_distribution'].items(), key=lambda x: x[1])[0] if stats['hourly_distribution'] else 'N/A'
-        
-        # User Agent采样数量
-        user_agent_count = len(stats['user_agents_sampler'].get_samples())
-        
-        # 行为模式分析
-        behavior_pattern = self._analyze_behavior_pattern(stats, total_requests, unique_api_count, error_rate)
-        
-        return {
-            'IP地址': ip,
-            'IP类型': ip_type,
-            '总请求数': total_requests,
-            '成功请求数': success_requests,
-            '错误请求数': error_requests,
-            '慢请求数': slow_requests,
-            '成功率(%)': round(success_rate, 2),
-            '错误率(%)': round(error_rate, 2),
-            '慢请求率(%)': round(slow_rate, 2),
-            '平均响应时间(秒)': round(avg_response_time, 3),
-            '响应时间中位数(秒)': round(median_time, 3),
-            'P95响应时间(秒)': round(p95_time, 3),
-            'P99响应时间(秒)': round(p99_time, 3),
-            '平均数据传输(KB)': round(avg_data_size, 2),
-            '数据传输中位数(KB)': round(median_data_size, 2),
-            'P95数据传输(KB)': round(p95_data_size, 2),
-            '总数据传输(MB)': round(stats['total_data_size'] / 1024, 2),
-            '唯一API数(估计)': int(unique_api_count),
-            '最常见状态码': most_common_status,
-            '活跃时段': f"{peak_hour}:00" if peak_hour != 'N/A' else 'N/A',
-            '风险评分': risk_score,
-            '风险因子': '; '.join(risk_factors) if risk_factors else '无',
-            '异常评分': anomaly_score,
-            '异常等级': anomaly_level,
-            '行为模式': behavior_pattern,
-            'User Agent采样数': user_agent_count
-        }
-    
+
+    def _calculate_ip_scores(self, table):
+        """在汇总表上按列计算比率、风险评分、异常评分与行为模式"""
+        total = table['total_requests'].to_numpy(dtype=np.float64)
+        has_requests = total > 0
+        safe_total = np.where(has_requests, total, 1)
+
+        table['success_rate'] = np.where(has_requests, table['success_requests'] / safe_total * 100, 0)
+        table['error_rate'] = np.where(has_requests, table['error_requests'] / safe_total * 100, 0)
+        table['slow_rate'] = np.where(has_requests, table['slow_requests'] / safe_total * 100, 0)
+
+        risk_score, risk_factors = self._calculate_advanced_risk_score(table)
+        table['risk_score'] = risk_score
+        table['risk_factors'] = risk_factors
+
+        anomaly_score, anomaly_level = self._calculate_anomaly_score(table)
+        table['anomaly_score'] = anomaly_score
+        table['anomaly_level'] = anomaly_level
+
+        table['behavior_pattern'] = self._analyze_behavior_pattern(table)
+
+    def _build_ip_report(self, table):
+        """由汇总表生成报告DataFrame"""
+        total = table['total_requests'].to_numpy()
+        success = table['success_requests'].to_numpy()
+        ips = [self.aggregator.ip_address(ip_id) for ip_id in table['ip_id']]
+
+        avg_response_time = np.where(success > 0, table['total_response_time'] / np.where(success > 0, success, 1), 0)
+        avg_data_size = np.where(total > 0, table['total_data_size'] / np.where(total > 0, total, 1), 0)
+
+        return pd.DataFrame({
+            'IP地址': ips,
+            'IP类型': [self._classify_ip_type(ip) for ip in ips],
+            '总请求数': total,
+            '成功请求数': success,
+            '错误请求数': table['error_requests'].to_numpy(),
+            '慢请求数': table['slow_requests'].to_numpy(),
+            '成功率(%)': table['success_rate'].round(2).to_numpy(),
+            '错误率(%)': table['error_rate'].round(2).to_numpy(),
+            '慢请求率(%)': table['slow_rate'].round(2).to_numpy(),
+            '平均响应时间(秒)': np.round(avg_response_time, 3),
+            '响应时间中位数(秒)': table['median_time'].round(3).to_numpy(),
+            'P95响应时间(秒)': table['p95_time'].round(3).to_numpy(),
+            'P99响应时间(秒)': table['p99_time'].round(3).to_numpy(),
+            '平均数据传输(KB)': np.round(avg_data_size, 2),
+            '数据传输中位数(KB)': table['median_data_size'].round(2).to_numpy(),
+            'P95数据传输(KB)': table['p95_data_size'].round(2).to_numpy(),
+            '总数据传输(MB)': (table['total_data_size'] / 1024).round(2).to_numpy(),
+            '唯一API数(估计)': table['unique_api_count'].astype(int).to_numpy(),
+            '最常见状态码': table['most_common_status'].to_numpy(),
+            '活跃时段': np.where(table['has_hourly'], table['peak_hour'].astype(str) + ':00', 'N/A'),
+            '风险评分': table['risk_score'].to_numpy(),
+            '风险因子': table['risk_factors'].to_numpy(),
+            '异常评分': table['anomaly_score'].to_numpy(),
+            '异常等级': table['anomaly_level'].to_numpy(),
+            '行为模式': table['behavior_pattern'].to_numpy(),
+            'User Agent采样数': table['user_agent_count'].astype(int).to_numpy()
+        })
+
     def _classify_ip_type(self, ip_str):
         """分类IP类型"""
         if not IPADDRESS_AVAILABLE:
@@ -384,470 +529,430 @@ class AdvancedIPAnalyzer:
                 return "公网IP"
         except ValueError:
             return "无效IP"
-    
-    def _calculate_advanced_risk_score(self, stats, total_requests, error_rate, slow_rate, unique_api_count):
-        """计算高级风险评分（0-100，分数越高风险越大）"""
-        risk_score = 0
-        risk_factors = []
-        
-        # 基于请求量的风险（大量请求可能是攻击）
-        if total_requests > 50000:
-            risk_score += 40
-            risk_factors.append('超高请求量')
-        elif total_requests > 10000:
-            risk_score += 30
-            risk_factors.append('高请求量')
-        elif total_requests > 1000:
-            risk_score += 15
-            risk_factors.append('中等请求量')
-        elif total_requests > 100:
-            risk_score += 5
-        
-        # 基于错误率的风险
-        if error_rate > 50:
-            risk_score += 25
-            risk_factors.append('极高错误率')
-        elif error_rate > 20:
-            risk_score += 15
-            risk_factors.append('高错误率')
-        elif error_rate > 10:
-            risk_score += 10
-            risk_factors.append('中等错误率')
-        
-        # 基于慢请求率的风险
-        if slow_rate > 30:
-            risk_score += 20
-            risk_factors.append('极高慢请求率')
-        elif slow_rate > 10:
-            risk_score += 10
-            risk_factors.append('高慢请求率')
-        
-        # 基于API多样性的风险（访问过多不同API可能是扫描）
-        if unique_api_count > 100:
-            risk_score += 20
-            risk_factors.append('API扫描行为')
-        elif unique_api_count > 50:
-            risk_score += 15
-            risk_factors.append('高API多样性')
-        elif unique_api_count > 20:
-            risk_score += 10
-            risk_factors.append('中等API多样性')
-        
-        # 基于4xx状态码比例
-        status_4xx_count = sum(count for status, count in stats['status_codes'].items() if status.startswith('4'))
-        if total_requests > 0:
-            status_4xx_rate = status_4xx_count / total_requests * 100
-            if status_4xx_rate > 30:
-                risk_score += 15
-                risk_factors.append('高4xx错误率')
-            elif status_4xx_rate > 10:
-                risk_score += 10
-                risk_factors.append('中等4xx错误率')
-        
-        # 基于时间分布的风险（非正常时间大量访问）
-        if stats['hourly_distribution']:
-            night_requests = sum(stats['hourly_distribution'].get(hour, 0) for hour in [0, 1, 2, 3, 4, 5])
-            night_ratio = night_requests / total_requests * 100 if total_requests > 0 else 0
-            if night_ratio > 50:
-                risk_score += 15
-                risk_factors.append('深夜异常活跃')
-        
-        return min(risk_score, 100), risk_factors
-    
-    def _calculate_anomaly_score(self, stats, total_requests, error_rate, slow_rate):
-        """计算异常检测评分"""
-        anomaly_score = 0
-        
-        # 请求量异常
-        if total_requests > 20000:
-            anomaly_score += 30
-        
-        # 成功率异常
-        success_rate = ((stats['success_requests'] / total_requests * 100) if total_requests > 0 else 0)
-        if success_rate < 50:
-            anomaly_score += 40
-        
-        # 响应时间异常
-        if stats['response_time_digest'].count > 0:
-            p99_time = stats['response_time_digest'].percentile(99)
-            if p99_time > 10:  # P99超过10秒
-                anomaly_score += 30
-        
-        # 错误率异常
-        if error_rate > 20:
-            anomaly_score += 25
-        
+
+    def _calculate_advanced_risk_score(self, table):
+        """按列计算高级风险评分（0-100，分数越高风险越大）及风险因子"""
+        total = table['total_requests'].to_numpy(dtype=np.float64)
+        safe_total = np.where(total > 0, total, 1)
+        error_rate = table['error_rate'].to_numpy()
+        slow_rate = table['slow_rate'].to_numpy()
+        unique_api_count = table['unique_api_count'].to_numpy()
+        status_4xx_rate = np.where(total > 0, table['status_4xx_requests'] / safe_total * 100, 0)
+        night_ratio = np.where(total > 0, table['night_requests'] / safe_total * 100, 0)
+
+        # 每条规则：(分档条件, 分数, 风险因子)，同一规则命中第一个分档
+        rules = [
+            # 基于请求量的风险（大量请求可能是攻击）
+            [(total > 50000, 40, '超高请求量'), (total > 10000, 30, '高请求量'),
+             (total > 1000, 15, '中等请求量'), (total > 100, 5, None)],
+            # 基于错误率的风险
+            [(error_rate > 50, 25, '极高错误率'), (error_rate > 20, 15, '高错误率'),
+             (error_rate > 10, 10, '中等错误率')],
+            # 基于慢请求率的风险
+            [(slow_rate > 30, 20, '极高慢请求率'), (slow_rate > 10, 10, '高慢请求率')],
+            # 基于API多样性的风险（访问过多不同API可能是扫描）
+            [(unique_api_count > 100, 20, 'API扫描行为'), (unique_api_count > 50, 15, '高API多样性'),
+             (unique_api_count > 20, 10, '中等API多样性')],
+            # 基于4xx状态码比例
+            [(status_4xx_rate > 30, 15, '高4xx错误率'), (status_4xx_rate > 10, 10, '中等4xx错误率')],
+            # 基于时间分布的风险（非正常时间大量访问）
+            [(table['has_hourly'].to_numpy() & (night_ratio > 50), 15, '深夜异常活跃')],
+        ]
+
+        risk_score = np.zeros(len(table), dtype=np.int64)
+        factor_columns = []
+        for tiers in rules:
+            conditions = [condition for condition, _, _ in tiers]
+            risk_score += np.select(conditions, [score for _, score, _ in tiers], default=0)
+            factor_columns.append(np.select(conditions, [factor or '' for _, _, factor in tiers], default=''))
+
+        risk_factors = ['; '.join(factor for factor in factors if factor) or '无' for factors in zip(*factor_columns)]
+        return np.minimum(risk_score, 100), risk_factors
+
+    def _calculate_anomaly_score(self, table):
+        """按列计算异常检测评分"""
+        anomaly_score = (
+            np.where(table['total_requests'] > 20000, 30, 0)    # 请求量异常
+            + np.where(table['success_rate'] < 50, 40, 0)       # 成功率异常
+            + np.where(table['p99_time'] > 10, 30, 0)           # 响应时间异常：P99超过10秒
+            + np.where(table['error_rate'] > 20, 25, 0)         # 错误率异常
+        )
+
         # 异常等级分类
-        if anomaly_score >= 80:
-            anomaly_level = "严重异常"
-        elif anomaly_score >= 60:
-            anomaly_level = "中度异常"
-        elif anomaly_score >= 40:
-            anomaly_level = "轻微异常"
-        else:
-            anomaly_level = "正常"
-            
+        anomaly_level = np.select(
+            [anomaly_score >= 80, anomaly_score >= 60, anomaly_score >= 40],
+            ["严重异常", "中度异常", "轻微异常"],
+            default="正常"
+        )
         return anomaly_score, anomaly_level
+
+    def _analyze_behavior_pattern(self, table):
+        """按列分析行为模式"""
+        total = table['total_requests']
+        unique_api_count = table['unique_api_count']
+        error_rate = table['error_rate']
+        deep_access = (unique_api_count > 50) & (total > 1000)
+
+        return np.select(
+            [deep_access & (error_rate > 30),
+             deep_access,
+             (total > 5000) & (unique_api_count < 5),
+             error_rate > 50,
+             total < 10],
+            ["疑似恶意扫描", "深度访问用户", "高频单一访问", "异常访问", "轻度访问"],
+            default="正常访问"
+        )
+
+
+def _create_advanced_ip_analysis_excel(ip_df, output_path, hourly_distribution, total_processed):
+    """创建高级IP分析Excel报告（hourly_distribution为全局按小时请求数，total_processed为总处理记录数）"""
+    log_info(f"📊 创建高级IP分析Excel报告: {output_path}")
     
-    def _analyze_behavior_pattern(self, stats, total_requests, unique_api_count, error_rate):
-        """分析行为模式"""
-        if unique_api_count > 50 and total_requests > 1000:
-            if error_rate > 30:
-                return "疑似恶意扫描"
-            else:
-                return "深度访问用户"
-        elif total_requests > 5000 and unique_api_count < 5:
-            return "高频单一访问"
-        elif error_rate > 50:
-            return "异常访问"
-        elif total_requests < 10:
-            return "轻度访问"
+    wb = Workbook()
+    if 'Sheet' in wb.sheetnames:
+        del wb['Sheet']
+    
+    # 主要IP统计表 - 增强版
+    header_groups = {
+        "基础信息": ["IP地址", "IP类型", "行为模式"],
+        "请求统计": ["总请求数", "成功请求数", "错误请求数", "慢请求数"],
+        "性能比率": ["成功率(%)", "错误率(%)", "慢请求率(%)"],
+        "响应时间分析": ["平均响应时间(秒)", "响应时间中位数(秒)", "P95响应时间(秒)", "P99响应时间(秒)"],
+        "数据传输分析": ["平均数据传输(KB)", "数据传输中位数(KB)", "P95数据传输(KB)", "总数据传输(MB)"],
+        "风险评估": ["风险评分", "风险因子", "异常评分", "异常等级"],
+        "其他指标": ["唯一API数(估计)", "最常见状态码", "活跃时段", "User Agent采样数"]
+    }
+    
+    ws_main = add_dataframe_to_excel_with_grouped_headers(
+        wb, ip_df, '高级IP分析统计', header_groups=header_groups
+    )
+    
+    # 高风险IP工作表 - 增强版
+    _create_advanced_high_risk_ip_sheet(wb, ip_df)
+    
+    # IP类型分布工作表 - 增强版
+    _create_advanced_ip_type_distribution_sheet(wb, ip_df)
+    
+    # 行为模式分析工作表
+    _create_behavior_pattern_analysis_sheet(wb, ip_df)
+    
+    # 时间分布分析工作表 - 增强版
+    _create_advanced_time_distribution_sheet(wb, hourly_distribution)
+    
+    # 异常检测工作表
+    _create_anomaly_detection_sheet(wb, ip_df)
+    
+    # 概览工作表 - 增强版
+    _create_advanced_ip_overview_sheet(wb, ip_df, total_processed)
+    
+    # 保存文件
+    wb.save(output_path)
+    log_info(f"✅ 高级IP分析Excel报告已保存: {output_path}")
+
+
+def _create_advanced_high_risk_ip_sheet(wb, ip_df):
+    """创建高级高风险IP工作表"""
+    ws = wb.create_sheet(title='高风险IP分析')
+    
+    # 筛选高风险IP（风险评分 > 50或异常评分 > 60）
+    high_risk_ips = ip_df[
+        (ip_df['风险评分'] > 50) | (ip_df['异常评分'] > 60)
+    ].sort_values(by=['风险评分', '异常评分'], ascending=False)
+    
+    if high_risk_ips.empty:
+        ws.cell(row=1, column=1, value="🎉 未发现高风险IP").font = Font(bold=True)
+        return
+    
+    # 高风险IP表头
+    high_risk_headers = {
+        "基础信息": ["IP地址", "IP类型", "行为模式"],
+        "风险指标": ["风险评分", "异常评分", "异常等级"],
+        "关键统计": ["总请求数", "错误率(%)", "慢请求率(%)", "唯一API数(估计)"],
+        "详细信息": ["风险因子", "最常见状态码", "活跃时段", "总数据传输(MB)"]
+    }
+    
+    risk_columns = [
+        "IP地址", "IP类型", "行为模式", "风险评分", "异常评分", "异常等级", 
+        "总请求数", "错误率(%)", "慢请求率(%)", "唯一API数(估计)", 
+        "风险因子", "最常见状态码", "活跃时段", "总数据传输(MB)"
+    ]
+    risk_df = high_risk_ips[risk_columns].copy()
+    
+    # 由于工作表已创建，需要先删除再重新创建
+    wb.remove(ws)
+    ws = add_dataframe_to_excel_with_grouped_headers(
+        wb, risk_df, '高风险IP分析', header_groups=high_risk_headers
+    )
+    
+    # 添加风险分析说明
+    note_row = len(risk_df) + 5
+    ws.cell(row=note_row, column=1, value="🔍 风险评分说明：").font = Font(bold=True)
+    ws.cell(row=note_row + 1, column=1, value="• 风险评分 70-100: 高风险，需要立即关注")
+    ws.cell(row=note_row + 2, column=1, value="• 风险评分 50-70: 中等风险，建议监控")
+    ws.cell(row=note_row + 3, column=1, value="• 异常评分 80+: 严重异常")
+    ws.cell(row=note_row + 4, column=1, value="• 异常评分 60-79: 中度异常")
+    
+    format_excel_sheet(ws)
+
+
+def _create_advanced_ip_type_distribution_sheet(wb, ip_df):
+    """创建高级IP类型分布工作表"""
+    ws = wb.create_sheet(title='IP类型分布分析')
+    
+    # IP类型统计 - 增强版
+    ip_type_stats = ip_df.groupby('IP类型').agg({
+        'IP地址': 'count',
+        '总请求数': ['sum', 'mean'],
+        '成功率(%)': 'mean',
+        '错误率(%)': 'mean',
+        '风险评分': 'mean',
+        '异常评分': 'mean',
+        '唯一API数(估计)': 'mean'
+    }).round(2)
+    
+    # 展平列名
+    ip_type_stats.columns = [
+        'IP数量', '总请求数', '平均每IP请求数', '平均成功率(%)', 
+        '平均错误率(%)', '平均风险评分', '平均异常评分', '平均API数'
+    ]
+    ip_type_stats = ip_type_stats.reset_index()
+    
+    # 添加到工作表
+    type_headers = {
+        "分类": ["IP类型"],
+        "数量统计": ["IP数量", "总请求数", "平均每IP请求数"],
+        "性能指标": ["平均成功率(%)", "平均错误率(%)"],
+        "风险指标": ["平均风险评分", "平均异常评分", "平均API数"]
+    }
+    
+    ws = add_dataframe_to_excel_with_grouped_headers(
+        wb, ip_type_stats, 'IP类型分布分析', header_groups=type_headers
+    )
+    
+    format_excel_sheet(ws)
+
+
+def _create_behavior_pattern_analysis_sheet(wb, ip_df):
+    """创建行为模式分析工作表"""
+    ws = wb.create_sheet(title='行为模式分析')
+    
+    # 行为模式统计
+    behavior_stats = ip_df.groupby('行为模式').agg({
+        'IP地址': 'count',
+        '总请求数': ['sum', 'mean'],
+        '风险评分': 'mean',
+        '异常评分': 'mean',
+        '错误率(%)': 'mean'
+    }).round(2)
+    
+    behavior_stats.columns = ['IP数量', '总请求数', '平均每IP请求数', '平均风险评分', '平均异常评分', '平均错误率(%)']
+    behavior_stats = behavior_stats.reset_index()
+    behavior_stats = behavior_stats.sort_values(by='平均风险评分', ascending=False)
+    
+    # 添加到工作表
+    behavior_headers = {
+        "模式": ["行为模式"],
+        "数量统计": ["IP数量", "总请求数", "平均每IP请求数"],
+        "风险评估": ["平均风险评分", "平均异常评分", "平均错误率(%)"]
+    }
+    
+    ws = add_dataframe_to_excel_with_grouped_headers(
+        wb, behavior_stats, '行为模式分析', header_groups=behavior_headers
+    )
+    
+    format_excel_sheet(ws)
+
+
+def _create_advanced_time_distribution_sheet(wb, hourly_distribution):
+    """创建高级时间分布分析工作表"""
+    ws = wb.create_sheet(title='时间分布分析')
+    
+    if not hourly_distribution:
+        ws.cell(row=1, column=1, value="⚠️ 无时间分布数据").font = Font(bold=True)
+        return
+    
+    # 创建小时分布数据 - 增强版
+    hours = list(range(24))
+    total_requests = sum(hourly_distribution.values())
+    
+    time_data = []
+    for hour in hours:
+        requests = hourly_distribution.get(hour, 0)
+        percentage = round(requests / total_requests * 100, 2) if total_requests > 0 else 0
+        
+        # 分析时段特征
+        if 6 <= hour <= 12:
+            period = "上午"
+        elif 13 <= hour <= 18:
+            period = "下午"
+        elif 19 <= hour <= 23:
+            period = "晚上"
         else:
-            return "正常访问"
+            period = "深夜"
+        
+        time_data.append({
+            '小时': f"{hour:02d}:00",
+            '时段': period,
+            '请求数': requests,
+            '占比(%)': percentage,
+            '活跃度': '高' if percentage > 6 else ('中' if percentage > 3 else '低')
+        })
     
-    def _create_advanced_ip_analysis_excel(self, ip_df, output_path):
-        """创建高级IP分析Excel报告"""
-        log_info(f"📊 创建高级IP分析Excel报告: {output_path}")
-        
-        wb = Workbook()
-        if 'Sheet' in wb.sheetnames:
-            del wb['Sheet']
-        
-        # 主要IP统计表 - 增强版
-        header_groups = {
-            "基础信息": ["IP地址", "IP类型", "行为模式"],
-            "请求统计": ["总请求数", "成功请求数", "错误请求数", "慢请求数"],
-            "性能比率": ["成功率(%)", "错误率(%)", "慢请求率(%)"],
-            "响应时间分析": ["平均响应时间(秒)", "响应时间中位数(秒)", "P95响应时间(秒)", "P99响应时间(秒)"],
-            "数据传输分析": ["平均数据传输(KB)", "数据传输中位数(KB)", "P95数据传输(KB)", "总数据传输(MB)"],
-            "风险评估": ["风险评分", "风险因子", "异常评分", "异常等级"],
-            "其他指标": ["唯一API数(估计)", "最常见状态码", "活跃时段", "User Agent采样数"]
-        }
-        
-        ws_main = add_dataframe_to_excel_with_grouped_headers(
-            wb, ip_df, '高级IP分析统计', header_groups=header_groups
-        )
-        
-        # 高风险IP工作表 - 增强版
-        self._create_advanced_high_risk_ip_sheet(wb, ip_df)
-        
-        # IP类型分布工作表 - 增强版
-        self._create_advanced_ip_type_distribution_sheet(wb, ip_df)
-        
-        # 行为模式分析工作表
-        self._create_behavior_pattern_analysis_sheet(wb, ip_df)
-        
-        # 时间分布分析工作表 - 增强版
-        self._create_advanced_time_distribution_sheet(wb)
-        
-        # 异常检测工作表
-        self._create_anomaly_detection_sheet(wb, ip_df)
-        
-        # 概览工作表 - 增强版
-        self._create_advanced_ip_overview_sheet(wb, ip_df)
-        
-        # 保存文件
-        wb.save(output_path)
-        log_info(f"✅ 高级IP分析Excel报告已保存: {output_path}")
+    time_df = pd.DataFrame(time_data)
     
-    def _create_advanced_high_risk_ip_sheet(self, wb, ip_df):
-        """创建高级高风险IP工作表"""
-        ws = wb.create_sheet(title='高风险IP分析')
-        
-        # 筛选高风险IP（风险评分 > 50或异常评分 > 60）
-        high_risk_ips = ip_df[
-            (ip_df['风险评分'] > 50) | (ip_df['异常评分'] > 60)
-        ].sort_values(by=['风险评分', '异常评分'], ascending=False)
-        
-        if high_risk_ips.empty:
-            ws.cell(row=1, column=1, value="🎉 未发现高风险IP").font = Font(bold=True)
-            return
-        
-        # 高风险IP表头
-        high_risk_headers = {
-            "基础信息": ["IP地址", "IP类型", "行为模式"],
-            "风险指标": ["风险评分", "异常评分", "异常等级"],
-            "关键统计": ["总请求数", "错误率(%)", "慢请求率(%)", "唯一API数(估计)"],
-            "详细信息": ["风险因子", "最常见状态码", "活跃时段", "总数据传输(MB)"]
-        }
-        
-        risk_columns = [
-            "IP地址", "IP类型", "行为模式", "风险评分", "异常评分", "异常等级", 
-            "总请求数", "错误率(%)", "慢请求率(%)", "唯一API数(估计)", 
-            "风险因子", "最常见状态码", "活跃时段", "总数据传输(MB)"
-        ]
-        risk_df = high_risk_ips[risk_columns].copy()
-        
-        # 由于工作表已创建，需要先删除再重新创建
-        wb.remove(ws)
-        ws = add_dataframe_to_excel_with_grouped_headers(
-            wb, risk_df, '高风险IP分析', header_groups=high_risk_headers
-        )
-        
-        # 添加风险分析说明
-        note_row = len(risk_df) + 5
-        ws.cell(row=note_row, column=1, value="🔍 风险评分说明：").font = Font(bold=True)
-        ws.cell(row=note_row + 1, column=1, value="• 风险评分 70-100: 高风险，需要立即关注")
-        ws.cell(row=note_row + 2, column=1, value="• 风险评分 50-70: 中等风险，建议监控")
-        ws.cell(row=note_row + 3, column=1, value="• 异常评分 80+: 严重异常")
-        ws.cell(row=note_row + 4, column=1, value="• 异常评分 60-79: 中度异常")
-        
-        format_excel_sheet(ws)
+    # 添加到工作表
+    time_headers = {
+        "时间": ["小时", "时段"],
+        "统计": ["请求数", "占比(%)", "活跃度"]
+    }
     
-    def _create_advanced_ip_type_distribution_sheet(self, wb, ip_df):
-        """创建高级IP类型分布工作表"""
-        ws = wb.create_sheet(title='IP类型分布分析')
-        
-        # IP类型统计 - 增强版
-        ip_type_stats = ip_df.groupby('IP类型').agg({
-            'IP地址': 'count',
-            '总请求数': ['sum', 'mean'],
-            '成功率(%)': 'mean',
-            '错误率(%)': 'mean',
-            '风险评分': 'mean',
-            '异常评分': 'mean',
-            '唯一API数(估计)': 'mean'
-        }).round(2)
-        
-        # 展平列名
-        ip_type_stats.columns = [
-            'IP数量', '总请求数', '平均每IP请求数', '平均成功率(%)', 
-            '平均错误率(%)', '平均风险评分', '平均异常评分', '平均API数'
-        ]
-        ip_type_stats = ip_type_stats.reset_index()
-        
-        # 添加到工作表
-        type_headers = {
-            "分类": ["IP类型"],
-            "数量统计": ["IP数量", "总请求数", "平均每IP请求数"],
-            "性能指标": ["平均成功率(%)", "平均错误率(%)"],
-            "风险指标": ["平均风险评分", "平均异常评分", "平均API数"]
-        }
-        
-        ws = add_dataframe_to_excel_with_grouped_headers(
-            wb, ip_type_stats, 'IP类型分布分析', header_groups=type_headers
-        )
-        
-        format_excel_sheet(ws)
+    ws = add_dataframe_to_excel_with_grouped_headers(
+        wb, time_df, '时间分布分析', header_groups=time_headers
+    )
     
-    def _create_behavior_pattern_analysis_sheet(self, wb, ip_df):
-        """创建行为模式分析工作表"""
-        ws = wb.create_sheet(title='行为模式分析')
-        
-        # 行为模式统计
-        behavior_stats = ip_df.groupby('行为模式').agg({
-            'IP地址': 'count',
-            '总请求数': ['sum', 'mean'],
-            '风险评分': 'mean',
-            '异常评分': 'mean',
-            '错误率(%)': 'mean'
-        }).round(2)
-        
-        behavior_stats.columns = ['IP数量', '总请求数', '平均每IP请求数', '平均风险评分', '平均异常评分', '平均错误率(%)']
-        behavior_stats = behavior_stats.reset_index()
-        behavior_stats = behavior_stats.sort_values(by='平均风险评分', ascending=False)
-        
-        # 添加到工作表
-        behavior_headers = {
-            "模式": ["行为模式"],
-            "数量统计": ["IP数量", "总请求数", "平均每IP请求数"],
-            "风险评估": ["平均风险评分", "平均异常评分", "平均错误率(%)"]
-        }
-        
-        ws = add_dataframe_to_excel_with_grouped_headers(
-            wb, behavior_stats, '行为模式分析', header_groups=behavior_headers
-        )
-        
-        format_excel_sheet(ws)
+    format_excel_sheet(ws)
+
+
+def _create_anomaly_detection_sheet(wb, ip_df):
+    """创建异常检测工作表"""
+    ws = wb.create_sheet(title='异常检测分析')
     
-    def _create_advanced_time_distribution_sheet(self, wb):
-        """创建高级时间分布分析工作表"""
-        ws = wb.create_sheet(title='时间分布分析')
-        
-        if not self.global_hourly_distribution:
-            ws.cell(row=1, column=1, value="⚠️ 无时间分布数据").font = Font(bold=True)
-            return
-        
-        # 创建小时分布数据 - 增强版
-        hours = list(range(24))
-        total_requests = sum(self.global_hourly_distribution.values())
-        
-        time_data = []
-        for hour in hours:
-            requests = self.global_hourly_distribution.get(hour, 0)
-            percentage = round(requests / total_requests * 100, 2) if total_requests > 0 else 0
-            
-            # 分析时段特征
-            if 6 <= hour <= 12:
-                period = "上午"
-            elif 13 <= hour <= 18:
-                period = "下午"
-            elif 19 <= hour <= 23:
-                period = "晚上"
-            else:
-                period = "深夜"
-            
-            time_data.append({
-                '小时': f"{hour:02d}:00",
-                '时段': period,
-                '请求数': requests,
-                '占比(%)': percentage,
-                '活跃度': '高' if percentage > 6 else ('中' if percentage > 3 else '低')
-            })
-        
-        time_df = pd.DataFrame(time_data)
-        
-        # 添加到工作表
-        time_headers = {
-            "时间": ["小时", "时段"],
-            "统计": ["请求数", "占比(%)", "活跃度"]
-        }
-        
-        ws = add_dataframe_to_excel_with_grouped_headers(
-            wb, time_df, '时间分布分析', header_groups=time_headers
-        )
-        
-        format_excel_sheet(ws)
+    # 筛选异常IP
+    anomaly_ips = ip_df[ip_df['异常等级'] != '正常'].sort_values(by='异常评分', ascending=False)
     
-    def _create_anomaly_detection_sheet(self, wb, ip_df):
-        """创建异常检测工作表"""
-        ws = wb.create_sheet(title='异常检测分析')
-        
-        # 筛选异常IP
-        anomaly_ips = ip_df[ip_df['异常等级'] != '正常'].sort_values(by='异常评分', ascending=False)
-        
-        if anomaly_ips.empty:
-            ws.cell(row=1, column=1, value="🎉 未检测到异常IP").font = Font(bold=True)
-            return
-        
-        # 异常IP表头
-        anomaly_headers = {
-            "基础信息": ["IP地址", "IP类型", "行为模式"],
-            "异常指标": ["异常评分", "异常等级", "风险评分"],
-            "性能指标": ["总请求数", "成功率(%)", "P99响应时间(秒)", "唯一API数(估计)"]
-        }
-        
-        anomaly_columns = [
-            "IP地址", "IP类型", "行为模式", "异常评分", "异常等级", "风险评分",
-            "总请求数", "成功率(%)", "P99响应时间(秒)", "唯一API数(估计)"
-        ]
-        anomaly_df = anomaly_ips[anomaly_columns].copy()
-        
-        ws = add_dataframe_to_excel_with_grouped_headers(
-            wb, anomaly_df, '异常检测分析', header_groups=anomaly_headers
-        )
-        
-        format_excel_sheet(ws)
+    if anomaly_ips.empty:
+        ws.cell(row=1, column=1, value="🎉 未检测到异常IP").font = Font(bold=True)
+        return
     
-    def _create_advanced_ip_overview_sheet(self, wb, ip_df):
-        """创建高级IP分析概览工作表"""
-        ws = wb.create_sheet(title='分析概览')
-        
-        # 移动到第一个位置
-        wb.move_sheet(ws, -(len(wb.worksheets) - 1))
-        
-        # 总体统计
-        total_unique_ips = len(ip_df)
-        total_requests = ip_df['总请求数'].sum()
-        avg_requests_per_ip = total_requests / total_unique_ips if total_unique_ips > 0 else 0
-        
-        # 风险统计
-        high_risk_count = len(ip_df[ip_df['风险评分'] > 70])
-        medium_risk_count = len(ip_df[(ip_df['风险评分'] > 50) & (ip_df['风险评分'] <= 70)])
-        low_risk_count = len(ip_df[ip_df['风险评分'] <= 50])
-        
-        # 异常统计
-        severe_anomaly = len(ip_df[ip_df['异常等级'] == '严重异常'])
-        moderate_anomaly = len(ip_df[ip_df['异常等级'] == '中度异常'])
-        mild_anomaly = len(ip_df[ip_df['异常等级'] == '轻微异常'])
-        normal_count = len(ip_df[ip_df['异常等级'] == '正常'])
-        
-        # IP类型统计
-        ip_type_counts = ip_df['IP类型'].value_counts()
-        
-        # 行为模式统计
-        behavior_counts = ip_df['行为模式'].value_counts()
-        
-        # 性能统计
-        avg_success_rate = ip_df['成功率(%)'].mean()
-        avg_error_rate = ip_df['错误率(%)'].mean()
-        avg_response_time = ip_df['平均响应时间(秒)'].mean()
-        
-        # 概览数据
-        overview_data = [
-            ['🚀 === 高级IP分析概览 ===', ''],
-            ['', ''],
-            
-            ['📊 === 基础统计 ===', ''],
-            ['总处理记录数', self.total_processed],
-            ['唯一IP数量', total_unique_ips],
-            ['总请求数', total_requests],
-            ['平均每IP请求数', round(avg_requests_per_ip, 2)],
-            ['', ''],
-            
-            ['🔍 === 风险分布 ===', ''],
-            ['高风险IP数量 (>70)', high_risk_count],
-            ['中等风险IP数量 (50-70)', medium_risk_count],
-            ['低风险IP数量 (≤50)', low_risk_count],
-            ['', ''],
-            
-            ['⚠️ === 异常检测 ===', ''],
-            ['严重异常IP', severe_anomaly],
-            ['中度异常IP', moderate_anomaly],
-            ['轻微异常IP', mild_anomaly],
-            ['正常IP', normal_count],
-            ['', ''],
-            
-            ['🌐 === IP类型分布 ===', ''],
-        ]
-        
-        # 添加IP类型统计
-        for ip_type, count in ip_type_counts.items():
-            overview_data.append([f'{ip_type}数量', count])
-        
-        overview_data.extend([
-            ['', ''],
-            ['👤 === 行为模式分布 ===', ''],
-        ])
-        
-        # 添加行为模式统计
-        for behavior, count in behavior_counts.items():
-            overview_data.append([f'{behavior}数量', count])
-        
-        overview_data.extend([
-            ['', ''],
-            ['📈 === 性能统计 ===', ''],
-            ['平均成功率(%)', round(avg_success_rate, 2)],
-            ['平均错误率(%)', round(avg_error_rate, 2)],
-            ['平均响应时间(秒)', round(avg_response_time, 3)],
-            ['', ''],
-            
-            ['🏆 === TOP指标 ===', ''],
-            ['请求量最大IP', ip_df.iloc[0]['IP地址'] if not ip_df.empty else 'N/A'],
-            ['最大请求量', ip_df.iloc[0]['总请求数'] if not ip_df.empty else 0],
-            ['最高风险评分IP', ip_df.loc[ip_df['风险评分'].idxmax(), 'IP地址'] if not ip_df.empty else 'N/A'],
-            ['最高风险评分', ip_df['风险评分'].max() if not ip_df.empty else 0],
-            ['', ''],
-            
-            ['🔧 === 优化说明 ===', ''],
-            ['算法优化', 'T-Digest + HyperLogLog + 蓄水池采样'],
-            ['内存优化', '流式算法，支持40G+数据'],
-            ['分析增强', '多维风险评分 + 异常检测 + 行为分析'],
-        ])
-        
-        # 写入数据
-        for row_idx, (label, value) in enumerate(overview_data, start=1):
-            cell_label = ws.cell(row=row_idx, column=1, value=label)
-            cell_value = ws.cell(row=row_idx, column=2, value=value)
-            
-            if label.startswith('===') and label.endswith('==='):
-                cell_label.font = Font(bold=True, size=12)
-        
-        # 设置列宽
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 25
+    # 异常IP表头
+    anomaly_headers = {
+        "基础信息": ["IP地址", "IP类型", "行为模式"],
+        "异常指标": ["异常评分", "异常等级", "风险评分"],
+        "性能指标": ["总请求数", "成功率(%)", "P99响应时间(秒)", "唯一API数(估计)"]
+    }
+    
+    anomaly_columns = [
+        "IP地址", "IP类型", "行为模式", "异常评分", "异常等级", "风险评分",
+        "总请求数", "成功率(%)", "P99响应时间(秒)", "唯一API数(估计)"
+    ]
+    anomaly_df = anomaly_ips[anomaly_columns].copy()
+    
+    ws = add_dataframe_to_excel_with_grouped_headers(
+        wb, anomaly_df, '异常检测分析', header_groups=anomaly_headers
+    )
+    
+    format_excel_sheet(ws)
+
+
+def _create_advanced_ip_overview_sheet(wb, ip_df, total_processed):
+    """创建高级IP分析概览工作表"""
+    ws = wb.create_sheet(title='分析概览')
+    
+    # 移动到第一个位置
+    wb.move_sheet(ws, -(len(wb.worksheets) - 1))
+    
+    # 总体统计
+    total_unique_ips = len(ip_df)
+    total_requests = ip_df['总请求数'].sum()
+    avg_requests_per_ip = total_requests / total_unique_ips if total_unique_ips > 0 else 0
+    
+    # 风险统计
+    high_risk_count = len(ip_df[ip_df['风险评分'] > 70])
+    medium_risk_count = len(ip_df[(ip_df['风险评分'] > 50) & (ip_df['风险评分'] <= 70)])
+    low_risk_count = len(ip_df[ip_df['风险评分'] <= 50])
+    
+    # 异常统计
+    severe_anomaly = len(ip_df[ip_df['异常等级'] == '严重异常'])
+    moderate_anomaly = len(ip_df[ip_df['异常等级'] == '中度异常'])
+    mild_anomaly = len(ip_df[ip_df['异常等级'] == '轻微异常'])
+    normal_count = len(ip_df[ip_df['异常等级'] == '正常'])
+    
+    # IP类型统计
+    ip_type_counts = ip_df['IP类型'].value_counts()
+    
+    # 行为模式统计
+    behavior_counts = ip_df['行为模式'].value_counts()
+    
+    # 性能统计
+    avg_success_rate = ip_df['成功率(%)'].mean()
+    avg_error_rate = ip_df['错误率(%)'].mean()
+    avg_response_time = ip_df['平均响应时间(秒)'].mean()
+    
+    # 概览数据
+    overview_data = [
+        ['🚀 === 高级IP分析概览 ===', ''],
+        ['', ''],
+        
+        ['📊 === 基础统计 ===', ''],
+        ['总处理记录数', total_processed],
+        ['唯一IP数量', total_unique_ips],
+        ['总请求数', total_requests],
+        ['平均每IP请求数', round(avg_requests_per_ip, 2)],
+        ['', ''],
+        
+        ['🔍 === 风险分布 ===', ''],
+        ['高风险IP数量 (>70)', high_risk_count],
+        ['中等风险IP数量 (50-70)', medium_risk_count],
+        ['低风险IP数量 (≤50)', low_risk_count],
+        ['', ''],
+        
+        ['⚠️ === 异常检测 ===', ''],
+        ['严重异常IP', severe_anomaly],
+        ['中度异常IP', moderate_anomaly],
+        ['轻微异常IP', mild_anomaly],
+        ['正常IP', normal_count],
+        ['', ''],
+        
+        ['🌐 === IP类型分布 ===', ''],
+    ]
+    
+    # 添加IP类型统计
+    for ip_type, count in ip_type_counts.items():
+        overview_data.append([f'{ip_type}数量', count])
+    
+    overview_data.extend([
+        ['', ''],
+        ['👤 === 行为模式分布 ===', ''],
+    ])
+    
+    # 添加行为模式统计
+    for behavior, count in behavior_counts.items():
+        overview_data.append([f'{behavior}数量', count])
+    
+    overview_data.extend([
+        ['', ''],
+        ['📈 === 性能统计 ===', ''],
+        ['平均成功率(%)', round(avg_success_rate, 2)],
+        ['平均错误率(%)', round(avg_error_rate, 2)],
+        ['平均响应时间(秒)', round(avg_response_time, 3)],
+        ['', ''],
+        
+        ['🏆 === TOP指标 ===', ''],
+        ['请求量最大IP', ip_df.iloc[0]['IP地址'] if not ip_df.empty else 'N/A'],
+        ['最大请求量', ip_df.iloc[0]['总请求数'] if not ip_df.empty else 0],
+        ['最高风险评分IP', ip_df.loc[ip_df['风险评分'].idxmax(), 'IP地址'] if not ip_df.empty else 'N/A'],
+        ['最高风险评分', ip_df['风险评分'].max() if not ip_df.empty else 0],
+        ['', ''],
+        
+        ['🔧 === 优化说明 ===', ''],
+        ['算法优化', 'T-Digest + HyperLogLog + 蓄水池采样'],
+        ['内存优化', '流式算法，支持40G+数据'],
+        ['分析增强', '多维风险评分 + 异常检测 + 行为分析'],
+    ])
+    
+    # 写入数据
+    for row_idx, (label, value) in enumerate(overview_data, start=1):
+        cell_label = ws.cell(row=row_idx, column=1, value=label)
+        cell_value = ws.cell(row=row_idx, column=2, value=value)
         
-        format_excel_sheet(ws)
+        if label.startswith('===') and label.endswith('==='):
+            cell_label.font = Font(bold=True, size=12)
+    
+    # 设置列宽
+    ws.column_dimensions['A'].width = 30
+    ws.column_dimensions['B'].width = 25
+    
+    format_excel_sheet(ws)
 
 
 # 向后兼容的函数接口
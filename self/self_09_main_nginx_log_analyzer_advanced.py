@@ -1,5 +1,6 @@
 import os
 import gc
+import argparse
 import pandas as pd
 from datetime import datetime
 import traceback
@@ -23,13 +24,17 @@ from self_00_01_constants import (
 )
 from self_00_03_log_parser import collect_log_files, process_log_files
 from self_00_02_utils import log_info
+from self_00_06_report_sinks import configure_report_sinks, close_report_sinks
+from self_00_10_result_registry import get_result_registry
 
 
 class AdvancedNginxLogAnalyzer:
     """高级Nginx日志分析器 - 统一协调所有分析模块"""
     
-    def __init__(self):
+    def __init__(self, excel_mode=None):
+        """excel_mode: Excel生成模式 sync / background / process / off，默认取 DEFAULT_EXCEL_MODE"""
         self.script_start_time = datetime.now()
+        self.excel_mode = excel_mode
         self.outputs = {}
         self.temp_files = []
         
@@ -40,6 +45,9 @@ class AdvancedNginxLogAnalyzer:
             
             # 初始化分析环境
             log_dir, output_dir, temp_dir, temp_csv = self._setup_analysis_environment()
+            if self.excel_mode:
+                configure_report_sinks(excel_mode=self.excel_mode)
+                log_info(f"📝 Excel生成模式: {self.excel_mode}")
             
             # 收集和处理日志文件
             total_records = self._collect_and_process_logs(log_dir, temp_csv)
@@ -60,6 +68,9 @@ class AdvancedNginxLogAnalyzer:
             summary_output = os.path.join(output_dir, "12_高级综合报告.xlsx")
             self._generate_advanced_summary_report(summary_output)
             
+            # 等待后台报告生成完成
+            self._wait_for_background_reports()
+            
             # 清理临时文件
             self._cleanup_temp_files()
             
@@ -116,6 +127,7 @@ class AdvancedNginxLogAnalyzer:
     
     def _initialize_outputs(self, log_dir, total_records):
         """初始化输出数据结构"""
+        get_result_registry().clear()
         self.outputs = {
             'log_dir': log_dir,
             'total_requests': total_records,
@@ -144,8 +156,7 @@ class AdvancedNginxLogAnalyzer:
                     "success_codes": DEFAULT_SUCCESS_CODES, 
                     "slow_threshold": DEFAULT_SLOW_THRESHOLD
                 },
-                "description": "分析API性能指标，识别性能瓶颈",
-                "output_key": "slow_apis"
+                "description": "分析API性能指标，识别性能瓶颈"
             },
             {
                 "name": "高级服务层级分析", 
@@ -156,8 +167,7 @@ class AdvancedNginxLogAnalyzer:
                     "output_path": os.path.join(output_dir, "02.服务层级分析.xlsx"),
                     "success_codes": DEFAULT_SUCCESS_CODES
                 },
-                "description": "深度分析服务层级性能，使用流式算法",
-                "output_key": "service_stats"
+                "description": "深度分析服务层级性能，使用流式算法"
             },
             {
                 "name": "高级慢请求分析", 
@@ -168,8 +178,7 @@ class AdvancedNginxLogAnalyzer:
                     "output_path": os.path.join(output_dir, "03_慢请求分析.xlsx"),
                     "slow_threshold": DEFAULT_SLOW_THRESHOLD
                 },
-                "description": "智能识别和分析慢请求模式",
-                "output_key": "slowest_requests"
+                "description": "智能识别和分析慢请求模式"
             },
             {
                 "name": "高级状态码分析", 
@@ -180,8 +189,7 @@ class AdvancedNginxLogAnalyzer:
                     "output_path": os.path.join(output_dir, "04.状态码统计.xlsx"),
                     "slow_request_threshold": DEFAULT_SLOW_THRESHOLD
                 },
-                "description": "全面分析HTTP状态码分布",
-                "output_key": "status_stats"
+                "description": "全面分析HTTP状态码分布"
             },
             {
                 "name": "高级时间维度分析-全部接口", 
@@ -191,8 +199,7 @@ class AdvancedNginxLogAnalyzer:
                     "csv_path": temp_csv, 
                     "output_path": os.path.join(output_dir, "05.时间维度分析-全部接口.xlsx")
                 },
-                "description": "基于T-Digest的时间维度深度分析",
-                "output_key": "time_analysis_all"
+                "description": "基于T-Digest的时间维度深度分析"
             },
             {
                 "name": "时间维度分析-特定接口", 
@@ -203,8 +210,7 @@ class AdvancedNginxLogAnalyzer:
                     "output_path": os.path.join(output_dir, "05_01.时间维度分析-指定接口.xlsx"),
                     "specific_uri_list": DEFAULT_COLUMN_API
                 },
-                "description": "针对关键接口的时间维度分析",
-                "output_key": "time_analysis_specific"
+                "description": "针对关键接口的时间维度分析"
             },
             {
                 "name": "高级服务稳定性分析", 
@@ -214,8 +220,7 @@ class AdvancedNginxLogAnalyzer:
                     "csv_path": temp_csv, 
                     "output_path": os.path.join(output_dir, "06_服务稳定性.xlsx")
                 },
-                "description": "多维度服务稳定性评估，含异常检测",
-                "output_key": "service_stability"
+                "description": "多维度服务稳定性评估，含异常检测"
             },
             {
                 "name": "高级IP来源分析", 
@@ -225,8 +230,7 @@ class AdvancedNginxLogAnalyzer:
                     "csv_path": temp_csv, 
                     "output_path": os.path.join(output_dir, "08_IP来源分析.xlsx")
                 },
-                "description": "智能IP行为分析，含风险评估",
-                "output_key": "ip_analysis"
+                "description": "智能IP行为分析，含风险评估"
             },
             {
                 "name": "请求头分析", 
@@ -236,8 +240,7 @@ class AdvancedNginxLogAnalyzer:
                     "csv_path": temp_csv, 
                     "output_path": os.path.join(output_dir, "10_请求头分析.xlsx")
                 },
-                "description": "User-Agent和Referer深度分析",
-                "output_key": "header_analysis"
+                "description": "User-Agent和Referer深度分析"
             },
             {
                 "name": "请求头性能关联分析", 
@@ -248,8 +251,7 @@ class AdvancedNginxLogAnalyzer:
                     "output_path": os.path.join(output_dir, "11_请求头性能关联分析.xlsx"),
                     "slow_threshold": DEFAULT_SLOW_THRESHOLD
                 },
-                "description": "请求头与性能指标的关联性分析",
-                "output_key": "header_performance_analysis"
+                "description": "请求头与性能指标的关联性分析"
             }
         ]
     
@@ -277,7 +279,6 @@ class AdvancedNginxLogAnalyzer:
             # 跳过已执行的API性能分析
             if task_name == "API性能分析" and top_5_slowest is not None:
                 log_info(f"[{i}/{total_tasks}] ✅ {task_name} (已预先执行)")
-                self.outputs[task.get('output_key', task_name.lower())] = top_5_slowest
                 continue
             
             log_info(f"[{i}/{total_tasks}] 🔄 开始执行: {task_name}")
@@ -331,20 +332,15 @@ class AdvancedNginxLogAnalyzer:
                     "output_path": specific_api_output,
                     "specific_uri_list": slow_api
                 },
-                "description": f"针对慢接口 {slow_api[:50]} 的深度时间分析",
-                "output_key": f"slow_api_analysis_{i}"
+                "description": f"针对慢接口 {slow_api[:50]} 的深度时间分析"
             })
         
         # 按优先级重新排序任务
         analysis_tasks.sort(key=lambda x: x.get('priority', 999))
     
     def _process_task_result(self, task, result):
-        """处理任务结果"""
+        """处理任务结果：只输出日志摘要，不保留结果表（综合报告读取各分析器发布的结果摘要）"""
         task_name = task["name"]
-        output_key = task.get('output_key', task_name.lower())
-        
-        # 保存结果到outputs
-        self.outputs[output_key] = result
         
         # 根据任务类型显示特定的结果摘要
         if "API性能分析" in task_name and result is not None and not result.empty:
@@ -412,6 +408,14 @@ class AdvancedNginxLogAnalyzer:
             log_info(f"❌ 生成综合报告失败: {str(e)}", level="ERROR")
             log_info(traceback.format_exc(), level="ERROR")
     
+    def _wait_for_background_reports(self):
+        """等待后台生成的Excel报告全部写完，并关闭渲染进程池"""
+        start_time = datetime.now()
+        close_report_sinks()
+        elapsed = (datetime.now() - start_time).total_seconds()
+        if elapsed > 1:
+            log_info(f"⏳ 等待后台报告生成完成 (耗时: {elapsed:.2f} 秒)")
+    
     def _cleanup_temp_files(self):
         """清理临时文件"""
         log_info("🧹 清理临时文件...")
@@ -447,12 +451,16 @@ class AdvancedNginxLogAnalyzer:
 
 
 # 向后兼容的函数接口
-def main():
+def main(excel_mode=None):
     """主函数 - 兼容接口"""
-    analyzer = AdvancedNginxLogAnalyzer()
+    analyzer = AdvancedNginxLogAnalyzer(excel_mode)
     analyzer.main()
 
 
 # 启动高级分析
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='高级Nginx日志分析')
+    parser.add_argument('--excel-mode', choices=['sync', 'background', 'process', 'off'],
+                        help='Excel生成模式（process在后台进程池渲染，与后续分析并行），默认取常量配置')
+    args = parser.parse_args()
+    main(excel_mode=args.excel_mode)
\ No newline at end of file
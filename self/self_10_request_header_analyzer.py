@@ -6,7 +6,6 @@ from urllib.parse import urlparse
 from openpyxl import Workbook
 from openpyxl.styles import Font
 
-from self_00_01_constants import DEFAULT_CHUNK_SIZE
 from self_00_02_utils import log_info
 from self_00_04_excel_processor import (
     format_excel_sheet,
@@ -15,14 +14,17 @@ from self_00_04_excel_processor import (
     create_line_chart
 )
 from self_00_05_sampling_algorithms import HyperLogLog, ReservoirSampler
+from self_00_06_report_sinks import publish_report
+from self_00_07_csv_reader import read_csv_chunks
+
+# CSV读取字段
+CSV_COLUMNS = ['user_agent_string', 'referer_url', 'client_ip_address', 'response_status_code', 'total_request_duration']
 
 
 def analyze_request_headers(csv_path, output_path, top_n=100):
     """分析请求头数据，包括User-Agent和Referer分析 - 内存优化版"""
     log_info("🚀 开始高级请求头分析（内存优化版）...", show_memory=True)
     
-    chunk_size = max(DEFAULT_CHUNK_SIZE // 2, 10000)
-    
     # User-Agent分析数据 - 使用HyperLogLog优化内存
     user_agent_stats = defaultdict(lambda: {
         'count': 0,
@@ -64,7 +66,7 @@ def analyze_request_headers(csv_path, output_path, top_n=100):
     
     # 第一遍：收集统计数据
     log_info("开始收集请求头统计数据")
-    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+    for chunk in read_csv_chunks(csv_path, usecols=CSV_COLUMNS, categorical=True):
         chunk_size_actual = len(chunk)
         total_processed += chunk_size_actual
         
@@ -173,10 +175,10 @@ def analyze_request_headers(csv_path, output_path, top_n=100):
     
     log_info(f"✅ 请求头分析完成：总记录 {total_processed:,}，唯一User-Agent {len(user_agent_stats)}个，唯一Referer {len(referer_stats)}个")
     
-    # 生成分析报告
+    # 生成分析报告（转为普通字典，渲染任务可序列化到报告进程）
     analysis_results = {
-        'user_agent_stats': user_agent_stats,
-        'referer_stats': referer_stats,
+        'user_agent_stats': dict(user_agent_stats),
+        'referer_stats': dict(referer_stats),
         'browser_stats': browser_stats,
         'os_stats': os_stats,
         'device_stats': device_stats,
@@ -186,8 +188,10 @@ def analyze_request_headers(csv_path, output_path, top_n=100):
         'bot_stats': bot_stats
     }
     
-    # 创建Excel报告
-    create_request_header_excel(analysis_results, output_path, top_n, total_processed)
+    # 发布报告（请求头统计为计数字典，仅生成Excel）
+    publish_report(output_path,
+                   excel_writer=create_request_header_excel,
+                   excel_args=(analysis_results, output_path, top_n, total_processed))
     
     log_info(f"🎉 请求头分析完成，报告已生成：{output_path}", show_memory=True)
     
@@ -4,7 +4,7 @@ from collections import defaultdict, Counter
 from openpyxl import Workbook
 from openpyxl.styles import Font
 
-from self_00_01_constants import DEFAULT_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD
+from self_00_01_constants import DEFAULT_SLOW_THRESHOLD
 from self_00_02_utils import log_info
 from self_00_04_excel_processor import (
     format_excel_sheet,
@@ -13,6 +13,7 @@ from self_00_04_excel_processor import (
     create_line_chart
 )
 from self_00_05_sampling_algorithms import ReservoirSampler
+from self_00_06_report_sinks import publish_report
 from self_10_request_header_analyzer import (
     extract_browser_info, 
     extract_os_info, 
@@ -22,14 +23,19 @@ from self_10_request_header_analyzer import (
     detect_search_engine,
     detect_social_media
 )
+from self_00_07_csv_reader import read_csv_chunks
+
+# CSV读取字段
+CSV_COLUMNS = [
+    'user_agent_string', 'referer_url', 'total_request_duration', 'response_status_code',
+    'response_body_size_kb', 'request_full_uri', 'raw_time'
+]
 
 
 def analyze_header_performance_correlation(csv_path, output_path, slow_threshold=DEFAULT_SLOW_THRESHOLD):
     """分析请求头与性能的关联性 - 内存优化版"""
     log_info("🚀 开始请求头性能关联分析（内存优化版）...", show_memory=True)
     
-    chunk_size = max(DEFAULT_CHUNK_SIZE // 2, 10000)
-    
     # 性能统计数据结构
     browser_performance = defaultdict(lambda: {
         'total_requests': 0,
@@ -93,7 +99,7 @@ def analyze_header_performance_correlation(csv_path, output_path, slow_threshold
     
     # 第一遍：收集性能关联数据
     log_info("开始收集请求头性能关联数据")
-    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+    for chunk in read_csv_chunks(csv_path, usecols=CSV_COLUMNS, categorical=True):
         chunk_size_actual = len(chunk)
         total_processed += chunk_size_actual
         
@@ -196,8 +202,9 @@ def analyze_header_performance_correlation(csv_path, output_path, slow_threshold
         'total_slow_requests': total_slow_requests
     }
     
-    # 创建Excel报告
-    create_header_performance_excel(analysis_results, output_path, slow_threshold)
+    # 发布报告（Excel及已配置的数据输出目标）
+    publish_report(output_path, analysis_results,
+                   excel_writer=create_header_performance_excel, excel_args=(analysis_results, output_path, slow_threshold))
     
     log_info(f"🎉 请求头性能关联分析完成，报告已生成：{output_path}", show_memory=True)
     
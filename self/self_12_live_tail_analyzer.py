@@ -0,0 +1,582 @@
+"""
+实时跟踪分析模块 - 跟踪增长中的.log文件，按滚动窗口输出API/状态码/慢请求视图
+
+1. 文件跟踪：记录每个文件的inode与读取偏移，按固定大小的块只读取新增的完整行，积压很多时也不整段读入；
+   安装inotify_simple时按文件事件唤醒，否则按固定间隔轮询；文件被轮转（inode变化）时先读完
+   已打开的旧文件剩余内容再从头读取新文件，文件被截断（变小）时从头读取
+2. 新行逐行解析，每攒够 LIVE_TAIL_BATCH_LINES 行送入分析器：
+   - 送入 AdvancedStreamingApiAnalyzer.process_chunk，得到启动以来的累计API统计
+   - 写入按分钟的环形聚合（API请求/错误/慢请求/耗时、状态码计数、耗时直方图），
+     最近5/15/60分钟视图由最近N个分钟桶合并得到，不重读历史数据
+   - 送入 ErrorBurstDetector，接口错误爆发开始/结束时立即输出
+3. 定期发布快照：JSON / HTML 写到输出目录，或写入ClickHouse通用结果表
+
+时间以日志时间为准：窗口终点为已读到的最新日志时间，无新日志时按墙钟流逝推进，
+因此既可跟踪实时日志，也可用 from_start=True 回放已有日志。
+
+用法：
+    python self_12_live_tail_analyzer.py                  # 跟踪 DEFAULT_LOG_DIR
+    LiveTailAnalyzer(log_dir, output_dir).run()
+"""
+
+import glob
+import html
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from self_00_01_constants import DEFAULT_LOG_DIR, DEFAULT_SLOW_THRESHOLD, DEFAULT_SUCCESS_CODES, LOG_TYPE_AUTO, \
+    LIVE_TAIL_WINDOWS_MINUTES, LIVE_TAIL_POLL_INTERVAL, LIVE_TAIL_BATCH_LINES, LIVE_TAIL_BATCH_SECONDS, \
+    LIVE_TAIL_READ_BYTES, LIVE_TAIL_SNAPSHOT_INTERVAL, LIVE_TAIL_SNAPSHOT_FORMATS, LIVE_TAIL_TOP_N, \
+    STATUS_DESCRIPTIONS
+from self_00_02_utils import log_info, extract_app_name
+from self_00_03_log_parser import detect_log_type, parse_log_line
+from self_00_06_report_sinks import ClickHouseSink
+from self_00_09_burst_detector import ErrorBurstDetector, log_burst_event, to_epoch_seconds
+from self_01_api_analyzer_optimized import AdvancedStreamingApiAnalyzer, API_FIELD_MAPPING, \
+    generate_advanced_api_statistics
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+# 耗时直方图分桶边界（秒），对数间隔，用于合并窗口后估算分位数
+DURATION_BUCKET_EDGES = np.r_[0.0, np.geomspace(0.001, 600, 160)]
+
+
+class TailedFile:
+    """单个被跟踪文件的读取状态（文件保持打开，轮转后仍可读完旧文件）"""
+
+    __slots__ = ('path', 'source_file', 'app_name', 'log_type', 'inode', 'offset', 'partial', 'handle')
+
+    def __init__(self, path, offset=0, inode=None):
+        self.path = path
+        self.source_file = os.path.basename(path)
+        self.app_name = extract_app_name(self.source_file)
+        self.log_type = None
+        self.inode = inode
+        self.offset = offset
+        self.partial = b''
+        self.handle = None
+
+    def open_file(self):
+        """打开文件并定位到读取偏移；打开的已不是记录的inode时视为新文件，从头读取"""
+        self.handle = open(self.path, 'rb')
+        inode = os.fstat(self.handle.fileno()).st_ino
+        if self.inode is not None and inode != self.inode:
+            self.offset = 0
+            self.partial = b''
+        self.inode = inode
+        self.handle.seek(self.offset)
+
+    def close_file(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def restart(self, inode):
+        """轮转或截断后从头读取"""
+        self.close_file()
+        self.inode = inode
+        self.offset = 0
+        self.partial = b''
+
+
+class LogFileTailer:
+    """
+    跟踪目录下所有.log文件的新增行
+
+    Args:
+        log_dir: 日志目录或单个.log文件
+        from_start: 已存在的文件是否从头读取（默认只读取启动后新增的内容）
+        poll_interval: 无inotify时的轮询间隔（秒）
+    """
+
+    def __init__(self, log_dir, from_start=False, poll_interval=LIVE_TAIL_POLL_INTERVAL):
+        self.log_dir = log_dir
+        self.poll_interval = poll_interval
+        self.files = {}
+
+        for path in self._list_files():
+            stat = os.stat(path)
+            self.files[path] = TailedFile(path, offset=0 if from_start else stat.st_size, inode=stat.st_ino)
+
+        self.inotify = None
+        if INOTIFY_AVAILABLE:
+            watch_dir = log_dir if os.path.isdir(log_dir) else os.path.dirname(os.path.abspath(log_dir))
+            self.inotify = INotify()
+            self.inotify.add_watch(watch_dir, inotify_flags.MODIFY | inotify_flags.CREATE | inotify_flags.MOVED_TO)
+
+        log_info(f"跟踪 {len(self.files)} 个日志文件（{'inotify' if self.inotify else '轮询'}，"
+                 f"{'从头读取' if from_start else '只读取新增内容'}）: {log_dir}")
+
+    def _list_files(self):
+        if os.path.isdir(self.log_dir):
+            return sorted(glob.glob(os.path.join(self.log_dir, "*.log")))
+        return [self.log_dir] if os.path.isfile(self.log_dir) else []
+
+    def read_lines(self):
+        """逐块读取所有文件新增的完整行，逐行产出 (TailedFile, line)"""
+        for path in self._list_files():
+            if path not in self.files:
+                # 启动后新出现的文件从头读取
+                self.files[path] = TailedFile(path)
+                log_info(f"发现新日志文件: {path}")
+
+        for tailed in list(self.files.values()):
+            try:
+                stat = os.stat(tailed.path)
+            except FileNotFoundError:
+                stat = None
+
+            if stat is None or (tailed.inode is not None and stat.st_ino != tailed.inode):
+                # 已轮转（改名或删除后重建）：先读完仍打开的旧文件，包括末尾没有换行的最后一行
+                if tailed.handle is not None:
+                    yield from self._read_blocks(tailed, final=True)
+                    tailed.close_file()
+                if stat is None:
+                    continue
+                log_info(f"日志文件已轮转，从头读取: {tailed.path}")
+                tailed.restart(stat.st_ino)
+            elif stat.st_size < tailed.offset:
+                log_info(f"日志文件被截断，从头读取: {tailed.path}")
+                tailed.restart(stat.st_ino)
+            elif stat.st_size == tailed.offset:
+                continue
+
+            yield from self._read_blocks(tailed)
+
+    @staticmethod
+    def _read_blocks(tailed, final=False):
+        """从读取偏移按块读到文件末尾，末尾不完整的行留到下次读取（final 时作为最后一行产出）"""
+        if tailed.handle is None:
+            try:
+                tailed.open_file()
+            except FileNotFoundError:
+                return
+        if tailed.log_type is None:
+            tailed.log_type = detect_log_type(tailed.path)
+
+        while True:
+            data = tailed.handle.read(LIVE_TAIL_READ_BYTES)
+            if not data:
+                break
+            tailed.offset += len(data)
+
+            complete, _, tailed.partial = (tailed.partial + data).rpartition(b'\n')
+            for raw_line in complete.split(b'\n'):
+                line = raw_line.decode('utf-8', errors='replace').strip()
+                if line:
+                    yield tailed, line
+
+        if final and tailed.partial:
+            line = tailed.partial.decode('utf-8', errors='replace').strip()
+            tailed.partial = b''
+            if line:
+                yield tailed, line
+
+    def wait(self, timeout):
+        """等待文件变化或超时"""
+        if self.inotify is not None:
+            self.inotify.read(timeout=int(timeout * 1000))
+        else:
+            time.sleep(min(timeout, self.poll_interval))
+
+    def close(self):
+        for tailed in self.files.values():
+            tailed.close_file()
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+
+class RollingMinuteWindow:
+    """
+    按分钟的环形聚合：每个槽位保存一分钟的API聚合、状态码计数与耗时直方图
+
+    Args:
+        max_minutes: 保留的分钟数（最大滚动窗口）
+        slow_threshold: 慢请求阈值（秒）
+    """
+
+    API_COLUMNS = ['requests', 'errors', 'slow', 'duration_sum', 'duration_max']
+
+    def __init__(self, max_minutes, slow_threshold):
+        self.max_minutes = max_minutes
+        self.slow_threshold = slow_threshold
+        self.slot_minute = np.full(max_minutes, -1, dtype=np.int64)
+        self.api_frames = [None] * max_minutes
+        self.status_counts = [None] * max_minutes
+        self.histograms = np.zeros((max_minutes, len(DURATION_BUCKET_EDGES)), dtype=np.int64)
+        self.latest_minute = -1
+
+    def add_chunk(self, chunk, seconds):
+        """
+        写入一个数据块
+
+        Args:
+            chunk: 含 api / status / duration 列的DataFrame
+            seconds: 每行的日志时间（整数秒）
+        """
+        frame = pd.DataFrame({
+            'minute': seconds // 60,
+            'api': chunk['api'].to_numpy(),
+            'status': chunk['status'].to_numpy(),
+            'duration': chunk['duration'].to_numpy(),
+        })
+        frame['errors'] = frame['status'].str.match(r'[45]').fillna(False)
+        frame['slow'] = frame['duration'] > self.slow_threshold
+        frame['bucket'] = np.searchsorted(DURATION_BUCKET_EDGES, frame['duration'].to_numpy(), side='right') - 1
+
+        self.latest_minute = max(self.latest_minute, int(frame['minute'].max()))
+        frame = frame[frame['minute'] > self.latest_minute - self.max_minutes]
+
+        for minute, group in frame.groupby('minute', sort=True):
+            slot = self._slot(int(minute))
+
+            api_frame = group.groupby('api', sort=False).agg(
+                requests=('duration', 'size'), errors=('errors', 'sum'), slow=('slow', 'sum'),
+                duration_sum=('duration', 'sum'), duration_max=('duration', 'max'))
+            self.api_frames[slot] = api_frame if self.api_frames[slot] is None else \
+                self._merge_api_frames([self.api_frames[slot], api_frame])
+
+            status_counts = group['status'].value_counts()
+            self.status_counts[slot] = status_counts if self.status_counts[slot] is None else \
+                self.status_counts[slot].add(status_counts, fill_value=0)
+
+            self.histograms[slot] += np.bincount(group['bucket'].to_numpy(), minlength=len(DURATION_BUCKET_EDGES))
+
+    def _slot(self, minute):
+        """返回分钟对应的槽位，槽位中是更早的分钟时先清空"""
+        slot = minute % self.max_minutes
+        if self.slot_minute[slot] != minute:
+            self.slot_minute[slot] = minute
+            self.api_frames[slot] = None
+            self.status_counts[slot] = None
+            self.histograms[slot] = 0
+        return slot
+
+    @classmethod
+    def _merge_api_frames(cls, frames):
+        merged = pd.concat(frames).groupby(level=0, sort=False)
+        return merged.agg({'requests': 'sum', 'errors': 'sum', 'slow': 'sum',
+                           'duration_sum': 'sum', 'duration_max': 'max'})
+
+    def window(self, minutes, now_minute):
+        """
+        合并最近 minutes 分钟（截至 now_minute）的聚合
+
+        Returns:
+            (api_df, status_counts, histogram)
+        """
+        slots = np.flatnonzero((self.slot_minute > now_minute - minutes) & (self.slot_minute <= now_minute))
+        api_frames = [self.api_frames[slot] for slot in slots if self.api_frames[slot] is not None]
+        status_frames = [self.status_counts[slot] for slot in slots if self.status_counts[slot] is not None]
+
+        api_df = self._merge_api_frames(api_frames) if api_frames else pd.DataFrame(columns=self.API_COLUMNS)
+        status_counts = pd.concat(status_frames).groupby(level=0).sum() if status_frames else pd.Series(dtype=np.int64)
+        return api_df, status_counts, self.histograms[slots].sum(axis=0)
+
+
+def histogram_percentile(histogram, percentile):
+    """由耗时直方图估算分位数（取所在分桶的上边界）"""
+    total = histogram.sum()
+    if total == 0:
+        return 0.0
+    index = int(np.searchsorted(np.cumsum(histogram), total * percentile / 100))
+    return float(DURATION_BUCKET_EDGES[min(index + 1, len(DURATION_BUCKET_EDGES) - 1)])
+
+
+class LiveTailAnalyzer:
+    """
+    实时跟踪分析器
+
+    Args:
+        log_dir: 日志目录或单个.log文件
+        output_dir: 快照输出目录
+        windows: 滚动窗口（分钟）列表
+        snapshot_interval: 快照发布间隔（秒）
+        snapshot_formats: 快照格式，json / html / clickhouse
+        slow_threshold: 慢请求阈值（秒）
+        success_codes: 成功状态码
+        from_start: 已存在的文件是否从头读取
+    """
+
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, output_dir=None, windows=None,
+                 snapshot_interval=LIVE_TAIL_SNAPSHOT_INTERVAL, snapshot_formats=None,
+                 slow_threshold=DEFAULT_SLOW_THRESHOLD, success_codes=None, from_start=False):
+        self.output_dir = output_dir or f"{log_dir}_实时分析"
+        self.windows = sorted(windows or LIVE_TAIL_WINDOWS_MINUTES)
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_formats = list(snapshot_formats or LIVE_TAIL_SNAPSHOT_FORMATS)
+        self.slow_threshold = slow_threshold
+        self.success_codes = [str(code) for code in (success_codes or DEFAULT_SUCCESS_CODES)]
+
+        self.tailer = LogFileTailer(log_dir, from_start=from_start)
+        self.minute_window = RollingMinuteWindow(self.windows[-1], slow_threshold)
+        self.burst_detector = ErrorBurstDetector(on_event=log_burst_event)
+        self.api_analyzer = AdvancedStreamingApiAnalyzer(slow_threshold)
+        self.clickhouse_sink = ClickHouseSink() if 'clickhouse' in self.snapshot_formats else None
+
+        self.pending_rows = []
+        self.total_lines = 0
+        self.total_records = 0
+        self.parse_errors = 0
+        self.snapshots_published = 0
+
+        # 日志时间水位：已读到的最新日志时间，以及读到它时的墙钟
+        self.watermark = None
+        self.watermark_wall = time.monotonic()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def run(self, duration=None):
+        """
+        跟踪日志直到中断（Ctrl+C）或运行 duration 秒
+
+        Returns:
+            dict: 最后一次快照
+        """
+        log_info(f"🚀 开始实时跟踪分析，窗口 {self.windows} 分钟，快照每 {self.snapshot_interval} 秒 -> {self.output_dir}",
+                 show_memory=True)
+        start = time.monotonic()
+        last_feed = last_snapshot = start
+        snapshot = None
+
+        try:
+            while duration is None or time.monotonic() - start < duration:
+                self._read_new_lines()
+
+                now = time.monotonic()
+                if self.pending_rows and (len(self.pending_rows) >= LIVE_TAIL_BATCH_LINES
+                                          or now - last_feed >= LIVE_TAIL_BATCH_SECONDS):
+                    self._feed_pending_rows()
+                    last_feed = now
+
+                if now - last_snapshot >= self.snapshot_interval:
+                    self.burst_detector.advance(self.current_seconds())
+                    snapshot = self.publish_snapshot()
+                    last_snapshot = now
+
+                if len(self.pending_rows) < LIVE_TAIL_BATCH_LINES:
+                    self.tailer.wait(min(LIVE_TAIL_BATCH_SECONDS, self.snapshot_interval))
+        except KeyboardInterrupt:
+            log_info("收到中断信号，停止跟踪")
+        finally:
+            self._read_new_lines()
+            self._feed_pending_rows()
+            snapshot = self.publish_snapshot()
+            self.tailer.close()
+            if self.clickhouse_sink is not None:
+                self.clickhouse_sink.close()
+            log_info(f"🎉 实时跟踪结束：读取 {self.total_lines:,} 行，解析 {self.total_records:,} 条，"
+                     f"跳过 {self.parse_errors:,} 行，发布快照 {self.snapshots_published} 次", show_memory=True)
+        return snapshot
+
+    def _read_new_lines(self):
+        """读取并解析新增行，每攒够 LIVE_TAIL_BATCH_LINES 条即送入分析器（积压很多时内存也有界）"""
+        for tailed, line in self.tailer.read_lines():
+            self.total_lines += 1
+            row = parse_log_line(line, tailed.source_file, tailed.app_name, tailed.log_type or LOG_TYPE_AUTO)
+            if row:
+                self.pending_rows.append(row)
+                if len(self.pending_rows) >= LIVE_TAIL_BATCH_LINES:
+                    self._feed_pending_rows()
+            else:
+                self.parse_errors += 1
+
+    def _feed_pending_rows(self):
+        """将攒下的记录送入各分析器"""
+        if not self.pending_rows:
+            return
+        chunk = pd.DataFrame(self.pending_rows)
+        self.pending_rows = []
+        self.total_records += len(chunk)
+
+        # 启动以来的累计API统计
+        self.api_analyzer.process_chunk(chunk, API_FIELD_MAPPING, self.success_codes)
+
+        seconds, valid = to_epoch_seconds(chunk['raw_time'] if 'raw_time' in chunk.columns else
+                                          pd.Series(None, index=chunk.index, dtype=object))
+        if not valid.any():
+            return
+
+        frame = pd.DataFrame({
+            'api': chunk['request_full_uri'].fillna('').astype(str).to_numpy()[valid],
+            'status': chunk['response_status_code'].fillna('').astype(str).to_numpy()[valid],
+            'duration': pd.to_numeric(chunk['total_request_duration'], errors='coerce').fillna(0).to_numpy()[valid],
+        })
+        seconds = seconds[valid]
+
+        # 分钟环形聚合与错误爆发检测
+        self.minute_window.add_chunk(frame, seconds)
+        errors = frame['status'].str.match(r'[45]').to_numpy()
+        if errors.any():
+            self.burst_detector.update(frame['api'].to_numpy()[errors], seconds[errors])
+
+        latest = int(seconds.max())
+        if self.watermark is None or latest > self.watermark:
+            self.watermark = latest
+            self.watermark_wall = time.monotonic()
+
+    def current_seconds(self):
+        """当前日志时间：最新日志时间 + 此后经过的墙钟时间"""
+        if self.watermark is None:
+            return 0
+        return self.watermark + int(time.monotonic() - self.watermark_wall)
+
+    def build_snapshot_frames(self):
+        """生成快照结果表 {表名: DataFrame}"""
+        now_seconds = self.current_seconds()
+        now_minute = now_seconds // 60
+        frames = {}
+        summary_rows = []
+
+        for minutes in self.windows:
+            api_df, status_counts, histogram = self.minute_window.window(minutes, now_minute)
+            total = int(api_df['requests'].sum()) if not api_df.empty else 0
+            errors = int(api_df['errors'].sum()) if not api_df.empty else 0
+            slow = int(api_df['slow'].sum()) if not api_df.empty else 0
+
+            summary_rows.append({
+                '窗口(分钟)': minutes,
+                '请求数': total,
+                'QPS': round(total / (minutes * 60), 2),
+                '错误数': errors,
+                '错误率(%)': round(errors / total * 100, 2) if total else 0,
+                '慢请求数': slow,
+                '慢请求率(%)': round(slow / total * 100, 2) if total else 0,
+                'P50耗时(秒)': round(histogram_percentile(histogram, 50), 3),
+                'P95耗时(秒)': round(histogram_percentile(histogram, 95), 3),
+                'P99耗时(秒)': round(histogram_percentile(histogram, 99), 3),
+            })
+
+            frames[f'API_{minutes}分钟'] = self._api_view(api_df, 'requests')
+            frames[f'慢请求_{minutes}分钟'] = self._api_view(api_df[api_df['slow'] > 0], 'slow')
+            frames[f'状态码_{minutes}分钟'] = pd.DataFrame({
+                '状态码': status_counts.index.astype(str),
+                '描述': [STATUS_DESCRIPTIONS.get(code, '') for code in status_counts.index.astype(str)],
+                '请求数': status_counts.to_numpy().astype(np.int64),
+                '占比(%)': (status_counts / total * 100).round(2).to_numpy() if total else 0,
+            }).sort_values(by='请求数', ascending=False)
+
+        frames['窗口汇总'] = pd.DataFrame(summary_rows)
+        frames['错误爆发'] = self._burst_view()
+        frames['累计API'] = self._cumulative_api_view()
+        return frames
+
+    @staticmethod
+    def _api_view(api_df, sort_column):
+        """窗口内Top API"""
+        if api_df.empty:
+            return pd.DataFrame()
+        top = api_df.sort_values(by=sort_column, ascending=False).head(LIVE_TAIL_TOP_N)
+        requests = top['requests'].to_numpy()
+        return pd.DataFrame({
+            'API': top.index,
+            '请求数': requests,
+            '错误数': top['errors'].to_numpy().astype(np.int64),
+            '错误率(%)': np.round(top['errors'].to_numpy() / requests * 100, 2),
+            '慢请求数': top['slow'].to_numpy().astype(np.int64),
+            '慢请求率(%)': np.round(top['slow'].to_numpy() / requests * 100, 2),
+            '平均耗时(秒)': np.round(top['duration_sum'].to_numpy() / requests, 3),
+            '最大耗时(秒)': np.round(top['duration_max'].to_numpy(), 3),
+        })
+
+    def _burst_view(self):
+        """进行中与最近结束的错误爆发"""
+        rows = [{'状态': '进行中', 'API': burst['key'], '开始时间': burst['start_time'], '结束时间': None,
+                 '峰值时间': burst['peak_time'], f'峰值{self.burst_detector.window_seconds}秒错误数': burst['peak_count'],
+                 '错误数': burst['errors']}
+                for burst in self.burst_detector.active_bursts()]
+        rows += [{'状态': '已结束', 'API': burst['key'], '开始时间': burst['start_time'], '结束时间': burst['end_time'],
+                  '峰值时间': burst['peak_time'], f'峰值{self.burst_detector.window_seconds}秒错误数': burst['peak_count'],
+                  '错误数': burst['errors']}
+                 for burst in list(self.burst_detector.bursts)[-LIVE_TAIL_TOP_N:][::-1]]
+        return pd.DataFrame(rows)
+
+    def _cumulative_api_view(self):
+        """启动以来的累计API统计（来自流式API分析器）"""
+        results = generate_advanced_api_statistics(self.api_analyzer)
+        if not results:
+            return pd.DataFrame()
+        results_df = pd.DataFrame(results)
+        if '总请求数' in results_df.columns:
+            results_df = results_df.sort_values(by='总请求数', ascending=False)
+        return results_df.head(LIVE_TAIL_TOP_N)
+
+    def publish_snapshot(self):
+        """发布快照"""
+        frames = self.build_snapshot_frames()
+        generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        log_time = pd.Timestamp(self.current_seconds(), unit='s').strftime('%Y-%m-%d %H:%M:%S') \
+            if self.watermark is not None else None
+        snapshot = {
+            'generated_at': generated_at,
+            'log_time': log_time,
+            'total_records': self.total_records,
+            'frames': {name: json.loads(df.to_json(orient='records', force_ascii=False, date_format='iso'))
+                       for name, df in frames.items()},
+        }
+
+        if 'json' in self.snapshot_formats:
+            self._write_atomic(os.path.join(self.output_dir, 'live_snapshot.json'),
+                               json.dumps(snapshot, ensure_ascii=False, indent=2))
+        if 'html' in self.snapshot_formats:
+            self._write_atomic(os.path.join(self.output_dir, 'live_snapshot.html'),
+                               self._render_html(frames, generated_at, log_time))
+        if self.clickhouse_sink is not None:
+            try:
+                self.clickhouse_sink.write('live_tail', os.path.join(self.output_dir, 'live_tail.xlsx'), frames)
+            except Exception as e:
+                log_info(f"快照写入ClickHouse失败: {e}", level="ERROR")
+
+        self.snapshots_published += 1
+        summary = frames['窗口汇总'].iloc[0] if not frames['窗口汇总'].empty else None
+        if summary is not None:
+            # 汇总行混有整数与小数列，按行取出时计数会变为浮点
+            log_info(f"快照 @ {log_time}: 最近{int(summary['窗口(分钟)'])}分钟 {int(summary['请求数']):,} 请求, "
+                     f"错误率 {summary['错误率(%)']}%, P95 {summary['P95耗时(秒)']}秒, "
+                     f"进行中爆发 {len(self.burst_detector.active_bursts())} 个")
+        return snapshot
+
+    def _render_html(self, frames, generated_at, log_time):
+        """快照HTML（页面每个快照间隔自动刷新）"""
+        parts = [
+            '<!DOCTYPE html><html><head><meta charset="utf-8">',
+            f'<meta http-equiv="refresh" content="{int(self.snapshot_interval)}">',
+            '<title>Nginx实时分析</title>',
+            '<style>body{font-family:sans-serif;margin:16px}table{border-collapse:collapse;margin-bottom:24px}'
+            'th,td{border:1px solid #ccc;padding:4px 8px;font-size:13px}th{background:#4472C4;color:#fff}</style>',
+            '</head><body>',
+            f'<h2>Nginx实时分析</h2><p>生成时间: {generated_at}，日志时间: {log_time or "-"}，'
+            f'累计记录: {self.total_records:,}</p>',
+        ]
+        for name, df in frames.items():
+            parts.append(f'<h3>{html.escape(name)}</h3>')
+            parts.append(df.to_html(index=False, na_rep='') if not df.empty else '<p>无数据</p>')
+        parts.append('</body></html>')
+        return '\n'.join(parts)
+
+    @staticmethod
+    def _write_atomic(path, content):
+        """先写临时文件再替换，读取方不会读到写了一半的快照"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temp_path, path)
+
+
+def run_live_tail(log_dir=DEFAULT_LOG_DIR, output_dir=None, duration=None, from_start=False, **kwargs):
+    """实时跟踪分析入口"""
+    return LiveTailAnalyzer(log_dir, output_dir, from_start=from_start, **kwargs).run(duration)
+
+
+if __name__ == "__main__":
+    run_live_tail()
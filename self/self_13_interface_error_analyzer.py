@@ -1,7 +1,6 @@
 import gc
 import os
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 from openpyxl import Workbook
@@ -10,12 +9,22 @@ from openpyxl.chart.label import DataLabelList
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
 from self_00_01_constants import (
-    DEFAULT_CHUNK_SIZE, EXCEL_MAX_ROWS,
+    EXCEL_MAX_ROWS,
     HEADER_FILL, ERROR_FILL, WARNING_FILL, SUCCESS_FILL,
-    STATUS_DESCRIPTIONS
+    STATUS_DESCRIPTIONS, ERROR_DETAIL_SAMPLE_SIZE
 )
 from self_00_02_utils import log_info
 from self_00_04_excel_processor import add_dataframe_to_excel_with_grouped_headers
+from self_00_06_report_sinks import publish_report
+from self_00_05_sampling_algorithms import ReservoirSampler
+from self_00_07_csv_reader import read_csv_chunks
+from self_00_09_burst_detector import ErrorBurstDetector, log_burst_event, to_epoch_seconds
+
+# CSV读取字段
+CSV_COLUMNS = [
+    'response_status_code', 'request_path', 'raw_time', 'total_request_duration', 'client_ip_address',
+    'application_name', 'service_name', 'upstream_server_address', 'upstream_connect_time', 'upstream_response_time'
+]
 
 
 def analyze_interface_errors(csv_path, output_path, slow_request_threshold=3.0, 
@@ -47,8 +56,7 @@ def analyze_interface_errors(csv_path, output_path, slow_request_threshold=3.0,
     }
     
     # 分块处理数据
-    chunk_size = DEFAULT_CHUNK_SIZE
-    reader = pd.read_csv(csv_path, chunksize=chunk_size)
+    reader = read_csv_chunks(csv_path, usecols=CSV_COLUMNS, categorical=True)
     
     for chunk in reader:
         stats['chunks_processed'] += 1
@@ -66,6 +74,9 @@ def analyze_interface_errors(csv_path, output_path, slow_request_threshold=3.0,
             del chunk
             gc.collect()
     
+    # 数据结束，关闭进行中的错误爆发
+    collectors['burst_detector'].flush()
+    
     # 后处理：过滤低流量接口并计算派生指标
     _post_process_data(collectors, stats, min_requests, error_threshold)
     
@@ -73,11 +84,8 @@ def analyze_interface_errors(csv_path, output_path, slow_request_threshold=3.0,
     log_info("生成接口错误分析报告...", True)
     dataframes = _generate_analysis_dataframes(collectors, stats, slow_request_threshold)
     
-    # 创建Excel报告
-    _create_excel_report(output_path, dataframes)
-    
-    # 生成图表
-    _create_charts(output_path, dataframes)
+    # 发布报告（Excel及图表、已配置的数据输出目标）
+    publish_report(output_path, dataframes, excel_writer=_write_excel_with_charts, excel_args=(output_path, dataframes))
     
     end_time = datetime.now()
     log_info(f"接口错误分析完成，耗时: {(end_time - start_time).total_seconds():.2f} 秒", True)
@@ -90,14 +98,14 @@ def analyze_interface_errors(csv_path, output_path, slow_request_threshold=3.0,
 def _initialize_collectors():
     """初始化数据收集器"""
     return {
-        # 接口错误统计
+        # 接口错误统计（响应时间只累计总和，不保留逐条数据）
         'interface_stats': defaultdict(lambda: {
             'total_requests': 0,
             'error_requests': 0,
             'status_codes': Counter(),
             'error_codes': Counter(),
-            'response_times': [],
-            'error_response_times': [],
+            'response_time_sum': 0.0,
+            'error_response_time_sum': 0.0,
             'slow_requests': 0,
             'clients': set(),
             'applications': set(),
@@ -108,8 +116,8 @@ def _initialize_collectors():
             'error_time_distribution': defaultdict(int)  # 按小时统计错误分布
         }),
         
-        # 错误状态码详情
-        'error_details': defaultdict(list),
+        # 错误详情样本（每个接口蓄水池采样，内存与错误量无关）
+        'error_details': defaultdict(lambda: ReservoirSampler(ERROR_DETAIL_SAMPLE_SIZE)),
         
         # 时间维度错误统计
         'error_by_time': defaultdict(lambda: defaultdict(int)),  # {time: {interface: count}}
@@ -119,8 +127,10 @@ def _initialize_collectors():
             'total_errors': 0,
             'interfaces': set(),
             'error_codes': Counter(),
-            'avg_connect_time': [],
-            'avg_response_time': []
+            'connect_time_sum': 0.0,
+            'connect_time_count': 0,
+            'response_time_sum': 0.0,
+            'response_time_count': 0
         }),
         
         # 错误影响面统计
@@ -133,8 +143,8 @@ def _initialize_collectors():
             'total_services': set()
         },
         
-        # 错误时间集中度分析
-        'error_time_clusters': defaultdict(list),  # {interface: [error_times]}
+        # 错误爆发检测（按接口的滑动窗口，在线发出爆发开始/结束事件）
+        'burst_detector': ErrorBurstDetector(on_event=log_burst_event),
         
         # 关键错误类型统计
         'critical_errors': {
@@ -147,118 +157,186 @@ def _initialize_collectors():
     }
 
 
+def _string_column(chunk, field, default=''):
+    """取字符串列（category转为object），缺失值填充默认值"""
+    if field not in chunk.columns:
+        return pd.Series(default, index=chunk.index, dtype=object)
+    return chunk[field].astype(object).fillna(default)
+
+
+def _numeric_column(chunk, field):
+    """取数值列，缺失值填充0"""
+    if field not in chunk.columns:
+        return pd.Series(0.0, index=chunk.index)
+    return pd.to_numeric(chunk[field], errors='coerce').fillna(0.0)
+
+
 def _process_chunk(chunk, collectors, stats, slow_request_threshold, error_threshold):
-    """处理单个数据块"""
-    
-    # 字段映射
-    status_field = 'response_status_code'
-    path_field = 'request_path'
-    time_field = 'raw_time'
-    duration_field = 'total_request_duration'
-    client_ip_field = 'client_ip_address'
-    app_field = 'application_name'
-    service_field = 'service_name'
-    upstream_field = 'upstream_server_address'
-    upstream_connect_field = 'upstream_connect_time'
-    upstream_response_field = 'upstream_response_time'
-    
-    for _, row in chunk.iterrows():
-        interface = row.get(path_field, 'unknown')
-        status_code = str(row.get(status_field, ''))
-        request_time = float(row.get(duration_field, 0) or 0)
-        timestamp_str = row.get(time_field, '')
-        client_ip = row.get(client_ip_field, '')
-        application = row.get(app_field, '')
-        service = row.get(service_field, '')
-        upstream = row.get(upstream_field, '')
-        
-        # 更新接口统计
-        interface_stat = collectors['interface_stats'][interface]
-        interface_stat['total_requests'] += 1
-        interface_stat['status_codes'][status_code] += 1
-        interface_stat['response_times'].append(request_time)
-        interface_stat['clients'].add(client_ip)
-        interface_stat['applications'].add(application)
-        interface_stat['services'].add(service)
-        if upstream:
-            interface_stat['upstream_servers'].add(upstream)
-        
-        # 慢请求统计
-        if request_time > slow_request_threshold:
-            interface_stat['slow_requests'] += 1
-        
-        # 更新全局影响面统计
-        impact = collectors['impact_analysis']
-        impact['total_clients'].add(client_ip)
-        impact['total_applications'].add(application)  
-        impact['total_services'].add(service)
+    """处理单个数据块（按列向量化聚合）"""
+    
+    frame = pd.DataFrame({
+        'interface': _string_column(chunk, 'request_path', 'unknown'),
+        'status': _string_column(chunk, 'response_status_code'),
+        'duration': _numeric_column(chunk, 'total_request_duration'),
+        'time': _string_column(chunk, 'raw_time'),
+        'client': _string_column(chunk, 'client_ip_address'),
+        'application': _string_column(chunk, 'application_name'),
+        'service': _string_column(chunk, 'service_name'),
+        'upstream': _string_column(chunk, 'upstream_server_address'),
+    })
+    frame['is_slow'] = frame['duration'] > slow_request_threshold
+    
+    interface_stats = collectors['interface_stats']
+    impact = collectors['impact_analysis']
+    
+    # 更新接口统计
+    grouped = frame.groupby('interface', sort=False).agg(
+        total=('duration', 'size'), time_sum=('duration', 'sum'), slow=('is_slow', 'sum'))
+    for interface, total, time_sum, slow in grouped.itertuples():
+        interface_stat = interface_stats[interface]
+        interface_stat['total_requests'] += int(total)
+        interface_stat['response_time_sum'] += float(time_sum)
+        interface_stat['slow_requests'] += int(slow)
+    
+    for (interface, status_code), count in frame.groupby(['interface', 'status'], sort=False).size().items():
+        interface_stats[interface]['status_codes'][status_code] += int(count)
+    
+    for field, set_name in (('client', 'clients'), ('application', 'applications'), ('service', 'services')):
+        for interface, value in frame[['interface', field]].drop_duplicates().itertuples(index=False):
+            interface_stats[interface][set_name].add(value)
+    with_upstream = frame[frame['upstream'] != '']
+    for interface, upstream in with_upstream[['interface', 'upstream']].drop_duplicates().itertuples(index=False):
+        interface_stats[interface]['upstream_servers'].add(upstream)
+    
+    # 更新全局影响面统计
+    impact['total_clients'].update(frame['client'].unique())
+    impact['total_applications'].update(frame['application'].unique())
+    impact['total_services'].update(frame['service'].unique())
+    
+    # 错误请求处理
+    errors = frame[frame['status'].str.match(r'[45]')]
+    if errors.empty:
+        return
+    stats['total_error_requests'] += len(errors)
+    
+    error_grouped = errors.groupby('interface', sort=False)['duration'].agg(['size', 'sum'])
+    for interface, count, time_sum in error_grouped.itertuples():
+        interface_stat = interface_stats[interface]
+        interface_stat['error_requests'] += int(count)
+        interface_stat['error_response_time_sum'] += float(time_sum)
+    
+    for (interface, status_code), count in errors.groupby(['interface', 'status'], sort=False).size().items():
+        interface_stats[interface]['error_codes'][status_code] += int(count)
+    
+    _process_error_times(errors, collectors)
+    
+    # 更新影响面统计
+    impact['error_clients'].update(errors['client'].unique())
+    impact['error_applications'].update(errors['application'].unique())
+    impact['error_services'].update(errors['service'].unique())
+    
+    # 上游服务错误统计
+    _process_upstream_errors(errors, chunk, collectors['upstream_errors'])
+    
+    # 关键错误类型统计
+    critical_errors = collectors['critical_errors']
+    critical = errors[errors['status'].isin(list(critical_errors))]
+    for (status_code, interface), count in critical.groupby(['status', 'interface'], sort=False).size().items():
+        critical_errors[status_code][interface] += int(count)
+    
+    # 错误详情采样
+    _sample_error_details(errors, collectors['error_details'])
+
+
+def _process_error_times(errors, collectors):
+    """错误时间：首末时间、小时分布、时间维度统计与爆发检测"""
+    seconds, valid = to_epoch_seconds(errors['time'])
+    if not valid.any():
+        return
+    interfaces = errors['interface'].to_numpy()[valid]
+    seconds = seconds[valid]
+    
+    times = pd.DataFrame({'interface': interfaces, 'seconds': seconds})
+    interface_stats = collectors['interface_stats']
+    
+    # 首末错误时间
+    for interface, first, last in times.groupby('interface', sort=False)['seconds'].agg(['min', 'max']).itertuples():
+        interface_stat = interface_stats[interface]
+        first_time = pd.Timestamp(first, unit='s').to_pydatetime()
+        last_time = pd.Timestamp(last, unit='s').to_pydatetime()
+        if not interface_stat['first_error_time'] or first_time < interface_stat['first_error_time']:
+            interface_stat['first_error_time'] = first_time
+        if not interface_stat['last_error_time'] or last_time > interface_stat['last_error_time']:
+            interface_stat['last_error_time'] = last_time
+    
+    # 错误时间分布（按小时）
+    times['hour'] = seconds // 3600
+    for (interface, hour), count in times.groupby(['interface', 'hour'], sort=False).size().items():
+        hour_time = pd.Timestamp(hour * 3600, unit='s')
+        interface_stats[interface]['error_time_distribution'][hour_time.strftime('%H')] += int(count)
         
-        # 错误请求处理
-        is_error = status_code.startswith(('4', '5'))
-        if is_error:
-            stats['total_error_requests'] += 1
-            interface_stat['error_requests'] += 1
-            interface_stat['error_codes'][status_code] += 1
-            interface_stat['error_response_times'].append(request_time)
-            
-            # 记录错误时间
-            if timestamp_str:
-                try:
-                    error_time = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                    if not interface_stat['first_error_time']:
-                        interface_stat['first_error_time'] = error_time
-                    interface_stat['last_error_time'] = error_time
-                    
-                    # 错误时间分布（按小时）
-                    hour_key = error_time.strftime('%H')
-                    interface_stat['error_time_distribution'][hour_key] += 1
-                    
-                    # 错误时间集中度
-                    collectors['error_time_clusters'][interface].append(error_time)
-                    
-                    # 时间维度错误统计
-                    time_key = error_time.strftime('%Y-%m-%d %H')
-                    collectors['error_by_time'][time_key][interface] += 1
-                except:
-                    pass
-            
-            # 更新影响面统计
-            impact['error_clients'].add(client_ip)
-            impact['error_applications'].add(application)
-            impact['error_services'].add(service)
-            
-            # 上游服务错误统计
-            if upstream:
-                upstream_stat = collectors['upstream_errors'][upstream]
-                upstream_stat['total_errors'] += 1
-                upstream_stat['interfaces'].add(interface)
-                upstream_stat['error_codes'][status_code] += 1
-                
-                # 上游连接时间
-                upstream_connect = float(row.get(upstream_connect_field, 0) or 0)
-                upstream_response = float(row.get(upstream_response_field, 0) or 0)
-                if upstream_connect > 0:
-                    upstream_stat['avg_connect_time'].append(upstream_connect)
-                if upstream_response > 0:
-                    upstream_stat['avg_response_time'].append(upstream_response)
-            
-            # 关键错误类型统计
-            if status_code in collectors['critical_errors']:
-                collectors['critical_errors'][status_code][interface] += 1
-            
-            # 错误详情收集(限制数量避免内存问题)
-            if len(collectors['error_details'][interface]) < 100:
-                error_detail = {
-                    'time': timestamp_str,
-                    'status_code': status_code,
-                    'response_time': request_time,
-                    'client_ip': client_ip,
-                    'application': application,
-                    'service': service,
-                    'upstream': upstream,
-                    'request_path': interface
-                }
-                collectors['error_details'][interface].append(error_detail)
+        # 时间维度错误统计
+        collectors['error_by_time'][hour_time.strftime('%Y-%m-%d %H')][interface] += int(count)
+    
+    # 错误爆发检测
+    collectors['burst_detector'].update(interfaces, seconds)
+
+
+def _process_upstream_errors(errors, chunk, upstream_errors):
+    """上游服务错误统计：连接/响应时间只累计总和与次数"""
+    mask = (errors['upstream'] != '').to_numpy()
+    if not mask.any():
+        return
+    
+    upstream = pd.DataFrame({
+        'upstream': errors['upstream'].to_numpy()[mask],
+        'interface': errors['interface'].to_numpy()[mask],
+        'status': errors['status'].to_numpy()[mask],
+        'connect': _numeric_column(chunk, 'upstream_connect_time').loc[errors.index].to_numpy()[mask],
+        'response': _numeric_column(chunk, 'upstream_response_time').loc[errors.index].to_numpy()[mask],
+    })
+    upstream['connect_valid'] = upstream['connect'] > 0
+    upstream['response_valid'] = upstream['response'] > 0
+    upstream['connect'] = upstream['connect'].where(upstream['connect_valid'], 0.0)
+    upstream['response'] = upstream['response'].where(upstream['response_valid'], 0.0)
+    
+    grouped = upstream.groupby('upstream', sort=False).agg(
+        total=('status', 'size'),
+        connect_sum=('connect', 'sum'), connect_count=('connect_valid', 'sum'),
+        response_sum=('response', 'sum'), response_count=('response_valid', 'sum'))
+    for name, total, connect_sum, connect_count, response_sum, response_count in grouped.itertuples():
+        upstream_stat = upstream_errors[name]
+        upstream_stat['total_errors'] += int(total)
+        upstream_stat['connect_time_sum'] += float(connect_sum)
+        upstream_stat['connect_time_count'] += int(connect_count)
+        upstream_stat['response_time_sum'] += float(response_sum)
+        upstream_stat['response_time_count'] += int(response_count)
+    
+    for name, interface in upstream[['upstream', 'interface']].drop_duplicates().itertuples(index=False):
+        upstream_errors[name]['interfaces'].add(interface)
+    for (name, status_code), count in upstream.groupby(['upstream', 'status'], sort=False).size().items():
+        upstream_errors[name]['error_codes'][status_code] += int(count)
+
+
+def _sample_error_details(errors, error_details):
+    """按接口蓄水池采样错误详情，只为被采中的行构造记录"""
+    columns = {field: errors[field].to_numpy() for field in
+               ('time', 'status', 'duration', 'client', 'application', 'service', 'upstream', 'interface')}
+    
+    for interface, positions in errors.groupby('interface', sort=False).indices.items():
+        def make_detail(i, positions=positions):
+            row = positions[i]
+            return {
+                'time': columns['time'][row],
+                'status_code': columns['status'][row],
+                'response_time': float(columns['duration'][row]),
+                'client_ip': columns['client'][row],
+                'application': columns['application'][row],
+                'service': columns['service'][row],
+                'upstream': columns['upstream'][row],
+                'request_path': columns['interface'][row]
+            }
+        error_details[interface].add_lazy_batch(len(positions), make_detail)
 
 
 def _post_process_data(collectors, stats, min_requests, error_threshold):
@@ -310,7 +388,10 @@ def _generate_analysis_dataframes(collectors, stats, slow_request_threshold):
     dataframes['error_details_df'] = _create_error_details_dataframe(collectors['error_details'])
     
     # 9. 错误时间集中度分析
-    dataframes['error_clusters_df'] = _create_error_clusters_dataframe(collectors['error_time_clusters'])
+    dataframes['error_clusters_df'] = _create_error_clusters_dataframe(collectors['burst_detector'])
+    
+    # 10. 错误爆发事件
+    dataframes['error_bursts_df'] = _create_error_bursts_dataframe(collectors['burst_detector'])
     
     return dataframes
 
@@ -349,8 +430,8 @@ def _create_interface_errors_dataframe(interface_stats):
         error_rate = (error_requests / total_requests * 100) if total_requests > 0 else 0
         
         # 响应时间统计
-        avg_response_time = np.mean(stat['response_times']) if stat['response_times'] else 0
-        avg_error_response_time = np.mean(stat['error_response_times']) if stat['error_response_times'] else 0
+        avg_response_time = stat['response_time_sum'] / total_requests if total_requests > 0 else 0
+        avg_error_response_time = stat['error_response_time_sum'] / error_requests if error_requests > 0 else 0
         
         # 主要错误类型
         top_error_code = stat['error_codes'].most_common(1)
@@ -477,8 +558,8 @@ def _create_upstream_errors_dataframe(upstream_errors):
         if stat['total_errors'] == 0:
             continue
             
-        avg_connect_time = np.mean(stat['avg_connect_time']) if stat['avg_connect_time'] else 0
-        avg_response_time = np.mean(stat['avg_response_time']) if stat['avg_response_time'] else 0
+        avg_connect_time = stat['connect_time_sum'] / stat['connect_time_count'] if stat['connect_time_count'] else 0
+        avg_response_time = stat['response_time_sum'] / stat['response_time_count'] if stat['response_time_count'] else 0
         
         # 主要错误类型
         top_error = stat['error_codes'].most_common(1)
@@ -553,8 +634,8 @@ def _create_error_details_dataframe(error_details):
     """创建错误详情表"""
     details_data = []
     
-    for interface, details in error_details.items():
-        for detail in details[:50]:  # 限制每个接口最多显示50条
+    for interface, sampler in error_details.items():
+        for detail in sampler.samples[:50]:  # 限制每个接口最多显示50条
             details_data.append({
                 '接口路径': interface,
                 '错误时间': detail['time'],
@@ -570,44 +651,45 @@ def _create_error_details_dataframe(error_details):
     return details_df.sort_values(by=['接口路径', '错误时间'], ascending=[True, False]) if not details_df.empty else details_df
 
 
-def _create_error_clusters_dataframe(error_time_clusters):
-    """创建错误时间集中度分析表"""
-    cluster_data = []
-    
-    for interface, error_times in error_time_clusters.items():
-        if len(error_times) < 2:
-            continue
-            
-        error_times.sort()
-        
-        # 计算错误时间间隔
-        intervals = []
-        for i in range(1, len(error_times)):
-            interval = (error_times[i] - error_times[i-1]).total_seconds()
-            intervals.append(interval)
-        
-        # 错误集中度分析
-        avg_interval = np.mean(intervals) if intervals else 0
-        min_interval = min(intervals) if intervals else 0
-        max_interval = max(intervals) if intervals else 0
-        
-        # 错误爆发识别(间隔小于5分钟认为是爆发)
-        burst_count = sum(1 for interval in intervals if interval < 300)
-        
-        cluster_data.append({
-            '接口路径': interface,
-            '总错误次数': len(error_times),
-            '错误时间跨度(小时)': round((error_times[-1] - error_times[0]).total_seconds() / 3600, 2),
-            '平均间隔(秒)': round(avg_interval, 1),
-            '最短间隔(秒)': round(min_interval, 1),
-            '最长间隔(秒)': round(max_interval, 1),
-            '错误爆发次数': burst_count,
-            '首次错误': error_times[0].strftime('%Y-%m-%d %H:%M:%S'),
-            '最后错误': error_times[-1].strftime('%Y-%m-%d %H:%M:%S')
+def _create_error_clusters_dataframe(burst_detector):
+    """创建错误时间集中度分析表（在线统计的间隔与爆发检测结果）"""
+    summary = burst_detector.key_summary()
+    if summary.empty:
+        return summary
+    summary = summary[summary['errors'] >= 2]
+    
+    cluster_df = pd.DataFrame({
+        '接口路径': summary['key'],
+        '总错误次数': summary['errors'],
+        '错误时间跨度(小时)': (summary['span_seconds'] / 3600).round(2),
+        '平均间隔(秒)': summary['avg_gap'].round(1),
+        '最短间隔(秒)': summary['min_gap'].round(1),
+        '最长间隔(秒)': summary['max_gap'].round(1),
+        '错误爆发次数': summary['burst_count'],
+        f'最大{burst_detector.window_seconds}秒错误数': summary['max_window'],
+        '首次错误': summary['first_time'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        '最后错误': summary['last_time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    })
+    return cluster_df.sort_values(by=['错误爆发次数', '总错误次数'], ascending=False) if not cluster_df.empty else cluster_df
+
+
+def _create_error_bursts_dataframe(burst_detector):
+    """创建错误爆发事件表"""
+    burst_data = []
+    
+    for burst in burst_detector.bursts:
+        burst_data.append({
+            '接口路径': burst['key'],
+            '爆发开始': burst['start_time'].strftime('%Y-%m-%d %H:%M:%S'),
+            '爆发结束': burst['end_time'].strftime('%Y-%m-%d %H:%M:%S'),
+            '持续时间(秒)': burst['duration_seconds'],
+            '峰值时间': burst['peak_time'].strftime('%Y-%m-%d %H:%M:%S'),
+            f'峰值{burst_detector.window_seconds}秒错误数': burst['peak_count'],
+            '爆发期间错误数': burst['errors']
         })
     
-    cluster_df = pd.DataFrame(cluster_data)
-    return cluster_df.sort_values(by='错误爆发次数', ascending=False) if not cluster_df.empty else cluster_df
+    burst_df = pd.DataFrame(burst_data)
+    return burst_df.sort_values(by='爆发期间错误数', ascending=False) if not burst_df.empty else burst_df
 
 
 def _create_excel_report(output_path, dataframes):
@@ -642,6 +724,7 @@ def _create_excel_report(output_path, dataframes):
         ('错误时间分析', dataframes['error_time_analysis_df'], None),
         ('错误影响面', dataframes['impact_analysis_df'], None),
         ('错误时间集中度', dataframes['error_clusters_df'], None),
+        ('错误爆发事件', dataframes['error_bursts_df'], None),
         ('错误详情', dataframes['error_details_df'], None)
     ]
     
@@ -654,6 +737,12 @@ def _create_excel_report(output_path, dataframes):
     wb.save(output_path)
 
 
+def _write_excel_with_charts(output_path, dataframes):
+    """创建Excel报告并添加图表"""
+    _create_excel_report(output_path, dataframes)
+    _create_charts(output_path, dataframes)
+
+
 def _create_charts(output_path, dataframes):
     """创建图表(简化版)"""
     # 为了保持代码简洁，这里省略了详细的图表创建代码
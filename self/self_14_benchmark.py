@@ -0,0 +1,581 @@
+"""
+性能基准测试模块 - 合成日志生成 + 解析/各分析器独立计时 + 基线对比
+
+1. 合成日志：按固定随机种子生成自研(JSON)/底座两种格式的日志，可配置行数、应用数、API/IP基数
+   （按Zipf分布取热点）、错误率与耗时分布（lognormal / pareto / bimodal / uniform），
+   同一配置每次生成的文件内容完全一致
+2. 阶段计时：日志解析(self_00_03)与十个分析器各自在独立子进程中运行，子进程内采样RSS峰值，
+   输出每个阶段的耗时、行数、行/秒、RSS峰值，结果为JSON
+3. 基线对比：与保存的基线结果逐阶段比较，吞吐下降或内存上升超过容忍比例即判定为性能回退
+
+用法：
+    python self_14_benchmark.py --rows 200000 --log-format mixed --output result.json
+    python self_14_benchmark.py --rows 200000 --save-baseline baseline.json
+    python self_14_benchmark.py --rows 200000 --baseline baseline.json   # 有回退时退出码为1
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import psutil
+
+from self_00_01_constants import DEFAULT_SLOW_THRESHOLD, DEFAULT_SUCCESS_CODES, LOG_TYPE_SELF_DEVELOPED, \
+    LOG_TYPE_BASE, BENCHMARK_DEFAULT_ROWS, BENCHMARK_SEED, BENCHMARK_REGRESSION_TOLERANCE, \
+    BENCHMARK_RSS_SAMPLE_INTERVAL
+from self_00_02_utils import log_info
+
+LOG_FORMAT_MIXED = 'mixed'
+LATENCY_DISTRIBUTIONS = ('lognormal', 'pareto', 'bimodal', 'uniform')
+
+PARSE_STAGE = 'parse'
+
+# 分析器阶段：(阶段名, 模块, 入口函数, 额外参数, 输出文件)，子进程中按需导入，互不影响内存统计
+ANALYZER_STAGES = [
+    ('api', 'self_01_api_analyzer_optimized', 'analyze_api_performance',
+     {'success_codes': DEFAULT_SUCCESS_CODES, 'slow_threshold': DEFAULT_SLOW_THRESHOLD}, '01.接口性能分析.xlsx'),
+    ('service', 'self_02_service_analyzer_advanced', 'analyze_service_performance_advanced',
+     {'success_codes': DEFAULT_SUCCESS_CODES}, '02.服务层级分析.xlsx'),
+    ('slow_requests', 'self_03_slow_requests_analyzer_advanced', 'analyze_slow_requests_advanced',
+     {'slow_threshold': DEFAULT_SLOW_THRESHOLD}, '03_慢请求分析.xlsx'),
+    ('status', 'self_04_status_analyzer_advanced', 'analyze_status_codes',
+     {'slow_request_threshold': DEFAULT_SLOW_THRESHOLD}, '04.状态码统计.xlsx'),
+    ('time_dimension', 'self_05_time_dimension_analyzer_advanced', 'analyze_time_dimension',
+     {}, '05.时间维度分析-全部接口.xlsx'),
+    ('stability', 'self_06_performance_stability_analyzer_advanced', 'analyze_service_stability',
+     {}, '06_服务稳定性.xlsx'),
+    ('ip', 'self_08_ip_analyzer_advanced', 'analyze_ip_sources',
+     {}, '08_IP来源分析.xlsx'),
+    ('header', 'self_10_request_header_analyzer', 'analyze_request_headers',
+     {}, '10_请求头分析.xlsx'),
+    ('header_performance', 'self_11_header_performance_analyzer', 'analyze_header_performance_correlation',
+     {'slow_threshold': DEFAULT_SLOW_THRESHOLD}, '11_请求头性能关联分析.xlsx'),
+    ('interface_error', 'self_13_interface_error_analyzer', 'analyze_interface_errors',
+     {'slow_request_threshold': DEFAULT_SLOW_THRESHOLD}, '13_接口错误分析.xlsx'),
+]
+ANALYZER_STAGE_NAMES = [stage[0] for stage in ANALYZER_STAGES]
+
+HTTP_METHODS = np.array(['GET', 'POST', 'PUT', 'DELETE'])
+HTTP_METHOD_WEIGHTS = [0.7, 0.22, 0.05, 0.03]
+CLIENT_ERROR_CODES = np.array(['400', '401', '403', '404'])
+SERVER_ERROR_CODES = np.array(['500', '502', '503', '504'])
+USER_AGENTS = np.array([
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Mobile Safari/537.36',
+    'okhttp/4.12.0',
+    'python-requests/2.31.0',
+])
+REFERERS = np.array(['-', 'https://www.example.com/', 'https://m.example.com/index', 'https://www.example.com/search'])
+
+
+class SyntheticLogSpec:
+    """
+    合成日志配置
+
+    Args:
+        rows: 总行数
+        log_format: LOG_TYPE_SELF_DEVELOPED / LOG_TYPE_BASE / 'mixed'（各应用交替使用两种格式）
+        app_count: 应用数（每个应用一个日志文件）
+        api_count: 不同API路径数
+        ip_count: 不同客户端IP数
+        zipf_exponent: API与IP热度的Zipf指数，越大越集中
+        latency: 耗时分布，见 LATENCY_DISTRIBUTIONS
+        latency_median: 耗时中位数（秒）
+        error_rate: 错误请求比例，其中约30%为5xx
+        duration_hours: 日志覆盖的时间跨度（小时）
+        seed: 随机种子
+    """
+
+    FIELDS = ('rows', 'log_format', 'app_count', 'api_count', 'ip_count', 'zipf_exponent',
+              'latency', 'latency_median', 'error_rate', 'duration_hours', 'seed')
+
+    def __init__(self, rows=BENCHMARK_DEFAULT_ROWS, log_format=LOG_FORMAT_MIXED, app_count=4, api_count=500,
+                 ip_count=5000, zipf_exponent=1.1, latency='lognormal', latency_median=0.12, error_rate=0.05,
+                 duration_hours=24, seed=BENCHMARK_SEED):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"不支持的耗时分布: {latency}，可选 {', '.join(LATENCY_DISTRIBUTIONS)}")
+        if log_format not in (LOG_TYPE_SELF_DEVELOPED, LOG_TYPE_BASE, LOG_FORMAT_MIXED):
+            raise ValueError(f"不支持的日志格式: {log_format}")
+        self.rows = int(rows)
+        self.log_format = log_format
+        self.app_count = max(1, int(app_count))
+        self.api_count = max(1, int(api_count))
+        self.ip_count = max(1, int(ip_count))
+        self.zipf_exponent = float(zipf_exponent)
+        self.latency = latency
+        self.latency_median = float(latency_median)
+        self.error_rate = float(error_rate)
+        self.duration_hours = float(duration_hours)
+        self.seed = int(seed)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def signature(self):
+        """配置签名，基线对比时用于确认数据集一致"""
+        payload = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def _zipf_choice(rng, size, population, exponent):
+    """按Zipf热度从 0..population-1 中抽取"""
+    weights = 1.0 / np.arange(1, population + 1) ** exponent
+    return rng.choice(population, size=size, p=weights / weights.sum())
+
+
+def _sample_latency(rng, spec, size):
+    """按配置的分布生成请求耗时（秒）"""
+    median = spec.latency_median
+    if spec.latency == 'lognormal':
+        values = rng.lognormal(np.log(median), 1.0, size)
+    elif spec.latency == 'pareto':
+        # Pareto(α=1.5) 的中位数为 2^(1/α)×x_m
+        values = (rng.pareto(1.5, size) + 1) * median / 2 ** (1 / 1.5)
+    elif spec.latency == 'bimodal':
+        slow = rng.random(size) < 0.1
+        values = np.where(slow, rng.lognormal(np.log(median * 25), 0.5, size),
+                          rng.lognormal(np.log(median), 0.4, size))
+    else:
+        values = rng.uniform(0, median * 2, size)
+    return np.round(np.clip(values, 0.001, 600), 3)
+
+
+def _build_api_paths(api_count):
+    """API路径池：/api/<服务>/<资源>/<动作>，约1/5的路径带ID片段"""
+    services = [f'svc{i:02d}' for i in range(max(1, min(50, api_count // 10)))]
+    paths = []
+    for i in range(api_count):
+        service = services[i % len(services)]
+        path = f'/api/{service}/res{i // len(services)}/action{i % 7}'
+        if i % 5 == 0:
+            path += f'/{100000 + i}'
+        paths.append(path)
+    return np.array(paths)
+
+
+def _generate_app_rows(rng, spec, rows, api_paths, client_ips, start_epoch):
+    """生成一个应用的各列取值（全部向量化）"""
+    api_idx = _zipf_choice(rng, rows, len(api_paths), spec.zipf_exponent)
+    ip_idx = _zipf_choice(rng, rows, len(client_ips), spec.zipf_exponent)
+
+    status = np.full(rows, '200', dtype=object)
+    error = rng.random(rows) < spec.error_rate
+    server_error = error & (rng.random(rows) < 0.3)
+    status[error] = rng.choice(CLIENT_ERROR_CODES, error.sum())
+    status[server_error] = rng.choice(SERVER_ERROR_CODES, server_error.sum())
+
+    request_time = _sample_latency(rng, spec, rows)
+    connect = np.round(request_time * rng.uniform(0, 0.05, rows), 3)
+    header = np.round(np.maximum(connect, request_time * rng.uniform(0.3, 0.9, rows)), 3)
+    response = np.round(np.maximum(header, request_time * rng.uniform(0.9, 1.0, rows)), 3)
+    body = rng.lognormal(np.log(4096), 1.2, rows).astype(np.int64)
+
+    offsets = np.sort(rng.uniform(0, spec.duration_hours * 3600, rows))
+    end_epochs = start_epoch + offsets
+
+    return {
+        'api': api_paths[api_idx],
+        'ip': client_ips[ip_idx],
+        'port': rng.integers(1024, 65535, rows),
+        'method': rng.choice(HTTP_METHODS, rows, p=HTTP_METHOD_WEIGHTS),
+        'status': status,
+        'request_time': request_time,
+        'connect': connect,
+        'header': header,
+        'response': response,
+        'body': body,
+        'epoch': np.round(end_epochs, 3),
+        'time': pd.to_datetime(np.floor(end_epochs), unit='s', utc=True)
+                  .tz_convert('Asia/Shanghai').strftime('%Y-%m-%dT%H:%M:%S+08:00').to_numpy(),
+        'agent': rng.choice(USER_AGENTS, rows),
+        'referer': rng.choice(REFERERS, rows),
+    }
+
+
+def _format_self_developed_line(cols, i, host):
+    api = cols['api'][i]
+    return (
+        f'{{"time":"{cols["time"][i]}","timestamp":"{cols["epoch"][i]:.3f}","server_name":"{host}",'
+        f'"host":"{host}","client_ip":"{cols["ip"][i]}","client_port":"{cols["port"][i]}",'
+        f'"request_method":"{cols["method"][i]}","request_uri":"{api}","request_path":"{api}",'
+        f'"query_string":"","request_protocol":"HTTP/1.1","status":"{cols["status"][i]}",'
+        f'"request_time":"{cols["request_time"][i]:.3f}","body_bytes_sent":"{cols["body"][i]}",'
+        f'"bytes_sent":"{cols["body"][i] + 400}","content_type":"application/json",'
+        f'"upstream_connect_time":"{cols["connect"][i]:.3f}","upstream_header_time":"{cols["header"][i]:.3f}",'
+        f'"upstream_response_time":"{cols["response"][i]:.3f}","upstream_addr":"10.1.0.1:8080",'
+        f'"upstream_status":"{cols["status"][i]}","user_agent":"{cols["agent"][i]}","referer":"{cols["referer"][i]}"}}'
+    )
+
+
+def _format_base_line(cols, i, host):
+    return (
+        f'http_host:"{host}" remote_addr:"{cols["ip"][i]}" remote_port:"{cols["port"][i]}" '
+        f'time:"{cols["time"][i]}" request:"{cols["method"][i]} {cols["api"][i]} HTTP/1.1" '
+        f'code:"{cols["status"][i]}" body:"{cols["body"][i]}" http_referer:"{cols["referer"][i]}" '
+        f'ar_time:"{cols["request_time"][i]:.3f}" RealIp:"{cols["ip"][i]}" agent:"{cols["agent"][i]}"'
+    )
+
+
+def generate_synthetic_logs(output_dir, spec):
+    """
+    生成合成日志文件
+
+    Args:
+        output_dir: 输出目录
+        spec: SyntheticLogSpec
+
+    Returns:
+        [(文件路径, 日志类型, 行数)]
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(spec.seed)
+
+    api_paths = _build_api_paths(spec.api_count)
+    ip_numbers = rng.choice(2 ** 24, size=spec.ip_count, replace=False)
+    client_ips = np.array([f'10.{n >> 16}.{(n >> 8) & 255}.{n & 255}' for n in ip_numbers])
+    start_epoch = datetime(2025, 5, 9, tzinfo=timezone(timedelta(hours=8))).timestamp()
+
+    app_rows = np.full(spec.app_count, spec.rows // spec.app_count)
+    app_rows[:spec.rows % spec.app_count] += 1
+
+    files = []
+    for app_id, rows in enumerate(app_rows):
+        if spec.log_format == LOG_FORMAT_MIXED:
+            log_type = LOG_TYPE_SELF_DEVELOPED if app_id % 2 == 0 else LOG_TYPE_BASE
+        else:
+            log_type = spec.log_format
+        formatter = _format_self_developed_line if log_type == LOG_TYPE_SELF_DEVELOPED else _format_base_line
+
+        app_name = f'benchapp{app_id:02d}'
+        host = f'{app_name}.example.com'
+        path = os.path.join(output_dir, f'{app_name}_access.log')
+        cols = _generate_app_rows(rng, spec, int(rows), api_paths, client_ips, start_epoch)
+        with open(path, 'w', encoding='utf-8', newline='\n') as file:
+            for start in range(0, int(rows), 10000):
+                end = min(start + 10000, int(rows))
+                file.write('\n'.join(formatter(cols, i, host) for i in range(start, end)))
+                file.write('\n')
+        files.append((path, log_type, int(rows)))
+
+    log_info(f"合成日志生成完成: {len(files)} 个文件, {spec.rows:,} 行, 目录: {output_dir}")
+    return files
+
+
+class PeakRssSampler:
+    """后台线程定期采样当前进程RSS，记录峰值"""
+
+    def __init__(self, interval=BENCHMARK_RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._process = psutil.Process(os.getpid())
+        self._stop = threading.Event()
+        self._thread = None
+        self.start_rss = 0
+        self.peak_rss = 0
+
+    def _sample(self):
+        rss = self._process.memory_info().rss
+        if rss > self.peak_rss:
+            self.peak_rss = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_rss = self._process.memory_info().rss
+        self.peak_rss = self.start_rss
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+def _run_stage(stage, work_dir, excel_mode):
+    """执行单个阶段并计量（在子进程或当前进程中调用）"""
+    from self_00_06_report_sinks import configure_report_sinks, close_report_sinks
+
+    configure_report_sinks(excel_mode=excel_mode)
+    csv_path = os.path.join(work_dir, 'processed_logs.csv')
+    output_dir = os.path.join(work_dir, 'reports')
+    os.makedirs(output_dir, exist_ok=True)
+
+    if stage == PARSE_STAGE:
+        from self_00_03_log_parser import collect_log_files, process_log_files
+        log_files = sorted(collect_log_files(os.path.join(work_dir, 'logs')))
+        run = lambda: process_log_files(log_files, csv_path)
+    else:
+        _, module_name, func_name, extra_args, output_file = next(s for s in ANALYZER_STAGES if s[0] == stage)
+        func = getattr(importlib.import_module(module_name), func_name)
+        run = lambda: func(csv_path=csv_path, output_path=os.path.join(output_dir, output_file), **extra_args)
+
+    result = {'stage': stage, 'status': 'ok', 'error': None}
+    with PeakRssSampler() as sampler:
+        start = time.perf_counter()
+        try:
+            output = run()
+            close_report_sinks()
+            if stage == PARSE_STAGE:
+                result['rows'] = int(output)
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['seconds'] = round(time.perf_counter() - start, 4)
+
+    result['start_rss_mb'] = round(sampler.start_rss / 1024 / 1024, 1)
+    result['peak_rss_mb'] = round(sampler.peak_rss / 1024 / 1024, 1)
+    return result
+
+
+def _stage_process_entry(stage, work_dir, excel_mode, queue):
+    """子进程入口：结果通过队列返回"""
+    try:
+        queue.put(_run_stage(stage, work_dir, excel_mode))
+    except Exception as e:
+        queue.put({'stage': stage, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+
+
+def run_stage_isolated(stage, work_dir, excel_mode):
+    """在新的spawn子进程中执行阶段，避免模块导入与前序阶段的内存影响计量"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_stage_process_entry, args=(stage, work_dir, excel_mode, queue))
+    process.start()
+    try:
+        result = queue.get()
+    finally:
+        process.join()
+    if process.exitcode not in (0, None) and result.get('status') == 'ok':
+        result.update(status='failed', error=f"子进程退出码 {process.exitcode}")
+    return result
+
+
+def run_benchmark(spec, stages=None, work_dir=None, excel_mode='sync', isolate=True, keep_files=False):
+    """
+    生成合成日志并依次执行各阶段
+
+    Args:
+        spec: SyntheticLogSpec
+        stages: 要执行的阶段名列表，默认 解析 + 全部分析器；分析器阶段依赖解析生成的CSV，
+                因此只要包含分析器阶段就会先执行解析
+        work_dir: 工作目录，默认创建临时目录
+        excel_mode: 报告写出模式（'sync' 计入Excel写出耗时；'process' 在渲染进程中写出，计入等待耗时，
+                    RSS峰值不含渲染进程；'off' 只计分析耗时）
+        isolate: 每个阶段在独立子进程中执行
+        keep_files: 保留合成日志、CSV与报告
+
+    Returns:
+        结果字典（可直接序列化为JSON）
+    """
+    stages = list(stages or [PARSE_STAGE] + ANALYZER_STAGE_NAMES)
+    unknown = [stage for stage in stages if stage != PARSE_STAGE and stage not in ANALYZER_STAGE_NAMES]
+    if unknown:
+        raise ValueError(f"未知阶段: {', '.join(unknown)}")
+    if stages[0] != PARSE_STAGE:
+        stages = [PARSE_STAGE] + [stage for stage in stages if stage != PARSE_STAGE]
+
+    own_work_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='nginx_benchmark_')
+    result = {
+        'meta': {
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'excel_mode': excel_mode,
+            'isolated': isolate,
+            'spec': spec.to_dict(),
+            'spec_signature': spec.signature(),
+        },
+        'stages': {},
+    }
+
+    try:
+        start = time.perf_counter()
+        files = generate_synthetic_logs(os.path.join(work_dir, 'logs'), spec)
+        result['meta']['generate_seconds'] = round(time.perf_counter() - start, 3)
+        result['meta']['log_bytes'] = sum(os.path.getsize(path) for path, _, _ in files)
+
+        parsed_rows = 0
+        for stage in stages:
+            log_info(f"⏱️ 基准阶段: {stage}")
+            stage_result = run_stage_isolated(stage, work_dir, excel_mode) if isolate \
+                else _run_stage(stage, work_dir, excel_mode)
+            stage_result.pop('stage', None)
+
+            if stage == PARSE_STAGE:
+                parsed_rows = stage_result.get('rows', 0)
+                if stage_result['status'] != 'ok' or parsed_rows == 0:
+                    result['stages'][stage] = stage_result
+                    log_info(f"解析阶段失败，跳过分析器阶段: {stage_result.get('error')}", level="ERROR")
+                    break
+            else:
+                stage_result['rows'] = parsed_rows
+
+            seconds = stage_result.get('seconds') or 0
+            stage_result['rows_per_sec'] = round(stage_result['rows'] / seconds, 1) if seconds > 0 else None
+            result['stages'][stage] = stage_result
+            log_info(f"    {stage}: {seconds:.2f}s, {stage_result['rows_per_sec']} 行/秒, "
+                     f"RSS峰值 {stage_result.get('peak_rss_mb')} MB ({stage_result['status']})")
+
+        result['meta']['total_seconds'] = round(sum(s.get('seconds') or 0 for s in result['stages'].values()), 3)
+    finally:
+        if keep_files:
+            result['meta']['work_dir'] = work_dir
+        elif own_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return result
+
+
+def compare_to_baseline(result, baseline, tolerance=BENCHMARK_REGRESSION_TOLERANCE):
+    """
+    与基线结果逐阶段比较
+
+    Args:
+        result: run_benchmark 的结果
+        baseline: 基线结果（同样结构）
+        tolerance: 容忍比例，吞吐低于基线×(1-tolerance) 或 RSS峰值高于基线×(1+tolerance) 判定为回退
+
+    Returns:
+        {'comparable': bool, 'regressions': [...], 'stages': {阶段: 对比明细}}
+    """
+    comparison = {
+        'comparable': all(result['meta'].get(key) == baseline['meta'].get(key)
+                          for key in ('spec_signature', 'excel_mode', 'isolated')),
+        'tolerance': tolerance,
+        'regressions': [],
+        'stages': {},
+    }
+
+    for stage, current in result['stages'].items():
+        base = baseline['stages'].get(stage)
+        if not base or base.get('status') != 'ok':
+            continue
+        if current.get('status') != 'ok':
+            comparison['regressions'].append({'stage': stage, 'metric': 'status', 'detail': current.get('error')})
+            continue
+
+        detail = {}
+        for metric, higher_is_better in (('rows_per_sec', True), ('peak_rss_mb', False), ('seconds', False)):
+            current_value, base_value = current.get(metric), base.get(metric)
+            if not current_value or not base_value:
+                continue
+            change = (current_value - base_value) / base_value
+            detail[metric] = {'baseline': base_value, 'current': current_value, 'change_pct': round(change * 100, 1)}
+
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            if regressed and metric != 'seconds':  # 耗时与吞吐同源，只按吞吐判定
+                comparison['regressions'].append({'stage': stage, 'metric': metric, **detail[metric]})
+        comparison['stages'][stage] = detail
+
+    return comparison
+
+
+def _print_summary(result, comparison=None):
+    """控制台输出阶段汇总表"""
+    rows = []
+    for stage, stage_result in result['stages'].items():
+        row = {
+            '阶段': stage,
+            '状态': stage_result.get('status'),
+            '耗时(秒)': stage_result.get('seconds'),
+            '行/秒': stage_result.get('rows_per_sec'),
+            'RSS峰值(MB)': stage_result.get('peak_rss_mb'),
+        }
+        if comparison and stage in comparison['stages']:
+            for metric, label in (('rows_per_sec', '吞吐变化(%)'), ('peak_rss_mb', 'RSS变化(%)')):
+                row[label] = comparison['stages'][stage].get(metric, {}).get('change_pct')
+        rows.append(row)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+    if comparison:
+        if not comparison['comparable']:
+            print("⚠️ 当前数据集配置或运行方式与基线不同，对比结果仅供参考")
+        if comparison['regressions']:
+            print(f"❌ 检测到 {len(comparison['regressions'])} 项性能回退 (容忍 {comparison['tolerance']:.0%}):")
+            for item in comparison['regressions']:
+                print(f"   - {item['stage']} {item['metric']}: {item.get('baseline')} -> "
+                      f"{item.get('current', item.get('detail'))}")
+        else:
+            print("✅ 未检测到性能回退")
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='nginx日志分析管线性能基准测试')
+    parser.add_argument('--rows', type=int, default=BENCHMARK_DEFAULT_ROWS, help='合成日志总行数')
+    parser.add_argument('--log-format', default=LOG_FORMAT_MIXED,
+                        choices=[LOG_TYPE_SELF_DEVELOPED, LOG_TYPE_BASE, LOG_FORMAT_MIXED], help='合成日志格式')
+    parser.add_argument('--apps', type=int, default=4, help='应用数（日志文件数）')
+    parser.add_argument('--apis', type=int, default=500, help='不同API路径数')
+    parser.add_argument('--ips', type=int, default=5000, help='不同客户端IP数')
+    parser.add_argument('--zipf', type=float, default=1.1, help='API/IP热度的Zipf指数')
+    parser.add_argument('--latency', default='lognormal', choices=LATENCY_DISTRIBUTIONS, help='耗时分布')
+    parser.add_argument('--latency-median', type=float, default=0.12, help='耗时中位数(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='错误请求比例')
+    parser.add_argument('--seed', type=int, default=BENCHMARK_SEED, help='随机种子')
+    parser.add_argument('--stages', help=f"逗号分隔的阶段，可选 {PARSE_STAGE},{','.join(ANALYZER_STAGE_NAMES)}")
+    parser.add_argument('--excel-mode', default='sync', choices=['sync', 'process', 'off'], help='报告写出模式')
+    parser.add_argument('--in-process', action='store_true', help='在当前进程中执行各阶段（不隔离）')
+    parser.add_argument('--work-dir', help='工作目录（指定时保留生成的文件）')
+    parser.add_argument('--output', '-o', help='结果JSON输出路径')
+    parser.add_argument('--baseline', help='与该基线JSON对比，有回退时退出码为1')
+    parser.add_argument('--save-baseline', help='将本次结果保存为基线JSON')
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_REGRESSION_TOLERANCE, help='回退判定容忍比例')
+    args = parser.parse_args(argv)
+
+    spec = SyntheticLogSpec(rows=args.rows, log_format=args.log_format, app_count=args.apps,
+                            api_count=args.apis, ip_count=args.ips, zipf_exponent=args.zipf,
+                            latency=args.latency, latency_median=args.latency_median,
+                            error_rate=args.error_rate, seed=args.seed)
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()] if args.stages else None
+
+    result = run_benchmark(spec, stages=stages, work_dir=args.work_dir, excel_mode=args.excel_mode,
+                           isolate=not args.in_process, keep_files=bool(args.work_dir))
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            comparison = compare_to_baseline(result, json.load(file), args.tolerance)
+        result['comparison'] = comparison
+
+    if args.output:
+        _write_json(args.output, result)
+        log_info(f"基准结果已保存: {args.output}")
+    if args.save_baseline:
+        _write_json(args.save_baseline, result)
+        log_info(f"基线已保存: {args.save_baseline}")
+    if not args.output and not args.save_baseline:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    _print_summary(result, comparison)
+    failed = any(stage.get('status') != 'ok' for stage in result['stages'].values())
+    return 1 if failed or (comparison and comparison['regressions']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())